@@ -14,7 +14,7 @@ from pathlib import Path
 # Добавляем корневую директорию в путь
 sys.path.append(str(Path(__file__).parent.parent))
 
-from models import CreditContract, Drawdown, Repayment
+from models import CreditContract, Drawdown, Repayment, SubsidyTerms
 from .data_validator import DataValidator
 
 logger = logging.getLogger(__name__)
@@ -197,7 +197,8 @@ class TreasuryAPIClient:
             interest_payment_frequency=data['interest_payment_frequency'],
             principal_payment_frequency=data['principal_payment_frequency'],
             interest_rate_base=Decimal(str(data['interest_rate_base'])) if data.get('interest_rate_base') else None,
-            margin=Decimal(str(data['margin'])) if data.get('margin') else None
+            margin=Decimal(str(data['margin'])) if data.get('margin') else None,
+            subsidy=SubsidyTerms.from_parameters(data['subsidy']) if data.get('subsidy') else None
         )
     
     def _parse_drawdown(self, data: Dict[str, Any]) -> Drawdown:
@@ -2,12 +2,14 @@
 FastAPI бэкенд для системы аналитики кредитного портфеля
 """
 
-from fastapi import FastAPI, HTTPException, Depends
+from fastapi import FastAPI, HTTPException, Depends, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 import logging
-from datetime import datetime
+import json
+from datetime import date, datetime
+from decimal import Decimal
 from typing import List, Dict, Any, Optional
 
 import sys
@@ -18,9 +20,12 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from api import TreasuryAPIClient
+from models import KeyRateCurve
 from portfolio import PortfolioManager
 from versions import VersionManager
-from calculations import CalculationEngine
+from calculations import CalculationEngine, MAX_PATHS_COUNT
+from reports import DataExporter, ReportQueue, ReportBuilder, ReportStatus, ProcessReportRenderer
+from backend.response_cache import ResponseCache
 
 # Настройка логирования
 logging.basicConfig(level=logging.INFO)
@@ -43,14 +48,38 @@ app.add_middleware(
 )
 
 # Инициализация компонентов
+TREASURY_API_URL = "http://localhost:8001/api"  # URL казначейской системы
+TREASURY_API_KEY = "your-api-key-here"
+
 api_client = TreasuryAPIClient(
-    base_url="http://localhost:8001/api",  # URL казначейской системы
-    api_key="your-api-key-here"
+    base_url=TREASURY_API_URL,
+    api_key=TREASURY_API_KEY
 )
 
 portfolio_manager = PortfolioManager(api_client)
-version_manager = VersionManager(portfolio_manager)
+version_manager = VersionManager(portfolio_manager, cube_dir=os.getenv("SCENARIO_CUBE_DIR"))
 calculation_engine = CalculationEngine()
+data_exporter = DataExporter()
+response_cache = ResponseCache()
+report_builder = ReportBuilder(portfolio_manager, version_manager, data_exporter)
+# Отчеты формируются в отдельных процессах со своими менеджерами портфеля и версий
+report_queue = ReportQueue(
+    renderer=ProcessReportRenderer(TREASURY_API_URL, TREASURY_API_KEY),
+    storage_dir=os.getenv("REPORTS_STORAGE_DIR", str(Path(__file__).parent / "report_artifacts")),
+    max_workers=int(os.getenv("REPORTS_WORKERS", "2")),
+    ttl_minutes=int(os.getenv("REPORTS_TTL_MINUTES", "60")),
+    retention_minutes=int(os.getenv("REPORTS_RETENTION_MINUTES", str(24 * 60)))
+)
+
+@app.on_event("startup")
+async def start_report_queue():
+    report_queue.start()
+
+@app.on_event("shutdown")
+async def stop_report_queue():
+    report_queue.stop()
+    portfolio_manager.calculation_engine.rate_simulator.shutdown()
+    version_manager.close()
 
 # Зависимости
 def get_portfolio_manager():
@@ -62,6 +91,31 @@ def get_version_manager():
 def get_calculation_engine():
     return calculation_engine
 
+def get_data_exporter():
+    return data_exporter
+
+def get_report_queue():
+    return report_queue
+
+def get_response_cache():
+    return response_cache
+
+def _streaming_export(exporter: DataExporter,
+                      export_format: str,
+                      columns: List[str],
+                      rows,
+                      base_name: str,
+                      compress: bool = False) -> StreamingResponse:
+    """Создание потокового ответа с выгрузкой"""
+    export_format = exporter.validate_format(export_format)
+    filename = exporter.get_filename(base_name, export_format, compress)
+    
+    return StreamingResponse(
+        exporter.stream(export_format, columns, rows, compress=compress),
+        media_type=exporter.get_media_type(export_format, compress),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 # API Endpoints
 
 @app.get("/")
@@ -95,11 +149,19 @@ async def health_check():
 
 # Portfolio endpoints
 @app.get("/api/portfolio/data")
-async def get_portfolio_data(portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)):
+async def get_portfolio_data(
+    if_none_match: Optional[str] = Header(None),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    cache: ResponseCache = Depends(get_response_cache)
+):
     """Получение данных портфеля"""
     try:
-        data = portfolio_manager.load_portfolio_data()
-        return JSONResponse(content=data)
+        snapshot = portfolio_manager.get_snapshot_version()
+        cached = cache.get_or_render(
+            "portfolio_data", (), snapshot,
+            portfolio_manager.load_portfolio_data
+        )
+        return cache.respond(cached, if_none_match)
     except Exception as e:
         logger.error(f"Error loading portfolio data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -107,7 +169,9 @@ async def get_portfolio_data(portfolio_manager: PortfolioManager = Depends(get_p
 @app.get("/api/portfolio/metrics/{version_id}")
 async def get_portfolio_metrics(
     version_id: str,
-    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+    if_none_match: Optional[str] = Header(None),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    cache: ResponseCache = Depends(get_response_cache)
 ):
     """Получение метрик портфеля для версии"""
     try:
@@ -116,12 +180,22 @@ async def get_portfolio_metrics(
         if not version:
             raise HTTPException(status_code=404, detail="Version not found")
         
-        # Расчет кэш-флоу и метрик
-        cashflow = portfolio_manager.calculate_portfolio_cashflow(version)
-        contracts = portfolio_manager._contracts_cache or []
-        metrics = calculation_engine.calculate_portfolio_metrics(cashflow, contracts)
+        def render_metrics() -> Dict[str, Any]:
+            # Расчет кэш-флоу и метрик
+            cashflow = portfolio_manager.calculate_portfolio_cashflow(version)
+            contracts = portfolio_manager._contracts_cache or []
+            return calculation_engine.calculate_portfolio_metrics(cashflow, contracts)
         
-        return JSONResponse(content=metrics)
+        # Графики плавающих выборок зависят от базовой ставки снимка (та же ставка используется в расчете)
+        snapshot = (
+            portfolio_manager.get_snapshot_version(),
+            version_manager.revision,
+            portfolio_manager.get_current_base_rate()
+        )
+        cached = cache.get_or_render("portfolio_metrics", (version_id,), snapshot, render_metrics)
+        return cache.respond(cached, if_none_match)
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting portfolio metrics: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -143,6 +217,44 @@ async def get_portfolio_cashflow(
         logger.error(f"Error getting portfolio cashflow: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/portfolio/effective-rates/{version_id}")
+async def get_effective_rates(version_id: str):
+    """Эффективная ставка (XIRR) договоров версии с диагностикой сходимости"""
+    try:
+        result = version_manager.calculate_effective_rates(version_id)
+        return JSONResponse(content=result.to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating effective rates: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/portfolio/sensitivity")
+async def get_rate_sensitivity(
+    bump_bp: float = 1.0,
+    if_none_match: Optional[str] = Header(None),
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    cache: ResponseCache = Depends(get_response_cache)
+):
+    """Чувствительность процентных расходов к базовой ставке (DV01 по договорам, месяцам и валютам)"""
+    try:
+        snapshot = portfolio_manager.get_snapshot_version()
+        cached = cache.get_or_render(
+            "rate_sensitivity", (bump_bp,), snapshot,
+            lambda: portfolio_manager.calculate_rate_sensitivity(bump_bp).to_dict()
+        )
+        return cache.respond(cached, if_none_match)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating rate sensitivity: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/portfolio/engine-stats")
+async def get_engine_statistics(portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)):
+    """Статистика кэшей движка расчетов (сетки дат платежей, кривые дисконт-факторов)"""
+    return portfolio_manager.calculation_engine.get_cache_statistics()
+
 @app.post("/api/portfolio/refresh")
 async def refresh_portfolio_data(portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)):
     """Обновление данных портфеля"""
@@ -155,11 +267,18 @@ async def refresh_portfolio_data(portfolio_manager: PortfolioManager = Depends(g
 
 # Versions endpoints
 @app.get("/api/versions")
-async def get_versions(version_manager: VersionManager = Depends(get_version_manager)):
+async def get_versions(
+    if_none_match: Optional[str] = Header(None),
+    version_manager: VersionManager = Depends(get_version_manager),
+    cache: ResponseCache = Depends(get_response_cache)
+):
     """Получение списка версий"""
     try:
-        versions = version_manager.get_all_versions()
-        return JSONResponse(content=[v.dict() for v in versions])
+        cached = cache.get_or_render(
+            "versions", (), version_manager.revision,
+            lambda: [v.dict() for v in version_manager.get_all_versions()]
+        )
+        return cache.respond(cached, if_none_match)
     except Exception as e:
         logger.error(f"Error getting versions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -249,6 +368,34 @@ async def compare_versions(
         logger.error(f"Error comparing versions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/versions/{version_id}/cashflow/export/{format}")
+async def export_version_cashflow(
+    version_id: str,
+    format: str,
+    compress: bool = False,
+    version_manager: VersionManager = Depends(get_version_manager),
+    exporter: DataExporter = Depends(get_data_exporter)
+):
+    """Потоковая выгрузка кэш-флоу версии расчета в CSV или XLSX"""
+    try:
+        cashflow = version_manager.get_version_cashflow(version_id)
+        if cashflow is None:
+            raise HTTPException(status_code=404, detail="Version cashflow not found")
+        
+        return _streaming_export(
+            exporter, format, exporter.CASHFLOW_COLUMNS,
+            exporter.iter_cashflow_rows(cashflow),
+            base_name=f"cashflow_{version_id}",
+            compress=compress
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error exporting version cashflow: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Scenarios endpoints
 @app.get("/api/scenarios/templates")
 async def get_scenario_templates():
@@ -303,41 +450,311 @@ async def create_scenario(
         logger.error(f"Error creating scenario: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/api/scenarios/rate-sweep")
+async def run_rate_sweep(
+    sweep_data: Dict[str, Any],
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Пакетный расчет сценариев базовой ставки (куб сценарии x даты)"""
+    try:
+        if 'base_rates' not in sweep_data:
+            raise ValueError("base_rates is required")
+        
+        result = portfolio_manager.sweep_base_rates(
+            base_rates=sweep_data['base_rates'],
+            scenario_labels=sweep_data.get('labels')
+        )
+        return JSONResponse(content=result.to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running rate sweep: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/monte-carlo")
+async def run_monte_carlo(
+    simulation_data: Dict[str, Any],
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Стохастическое моделирование процентов по плавающим выборкам (P5/P50/P95 по месяцам)"""
+    try:
+        valuation_date = simulation_data.get('valuation_date')
+        
+        paths_count = int(simulation_data.get('paths_count', 5000))
+        if not 0 < paths_count <= MAX_PATHS_COUNT:
+            raise HTTPException(status_code=400, detail=f"paths_count must be between 1 and {MAX_PATHS_COUNT}")
+        
+        result = portfolio_manager.simulate_floating_interest(
+            model_name=simulation_data.get('model', 'vasicek'),
+            model_parameters=simulation_data.get('parameters'),
+            paths_count=paths_count,
+            seed=simulation_data.get('seed'),
+            valuation_date=date.fromisoformat(valuation_date) if valuation_date else None
+        )
+        return JSONResponse(content=result.to_dict())
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running Monte Carlo simulation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/stress-grid")
+async def run_stress_grid(
+    grid_data: Dict[str, Any],
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Сетка стресс-сценариев (rate_shock x drawdown_shock), результаты потоком NDJSON по мере расчета"""
+    try:
+        results = portfolio_manager.run_stress_grid(
+            grid_ranges=grid_data.get('parameters', {}),
+            limits=grid_data.get('limits'),
+            stop_on_breach=bool(grid_data.get('stop_on_breach', False))
+        )
+        
+        return StreamingResponse(
+            (json.dumps(metrics, ensure_ascii=False) + "\n" for metrics in results),
+            media_type="application/x-ndjson"
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running stress grid: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/reverse-stress")
+async def run_reverse_stress(
+    search_data: Dict[str, Any],
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Обратный стресс-тест: минимальный шок ставки или выборок, нарушающий помесячные ограничения"""
+    try:
+        result = portfolio_manager.run_reverse_stress(
+            direction=search_data.get('direction', {'rate_shock': 1.0}),
+            limits=search_data.get('limits', {}),
+            max_scale=float(search_data.get('max_scale', 1.0))
+        )
+        return JSONResponse(content=result.to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error running reverse stress test: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/npv")
+async def calculate_npv(
+    npv_data: Dict[str, Any],
+    version_manager: VersionManager = Depends(get_version_manager)
+):
+    """NPV чистого потока договоров по версиям на дату оценки"""
+    try:
+        if npv_data.get('discount_curve'):
+            curve = KeyRateCurve.from_parameters(npv_data['discount_curve'])
+        elif npv_data.get('discount_rate') is not None:
+            curve = KeyRateCurve.flat(Decimal(str(npv_data['discount_rate'])))
+        else:
+            curve = None
+        valuation_date = npv_data.get('valuation_date')
+        
+        result = version_manager.calculate_npv(
+            version_ids=npv_data.get('version_ids'),
+            curve=curve,
+            valuation_date=date.fromisoformat(valuation_date) if valuation_date else None
+        )
+        return JSONResponse(content=result.to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating NPV: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/subsidies")
+async def calculate_subsidies(
+    subsidy_data: Dict[str, Any],
+    version_manager: VersionManager = Depends(get_version_manager)
+):
+    """Субсидии, чистые проценты и эффективные ставки субсидируемых договоров по месяцам"""
+    try:
+        if 'version_id' not in subsidy_data:
+            raise ValueError("version_id is required")
+        
+        # Новые условия программ: кривая ставки субсидии или постоянная ставка
+        program_curves = {
+            program: (
+                KeyRateCurve.from_parameters(terms) if isinstance(terms, dict)
+                else KeyRateCurve.flat(Decimal(str(terms)))
+            )
+            for program, terms in (subsidy_data.get('programs') or {}).items()
+        }
+        
+        result = version_manager.calculate_subsidies(subsidy_data['version_id'], program_curves or None)
+        return JSONResponse(content=result.to_dict())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error calculating subsidies: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/scenarios/optimize")
+async def optimize_allocation(
+    optimization_data: Dict[str, Any],
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager)
+):
+    """Перераспределение долга под целевую загрузку и концентрацию с минимальными процентами"""
+    try:
+        if 'target_utilization' not in optimization_data:
+            raise ValueError("target_utilization is required")
+        
+        result = portfolio_manager.optimize_allocation(
+            target_utilization=float(optimization_data['target_utilization']),
+            max_concentration=float(optimization_data.get('max_concentration', 1.0))
+        )
+        effective_date = optimization_data.get('effective_date')
+        
+        return JSONResponse(content={
+            **result.to_dict(),
+            **portfolio_manager.get_reallocation_parameters(
+                result, date.fromisoformat(effective_date) if effective_date else None
+            )
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error optimizing allocation: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/api/scenarios/cube")
+async def get_scenario_cube_slice(
+    measure: str = "net_cashflow",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    as_of: Optional[date] = None,
+    segment: Optional[str] = None,
+    version_manager: VersionManager = Depends(get_version_manager)
+):
+    """Срез куба версий: сумма показателя за период или значение на дату as_of по всем сценариям"""
+    try:
+        cube = version_manager.get_scenario_cube()
+        if as_of is not None:
+            values = cube.on_date(measure, as_of, segment)
+        else:
+            values = cube.period_totals(measure, start_date, end_date, segment)
+        
+        return JSONResponse(content={
+            "measure": measure,
+            "segment": segment,
+            "start_date": start_date.isoformat() if start_date else None,
+            "end_date": end_date.isoformat() if end_date else None,
+            "as_of": as_of.isoformat() if as_of else None,
+            "values": values,
+            "axes": cube.get_axes()
+        })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error slicing scenario cube: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Reports endpoints
 @app.post("/api/reports/{report_type}")
 async def generate_report(
     report_type: str,
-    parameters: Dict[str, Any]
+    parameters: Dict[str, Any],
+    queue: ReportQueue = Depends(get_report_queue)
 ):
-    """Генерация отчета"""
+    """Постановка отчета в очередь на формирование"""
     try:
-        # TODO: Implement report generation
-        return JSONResponse(content={
-            "report_id": f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
-            "status": "generated",
-            "message": f"Report {report_type} generated successfully"
+        report_builder.validate_request(report_type, parameters)
+        job = queue.submit(report_type, parameters, report_builder.build_context(report_type, parameters))
+        
+        return JSONResponse(status_code=202, content={
+            "report_id": job.id,
+            "status": job.status.value,
+            "message": f"Report {report_type} queued"
         })
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error generating report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/reports/{report_id}/status")
+async def get_report_status(
+    report_id: str,
+    queue: ReportQueue = Depends(get_report_queue)
+):
+    """Статус формирования отчета"""
+    job = queue.get_job(report_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report not found")
+    return JSONResponse(content=json.loads(job.json(exclude={'artifact_path', 'fingerprint'})))
+
 @app.get("/api/reports/{report_id}/download/{format}")
-async def download_report(report_id: str, format: str):
-    """Скачивание отчета"""
+async def download_report(
+    report_id: str,
+    format: str,
+    exporter: DataExporter = Depends(get_data_exporter),
+    queue: ReportQueue = Depends(get_report_queue)
+):
+    """Скачивание готового отчета из очереди"""
+    job = queue.get_job(report_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report not found")
+    if job.status == ReportStatus.EXPIRED:
+        raise HTTPException(status_code=410, detail="Report expired")
+    if job.status == ReportStatus.FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Report generation failed")
+    if not job.is_ready():
+        raise HTTPException(status_code=409, detail=f"Report is {job.status.value}")
+    if format.lower() != job.artifact_format:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Report is available only in {job.artifact_format} format"
+        )
+    
     try:
-        # TODO: Implement report download
-        raise HTTPException(status_code=501, detail="Not implemented")
+        filename = f"{job.report_type}_{job.id}.{job.artifact_format}"
+        return StreamingResponse(
+            queue.iter_artifact(job),
+            media_type=exporter.get_media_type(job.artifact_format),
+            headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+        )
     except Exception as e:
         logger.error(f"Error downloading report: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 # Data endpoints
 @app.get("/api/data/export/{format}")
-async def export_data(format: str):
-    """Экспорт данных"""
+async def export_data(
+    format: str,
+    version_id: Optional[str] = None,
+    compress: bool = False,
+    portfolio_manager: PortfolioManager = Depends(get_portfolio_manager),
+    version_manager: VersionManager = Depends(get_version_manager),
+    exporter: DataExporter = Depends(get_data_exporter)
+):
+    """Экспорт графиков платежей (по умолчанию для активной версии)"""
     try:
-        # TODO: Implement data export
-        raise HTTPException(status_code=501, detail="Not implemented")
+        if version_id:
+            version = version_manager.get_version(version_id)
+        else:
+            version = version_manager.get_active_version()
+        if not version:
+            raise HTTPException(status_code=404, detail="Version not found")
+        
+        # Графики строятся лениво, по одному договору на порцию выгрузки
+        rows = exporter.iter_schedule_rows(portfolio_manager.iter_payment_schedules(version))
+        
+        return _streaming_export(
+            exporter, format, exporter.SCHEDULE_COLUMNS, rows,
+            base_name=f"schedules_{version.id}",
+            compress=compress
+        )
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error exporting data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,156 @@
+"""
+Кэш ответов API с поддержкой ETag / If-None-Match
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Hashable, Tuple
+import hashlib
+import json
+import threading
+import logging
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+logger = logging.getLogger(__name__)
+
+
+class CachedResponse:
+    """Сериализованный ответ с ETag"""
+    
+    __slots__ = ('body', 'etag')
+    
+    def __init__(self, body: bytes, etag: str):
+        self.body = body
+        self.etag = etag
+
+
+class ResponseCache:
+    """
+    LRU-кэш готовых JSON-ответов
+    
+    Ключ записи - (эндпоинт, параметры, версия снимка данных). Пока снимок не
+    меняется, повторный запрос отдает уже сериализованное тело без пересчета,
+    а при совпадении If-None-Match - пустой ответ 304.
+    """
+    
+    def __init__(self, max_entries: int = 256):
+        """
+        Инициализация кэша
+        
+        Args:
+            max_entries: Максимальное количество хранимых ответов
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, CachedResponse]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+    
+    def get_or_render(self,
+                      endpoint: str,
+                      params: Tuple,
+                      snapshot: Hashable,
+                      render: Callable[[], Any]) -> CachedResponse:
+        """
+        Получение ответа из кэша или его формирование
+        
+        Пустые результаты (например, при недоступности API казначейства)
+        не кэшируются.
+        
+        Args:
+            endpoint: Имя эндпоинта
+            params: Параметры запроса
+            snapshot: Версия снимка данных, от которых зависит ответ
+            render: Функция формирования содержимого ответа
+            
+        Returns:
+            Сериализованный ответ с ETag
+        """
+        key = (endpoint, params, snapshot)
+        
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return cached
+            self._misses += 1
+        
+        content = render()
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(',', ':')
+        ).encode('utf-8')
+        cached = CachedResponse(body, self._make_etag(body))
+        
+        if content:
+            with self._lock:
+                self._entries[key] = cached
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        
+        return cached
+    
+    def respond(self, cached: CachedResponse, if_none_match: Optional[str]) -> Response:
+        """
+        Построение HTTP-ответа с учетом условного запроса
+        
+        Args:
+            cached: Сериализованный ответ
+            if_none_match: Значение заголовка If-None-Match
+            
+        Returns:
+            Ответ 200 с телом или 304 без тела
+        """
+        headers = {
+            'ETag': cached.etag,
+            'Cache-Control': 'no-cache'  # Клиент обязан перепроверять ETag
+        }
+        
+        if if_none_match and self._etag_matches(cached.etag, if_none_match):
+            return Response(status_code=304, headers=headers)
+        
+        return Response(content=cached.body, media_type='application/json', headers=headers)
+    
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """
+        Сброс кэша
+        
+        Args:
+            endpoint: Эндпоинт (если None, сбрасывается весь кэш)
+        """
+        with self._lock:
+            if endpoint is None:
+                self._entries.clear()
+            else:
+                for key in [k for k in self._entries if k[0] == endpoint]:
+                    del self._entries[key]
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика попаданий в кэш"""
+        total = self._hits + self._misses
+        return {
+            'entries': len(self._entries),
+            'hits': self._hits,
+            'misses': self._misses,
+            'hit_rate': self._hits / total if total else 0.0
+        }
+    
+    def _make_etag(self, body: bytes) -> str:
+        """Сильный ETag по содержимому тела ответа"""
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+    
+    def _etag_matches(self, etag: str, if_none_match: str) -> bool:
+        """Проверка If-None-Match (слабое сравнение согласно RFC 9110)"""
+        if if_none_match.strip() == '*':
+            return True
+        
+        candidates = [tag.strip() for tag in if_none_match.split(',')]
+        return any(
+            (tag[2:] if tag.startswith('W/') else tag) == etag
+            for tag in candidates
+        )
@@ -0,0 +1,104 @@
+"""
+Общие фикстуры тестов расчетного ядра
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent.parent))
+
+from models import CreditContract, Drawdown, Repayment, KeyRateCurve, KeyRatePoint
+from models.credit_contract import CreditType, Currency, PaymentScheduleType, PaymentFrequency
+from models.drawdown import InterestRateType, DrawdownStatus
+from models.repayment import RepaymentStatus, RepaymentType
+
+
+@pytest.fixture
+def floating_portfolio():
+    """Договоры с фиксированными, плавающими и плановыми выборками и частичными погашениями"""
+    contracts, drawdowns, repayments = [], [], []
+    for index in range(4):
+        start = date(2024, 1, 10) + timedelta(days=17 * index)
+        contracts.append(CreditContract(
+            id=f"contract_{index}",
+            credit_type=CreditType.CREDIT_LINE,
+            currency=Currency.RUB,
+            total_limit=Decimal('100000000'),
+            available_limit=Decimal('40000000'),
+            start_date=start,
+            end_date=start + timedelta(days=540),
+            payment_schedule_type=PaymentScheduleType.BULLET,
+            interest_payment_frequency=PaymentFrequency.MONTHLY if index % 2 else PaymentFrequency.QUARTERLY,
+            principal_payment_frequency=PaymentFrequency.MONTHLY
+        ))
+        for number in range(3):
+            floating = (index + number) % 2 == 0
+            drawdowns.append(Drawdown(
+                id=f"drawdown_{index}_{number}",
+                contract_id=f"contract_{index}",
+                drawdown_date=start + timedelta(days=45 * number),
+                amount=Decimal(5_000_000 + 1_234_567 * number + 10_000 * index),
+                interest_rate_type=InterestRateType.FLOATING if floating else InterestRateType.FIXED,
+                interest_rate=Decimal('14.25') if floating else Decimal('11.5') + number,
+                margin=Decimal('2.75') if floating else None,
+                status=DrawdownStatus.PLANNED if number == 2 else DrawdownStatus.ACTUAL
+            ))
+        for number in range(2):
+            repayments.append(Repayment(
+                id=f"repayment_{index}_{number}",
+                contract_id=f"contract_{index}",
+                repayment_date=start + timedelta(days=120 + 150 * number),
+                principal_amount=Decimal(1_500_000 + 250_000 * number),
+                interest_amount=Decimal('0'),
+                status=RepaymentStatus.PLANNED,
+                repayment_type=RepaymentType.PRINCIPAL
+            ))
+    return contracts, drawdowns, repayments
+
+
+@pytest.fixture
+def stepped_curve():
+    """Ступенчатая траектория ключевой ставки"""
+    return KeyRateCurve(points=[
+        KeyRatePoint(effective_date=date(2024, 1, 1), rate=Decimal('16')),
+        KeyRatePoint(effective_date=date(2024, 4, 15), rate=Decimal('18')),
+        KeyRatePoint(effective_date=date(2024, 9, 2), rate=Decimal('21')),
+        KeyRatePoint(effective_date=date(2025, 2, 10), rate=Decimal('17.5'))
+    ])
+
+
+class FakeTreasuryClient:
+    """Клиент казначейской системы с данными в памяти и счетчиками обращений"""
+    
+    def __init__(self, contracts, drawdowns, repayments, base_rate=Decimal('16')):
+        self.contracts = contracts
+        self.drawdowns = drawdowns
+        self.repayments = repayments
+        self.base_rate = base_rate
+        self.calls = {'contracts': 0, 'base_rate': 0}
+    
+    def get_active_contracts(self):
+        self.calls['contracts'] += 1
+        return list(self.contracts)
+    
+    def get_contract_drawdowns(self, contract_id):
+        return [drawdown for drawdown in self.drawdowns if drawdown.contract_id == contract_id]
+    
+    def get_contract_repayments(self, contract_id):
+        return [repayment for repayment in self.repayments if repayment.contract_id == contract_id]
+    
+    def get_current_base_rate(self):
+        self.calls['base_rate'] += 1
+        return self.base_rate
+
+
+@pytest.fixture
+def treasury_client(floating_portfolio):
+    """Клиент казначейской системы с портфелем floating_portfolio"""
+    return FakeTreasuryClient(*floating_portfolio)
@@ -0,0 +1,83 @@
+"""
+Агрегация портфеля: DataAggregator, FrameAggregator и инкрементальное состояние
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from models.credit_contract import CreditType
+from portfolio import DataAggregator, FrameAggregator
+from portfolio.frame_aggregator import compare_aggregations
+from benchmarks.aggregation_benchmark import generate_portfolio
+
+pytest.importorskip('pandas')
+
+
+@pytest.fixture(scope='module')
+def mock_portfolio():
+    """Синтетический портфель: 40 договоров, 2000 выборок и погашений"""
+    return generate_portfolio(2_000, drawdowns_per_contract=50)
+
+
+def strip_date(aggregated):
+    aggregated.pop('aggregation_date', None)
+    return aggregated
+
+
+def test_frame_aggregator_matches_reference(mock_portfolio):
+    assert FrameAggregator().validate(*mock_portfolio) == []
+
+
+def test_frame_aggregator_matches_reference_on_subsets(mock_portfolio):
+    contracts, drawdowns, repayments = mock_portfolio
+    # Группы из одного договора и события договоров вне снимка
+    assert FrameAggregator().validate(contracts[:3], drawdowns[:100], repayments[:100]) == []
+
+
+def test_breakdown_contracts_sorted(mock_portfolio):
+    aggregated = DataAggregator().aggregate_portfolio_data(*mock_portfolio)
+    for breakdown in ('currency_breakdown', 'credit_type_breakdown'):
+        assert list(aggregated[breakdown]) == sorted(aggregated[breakdown])
+        for group in aggregated[breakdown].values():
+            assert group['contracts'] == sorted(group['contracts'])
+
+
+def test_incremental_upserts_match_full_recompute(mock_portfolio):
+    contracts, drawdowns, repayments = mock_portfolio
+    aggregator = DataAggregator()
+    state = aggregator.build_state(contracts, drawdowns, repayments)
+    
+    # Изменение договоров (в том числе смена типа кредита), удаление записей
+    credit_types = list(CreditType)
+    changed = [
+        contract.model_copy(update={
+            'available_limit': contract.total_limit / 2,
+            'credit_type': credit_types[(credit_types.index(contract.credit_type) + 1) % len(credit_types)]
+        })
+        for contract in contracts[::3]
+    ]
+    for contract in changed:
+        state.upsert_contract(contract)
+    # Повторная вставка без изменений переносит договор в конец группы
+    for contract in contracts[1::5]:
+        state.upsert_contract(state.contracts[contract.id])
+    for drawdown in drawdowns[::7]:
+        state.remove_drawdown(drawdown.id)
+    for repayment in repayments[::11]:
+        state.upsert_repayment(repayment.model_copy(update={'principal_amount': repayment.principal_amount + Decimal('1')}))
+    
+    changed_ids = {contract.id: contract for contract in changed}
+    removed = {drawdown.id for drawdown in drawdowns[::7]}
+    updated = {repayment.id for repayment in repayments[::11]}
+    expected = aggregator.aggregate_portfolio_data(
+        [changed_ids.get(contract.id, contract) for contract in contracts],
+        [drawdown for drawdown in drawdowns if drawdown.id not in removed],
+        [
+            repayment.model_copy(update={'principal_amount': repayment.principal_amount + Decimal('1')})
+            if repayment.id in updated else repayment
+            for repayment in repayments
+        ]
+    )
+    
+    assert compare_aggregations(strip_date(expected), strip_date(aggregator.aggregate_state(state))) == []
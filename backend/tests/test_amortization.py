@@ -0,0 +1,106 @@
+"""
+AmortizationGenerator: погашения ОД в сумме равны кредиту до копейки, эталон - цикл на Decimal
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from calculations import PaymentScheduler
+from calculations.amortization import AmortizationGenerator, periods_per_year
+from calculations.money import to_minor, from_minor
+from models.credit_contract import PaymentScheduleType
+
+from benchmarks.amortization_benchmark import generate_contracts, reference_schedule
+
+
+@pytest.fixture(scope='module')
+def contracts():
+    """Договоры всех типов графика, месячные и квартальные платежи"""
+    return generate_contracts(300)
+
+
+def kopeck_principals(size: int):
+    """Суммы кредита с копейками, не делящиеся нацело на число платежей"""
+    rng = np.random.default_rng(7)
+    return [from_minor(int(value)) for value in rng.integers(100_000_01, 1_000_000_000_00, size)]
+
+
+@pytest.mark.parametrize('schedule_type', ['annuity', 'differentiated', 'bullet'])
+def test_principal_sums_exact(contracts, schedule_type):
+    selected = [contract for contract in contracts if contract.payment_schedule_type.value == schedule_type]
+    principals = kopeck_principals(len(selected))
+    
+    result = AmortizationGenerator('Actual/360').generate(selected, principals)
+    bounds = result.get_lane_bounds()
+    
+    for lane, principal in enumerate(principals):
+        rows = slice(bounds[lane], bounds[lane + 1])
+        assert result.drawdowns[rows].sum() == to_minor(principal)
+        assert result.principal[rows].sum() == to_minor(principal)
+        assert result.balance_end[rows][-1] == 0
+        assert (result.balance_start[rows] + result.drawdowns[rows] - result.principal[rows]
+                == result.balance_end[rows]).all()
+
+
+@pytest.mark.parametrize('schedule_type', ['annuity', 'differentiated', 'bullet'])
+def test_matches_decimal_loop(contracts, schedule_type):
+    selected = [contract for contract in contracts if contract.payment_schedule_type.value == schedule_type]
+    principals = kopeck_principals(len(selected))
+    
+    result = AmortizationGenerator('Actual/360').generate(selected, principals)
+    bounds = result.get_lane_bounds()
+    
+    for lane, (contract, principal) in enumerate(zip(selected, principals)):
+        dates = [date.fromordinal(int(ordinal)) for ordinal in result.ordinals[bounds[lane]:bounds[lane + 1]]]
+        expected = reference_schedule(
+            principal, contract.margin, schedule_type, dates, periods_per_year(contract.principal_payment_frequency)
+        )
+        rows = slice(bounds[lane] + 1, bounds[lane + 1])
+        # Эталон округляет пошагово, замкнутая форма - один раз: допуск - копейка
+        for values, reference_values in zip(
+            (result.principal[rows], result.interest[rows], result.balance_end[rows]), expected
+        ):
+            assert np.abs(values - np.array([to_minor(value) for value in reference_values])).max() <= 1
+
+
+def test_payment_schedules_exact(contracts):
+    principals = kopeck_principals(len(contracts))
+    
+    schedules = PaymentScheduler().create_amortization_schedules(contracts, 'test', principals)
+    
+    for contract, principal in zip(contracts, principals):
+        schedule = schedules[contract.id]
+        assert sum(item.principal_payment for item in schedule.schedule_items) == principal
+        assert schedule.schedule_items[-1].debt_balance_end == Decimal('0')
+
+
+def test_zero_rate_annuity_is_linear(contracts):
+    contract = next(contract for contract in contracts if contract.payment_schedule_type == PaymentScheduleType.ANNUITY)
+    
+    result = AmortizationGenerator().generate([contract], [Decimal('1000000.01')], [Decimal('0')])
+    
+    assert result.principal.sum() == 100_000_001
+    assert result.principal[1:].max() - result.principal[1:].min() <= 1
+    assert result.interest.sum() == 0
+
+
+def test_annuity_schedule_exact(contracts):
+    schedule = PaymentScheduler().create_annuity_schedule(
+        contracts[0], Decimal('1234567.89'), Decimal('0.0125'), 37, 'test'
+    )
+    payments = [item.principal_payment + item.interest_payment for item in schedule.schedule_items[1:]]
+    
+    assert sum(item.principal_payment for item in schedule.schedule_items) == Decimal('1234567.89')
+    assert len(payments) == 37
+    # Аннуитетный платеж постоянен с точностью до округления
+    assert max(payments) - min(payments) <= Decimal('0.02')
+
+
+def test_custom_schedule_rejected(contracts):
+    custom = contracts[0].model_copy(update={'payment_schedule_type': PaymentScheduleType.CUSTOM})
+    
+    with pytest.raises(ValueError):
+        AmortizationGenerator().generate([custom])
@@ -0,0 +1,107 @@
+"""
+BusinessCalendar: праздники и переносы по ТК РФ, правила переноса дат
+"""
+
+from datetime import date, timedelta
+
+import pytest
+
+from calculations.business_calendar import BusinessCalendar, CALENDAR_RULES, russian_holidays
+
+
+@pytest.mark.parametrize('holiday, transfer', [
+    (date(2020, 2, 23), date(2020, 2, 24)),
+    (date(2020, 5, 9), date(2020, 5, 11)),
+    (date(2021, 5, 1), date(2021, 5, 3)),
+    (date(2021, 6, 12), date(2021, 6, 14)),
+    (date(2022, 6, 12), date(2022, 6, 13)),
+    (date(2023, 11, 4), date(2023, 11, 6)),
+    (date(2025, 3, 8), date(2025, 3, 10))
+])
+def test_weekend_holiday_transferred(holiday, transfer):
+    holidays = russian_holidays(holiday.year)
+    
+    assert holiday in holidays and transfer in holidays
+    assert not BusinessCalendar('russia').is_business_day([holiday, transfer]).any()
+
+
+def test_transfer_skips_taken_days():
+    # 1 и 9 мая 2021 - суббота и воскресенье: переносы на 3 и 10 мая
+    holidays = russian_holidays(2021)
+    
+    assert [day for day in holidays if day.month == 5] == [
+        date(2021, 5, 1), date(2021, 5, 3), date(2021, 5, 9), date(2021, 5, 10)
+    ]
+
+
+def test_new_year_holidays_not_transferred():
+    # Переносы новогодних выходных задает постановление Правительства, а не ТК РФ
+    holidays = russian_holidays(2022)
+    
+    assert [day for day in holidays if day.month == 1] == [date(2022, 1, day) for day in range(1, 9)]
+    assert BusinessCalendar('russia').is_business_day([date(2022, 1, 10)])[0]
+
+
+def test_weekday_holiday_not_transferred():
+    holidays = russian_holidays(2024)
+    
+    assert len(holidays) == len(set(holidays)) == 14
+    assert BusinessCalendar('russia').is_business_day([date(2024, 3, 7), date(2024, 3, 11)]).all()
+
+
+def test_decree_days_configured():
+    # Постановление на 2024 год: 27 апреля - рабочая суббота, 29 и 30 апреля - выходные
+    calendar = BusinessCalendar(
+        'russia', holidays=[date(2024, 4, 29), date(2024, 4, 30)], working_days=[date(2024, 4, 27)]
+    )
+    
+    assert calendar.is_business_day(
+        [date(2024, 4, 26), date(2024, 4, 27), date(2024, 4, 29), date(2024, 4, 30), date(2024, 5, 1)]
+    ).tolist() == [True, True, False, False, False]
+    assert date.fromordinal(int(calendar.advance([date(2024, 4, 26)], 2)[0])) == date(2024, 5, 2)
+
+
+def test_unknown_calendar_rejected():
+    assert set(CALENDAR_RULES) == {'russia', 'weekends'}
+    with pytest.raises(ValueError):
+        BusinessCalendar('moex')
+
+
+@pytest.mark.parametrize('value, following, modified_following', [
+    # Конец месяца в выходной: following уходит в следующий месяц, modified_following - назад
+    (date(2024, 3, 31), date(2024, 4, 1), date(2024, 3, 29)),
+    (date(2024, 8, 31), date(2024, 9, 2), date(2024, 8, 30)),
+    (date(2025, 5, 31), date(2025, 6, 2), date(2025, 5, 30)),
+    (date(2025, 11, 30), date(2025, 12, 1), date(2025, 11, 28)),
+    # Праздник и перенесенный выходной внутри месяца
+    (date(2022, 6, 12), date(2022, 6, 14), date(2022, 6, 14)),
+    (date(2025, 2, 23), date(2025, 2, 25), date(2025, 2, 25)),
+    # Рабочий день в конце месяца не переносится
+    (date(2024, 6, 28), date(2024, 6, 28), date(2024, 6, 28))
+])
+def test_modified_following_month_end(value, following, modified_following):
+    calendar = BusinessCalendar('russia')
+    
+    assert date.fromordinal(int(calendar.adjust([value], 'following')[0])) == following
+    assert date.fromordinal(int(calendar.adjust([value], 'modified_following')[0])) == modified_following
+
+
+@pytest.mark.parametrize('convention', ['following', 'modified_following', 'preceding', 'modified_preceding'])
+def test_weekend_conventions_match_quantlib(convention):
+    ql = pytest.importorskip('QuantLib')
+    conventions = {
+        'following': ql.Following,
+        'modified_following': ql.ModifiedFollowing,
+        'preceding': ql.Preceding,
+        'modified_preceding': ql.ModifiedPreceding
+    }
+    days = [date(2023, 12, 1) + timedelta(days=offset) for offset in range(800)]
+    
+    adjusted = BusinessCalendar('weekends').adjust(days, convention)
+    
+    expected = [
+        ql.WeekendsOnly().adjust(ql.Date(day.day, day.month, day.year), conventions[convention]).serialNumber()
+        for day in days
+    ]
+    # Серийный номер QuantLib: 1 - 31.12.1899
+    assert (adjusted - date(1899, 12, 30).toordinal()).tolist() == expected
@@ -0,0 +1,129 @@
+"""
+Доли года DayCountService против эталона QuantLib
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from calculations.day_count import DayCountService
+
+ql = pytest.importorskip('QuantLib')
+
+# Эталонные базы QuantLib
+QUANTLIB_DAY_COUNTS = {
+    'Actual/360': ql.Actual360(),
+    'Actual/365F': ql.Actual365Fixed(),
+    '30/360': ql.Thirty360(ql.Thirty360.BondBasis),
+    'Actual/Actual': ql.ActualActual(ql.ActualActual.ISDA)
+}
+
+# Bond Basis: 31-е число начала и окончания, концы февраля
+BOND_BASIS_PERIODS = [
+    (date(2024, 1, 31), date(2024, 3, 31)),
+    (date(2024, 1, 30), date(2024, 3, 31)),
+    (date(2024, 1, 29), date(2024, 3, 31)),
+    (date(2024, 3, 31), date(2024, 4, 30)),
+    (date(2024, 3, 31), date(2024, 5, 31)),
+    (date(2024, 5, 31), date(2024, 6, 1)),
+    (date(2024, 1, 15), date(2024, 1, 31)),
+    (date(2024, 2, 29), date(2024, 3, 31)),
+    (date(2023, 2, 28), date(2023, 3, 31)),
+    (date(2024, 8, 31), date(2025, 8, 31)),
+    (date(2024, 12, 31), date(2025, 1, 31))
+]
+
+# Act/Act ISDA: периоды через границу года, високосные годы, несколько лет
+CROSS_YEAR_PERIODS = [
+    (date(2023, 12, 31), date(2024, 1, 1)),
+    (date(2023, 12, 15), date(2024, 1, 15)),
+    (date(2024, 12, 15), date(2025, 1, 15)),
+    (date(2024, 2, 29), date(2025, 2, 28)),
+    (date(2023, 7, 1), date(2025, 7, 1)),
+    (date(2019, 11, 30), date(2024, 3, 1)),
+    (date(2024, 1, 1), date(2025, 1, 1)),
+    (date(2024, 12, 31), date(2025, 1, 1))
+]
+
+
+def quantlib_year_fractions(day_count, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Доли года через QuantLib по одному периоду"""
+    result = np.empty(len(start))
+    for index in range(len(start)):
+        start_date = date.fromordinal(int(start[index]))
+        end_date = date.fromordinal(int(end[index]))
+        result[index] = day_count.yearFraction(
+            ql.Date(start_date.day, start_date.month, start_date.year),
+            ql.Date(end_date.day, end_date.month, end_date.year)
+        )
+    return result
+
+
+def random_periods(size: int, seed: int = 42):
+    """Случайные периоды до трех лет (порядковые номера date.toordinal())"""
+    rng = np.random.default_rng(seed)
+    start = rng.integers(date(2000, 1, 1).toordinal(), date(2030, 1, 1).toordinal(), size)
+    end = start + rng.integers(1, 3 * 366, size)
+    return start.astype(np.int64), end.astype(np.int64)
+
+
+def month_end_periods():
+    """Все пары концов месяцев 2023-2025: начала и окончания на 28-31 число"""
+    ends = [
+        date(year, month + 1, 1).toordinal() - 1 if month < 12 else date(year, 12, 31).toordinal()
+        for year in range(2023, 2026)
+        for month in range(1, 13)
+    ]
+    start, end = np.meshgrid(ends, ends, indexing='ij')
+    mask = end > start
+    return start[mask].astype(np.int64), end[mask].astype(np.int64)
+
+
+def assert_matches_quantlib(basis: str, start: np.ndarray, end: np.ndarray) -> None:
+    expected = quantlib_year_fractions(QUANTLIB_DAY_COUNTS[basis], start, end)
+    actual = DayCountService(basis).year_fractions(start, end)
+    mismatches = np.flatnonzero(np.abs(actual - expected) > 1e-12)
+    assert not len(mismatches), [
+        (date.fromordinal(int(start[index])), date.fromordinal(int(end[index])), actual[index], expected[index])
+        for index in mismatches[:5]
+    ]
+
+
+@pytest.mark.parametrize('basis', list(QUANTLIB_DAY_COUNTS))
+def test_random_periods_match_quantlib(basis):
+    assert_matches_quantlib(basis, *random_periods(20_000))
+
+
+@pytest.mark.parametrize('basis', list(QUANTLIB_DAY_COUNTS))
+def test_month_end_periods_match_quantlib(basis):
+    assert_matches_quantlib(basis, *month_end_periods())
+
+
+def test_bond_basis_day_31_matches_quantlib():
+    start = np.array([period[0].toordinal() for period in BOND_BASIS_PERIODS], dtype=np.int64)
+    end = np.array([period[1].toordinal() for period in BOND_BASIS_PERIODS], dtype=np.int64)
+    assert_matches_quantlib('30/360', start, end)
+    
+    # 31 -> 31: оба числа приводятся к 30
+    assert DayCountService('30/360').day_counts([date(2024, 1, 31).toordinal()], [date(2024, 3, 31).toordinal()])[0] == 60
+    # 29 -> 31: число окончания остается 31
+    assert DayCountService('30/360').day_counts([date(2024, 1, 29).toordinal()], [date(2024, 3, 31).toordinal()])[0] == 62
+
+
+def test_actual_actual_cross_year_matches_quantlib():
+    start = np.array([period[0].toordinal() for period in CROSS_YEAR_PERIODS], dtype=np.int64)
+    end = np.array([period[1].toordinal() for period in CROSS_YEAR_PERIODS], dtype=np.int64)
+    assert_matches_quantlib('Actual/Actual', start, end)
+    
+    # 15 дней 2023 года из 365 и 15 дней 2024 года из 366
+    assert DayCountService('Actual/Actual').year_fraction(date(2023, 12, 17), date(2024, 1, 16)) == pytest.approx(
+        15 / 365 + 15 / 366, abs=1e-15
+    )
+
+
+@pytest.mark.parametrize('basis', list(QUANTLIB_DAY_COUNTS))
+def test_year_fraction_ratios_match_year_fractions(basis):
+    start, end = random_periods(5_000, seed=7)
+    numerators, denominators = DayCountService(basis).year_fraction_ratios(start, end)
+    np.testing.assert_allclose(numerators / denominators, DayCountService(basis).year_fractions(start, end), rtol=0, atol=1e-12)
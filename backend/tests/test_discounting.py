@@ -0,0 +1,101 @@
+"""
+NPV DiscountingEngine против скалярного дисконтирования по дням
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+import math
+
+import pytest
+
+from calculations import DiscountingEngine, PaymentScheduler, InterestCalculator
+from calculations.discounting import DISCOUNT_DAY_BASIS
+from models import KeyRateCurve
+
+
+@pytest.fixture
+def version_schedules(floating_portfolio):
+    """Графики договоров двух версий с разной базовой ставкой"""
+    contracts, drawdowns, repayments = floating_portfolio
+    scheduler = PaymentScheduler()
+    return {
+        version_id: {
+            contract.id: scheduler.create_payment_schedule(
+                contract,
+                [drawdown for drawdown in drawdowns if drawdown.contract_id == contract.id],
+                [repayment for repayment in repayments if repayment.contract_id == contract.id],
+                version_id,
+                base_rate
+            )
+            for contract in contracts
+        }
+        for version_id, base_rate in (('base', Decimal('16')), ('stress', Decimal('21')))
+    }
+
+
+def reference_npv(schedule, curve: KeyRateCurve, valuation_date: date) -> float:
+    """NPV графика циклом по строкам: фактор даты - произведение факторов дней от даты оценки"""
+    npv = 0.0
+    for item in schedule.schedule_items:
+        if item.payment_date < valuation_date:
+            continue
+        log_factor, day = 0.0, valuation_date
+        while day < item.payment_date:
+            log_factor -= math.log1p(float(curve.get_rate(day)) / 100) / DISCOUNT_DAY_BASIS
+            day += timedelta(days=1)
+        flow = item.drawdown_amount - item.principal_payment - item.interest_payment
+        npv += float(flow) * math.exp(log_factor)
+    return npv
+
+
+def test_flat_rate_matches_closed_form(version_schedules):
+    result = DiscountingEngine().npv_portfolio(version_schedules, Decimal('15'), date(2024, 1, 1))
+    
+    for version_id, schedules in version_schedules.items():
+        contract_npv = result.get_contract_npv(version_id)
+        for contract_id, schedule in schedules.items():
+            expected = sum(
+                float(item.drawdown_amount - item.principal_payment - item.interest_payment)
+                * 1.15 ** -((item.payment_date - date(2024, 1, 1)).days / DISCOUNT_DAY_BASIS)
+                for item in schedule.schedule_items
+            )
+            assert contract_npv[contract_id] == pytest.approx(expected, rel=1e-12, abs=1e-6)
+        assert result.get_portfolio_npv()[version_id] == pytest.approx(sum(contract_npv.values()), abs=1e-6)
+
+
+def test_stepped_curve_matches_daily_loop(version_schedules, stepped_curve):
+    valuation_date = date(2024, 6, 1)
+    result = DiscountingEngine().npv_portfolio(version_schedules, stepped_curve, valuation_date)
+    
+    for version_id, schedules in version_schedules.items():
+        for contract_id, schedule in schedules.items():
+            expected = reference_npv(schedule, stepped_curve, valuation_date)
+            assert result.get_contract_npv(version_id)[contract_id] == pytest.approx(expected, rel=1e-10, abs=1e-6)
+
+
+def test_curve_cached_per_valuation_date(version_schedules, stepped_curve):
+    engine = DiscountingEngine()
+    engine.npv_portfolio(version_schedules, stepped_curve, date(2024, 6, 1))
+    engine.npv_portfolio(version_schedules, stepped_curve, date(2024, 6, 1))
+    engine.npv_portfolio(version_schedules, stepped_curve, date(2024, 7, 1))
+    
+    assert engine.curve_cache.get_stats() == {'size': 2, 'hits': 1, 'misses': 2}
+
+
+def test_calculator_npv_matches_closed_form():
+    cashflows = [
+        {'date': date(2024, 1, 1), 'amount': Decimal('-1000000')},
+        {'date': date(2024, 7, 1), 'amount': Decimal('300000')},
+        {'date': date(2025, 1, 1), 'amount': Decimal('400000')},
+        {'date': date(2025, 12, 31), 'amount': Decimal('500000')}
+    ]
+    expected = sum(
+        float(cashflow['amount']) * 1.12 ** -((cashflow['date'] - date(2024, 1, 1)).days / DISCOUNT_DAY_BASIS)
+        for cashflow in cashflows
+    )
+    
+    npv = InterestCalculator().calculate_net_present_value(cashflows, Decimal('0.12'))
+    
+    # Результат округлен до копейки
+    assert float(npv) == pytest.approx(expected, abs=0.005)
+    assert npv == npv.quantize(Decimal('0.01'))
@@ -0,0 +1,199 @@
+"""
+Денежная арифметика в копейках: округление, распределение погашений и итоги до копейки
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN
+import random
+
+import pytest
+
+from calculations import CalculationEngine, PaymentScheduler, TrancheBook
+from calculations.money import (
+    to_minor, from_minor, to_rate_units, divide_half_even, accrue_interest, schedule_minor_rows
+)
+
+KOPECK = Decimal('0.01')
+
+
+@pytest.mark.parametrize('numerator, denominator, expected', [
+    (5, 2, 2), (7, 2, 4), (1, 2, 0), (3, 2, 2),
+    (-5, 2, -2), (-7, 2, -4), (-1, 2, 0),
+    (1, 3, 0), (2, 3, 1), (-2, 3, -1),
+    (250, 100, 2), (350, 100, 4), (0, 7, 0)
+])
+def test_divide_half_even_ties(numerator, denominator, expected):
+    assert divide_half_even(numerator, denominator) == expected
+
+
+def test_divide_half_even_matches_decimal():
+    rng = random.Random(7)
+    for _ in range(5000):
+        numerator = rng.randint(-10 ** 12, 10 ** 12)
+        denominator = rng.choice([2, 4, 10, 360, 365, 36500, rng.randint(1, 10 ** 9)])
+        expected = int((Decimal(numerator) / Decimal(denominator)).quantize(Decimal(1), rounding=ROUND_HALF_EVEN))
+        assert divide_half_even(numerator, denominator) == expected
+
+
+@pytest.mark.parametrize('value, expected', [
+    ('0.125', 12), ('0.135', 14), ('-0.125', -12), ('1.005', 100), ('1.015', 102),
+    (0.1 + 0.2, 30), (2.675, 268), (100, 10000), (Decimal('123456789.99'), 12345678999)
+])
+def test_to_minor_half_even(value, expected):
+    assert to_minor(value) == expected
+
+
+def test_minor_round_trip():
+    rng = random.Random(11)
+    for _ in range(5000):
+        units = rng.randint(-10 ** 14, 10 ** 14)
+        amount = from_minor(units)
+        assert amount == amount.quantize(KOPECK)
+        assert to_minor(amount) == units
+        assert to_minor(str(amount)) == units
+        assert from_minor(to_minor(amount)) == amount
+
+
+def test_accrue_interest_rounds_once():
+    # 1 000 000.00 под 12.5% за 1/365 года = 342.4657... -> 342.47
+    assert accrue_interest(100_000_000, to_rate_units('12.5'), 1, 365) == 34247
+    # Половина копейки - к четному: 0.005 -> 0.00, 0.015 -> 0.02
+    assert accrue_interest(1, to_rate_units(50), 1, 1) == 0
+    assert accrue_interest(3, to_rate_units(50), 1, 1) == 2
+
+
+def tranche_book(floating_portfolio, amounts, allocation):
+    """Транши договора с заданными суммами, выданные полностью"""
+    _, drawdowns, _ = floating_portfolio
+    template = drawdowns[0]
+    book = TrancheBook([
+        template.model_copy(update={
+            'id': f"tranche_{index}",
+            'amount': from_minor(amount),
+            'drawdown_date': template.drawdown_date.fromordinal(template.drawdown_date.toordinal() + index)
+        })
+        for index, amount in enumerate(amounts)
+    ], allocation)
+    book.draw(template.drawdown_date.fromordinal(template.drawdown_date.toordinal() + len(amounts)))
+    return book
+
+
+def test_pro_rata_repayment_distributes_remainder(floating_portfolio):
+    book = tranche_book(floating_portfolio, [10000, 10000, 10000], 'pro_rata')
+    
+    # 100.00 на три равных транша: доли по 33.33, последняя копейка - первому по порядку
+    allocated = book.repay(10000)
+    assert allocated.tolist() == [3334, 3333, 3333]
+    assert book.balances.tolist() == [6666, 6667, 6667]
+
+
+def test_pro_rata_repayment_largest_remainder(floating_portfolio):
+    rng = random.Random(5)
+    for _ in range(200):
+        amounts = [rng.randint(1, 10 ** 9) for _ in range(rng.randint(1, 7))]
+        book = tranche_book(floating_portfolio, amounts, 'pro_rata')
+        amount = rng.randint(1, sum(amounts))
+        
+        allocated = book.repay(amount).tolist()
+        
+        assert sum(allocated) == amount
+        exact = [Decimal(amount) * balance / sum(amounts) for balance in amounts]
+        for share, balance, value in zip(allocated, amounts, exact):
+            assert 0 <= share <= balance
+            assert abs(share - value) < 1
+
+
+def test_fifo_repayment_and_overpayment(floating_portfolio):
+    book = tranche_book(floating_portfolio, [5000, 7000, 9000], 'fifo')
+    assert book.repay(8000).tolist() == [5000, 3000, 0]
+    # Погашение сверх остатка траншам не распределяется
+    assert book.repay(50000).tolist() == [0, 4000, 9000]
+    assert book.balances.sum() == 0
+
+
+def reference_daily_interest(contract, drawdowns, repayments, base_rate):
+    """
+    Проценты режима daily на Decimal: по траншам за день, округление каждого транша до копейки
+    
+    Returns:
+        Словарь {дата: проценты в копейках}
+    """
+    tranches = sorted(drawdowns, key=lambda drawdown: drawdown.drawdown_date)
+    rates = [
+        base_rate + drawdown.margin if drawdown.is_floating_rate() else drawdown.interest_rate
+        for drawdown in tranches
+    ]
+    balances = [Decimal('0')] * len(tranches)
+    dates = sorted({drawdown.drawdown_date for drawdown in tranches} | {repayment.repayment_date for repayment in repayments})
+    
+    interest = {}
+    for event_date in dates:
+        total = sum(
+            (balance * rate / Decimal('36500')).quantize(KOPECK, rounding=ROUND_HALF_EVEN)
+            for balance, rate in zip(balances, rates)
+        )
+        total += sum(repayment.interest_amount for repayment in repayments if repayment.repayment_date == event_date)
+        for index, drawdown in enumerate(tranches):
+            if drawdown.drawdown_date == event_date:
+                balances[index] = drawdown.amount
+        principal = sum(repayment.principal_amount for repayment in repayments if repayment.repayment_date == event_date)
+        for index, balance in enumerate(balances):
+            repaid = min(balance, principal)
+            balances[index] -= repaid
+            principal -= repaid
+        interest[event_date] = to_minor(total)
+    return interest
+
+
+def test_daily_interest_exact_to_kopeck(floating_portfolio):
+    contracts, drawdowns, repayments = floating_portfolio
+    base_rate = Decimal('16')
+    scheduler = PaymentScheduler(accrual_mode='daily')
+    
+    for contract in contracts:
+        contract_drawdowns = [drawdown for drawdown in drawdowns if drawdown.contract_id == contract.id]
+        contract_repayments = [repayment for repayment in repayments if repayment.contract_id == contract.id]
+        schedule = scheduler.create_payment_schedule(
+            contract, contract_drawdowns, contract_repayments, 'test', base_rate
+        )
+        expected = reference_daily_interest(contract, contract_drawdowns, contract_repayments, base_rate)
+        
+        rows = {row[0]: row[3] for row in schedule_minor_rows(schedule)}
+        for event_date, interest in expected.items():
+            assert rows[event_date] == interest, f"{contract.id} {event_date}"
+        assert schedule.total_interest_payments == from_minor(sum(rows.values()))
+
+
+@pytest.mark.parametrize('accrual_mode', ['daily', 'event'])
+def test_consolidated_totals_exact(floating_portfolio, accrual_mode):
+    contracts, drawdowns, repayments = floating_portfolio
+    scheduler = PaymentScheduler(accrual_mode=accrual_mode)
+    schedules = {
+        contract.id: scheduler.create_payment_schedule(
+            contract,
+            [drawdown for drawdown in drawdowns if drawdown.contract_id == contract.id],
+            [repayment for repayment in repayments if repayment.contract_id == contract.id],
+            'test',
+            Decimal('16')
+        )
+        for contract in contracts
+    }
+    
+    cashflow = CalculationEngine(accrual_mode=accrual_mode).consolidate_schedules('test', schedules, contracts)
+    
+    # Эталон - суммы Decimal элементов графиков по датам
+    expected = {}
+    for schedule in schedules.values():
+        for item in schedule.schedule_items:
+            row = expected.setdefault(item.payment_date, [Decimal('0')] * 4)
+            row[0] += item.drawdown_amount
+            row[1] += item.principal_payment
+            row[2] += item.interest_payment
+            row[3] += item.debt_balance_end
+    
+    assert [item.cashflow_date for item in cashflow.cashflow_items] == sorted(expected)
+    for item in cashflow.cashflow_items:
+        assert [
+            item.total_drawdowns, item.total_principal_payments, item.total_interest_payments, item.total_debt_balance
+        ] == expected[item.cashflow_date]
+    assert cashflow.total_interest_payments == sum(schedule.total_interest_payments for schedule in schedules.values())
+    assert cashflow.total_drawdowns == sum(drawdown.amount for drawdown in drawdowns)
@@ -0,0 +1,54 @@
+"""
+Моделирование процентов по плавающим выборкам методом Монте-Карло
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from calculations import CalculationEngine, MonteCarloRateSimulator, MAX_PATHS_COUNT, create_short_rate_model
+
+
+@pytest.fixture
+def accrual(floating_portfolio):
+    return CalculationEngine(accrual_mode='event').build_portfolio_accrual(*floating_portfolio)
+
+
+def simulate(simulator, accrual, paths_count=2_500):
+    return simulator.simulate(
+        accrual, create_short_rate_model('vasicek'), 16.0,
+        paths_count=paths_count, seed=42, valuation_date=date(2024, 1, 1)
+    )
+
+
+def test_pool_result_matches_serial(accrual):
+    serial = simulate(MonteCarloRateSimulator(max_workers=1, chunk_size=500), accrual)
+    
+    simulator = MonteCarloRateSimulator(max_workers=2, chunk_size=500)
+    try:
+        pooled = simulate(simulator, accrual)
+        executor = simulator._executor
+        # Пул переиспользуется следующими расчетами и запускается через spawn
+        repeated = simulate(simulator, accrual)
+        assert simulator._executor is executor
+        assert executor._mp_context.get_start_method() == 'spawn'
+    finally:
+        simulator.shutdown()
+    
+    assert simulator._executor is None
+    np.testing.assert_array_equal(pooled.total_bands, serial.total_bands)
+    np.testing.assert_array_equal(repeated.floating_mean, serial.floating_mean)
+
+
+def test_bands_are_ordered(accrual):
+    result = simulate(MonteCarloRateSimulator(max_workers=1), accrual, paths_count=1_000)
+    assert np.all(result.get_band(5) <= result.get_band(50) + 1e-9)
+    assert np.all(result.get_band(50) <= result.get_band(95) + 1e-9)
+    np.testing.assert_allclose(result.total_bands - result.floating_bands, np.tile(result.fixed_interest, (3, 1)))
+
+
+@pytest.mark.parametrize('paths_count', [0, MAX_PATHS_COUNT + 1])
+def test_paths_count_is_bounded(accrual, paths_count):
+    with pytest.raises(ValueError):
+        simulate(MonteCarloRateSimulator(max_workers=1), accrual, paths_count=paths_count)
@@ -0,0 +1,96 @@
+"""
+Расчеты PortfolioManager поверх клиента казначейской системы
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+
+import numpy as np
+import pytest
+
+from models import CalculationVersion
+from models.calculation_version import VersionType
+from portfolio import PortfolioManager
+
+
+@pytest.fixture
+def manager(treasury_client):
+    """Менеджер портфеля без загруженных данных"""
+    return PortfolioManager(treasury_client)
+
+
+def test_optimize_allocation_loads_portfolio(manager, treasury_client):
+    result = manager.optimize_allocation(0.5, 0.4)
+    
+    assert treasury_client.calls['contracts'] == 1
+    assert result.contract_ids == [contract.id for contract in treasury_client.contracts]
+    assert result.feasible
+    total_limit = sum(float(contract.total_limit) for contract in treasury_client.contracts)
+    assert result.target_balances.sum() == pytest.approx(0.5 * total_limit)
+    assert result.target_balances.max() <= 0.4 * result.target_balances.sum() + 1e-6
+    assert result.annual_interest(result.target_balances) <= result.annual_interest(
+        result.current_balances * result.target_balances.sum() / result.current_balances.sum()
+    ) + 1e-6
+
+
+def test_reallocation_parameters_carry_drawdown_terms(manager):
+    result = manager.optimize_allocation(0.5, 0.4)
+    
+    fresh = PortfolioManager(manager.api_client)
+    parameters = fresh.get_reallocation_parameters(result, date(2025, 1, 1))
+    
+    moved = sum(item['amount'] for item in parameters['additional_drawdowns']) - sum(
+        item['principal_amount'] for item in parameters['additional_repayments']
+    )
+    assert moved == pytest.approx(float(result.changes.sum()), abs=0.05)
+    for item in parameters['additional_drawdowns']:
+        assert {'interest_rate_type', 'interest_rate', 'margin'} <= set(item)
+        assert 'effective_rate' not in item
+
+
+def test_optimize_allocation_reloads_stale_cache(manager, treasury_client):
+    manager.optimize_allocation(0.5)
+    
+    # Новый договор в казначейской системе и истекший срок жизни кэша
+    extra = treasury_client.contracts[0].model_copy(update={'id': 'contract_extra'})
+    treasury_client.contracts.append(extra)
+    manager._cache_timestamp = datetime.now() - timedelta(minutes=manager._cache_ttl_minutes + 1)
+    
+    result = manager.optimize_allocation(0.5)
+    
+    assert treasury_client.calls['contracts'] == 2
+    assert 'contract_extra' in result.contract_ids
+    np.testing.assert_allclose(
+        result.current_balances,
+        [float(contract.total_limit - contract.available_limit) for contract in treasury_client.contracts]
+    )
+
+
+def test_base_rate_captured_per_snapshot(manager, treasury_client):
+    assert manager.get_current_base_rate() == Decimal('16')
+    snapshot = manager.get_snapshot_version()
+    
+    # Ставка в казначейской системе меняется - снимок продолжает использовать свою
+    treasury_client.base_rate = Decimal('21')
+    for _ in range(5):
+        assert manager.get_current_base_rate() == Decimal('16')
+        assert manager.get_snapshot_version() == snapshot
+    assert treasury_client.calls['base_rate'] == 1
+    
+    manager.load_portfolio_data(force_refresh=True)
+    assert manager.get_snapshot_version() != snapshot
+    assert manager.get_current_base_rate() == Decimal('21')
+    assert treasury_client.calls['base_rate'] == 2
+
+
+def test_cashflow_uses_snapshot_base_rate(manager, treasury_client):
+    version = CalculationVersion(id='base', name='base', version_type=VersionType.BASE, created_by='test')
+    before = manager.calculate_portfolio_cashflow(version).total_interest_payments
+    
+    # Ставка в API изменилась после загрузки снимка: расчет не должен ее увидеть
+    treasury_client.base_rate = Decimal('21')
+    manager._schedules_cache.clear()
+    assert manager.calculate_portfolio_cashflow(version).total_interest_payments == before
+    
+    manager.load_portfolio_data(force_refresh=True)
+    assert manager.calculate_portfolio_cashflow(version).total_interest_payments > before
@@ -0,0 +1,68 @@
+"""
+Пакетный расчет по ставкам (RateSweepEngine) против графиков планировщика
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from calculations import PaymentScheduler, PortfolioAccrual, RateSweepEngine, DailyRateTable
+from calculations.money import schedule_minor_rows, MINOR_UNITS
+
+
+def scheduler_interest_by_date(scheduler, contracts, drawdowns, repayments, table):
+    """Проценты графиков планировщика по датам"""
+    totals = {}
+    for contract in contracts:
+        schedule = scheduler.create_payment_schedule(
+            contract,
+            [drawdown for drawdown in drawdowns if drawdown.contract_id == contract.id],
+            [repayment for repayment in repayments if repayment.contract_id == contract.id],
+            'test',
+            base_rate_table=table
+        )
+        for row in schedule_minor_rows(schedule):
+            totals[row[0]] = totals.get(row[0], 0) + row[3]
+    return totals
+
+
+@pytest.mark.parametrize('accrual_mode', ['daily', 'event'])
+def test_sweep_matches_scheduler_under_stepped_curve(floating_portfolio, stepped_curve, accrual_mode):
+    contracts, drawdowns, repayments = floating_portfolio
+    scheduler = PaymentScheduler(accrual_mode=accrual_mode)
+    table = DailyRateTable(stepped_curve, date(2024, 1, 1), date(2026, 12, 31))
+    
+    expected = scheduler_interest_by_date(scheduler, contracts, drawdowns, repayments, table)
+    accrual = PortfolioAccrual.from_portfolio(scheduler, contracts, drawdowns, repayments)
+    result = RateSweepEngine().sweep(accrual, [stepped_curve])
+    
+    expected_interest = np.array([expected.get(event_date, 0) for event_date in result.dates]) / MINOR_UNITS
+    # Планировщик округляет проценты транша до копейки на каждом событии
+    tolerance = 0.01 * len(drawdowns) * 2
+    assert np.abs(result.interest[0] - expected_interest).max() <= tolerance
+    assert result.total_interest()[0] == pytest.approx(expected_interest.sum(), abs=tolerance * len(result.dates))
+    assert expected_interest.sum() > 0
+
+
+def test_daily_and_event_modes_use_one_rate_scale(floating_portfolio):
+    contracts, drawdowns, repayments = floating_portfolio
+    contract = contracts[0]
+    drawdown = drawdowns[0].model_copy(update={'interest_rate_type': 'fixed', 'margin': None, 'status': 'actual'})
+    repayment = repayments[0].model_copy(update={
+        'repayment_date': date.fromordinal(drawdown.drawdown_date.toordinal() + 1),
+        'principal_amount': drawdown.amount
+    })
+    
+    # Один день по остатку (далее долг погашен): в обоих режимах остаток * ставка % / 100 * доля года
+    one_day = {}
+    for accrual_mode in ('daily', 'event'):
+        schedule = PaymentScheduler(accrual_mode=accrual_mode).create_payment_schedule(
+            contract, [drawdown], [repayment], 'test'
+        )
+        one_day[accrual_mode] = float(schedule.total_interest_payments)
+    
+    expected = float(drawdown.amount * drawdown.interest_rate) / 100 / 365
+    assert one_day['daily'] == pytest.approx(expected, abs=0.01)
+    # Режим event - по базе Actual/360
+    assert one_day['event'] == pytest.approx(expected * 365 / 360, abs=0.01)
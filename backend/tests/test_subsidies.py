@@ -0,0 +1,75 @@
+"""
+SubsidyBook: пересчет субсидий и чистых процентов против помесячного цикла на Decimal
+"""
+
+from decimal import Decimal
+
+import pytest
+
+from calculations.subsidies import SubsidyBook
+from calculations.money import to_minor
+
+from benchmarks.subsidy_benchmark import generate_portfolio, program_curves, reference
+
+MONTHS = 36
+
+
+@pytest.fixture(scope='module')
+def portfolio():
+    """Субсидируемые договоры всех программ, часть - с ограничением субсидируемой суммы"""
+    return generate_portfolio(60, MONTHS)
+
+
+def assert_matches_reference(result, expected):
+    """Субсидия и чистые проценты договоров совпадают с эталоном с точностью до копейки"""
+    totals = result.get_contract_totals()
+    assert set(totals) == set(expected)
+    for contract_id, (subsidy, net) in expected.items():
+        assert abs(to_minor(Decimal(repr(totals[contract_id]['subsidy']))) - to_minor(subsidy)) <= 1, contract_id
+        assert abs(to_minor(Decimal(repr(totals[contract_id]['net_interest']))) - to_minor(net)) <= 1, contract_id
+
+
+def test_contract_terms_match_decimal_loop(portfolio):
+    contracts, schedules = portfolio
+    
+    result = SubsidyBook(contracts, schedules).calculate()
+    
+    assert_matches_reference(result, reference(contracts, schedules, {}))
+
+
+def test_program_recompute_matches_decimal_loop(portfolio):
+    contracts, schedules = portfolio
+    book = SubsidyBook(contracts, schedules)
+    curves = program_curves(MONTHS)
+    
+    # Пересчет по новым условиям не меняет массивы книги
+    recomputed = book.calculate(curves)
+    original = book.calculate()
+    
+    assert_matches_reference(recomputed, reference(contracts, schedules, curves))
+    assert_matches_reference(original, reference(contracts, schedules, {}))
+    others = [index for index, program in enumerate(book.programs) if program == 'other']
+    assert (recomputed.subsidy[others] == original.subsidy[others]).all()
+    assert recomputed.get_program_totals()['1528']['subsidy'] != original.get_program_totals()['1528']['subsidy']
+
+
+def test_program_totals_add_up(portfolio):
+    contracts, schedules = portfolio
+    
+    result = SubsidyBook(contracts, schedules).calculate(program_curves(MONTHS))
+    summary = result.to_dict()
+    
+    assert summary['months'] == MONTHS
+    assert sum(totals['contracts'] for totals in summary['by_program'].values()) == len(contracts)
+    assert sum(totals['subsidy'] for totals in summary['by_program'].values()) == pytest.approx(summary['total_subsidy'])
+    assert sum(month['net_interest'] for month in summary['by_month']) == pytest.approx(summary['total_net_interest'])
+    assert summary['total_gross_interest'] - summary['total_subsidy'] == pytest.approx(summary['total_net_interest'])
+
+
+def test_contracts_without_subsidy_skipped(portfolio):
+    contracts, schedules = portfolio
+    unsubsidized = contracts[0].model_copy(update={'subsidy': None})
+    
+    book = SubsidyBook([unsubsidized] + contracts[1:], schedules)
+    
+    assert book.contract_ids == [contract.id for contract in contracts[1:]]
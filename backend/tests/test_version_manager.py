@@ -0,0 +1,60 @@
+"""
+Файлы куба сценариев VersionManager
+"""
+
+import os
+
+import pytest
+
+from portfolio import PortfolioManager
+from versions import VersionManager
+
+
+@pytest.fixture
+def version_manager(treasury_client, tmp_path):
+    manager = VersionManager(PortfolioManager(treasury_client), cube_dir=str(tmp_path))
+    yield manager
+    manager.close()
+
+
+def test_cube_files_scoped_per_process(version_manager, tmp_path):
+    version_manager.create_base_version("base", "", "test")
+    cube = version_manager.get_scenario_cube()
+    
+    assert cube.path.parent == version_manager.cube_dir
+    assert version_manager.cube_dir.parent == tmp_path
+    assert version_manager.cube_dir.name.startswith(f"process_{os.getpid()}_")
+    
+    # Перестроение куба удаляет файлы предыдущего
+    previous = cube.path
+    version_manager.create_base_version("base 2", "", "test")
+    rebuilt = version_manager.get_scenario_cube()
+    assert rebuilt.path != previous and not previous.exists()
+    assert sorted(path.name for path in version_manager.cube_dir.iterdir()) == sorted(
+        [rebuilt.path.name, rebuilt.path.with_suffix('.json').name]
+    )
+
+
+def test_stale_cube_dirs_removed(treasury_client, tmp_path):
+    dead = tmp_path / "process_999999999_deadbeef"
+    alive = tmp_path / f"process_{os.getppid()}_cafebabe"
+    for directory in (dead, alive):
+        directory.mkdir()
+        (directory / "scenario_cube_1.npy").write_bytes(b"")
+    
+    manager = VersionManager(PortfolioManager(treasury_client), cube_dir=str(tmp_path))
+    
+    assert not dead.exists()
+    assert alive.exists()
+    manager.close()
+
+
+def test_close_removes_current_cube(treasury_client, tmp_path):
+    manager = VersionManager(PortfolioManager(treasury_client), cube_dir=str(tmp_path))
+    manager.create_base_version("base", "", "test")
+    manager.get_scenario_cube()
+    assert manager.cube_dir.exists()
+    
+    manager.close()
+    
+    assert not manager.cube_dir.exists()
@@ -0,0 +1,73 @@
+"""
+XIRRSolver: пример XIRR Excel, резервный метод Брента и линии без корня
+"""
+
+from datetime import date
+
+import numpy as np
+import pytest
+
+from calculations.xirr import XIRRSolver, XIRR_METHODS
+
+# Пример из документации функции XIRR Excel: ставка 0.373362535 (Excel останавливает
+# итерации на точности 1e-8, поэтому сравнение с допуском 1e-8)
+EXCEL_DATES = [date(2008, 1, 1), date(2008, 3, 1), date(2008, 10, 30), date(2009, 2, 15), date(2009, 4, 1)]
+EXCEL_AMOUNTS = [-10000.0, 2750.0, 4250.0, 3250.0, 2750.0]
+EXCEL_RATE = 0.373362535
+
+# Потоки, на которых векторный Ньютон не сходится за лимит итераций
+BRENT_TIMES = [0.0, 5.75, 6.75]
+BRENT_AMOUNTS = [-15.0, -150.0, 140.0]
+
+
+def bisect_rate(times, amounts, lower: float, upper: float) -> float:
+    """Корень NPV(r) на отрезке со сменой знака делением пополам"""
+    times, amounts = np.asarray(times), np.asarray(amounts)
+    
+    def npv(rate: float) -> float:
+        return float(amounts @ (1 + rate) ** -times)
+    
+    for _ in range(200):
+        middle = (lower + upper) / 2
+        if np.sign(npv(middle)) == np.sign(npv(lower)):
+            lower = middle
+        else:
+            upper = middle
+    return (lower + upper) / 2
+
+
+def test_excel_xirr_example():
+    result = XIRRSolver().solve_dates(
+        ['excel'], np.zeros(len(EXCEL_DATES), dtype=np.int64),
+        [value.toordinal() for value in EXCEL_DATES], EXCEL_AMOUNTS
+    )
+    
+    assert result.get_rate('excel') == pytest.approx(EXCEL_RATE, abs=1e-8)
+    assert result.methods[0] == XIRR_METHODS.index('newton')
+    assert result.get_effective_rates()['excel'] == pytest.approx(EXCEL_RATE * 100, abs=1e-6)
+
+
+def test_brent_fallback_lane():
+    result = XIRRSolver().solve(['lane'], np.zeros(len(BRENT_TIMES), dtype=np.int64), BRENT_TIMES, BRENT_AMOUNTS)
+    
+    assert result.methods[0] == XIRR_METHODS.index('brent')
+    assert result.get_rate('lane') == pytest.approx(bisect_rate(BRENT_TIMES, BRENT_AMOUNTS, -0.5, 0.5), abs=1e-10)
+    assert result.get_diagnostics()['brent'] == 1
+
+
+def test_lanes_solved_together():
+    # Линии Ньютона, Брента и без смены знака в одном вызове
+    excel_times = [(value - EXCEL_DATES[0]).days / 365.0 for value in EXCEL_DATES]
+    lane_index = np.repeat([0, 1, 2], [len(excel_times), len(BRENT_TIMES), 2])
+    times = np.concatenate([excel_times, BRENT_TIMES, [0.0, 1.0]])
+    amounts = np.concatenate([EXCEL_AMOUNTS, BRENT_AMOUNTS, [-100.0, -50.0]])
+    
+    result = XIRRSolver().solve(['excel', 'brent', 'outflows'], lane_index, times, amounts)
+    diagnostics = result.get_diagnostics()
+    
+    assert result.get_rate('excel') == pytest.approx(EXCEL_RATE, abs=1e-8)
+    assert result.get_rate('brent') == pytest.approx(bisect_rate(BRENT_TIMES, BRENT_AMOUNTS, -0.5, 0.5), abs=1e-10)
+    assert result.get_rate('outflows') is None
+    assert (diagnostics['newton'], diagnostics['brent'], diagnostics['failed']) == (1, 1, 1)
+    assert diagnostics['failures'] == {'outflows': 'no sign change in cashflows'}
+    assert diagnostics['max_residual'] < 1e-12
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк агрегации портфеля: DataAggregator (python) против FrameAggregator (pandas)
+
+Запуск:
+    python benchmarks/aggregation_benchmark.py
+    python benchmarks/aggregation_benchmark.py --sizes 10000 100000 --repeat 3
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import List, Tuple
+import argparse
+import random
+import time
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, Drawdown, Repayment
+from models.credit_contract import CreditType, Currency, PaymentScheduleType, PaymentFrequency
+from models.drawdown import InterestRateType, DrawdownStatus
+from models.repayment import RepaymentStatus, RepaymentType
+from portfolio import DataAggregator, FrameAggregator
+
+
+def generate_portfolio(drawdowns_count: int,
+                       drawdowns_per_contract: int = 100,
+                       seed: int = 42) -> Tuple[List[CreditContract], List[Drawdown], List[Repayment]]:
+    """
+    Генерация синтетического портфеля
+    
+    Args:
+        drawdowns_count: Количество выборок
+        drawdowns_per_contract: Среднее количество выборок на договор
+        seed: Инициализация генератора случайных чисел
+        
+    Returns:
+        Кортеж (договоры, выборки, погашения); погашений столько же, сколько выборок
+    """
+    rng = random.Random(seed)
+    start = date(2020, 1, 1)
+    contracts_count = max(1, drawdowns_count // drawdowns_per_contract)
+    
+    contracts = []
+    for index in range(contracts_count):
+        total_limit = Decimal(rng.randint(1_000, 500_000)) * 1000
+        contract_start = start + timedelta(days=rng.randint(0, 1500))
+        contracts.append(CreditContract(
+            id=f"contract_{index}",
+            credit_type=rng.choice(list(CreditType)),
+            currency=rng.choice(list(Currency)),
+            total_limit=total_limit,
+            available_limit=total_limit * Decimal(rng.randint(0, 100)) / 100,
+            start_date=contract_start,
+            end_date=contract_start + timedelta(days=rng.randint(180, 3650)),
+            payment_schedule_type=PaymentScheduleType.BULLET,
+            interest_payment_frequency=PaymentFrequency.MONTHLY,
+            principal_payment_frequency=PaymentFrequency.MONTHLY
+        ))
+    
+    drawdowns = []
+    repayments = []
+    for index in range(drawdowns_count):
+        contract = contracts[rng.randrange(contracts_count)]
+        event_date = contract.start_date + timedelta(days=rng.randint(0, 720))
+        drawdowns.append(Drawdown(
+            id=f"drawdown_{index}",
+            contract_id=contract.id,
+            drawdown_date=event_date,
+            amount=Decimal(rng.randint(1, 10_000)) * 100,
+            interest_rate_type=InterestRateType.FIXED,
+            interest_rate=Decimal('12.5'),
+            status=DrawdownStatus.ACTUAL
+        ))
+        repayments.append(Repayment(
+            id=f"repayment_{index}",
+            contract_id=contract.id,
+            repayment_date=event_date + timedelta(days=rng.randint(30, 365)),
+            principal_amount=Decimal(rng.randint(0, 10_000)) * 100,
+            interest_amount=Decimal(rng.randint(0, 1_000)) * 10,
+            status=RepaymentStatus.PLANNED,
+            repayment_type=RepaymentType.FULL
+        ))
+    
+    return contracts, drawdowns, repayments
+
+
+def measure(func, repeat: int) -> float:
+    """Лучшее время выполнения из repeat запусков, в секундах"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк агрегации портфеля")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Количество выборок в портфеле")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    python_aggregator = DataAggregator()
+    frame_aggregator = FrameAggregator()
+    
+    print(f"{'drawdowns':>10} {'python, s':>10} {'pandas, s':>10} {'frames, s':>10} {'speedup':>8}  validation")
+    
+    for size in args.sizes:
+        contracts, drawdowns, repayments = generate_portfolio(size)
+        
+        python_time = measure(
+            lambda: python_aggregator.aggregate_portfolio_data(contracts, drawdowns, repayments), args.repeat
+        )
+        pandas_time = measure(
+            lambda: frame_aggregator.aggregate_portfolio_data(contracts, drawdowns, repayments), args.repeat
+        )
+        
+        # Агрегация по готовому колоночному снимку (без разбора объектов)
+        frames = frame_aggregator.build_frames(contracts, drawdowns, repayments)
+        frames_time = measure(lambda: frame_aggregator.aggregate_frames(frames), args.repeat)
+        
+        mismatches = frame_aggregator.validate(contracts, drawdowns, repayments)
+        validation = 'ok' if not mismatches else f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+        
+        print(f"{size:>10} {python_time:>10.3f} {pandas_time:>10.3f} {frames_time:>10.3f} "
+              f"{python_time / pandas_time:>7.1f}x  {validation}")
+
+
+if __name__ == "__main__":
+    main()
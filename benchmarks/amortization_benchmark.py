@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк графиков погашения: цикл по периодам на Decimal против AmortizationGenerator
+
+Эталон - пошаговый расчет каждого договора на Decimal (аннуитетный платеж,
+погашение ОД и проценты период за периодом). Колонка validation проверяет,
+что сумма погашений равна сумме кредита и остаток в конце нулевой, а
+проценты и остатки совпадают с эталоном с точностью до копейки (эталон
+округляет пошагово, замкнутая форма - один раз).
+
+Запуск:
+    python benchmarks/amortization_benchmark.py
+    python benchmarks/amortization_benchmark.py --sizes 1000 10000 --repeat 3
+"""
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import List
+import argparse
+import time
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models.credit_contract import (
+    CreditContract, CreditType, Currency, PaymentScheduleType, PaymentFrequency
+)
+from calculations.amortization import AmortizationGenerator, periods_per_year
+from calculations.money import to_minor
+
+KOPECK = Decimal('0.01')
+SCHEDULE_TYPES = [PaymentScheduleType.ANNUITY, PaymentScheduleType.DIFFERENTIATED, PaymentScheduleType.BULLET]
+FREQUENCIES = [PaymentFrequency.MONTHLY, PaymentFrequency.QUARTERLY]
+
+
+def generate_contracts(size: int, seed: int = 42) -> List[CreditContract]:
+    """Договоры сроком 1-10 лет с равным числом договоров каждого типа графика"""
+    rng = np.random.default_rng(seed)
+    contracts = []
+    for index in range(size):
+        start = date(2024, 1, 1).toordinal() + int(rng.integers(0, 730))
+        start_date = date.fromordinal(start)
+        years = int(rng.integers(1, 11))
+        contracts.append(CreditContract(
+            id=f"contract_{index}",
+            credit_type=CreditType.ONE_TIME_LOAN,
+            currency=Currency.RUB,
+            total_limit=Decimal(int(rng.integers(1_000_000, 1_000_000_000))),
+            available_limit=Decimal('0'),
+            start_date=start_date,
+            end_date=start_date.replace(year=start_date.year + years, day=min(start_date.day, 28)),
+            payment_schedule_type=SCHEDULE_TYPES[index % len(SCHEDULE_TYPES)],
+            interest_payment_frequency=FREQUENCIES[index % len(FREQUENCIES)],
+            principal_payment_frequency=FREQUENCIES[index % len(FREQUENCIES)],
+            margin=Decimal(int(rng.integers(500, 2500))) / 100
+        ))
+    return contracts
+
+
+def reference_schedule(balance: Decimal, rate: Decimal, schedule_type: str, dates: List[date], periods: float):
+    """
+    Пошаговый график одного договора на Decimal (база Actual/360)
+    
+    Returns:
+        Списки (погашения ОД, проценты, остатки на конец)
+    """
+    n = len(dates) - 1
+    period_rate = rate / 100 / Decimal(str(periods))
+    if schedule_type == 'annuity':
+        payment = balance * period_rate / (1 - (1 + period_rate) ** -n)
+    principal_payments, interest_payments, balances = [], [], []
+    principal_left = balance
+    
+    for k in range(1, n + 1):
+        if schedule_type == 'annuity':
+            interest = balance * period_rate
+            principal = payment - interest if k < n else balance
+        else:
+            interest = balance * rate / 100 * (dates[k] - dates[k - 1]).days / 360
+            if schedule_type == 'differentiated':
+                principal = principal_left / n if k < n else balance
+            else:
+                principal = balance if k == n else Decimal('0')
+        balance -= principal
+        principal_payments.append(principal.quantize(KOPECK, rounding=ROUND_HALF_EVEN))
+        interest_payments.append(interest.quantize(KOPECK, rounding=ROUND_HALF_EVEN))
+        balances.append(balance.quantize(KOPECK, rounding=ROUND_HALF_EVEN))
+    return principal_payments, interest_payments, balances
+
+
+def measure(func, repeat: int):
+    """Лучшее время выполнения из repeat запусков (секунды) и результат"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк графиков погашения")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000],
+                        help="Количество договоров")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    generator = AmortizationGenerator('Actual/360')
+    
+    print(f"{'contracts':>10} {'rows':>9} {'decimal loop, s':>16} {'vector, s':>10} {'speedup':>8}  validation")
+    
+    for size in args.sizes:
+        contracts = generate_contracts(size)
+        vector_time, result = measure(lambda: generator.generate(contracts), args.repeat)
+        bounds = result.get_lane_bounds()
+        
+        def reference():
+            return [
+                reference_schedule(
+                    contract.total_limit, contract.margin, contract.payment_schedule_type.value,
+                    [date.fromordinal(int(ordinal)) for ordinal in result.ordinals[bounds[lane]:bounds[lane + 1]]],
+                    periods_per_year(contract.principal_payment_frequency)
+                )
+                for lane, contract in enumerate(contracts)
+            ]
+        
+        decimal_time, expected = measure(reference, 1)
+        
+        mismatches = []
+        for lane, contract in enumerate(contracts):
+            rows = slice(bounds[lane] + 1, bounds[lane + 1])
+            if result.principal[rows].sum() != to_minor(contract.total_limit) or result.balance_end[rows][-1] != 0:
+                mismatches.append(f"{contract.id}: principal does not amortize")
+            for name, values, reference_values in (
+                ('principal', result.principal[rows], expected[lane][0]),
+                ('interest', result.interest[rows], expected[lane][1]),
+                ('balance', result.balance_end[rows], expected[lane][2])
+            ):
+                difference = np.abs(values - np.array([to_minor(value) for value in reference_values])).max()
+                # Допуск - копейка на округление
+                if difference > 1:
+                    mismatches.append(f"{contract.id}: {name} differs by {difference} kopecks")
+        validation = 'ok' if not mismatches else f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+        
+        print(f"{size:>10} {len(result.ordinals):>9} {decimal_time:>16.3f} {vector_time:>10.3f} "
+              f"{decimal_time / vector_time:>7.0f}x  {validation}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк календаря рабочих дней: QuantLib по одной дате против BusinessCalendar
+
+Замеряются перенос дат (Following, ModifiedFollowing), сдвиг на рабочие дни
+и построение графиков дат уплаты для портфеля договоров (ql.Schedule на
+договор против одной векторной операции). Эталон - QuantLib с теми же
+праздниками (BespokeCalendar); расхождения выводятся в колонке validation.
+Последняя строка - сетки дат по договорам с повторяющимися условиями:
+построение на каждый договор против DateGridCache (колонка quantlib - без
+кэша).
+
+Запуск:
+    python benchmarks/calendar_benchmark.py
+    python benchmarks/calendar_benchmark.py --sizes 10000 100000 --repeat 3
+"""
+
+from datetime import date
+from typing import List
+import argparse
+import time
+
+import numpy as np
+import QuantLib as ql
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from calculations.business_calendar import BusinessCalendar, russian_holidays
+from calculations.date_grid import DateGridCache
+
+# Правила переноса QuantLib
+QUANTLIB_CONVENTIONS = {
+    'following': ql.Following,
+    'modified_following': ql.ModifiedFollowing
+}
+
+# Периодичности уплаты: шаг QuantLib
+QUANTLIB_PERIODS = {
+    'monthly': ql.Period(1, ql.Months),
+    'quarterly': ql.Period(3, ql.Months),
+    'semi_annually': ql.Period(6, ql.Months)
+}
+
+
+def quantlib_calendar(first_year: int, last_year: int) -> ql.Calendar:
+    """Календарь QuantLib с праздниками russian_holidays"""
+    calendar = ql.BespokeCalendar('russia')
+    calendar.addWeekend(ql.Saturday)
+    calendar.addWeekend(ql.Sunday)
+    for year in range(first_year, last_year + 1):
+        for holiday in russian_holidays(year):
+            calendar.addHoliday(ql.Date(holiday.day, holiday.month, holiday.year))
+    return calendar
+
+
+def to_quantlib(ordinal: int) -> ql.Date:
+    """Дата QuantLib по порядковому номеру"""
+    value = date.fromordinal(int(ordinal))
+    return ql.Date(value.day, value.month, value.year)
+
+
+def from_quantlib(value: ql.Date) -> int:
+    """Порядковый номер даты QuantLib"""
+    return date(value.year(), value.month(), value.dayOfMonth()).toordinal()
+
+
+def quantlib_schedules(calendar: ql.Calendar,
+                       starts: np.ndarray,
+                       ends: np.ndarray,
+                       frequencies: List[str],
+                       convention: str) -> np.ndarray:
+    """Даты уплаты через ql.Schedule по одному договору (даты до окончания договора)"""
+    result = []
+    for start, end, frequency in zip(starts, ends, frequencies):
+        # Конец графика - последняя дата периода не позже окончания договора
+        schedule = ql.Schedule(
+            to_quantlib(start), to_quantlib(end) + ql.Period(1, ql.Years), QUANTLIB_PERIODS[frequency], calendar,
+            QUANTLIB_CONVENTIONS[convention], QUANTLIB_CONVENTIONS[convention], ql.DateGeneration.Forward, False
+        )
+        unadjusted = ql.Schedule(
+            to_quantlib(start), to_quantlib(end) + ql.Period(1, ql.Years), QUANTLIB_PERIODS[frequency],
+            ql.NullCalendar(), ql.Unadjusted, ql.Unadjusted, ql.DateGeneration.Forward, False
+        )
+        dates = sorted({
+            from_quantlib(adjusted)
+            for adjusted, raw in zip(schedule, unadjusted) if from_quantlib(raw) <= end
+        })
+        result.extend(dates)
+    return np.array(result, dtype=np.int64)
+
+
+def measure(func, repeat: int):
+    """Лучшее время выполнения из repeat запусков (секунды) и результат"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк календаря рабочих дней")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000],
+                        help="Количество дат (договоров - в 10 раз меньше)")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    calendar = BusinessCalendar('russia')
+    ql_calendar = quantlib_calendar(2018, 2045)
+    
+    print(f"{'operation':>28} {'size':>8} {'quantlib, s':>12} {'vector, s':>10} {'speedup':>8}  validation")
+    
+    for size in args.sizes:
+        rng = np.random.default_rng(size)
+        ordinals = rng.integers(date(2020, 1, 1).toordinal(), date(2035, 1, 1).toordinal(), size)
+        shifts = rng.integers(-30, 31, size)
+        
+        operations = []
+        for convention, ql_convention in QUANTLIB_CONVENTIONS.items():
+            operations.append((
+                f"adjust {convention}",
+                lambda convention=convention, ql_convention=ql_convention: np.array(
+                    [from_quantlib(ql_calendar.adjust(to_quantlib(ordinal), ql_convention)) for ordinal in ordinals]
+                ),
+                lambda convention=convention: calendar.adjust(ordinals, convention)
+            ))
+        operations.append((
+            "advance business days",
+            lambda: np.array([
+                from_quantlib(ql_calendar.advance(to_quantlib(ordinal), int(shift), ql.Days))
+                for ordinal, shift in zip(ordinals, shifts)
+            ]),
+            lambda: calendar.advance(ordinals, shifts)
+        ))
+        
+        # Графики договоров: начало, срок 1-10 лет, периодичность
+        contracts = size // 10
+        starts = ordinals[:contracts]
+        ends = np.array([
+            date.fromordinal(int(start)).replace(day=1).toordinal() + int(rng.integers(365, 3650))
+            for start in starts
+        ], dtype=np.int64)
+        frequencies = [list(QUANTLIB_PERIODS)[index % len(QUANTLIB_PERIODS)] for index in range(contracts)]
+        operations.append((
+            "schedules modified_following",
+            lambda: quantlib_schedules(ql_calendar, starts, ends, frequencies, 'modified_following'),
+            lambda: calendar.schedules(starts, ends, frequencies, 'modified_following')[1]
+        ))
+        
+        # Сетки по одной на договор: условия повторяются (10 договоров на набор условий)
+        terms = [
+            (date.fromordinal(int(starts[index % max(contracts // 10, 1)])),
+             date.fromordinal(int(ends[index % max(contracts // 10, 1)])),
+             frequencies[index % max(contracts // 10, 1)])
+            for index in range(contracts)
+        ]
+        
+        def cached_grids():
+            cache = DateGridCache()
+            grids = [cache.get(calendar, *term, 'modified_following') for term in terms]
+            return np.concatenate(grids)
+        
+        operations.append((
+            "grids per contract (cache)",
+            lambda: np.concatenate([calendar.schedule(*term, 'modified_following') for term in terms]),
+            cached_grids
+        ))
+        
+        for name, reference, vectorized in operations:
+            quantlib_time, expected = measure(reference, 1)
+            vector_time, result = measure(vectorized, args.repeat)
+            mismatches = int((result != expected).sum()) if len(result) == len(expected) else -1
+            validation = 'ok' if mismatches == 0 else (
+                f"{mismatches} mismatches" if mismatches > 0 else f"length {len(result)} != {len(expected)}"
+            )
+            print(f"{name:>28} {size:>8} {quantlib_time:>12.3f} {vector_time:>10.4f} "
+                  f"{quantlib_time / vector_time:>7.0f}x  {validation}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк долей года: QuantLib по одному периоду против DayCountService (NumPy)
+
+Совпадение векторного расчета с QuantLib проверяется тестами
+backend/tests/test_day_count.py.
+
+Запуск:
+    python benchmarks/day_count_benchmark.py
+    python benchmarks/day_count_benchmark.py --sizes 10000 1000000 --repeat 3
+"""
+
+from datetime import date
+import argparse
+import time
+
+import numpy as np
+import QuantLib as ql
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from calculations.day_count import DayCountService
+
+# Эталонные базы QuantLib
+QUANTLIB_DAY_COUNTS = {
+    'Actual/360': ql.Actual360(),
+    'Actual/365F': ql.Actual365Fixed(),
+    '30/360': ql.Thirty360(ql.Thirty360.BondBasis),
+    'Actual/Actual': ql.ActualActual(ql.ActualActual.ISDA)
+}
+
+
+def generate_periods(size: int, seed: int = 42):
+    """
+    Генерация случайных периодов
+    
+    Args:
+        size: Количество периодов
+        seed: Инициализация генератора случайных чисел
+        
+    Returns:
+        Кортеж (начала, окончания) порядковых номеров дат (date.toordinal())
+    """
+    rng = np.random.default_rng(seed)
+    start = rng.integers(date(2000, 1, 1).toordinal(), date(2030, 1, 1).toordinal(), size)
+    # Периоды до трех лет: в выборку попадают концы месяцев и високосные годы
+    end = start + rng.integers(1, 3 * 366, size)
+    return start.astype(np.int64), end.astype(np.int64)
+
+
+def quantlib_year_fractions(day_count, start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Доли года через QuantLib по одному периоду"""
+    result = np.empty(len(start))
+    for index in range(len(start)):
+        start_date = date.fromordinal(int(start[index]))
+        end_date = date.fromordinal(int(end[index]))
+        result[index] = day_count.yearFraction(
+            ql.Date(start_date.day, start_date.month, start_date.year),
+            ql.Date(end_date.day, end_date.month, end_date.year)
+        )
+    return result
+
+
+def measure(func, repeat: int) -> float:
+    """Лучшее время выполнения из repeat запусков, в секундах"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк долей года по базам расчета дней")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                        help="Количество периодов")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    print(f"{'basis':>14} {'periods':>10} {'per-call/s':>12} {'vector/s':>12} {'speedup':>8}")
+    
+    for size in args.sizes:
+        start, end = generate_periods(size)
+        
+        for basis, day_count in QUANTLIB_DAY_COUNTS.items():
+            service = DayCountService(basis)
+            
+            quantlib_time = measure(lambda: quantlib_year_fractions(day_count, start, end), 1)
+            vector_time = measure(lambda: service.year_fractions(start, end), args.repeat)
+            
+            
+            print(f"{basis:>14} {size:>10} {size / quantlib_time:>12,.0f} {size / vector_time:>12,.0f} "
+                  f"{quantlib_time / vector_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
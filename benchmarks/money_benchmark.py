@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк денежной арифметики: Decimal против целых копеек (calculations.money)
+
+Замеряются два горячих цикла - начисление процентов по событиям графика и
+консолидация графиков в кэш-флоу портфеля. Колонка validation проверяет
+точность до копейки: проценты строк совпадают с эталоном на Decimal с
+банковским округлением по каждому траншу, итоги графиков и консолидированного кэш-флоу -
+с суммами элементов.
+
+Запуск:
+    python benchmarks/money_benchmark.py
+    python benchmarks/money_benchmark.py --sizes 1000 10000 --repeat 3
+"""
+
+from decimal import Decimal, ROUND_HALF_EVEN, localcontext
+from typing import Dict, List
+import argparse
+import random
+import time
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import PaymentSchedule
+from calculations import CalculationEngine, PaymentScheduler
+from calculations.money import (
+    to_minor, from_minor, to_rate_units, divide_half_even, schedule_minor_rows, RATE_SCALE
+)
+from benchmarks.aggregation_benchmark import generate_portfolio
+
+KOPECK = Decimal('0.01')
+
+
+def accrue_decimal(balances: List[Decimal], rates: List[Decimal]) -> Decimal:
+    """Проценты за день по событиям на Decimal (остаток * ставка % / 100 / 365)"""
+    total = Decimal('0')
+    for balance, rate in zip(balances, rates):
+        total += (balance * (rate / Decimal('36500'))).quantize(KOPECK, rounding=ROUND_HALF_EVEN)
+    return total
+
+
+def accrue_minor(balances: List[int], rates: List[int]) -> int:
+    """Те же проценты в целых копейках"""
+    total = 0
+    for balance, rate in zip(balances, rates):
+        total += divide_half_even(balance * rate, 100 * RATE_SCALE * 365)
+    return total
+
+
+def consolidate_decimal(schedules: Dict[str, PaymentSchedule]) -> Dict:
+    """Консолидация графиков по датам на Decimal"""
+    totals = {}
+    for schedule in schedules.values():
+        for item in schedule.schedule_items:
+            row = totals.get(item.payment_date)
+            if row is None:
+                row = totals[item.payment_date] = [Decimal('0')] * 4
+            row[0] += item.drawdown_amount
+            row[1] += item.principal_payment
+            row[2] += item.interest_payment
+            row[3] += item.debt_balance_end
+    return totals
+
+
+def consolidate_minor(schedules: Dict[str, PaymentSchedule]) -> Dict:
+    """Консолидация графиков по датам в целых копейках"""
+    totals = {}
+    for schedule in schedules.values():
+        for event_date, drawdown_amount, principal_payment, interest_payment, debt_balance in schedule_minor_rows(schedule):
+            row = totals.get(event_date)
+            if row is None:
+                row = totals[event_date] = [0] * 4
+            row[0] += drawdown_amount
+            row[1] += principal_payment
+            row[2] += interest_payment
+            row[3] += debt_balance
+    return totals
+
+
+def tranche_interest_decimal(schedules: Dict[str, PaymentSchedule], drawdowns, repayments) -> Dict:
+    """
+    Проценты строк по траншам на Decimal: каждый транш округляется до копейки, погашения ОД - FIFO
+    
+    Returns:
+        Словарь {(ID договора, дата строки): проценты по траншам}
+    """
+    result = {}
+    for contract_id, schedule in schedules.items():
+        dates = [item.payment_date for item in schedule.schedule_items]
+        tranches = sorted(
+            (drawdown for drawdown in drawdowns if drawdown.contract_id == contract_id),
+            key=lambda drawdown: drawdown.drawdown_date
+        )
+        principal = {}
+        for repayment in repayments:
+            if repayment.contract_id == contract_id:
+                principal[repayment.repayment_date] = principal.get(repayment.repayment_date, Decimal('0')) + repayment.principal_amount
+        balances = [Decimal('0')] * len(tranches)
+        for event_date in sorted(dates):
+            with localcontext() as context:
+                context.prec = 50
+                result[(contract_id, event_date)] = sum(
+                    (balance * tranche.interest_rate / Decimal('36500')).quantize(KOPECK, rounding=ROUND_HALF_EVEN)
+                    for balance, tranche in zip(balances, tranches)
+                )
+            for index, tranche in enumerate(tranches):
+                if tranche.drawdown_date == event_date:
+                    balances[index] = tranche.amount
+            remaining = principal.get(event_date, Decimal('0'))
+            for index, balance in enumerate(balances):
+                repaid = min(balance, remaining)
+                balances[index] -= repaid
+                remaining -= repaid
+    return result
+
+
+def validate(schedules: Dict[str, PaymentSchedule], contracts, drawdowns, repayments) -> List[str]:
+    """
+    Проверка точности до копейки
+    
+    Returns:
+        Список расхождений (пустой - все суммы точны)
+    """
+    repayment_interest = {}
+    for repayment in repayments:
+        key = (repayment.contract_id, repayment.repayment_date)
+        repayment_interest[key] = repayment_interest.get(key, Decimal('0')) + repayment.interest_amount
+    
+    tranche_interest = tranche_interest_decimal(schedules, drawdowns, repayments)
+    
+    mismatches = []
+    for contract_id, schedule in schedules.items():
+        for item in schedule.schedule_items:
+            # Суммы строк - ровно в копейках
+            for value in (item.drawdown_amount, item.principal_payment, item.interest_payment, item.debt_balance_end):
+                if value != value.quantize(KOPECK):
+                    mismatches.append(f"{contract_id} {item.payment_date}: {value} is not whole kopecks")
+            
+            # Проценты строки - эталон на Decimal с банковским округлением по каждому траншу
+            expected = (
+                repayment_interest.get((contract_id, item.payment_date), Decimal('0'))
+                + tranche_interest.get((contract_id, item.payment_date), Decimal('0'))
+            )
+            if item.interest_payment != expected:
+                mismatches.append(f"{contract_id} {item.payment_date}: interest {item.interest_payment} != {expected}")
+        
+        minor_interest = sum(row[3] for row in schedule_minor_rows(schedule))
+        if from_minor(minor_interest) != schedule.total_interest_payments:
+            mismatches.append(f"{contract_id}: total interest {schedule.total_interest_payments} != {from_minor(minor_interest)}")
+    
+    cashflow = CalculationEngine().consolidate_schedules('benchmark', schedules, contracts)
+    for field, total in (
+        ('total_drawdowns', sum(schedule.total_drawdowns for schedule in schedules.values())),
+        ('total_principal_payments', sum(schedule.total_principal_payments for schedule in schedules.values())),
+        ('total_interest_payments', sum(schedule.total_interest_payments for schedule in schedules.values()))
+    ):
+        if getattr(cashflow, field) != total:
+            mismatches.append(f"cashflow {field}: {getattr(cashflow, field)} != {total}")
+    return mismatches
+
+
+def measure(func, repeat: int) -> float:
+    """Лучшее время выполнения из repeat запусков, в секундах"""
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк денежной арифметики")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000],
+                        help="Количество выборок в портфеле")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    scheduler = PaymentScheduler()
+    
+    print(f"{'drawdowns':>10} {'rows':>8} {'accrual dec, s':>15} {'accrual int, s':>15} "
+          f"{'consol dec, s':>14} {'consol int, s':>14}  validation")
+    
+    for size in args.sizes:
+        contracts, drawdowns, repayments = generate_portfolio(size)
+        # Договоры с первого числа (даты уплаты процентов - помесячно)
+        contracts = [
+            contract.model_copy(update={'start_date': contract.start_date.replace(day=1)})
+            for contract in contracts
+        ]
+        # Каждое погашение возвращает свою выборку - остаток не уходит в минус
+        repayments = [
+            repayment.model_copy(update={'principal_amount': drawdown.amount})
+            for drawdown, repayment in zip(drawdowns, repayments)
+        ]
+        
+        # Графики договоров (выборки - по фиксированной ставке)
+        by_contract = {contract.id: ([], []) for contract in contracts}
+        for drawdown in drawdowns:
+            by_contract[drawdown.contract_id][0].append(drawdown)
+        for repayment in repayments:
+            by_contract[repayment.contract_id][1].append(repayment)
+        schedules = {
+            contract.id: scheduler.create_payment_schedule(contract, *by_contract[contract.id], 'benchmark')
+            for contract in contracts
+        }
+        rows = sum(len(schedule.schedule_items) for schedule in schedules.values())
+        
+        # Ядро начисления на тех же остатках и ставках
+        rng = random.Random(size)
+        balances = [item.debt_balance_start for schedule in schedules.values() for item in schedule.schedule_items]
+        rates = [Decimal(rng.randint(500, 2500)) / 100 for _ in balances]
+        balances_minor = [to_minor(balance) for balance in balances]
+        rates_minor = [to_rate_units(rate) for rate in rates]
+        
+        decimal_accrual = measure(lambda: accrue_decimal(balances, rates), args.repeat)
+        minor_accrual = measure(lambda: accrue_minor(balances_minor, rates_minor), args.repeat)
+        decimal_consolidation = measure(lambda: consolidate_decimal(schedules), args.repeat)
+        minor_consolidation = measure(lambda: consolidate_minor(schedules), args.repeat)
+        
+        mismatches = validate(schedules, contracts, drawdowns, repayments)
+        if from_minor(accrue_minor(balances_minor, rates_minor)) != accrue_decimal(balances, rates):
+            mismatches.append("accrual kernel totals differ")
+        validation = 'ok' if not mismatches else f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+        
+        print(f"{size:>10} {rows:>8} {decimal_accrual:>15.3f} {minor_accrual:>15.3f} "
+              f"{decimal_consolidation:>14.3f} {minor_consolidation:>14.3f}  {validation}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк пересчета субсидий: цикл по договорам и месяцам на Decimal против SubsidyBook
+
+Сценарий - изменение условий программ 1528 и 512: чистые проценты всего
+субсидируемого портфеля пересчитываются по новым ставкам субсидии. Массивы
+SubsidyBook строятся один раз (время построения - отдельная колонка), каждый
+пересчет - SubsidyBook.calculate. Эталон - помесячный цикл на Decimal по
+строкам графиков. Колонка validation проверяет, что субсидия и чистые
+проценты по каждому договору совпадают с эталоном с точностью до копейки.
+
+Запуск:
+    python benchmarks/subsidy_benchmark.py
+    python benchmarks/subsidy_benchmark.py --sizes 1000 5000 --months 60 --repeat 3
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Tuple
+import argparse
+import time
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import (
+    PaymentSchedule, PaymentScheduleItem, KeyRateCurve, KeyRatePoint, SubsidyTerms
+)
+from models.credit_contract import (
+    CreditContract, CreditType, Currency, PaymentScheduleType, PaymentFrequency
+)
+from calculations.subsidies import SubsidyBook, SUBSIDY_DAY_BASIS
+from calculations.money import to_minor
+
+PROGRAMS = ['1528', '512', 'other']
+START = date(2025, 1, 1)
+
+
+def month_start(index: int) -> date:
+    """Первое число месяца index от START"""
+    return date(START.year + index // 12, index % 12 + 1, 1)
+
+
+def generate_portfolio(size: int, months: int, seed: int = 42) -> Tuple[List[CreditContract], Dict[str, PaymentSchedule]]:
+    """Субсидируемые договоры с помесячными графиками (строки - первые числа месяцев)"""
+    rng = np.random.default_rng(seed)
+    contracts, schedules = [], {}
+    for index in range(size):
+        amount = int(rng.integers(1_000_000, 500_000_000))
+        rate = Decimal(int(rng.integers(1200, 2200))) / 100
+        cap = Decimal(amount // 2) if index % 4 == 0 else None
+        contract = CreditContract(
+            id=f"contract_{index}",
+            credit_type=CreditType.ONE_TIME_LOAN,
+            currency=Currency.RUB,
+            total_limit=Decimal(amount),
+            available_limit=Decimal('0'),
+            start_date=START,
+            end_date=month_start(months),
+            payment_schedule_type=PaymentScheduleType.DIFFERENTIATED,
+            interest_payment_frequency=PaymentFrequency.MONTHLY,
+            principal_payment_frequency=PaymentFrequency.MONTHLY,
+            subsidy=SubsidyTerms.from_parameters({
+                'program': PROGRAMS[index % len(PROGRAMS)],
+                'points': [
+                    {'date': month_start(int(rng.integers(0, 6))).isoformat(), 'subsidy_rate': float(rate) - 5,
+                     'subsidized_amount': float(cap) if cap is not None else None}
+                ]
+            })
+        )
+        schedule = PaymentSchedule(contract_id=contract.id, version_id='benchmark', calculation_date=START)
+        balance = Decimal(amount)
+        step = (balance / months).quantize(Decimal('0.01'))
+        items, minor_rows = [], []
+        for month in range(months):
+            principal = step if month else Decimal('0')
+            minor_rows.append((month_start(month), 0, to_minor(principal), 0, to_minor(balance - principal)))
+            items.append(PaymentScheduleItem(
+                payment_date=month_start(month),
+                debt_balance_start=balance,
+                debt_balance_end=balance - principal,
+                principal_payment=principal,
+                effective_rate=rate,
+                days_in_period=1
+            ))
+            balance -= principal
+        schedule.add_items(items, minor_rows)
+        contracts.append(contract)
+        schedules[contract.id] = schedule
+    return contracts, schedules
+
+
+def program_curves(months: int) -> Dict[str, KeyRateCurve]:
+    """Новые условия программ: ступенчатое снижение ставки субсидии по месяцам"""
+    return {
+        program: KeyRateCurve(points=[
+            KeyRatePoint(effective_date=month_start(month), rate=Decimal(str(rate - month // 12)))
+            for month in range(0, months, 12)
+        ])
+        for program, rate in (('1528', 9), ('512', 6))
+    }
+
+
+def reference(contracts: List[CreditContract],
+              schedules: Dict[str, PaymentSchedule],
+              curves: Dict[str, KeyRateCurve]) -> Dict[str, Tuple[Decimal, Decimal]]:
+    """
+    Помесячный расчет на Decimal: субсидия и чистые проценты по договорам
+    
+    Returns:
+        Словарь {ID договора: (субсидия, чистые проценты)}
+    """
+    basis = Decimal(str(SUBSIDY_DAY_BASIS)) * 100
+    result = {}
+    for contract in contracts:
+        curve = curves.get(contract.subsidy.program.value)
+        start = contract.subsidy.get_sorted_points()[0].effective_date
+        items = schedules[contract.id].schedule_items
+        subsidy_total, net_total = Decimal('0'), Decimal('0')
+        for position, item in enumerate(items):
+            following = items[position + 1].payment_date if position + 1 < len(items) else month_start(len(items))
+            days = (following - item.payment_date).days
+            subsidy_rate, cap = contract.subsidy.get_terms(item.payment_date)
+            if curve is not None and item.payment_date >= start:
+                subsidy_rate = curve.get_rate(item.payment_date)
+            balance = item.debt_balance_end
+            subsidized = balance if cap is None else min(balance, cap)
+            gross = balance * item.effective_rate * days / basis
+            subsidy = subsidized * subsidy_rate * days / basis
+            subsidy_total += subsidy
+            net_total += gross - subsidy
+        result[contract.id] = (subsidy_total, net_total)
+    return result
+
+
+def measure(func, repeat: int):
+    """Лучшее время выполнения из repeat запусков (секунды) и результат"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк пересчета субсидий")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 5_000],
+                        help="Количество договоров")
+    parser.add_argument('--months', type=int, default=60, help="Горизонт графиков, месяцев")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    curves = program_curves(args.months)
+    
+    print(f"{'contracts':>10} {'months':>7} {'decimal loop, s':>16} {'build, s':>9} {'recalc, s':>10} "
+          f"{'speedup':>8}  validation")
+    
+    for size in args.sizes:
+        contracts, schedules = generate_portfolio(size, args.months)
+        build_time, book = measure(lambda: SubsidyBook(contracts, schedules), 1)
+        vector_time, result = measure(lambda: book.calculate(curves), args.repeat)
+        decimal_time, expected = measure(lambda: reference(contracts, schedules, curves), 1)
+        
+        totals = result.get_contract_totals()
+        mismatches = []
+        for contract_id, (subsidy, net) in expected.items():
+            for name, value, reference_value in (
+                ('subsidy', totals[contract_id]['subsidy'], subsidy),
+                ('net interest', totals[contract_id]['net_interest'], net)
+            ):
+                difference = abs(to_minor(Decimal(repr(value))) - to_minor(reference_value))
+                # Допуск - копейка на округление
+                if difference > 1:
+                    mismatches.append(f"{contract_id}: {name} differs by {difference} kopecks")
+        validation = 'ok' if not mismatches else f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+        
+        print(f"{size:>10} {len(book.months):>7} {decimal_time:>16.3f} {build_time:>9.3f} {vector_time:>10.4f} "
+              f"{decimal_time / vector_time:>7.0f}x  {validation}")
+
+
+if __name__ == "__main__":
+    main()
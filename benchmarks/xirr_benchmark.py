@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк XIRR: скалярный Ньютон по договорам против векторного XIRRSolver
+
+Потоки договоров строятся так, что их ставка известна заранее: размер
+платежей подбирается под заданную ставку. Колонка validation сравнивает
+найденные ставки с заданными; договоры без смены знака потоков должны
+быть помечены как нерешенные.
+
+Запуск:
+    python benchmarks/xirr_benchmark.py
+    python benchmarks/xirr_benchmark.py --sizes 1000 10000 --repeat 3
+"""
+
+from datetime import date
+from typing import List, Optional, Tuple
+import argparse
+import time
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from calculations.xirr import XIRRSolver, XIRR_DAY_BASIS
+
+
+def generate_facilities(size: int, seed: int = 42) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Генерация потоков договоров с известной ставкой
+    
+    Выборки (1-5 траншей) - притоки, равные ежемесячные платежи - оттоки; каждый
+    сотый договор без платежей (ставка не существует).
+    
+    Args:
+        size: Количество договоров
+        seed: Инициализация генератора случайных чисел
+        
+    Returns:
+        Кортеж (номер договора, дата, сумма потока, заданная ставка)
+    """
+    rng = np.random.default_rng(seed)
+    rates = rng.uniform(-0.5, 3.0, size)
+    lanes, ordinals, amounts = [], [], []
+    
+    for lane in range(size):
+        start = rng.integers(date(2020, 1, 1).toordinal(), date(2026, 1, 1).toordinal())
+        drawdown_dates = start + np.sort(rng.integers(0, 180, rng.integers(1, 6)))
+        drawdowns = rng.uniform(1e5, 1e7, len(drawdown_dates)).round(2)
+        if lane % 100 == 99:
+            lane_dates, lane_amounts = drawdown_dates, drawdowns
+        else:
+            payment_dates = start + 200 + 30 * np.arange(rng.integers(6, 121))
+            # Равные платежи обнуляют NPV по заданной ставке (один корень - одна смена знака)
+            discount = (1 + rates[lane]) ** -((np.concatenate([drawdown_dates, payment_dates]) - start) / XIRR_DAY_BASIS)
+            payment = (drawdowns @ discount[:len(drawdowns)]) / discount[len(drawdowns):].sum()
+            lane_dates = np.concatenate([drawdown_dates, payment_dates])
+            lane_amounts = np.concatenate([drawdowns, np.full(len(payment_dates), -payment)])
+        lanes.append(np.full(len(lane_dates), lane))
+        ordinals.append(lane_dates)
+        amounts.append(lane_amounts)
+    
+    return np.concatenate(lanes), np.concatenate(ordinals), np.concatenate(amounts), rates
+
+
+def scalar_xirr(ordinals: np.ndarray, amounts: np.ndarray, guess: float = 0.1) -> Optional[float]:
+    """XIRR одного договора скалярным методом Ньютона (как прежний calculate_internal_rate_of_return)"""
+    start = int(ordinals[0])
+    periods = [(int(ordinal) - start) / XIRR_DAY_BASIS for ordinal in ordinals]
+    values = [float(amount) for amount in amounts]
+    scale = sum(abs(value) for value in values)
+    
+    for _ in range(100):
+        npv = 0.0
+        npv_derivative = 0.0
+        for period, amount in zip(periods, values):
+            npv += amount / (1 + guess) ** period
+            npv_derivative -= period * amount / (1 + guess) ** (period + 1)
+        if abs(npv) < 1e-10 * scale:
+            return guess
+        if abs(npv_derivative) < 1e-12 or guess <= -1:
+            return None
+        guess = guess - npv / npv_derivative
+        if not guess > -1:
+            return None
+    return None
+
+
+def measure(func, repeat: int) -> Tuple[float, object]:
+    """Лучшее время выполнения из repeat запусков (секунды) и результат"""
+    best, result = float('inf'), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def validate(result, rates: np.ndarray) -> List[str]:
+    """
+    Сравнение найденных ставок с заданными
+    
+    Returns:
+        Список расхождений (пустой - все ставки найдены)
+    """
+    mismatches = []
+    for lane, expected in enumerate(rates):
+        rate = result.get_rate(str(lane))
+        if lane % 100 == 99:
+            if rate is not None:
+                mismatches.append(f"{lane}: rate {rate} found without sign change")
+        elif rate is None or abs(rate - expected) > 1e-8 * max(1.0, abs(expected)):
+            mismatches.append(f"{lane}: {rate} != {expected}")
+    return mismatches
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Бенчмарк XIRR")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000],
+                        help="Количество договоров")
+    parser.add_argument('--repeat', type=int, default=3, help="Количество повторов замера")
+    args = parser.parse_args()
+    
+    solver = XIRRSolver()
+    
+    print(f"{'facilities':>10} {'cashflows':>10} {'scalar, s':>10} {'scalar failed':>14} "
+          f"{'vector, s':>10} {'speedup':>8} {'newton':>7} {'brent':>6} {'failed':>7}  validation")
+    
+    for size in args.sizes:
+        lanes, ordinals, amounts, rates = generate_facilities(size)
+        lane_ids = [str(lane) for lane in range(size)]
+        bounds = np.searchsorted(lanes, np.arange(size + 1))
+        
+        scalar_time, scalar_rates = measure(
+            lambda: [scalar_xirr(ordinals[bounds[lane]:bounds[lane + 1]], amounts[bounds[lane]:bounds[lane + 1]])
+                     for lane in range(size)],
+            1
+        )
+        vector_time, result = measure(lambda: solver.solve_dates(lane_ids, lanes, ordinals, amounts), args.repeat)
+        
+        diagnostics = result.get_diagnostics()
+        mismatches = validate(result, rates)
+        validation = 'ok' if not mismatches else f"{len(mismatches)} mismatches, first: {mismatches[0]}"
+        scalar_failed = sum(rate is None for rate in scalar_rates)
+        
+        print(f"{size:>10} {len(amounts):>10} {scalar_time:>10.3f} {scalar_failed:>14} "
+              f"{vector_time:>10.3f} {scalar_time / vector_time:>7.0f}x {diagnostics['newton']:>7} "
+              f"{diagnostics['brent']:>6} {diagnostics['failed']:>7}  {validation}")
+
+
+if __name__ == "__main__":
+    main()
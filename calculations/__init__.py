@@ -3,12 +3,85 @@
 """
 
 from .calculation_engine import CalculationEngine
-from .payment_scheduler import PaymentScheduler
+from .payment_scheduler import PaymentScheduler, ACCRUAL_MODES
 from .interest_calculator import InterestCalculator
+from .day_count import DayCountService, DAY_COUNT_CONVENTIONS
+from .business_calendar import BusinessCalendar, BUSINESS_DAY_CONVENTIONS, get_calendar
+from .date_grid import DateGridCache
+from .tranches import TrancheBook, REPAYMENT_ALLOCATIONS
+from .money import to_minor, from_minor, MINOR_UNITS, RATE_SCALE
+from .accrual_arrays import PortfolioAccrual
+from .daily_rates import DailyRateTable
+from .scenario_overlay import ScenarioOverlay
+from .cashflow_delta import CashflowDelta
+from .scenario_cube import ScenarioCube, CUBE_MEASURES
+from .rate_sweep import RateSweepEngine, RateSweepResult
+from .short_rate_models import (
+    ShortRateModel, VasicekModel, HullWhiteModel, CBR_CALIBRATION, create_short_rate_model
+)
+from .monte_carlo import MonteCarloRateSimulator, MonteCarloResult, MAX_PATHS_COUNT
+from .stress_grid import StressBasis, StressGridRunner, expand_stress_grid
+from .sensitivity import RateSensitivityEngine, RateSensitivityResult
+from .portfolio_optimizer import UtilizationOptimizer, OptimizationResult
+from .reverse_stress import MonthlyStressBasis, ReverseStressSearch, ReverseStressResult
+from .discounting import DiscountingEngine, DiscountCurve, NPVResult
+from .xirr import XIRRSolver, XIRRResult
+from .amortization import AmortizationGenerator, AmortizationResult, AMORTIZATION_TYPES
+from .subsidies import SubsidyBook, SubsidyResult, SUBSIDY_DAY_BASIS
 
 __all__ = [
     'CalculationEngine',
     'PaymentScheduler', 
-    'InterestCalculator'
+    'ACCRUAL_MODES',
+    'InterestCalculator',
+    'DayCountService',
+    'DAY_COUNT_CONVENTIONS',
+    'BusinessCalendar',
+    'BUSINESS_DAY_CONVENTIONS',
+    'get_calendar',
+    'DateGridCache',
+    'TrancheBook',
+    'REPAYMENT_ALLOCATIONS',
+    'to_minor',
+    'from_minor',
+    'MINOR_UNITS',
+    'RATE_SCALE',
+    'PortfolioAccrual',
+    'DailyRateTable',
+    'ScenarioOverlay',
+    'CashflowDelta',
+    'ScenarioCube',
+    'CUBE_MEASURES',
+    'RateSweepEngine',
+    'RateSweepResult',
+    'ShortRateModel',
+    'VasicekModel',
+    'HullWhiteModel',
+    'CBR_CALIBRATION',
+    'create_short_rate_model',
+    'MonteCarloRateSimulator',
+    'MonteCarloResult',
+    'MAX_PATHS_COUNT',
+    'StressBasis',
+    'StressGridRunner',
+    'expand_stress_grid',
+    'RateSensitivityEngine',
+    'RateSensitivityResult',
+    'UtilizationOptimizer',
+    'OptimizationResult',
+    'MonthlyStressBasis',
+    'ReverseStressSearch',
+    'ReverseStressResult',
+    'DiscountingEngine',
+    'DiscountCurve',
+    'NPVResult',
+    'XIRRSolver',
+    'XIRRResult',
+    'AmortizationGenerator',
+    'AmortizationResult',
+    'AMORTIZATION_TYPES',
+    'SubsidyBook',
+    'SubsidyResult',
+    'SUBSIDY_DAY_BASIS'
 ]
 
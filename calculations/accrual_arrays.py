@@ -0,0 +1,303 @@
+"""
+Массивы начислений портфеля для пакетных расчетов по ставкам
+"""
+
+from datetime import date
+from typing import List, Optional, Union
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, Drawdown, Repayment
+
+logger = logging.getLogger(__name__)
+
+# База начисления планировщика в режиме daily (ставка % / 100 / 365 за событие)
+ACCRUAL_DAY_BASIS = 365.0
+
+
+class PortfolioAccrual:
+    """
+    Колоночное представление графиков платежей портфеля
+    
+    Одна строка - одно событие графика одного договора (как элемент
+    PaymentSchedule). Строки упорядочены по дате; для каждой строки хранятся
+    не зависящие от ставки остатки и движения и составляющие процентов
+    (по фиксированным ставкам, по марже и вес базовой ставки). Проценты при
+    любой базовой ставке считаются векторно, без повторного построения
+    графиков.
+    
+    Базовая ставка для составляющих строки берется на дату строки, а
+    проценты по ним относятся на дату уплаты строки (interest_date_index):
+    в режиме event это дата уплаты, закрывающая интервал строки, в режиме
+    daily - сама дата строки.
+    """
+    
+    def __init__(self,
+                 contract_ids: List[str],
+                 dates: np.ndarray,
+                 date_index: np.ndarray,
+                 contract_index: np.ndarray,
+                 balance_start: np.ndarray,
+                 balance_end: np.ndarray,
+                 drawdowns: np.ndarray,
+                 principal: np.ndarray,
+                 scheduled_interest: np.ndarray,
+                 fixed_interest: np.ndarray,
+                 margin_interest: np.ndarray,
+                 floating_weight: np.ndarray,
+                 fallback_interest: np.ndarray,
+                 planned_drawdowns: np.ndarray,
+                 planned_balance_start: np.ndarray,
+                 planned_fixed_interest: np.ndarray,
+                 planned_floating_weight: np.ndarray,
+                 interest_date_index: Optional[np.ndarray] = None):
+        self.contract_ids = contract_ids
+        self.dates = dates
+        self.date_index = date_index
+        self.contract_index = contract_index
+        self.balance_start = balance_start
+        self.balance_end = balance_end
+        self.drawdowns = drawdowns
+        self.principal = principal
+        self.scheduled_interest = scheduled_interest
+        self.fixed_interest = fixed_interest  # Проценты по фиксированным ставкам
+        self.margin_interest = margin_interest  # Проценты по марже плавающих ставок
+        self.floating_weight = floating_weight  # Проценты плавающих ставок на 1 п.п. базовой ставки
+        self.fallback_interest = fallback_interest  # Проценты плавающих выборок по их собственной ставке
+        self.planned_drawdowns = planned_drawdowns  # Часть выборок со статусом planned
+        self.planned_balance_start = planned_balance_start  # Вклад плановых выборок в остаток на начало
+        self.planned_fixed_interest = planned_fixed_interest  # Вклад плановых выборок в fixed + margin
+        self.planned_floating_weight = planned_floating_weight  # Вклад плановых выборок в floating_weight
+        # Дата уплаты процентов по составляющим строки (по умолчанию - дата строки)
+        self.interest_date_index = date_index if interest_date_index is None else interest_date_index
+        
+        # Начала групп строк по датам (строки отсортированы по дате, каждая дата непуста)
+        self._date_starts = np.flatnonzero(np.r_[True, np.diff(date_index) != 0])
+        
+        # Пары (дата уплаты, дата ставки): номер пары строки, даты пар, начала групп по дате уплаты
+        stride = max(len(dates), 1)
+        pairs, pair_index = np.unique(self.interest_date_index * stride + self.date_index, return_inverse=True)
+        pair_interest_dates = pairs // stride
+        self._pair_index = pair_index.reshape(-1)
+        self._pair_rate_dates = pairs % stride
+        self._pair_starts = np.flatnonzero(np.r_[True, np.diff(pair_interest_dates) != 0]) if len(pairs) else pairs
+        self._pair_interest_dates = pair_interest_dates[self._pair_starts]
+    
+    @classmethod
+    def from_portfolio(cls,
+                       payment_scheduler,
+                       contracts: List[CreditContract],
+                       all_drawdowns: List[Drawdown],
+                       all_repayments: List[Repayment]) -> 'PortfolioAccrual':
+        """
+        Построение массивов начислений по портфелю
+        
+        Args:
+            payment_scheduler: Планировщик платежей (PaymentScheduler)
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки
+            all_repayments: Все погашения
+            
+        Returns:
+            Массивы начислений портфеля
+        """
+        drawdowns_by_contract = {}
+        for drawdown in all_drawdowns:
+            drawdowns_by_contract.setdefault(drawdown.contract_id, []).append(drawdown)
+        
+        repayments_by_contract = {}
+        for repayment in all_repayments:
+            repayments_by_contract.setdefault(repayment.contract_id, []).append(repayment)
+        
+        contract_ids = []
+        contract_index = []
+        rows = []
+        for index, contract in enumerate(contracts):
+            contract_rows = payment_scheduler.build_accrual_rows(
+                contract,
+                drawdowns_by_contract.get(contract.id, []),
+                repayments_by_contract.get(contract.id, [])
+            )
+            contract_ids.append(contract.id)
+            contract_index.extend([index] * len(contract_rows))
+            rows.extend(contract_rows)
+        
+        if rows:
+            columns = list(zip(*rows))
+        else:
+            columns = [()] * 15
+        
+        event_dates = np.array(columns[0], dtype='datetime64[D]')
+        dates, date_index = np.unique(event_dates, return_inverse=True)
+        order = np.argsort(date_index, kind='stable')
+        # Даты уплаты - всегда даты событий того же договора, поэтому есть в dates
+        interest_date_index = np.searchsorted(dates, np.array(columns[14], dtype='datetime64[D]'))
+        
+        def column(values, dtype=np.float64) -> np.ndarray:
+            return np.asarray(values, dtype=dtype)[order]
+        
+        accrual = cls(
+            contract_ids=contract_ids,
+            dates=dates,
+            date_index=date_index.reshape(-1)[order].astype(np.int64),
+            contract_index=column(contract_index, np.int64),
+            balance_start=column(columns[1]),
+            drawdowns=column(columns[2]),
+            principal=column(columns[3]),
+            scheduled_interest=column(columns[4]),
+            balance_end=column(columns[5]),
+            fixed_interest=column(columns[6]),
+            margin_interest=column(columns[7]),
+            floating_weight=column(columns[8]),
+            fallback_interest=column(columns[9]),
+            planned_drawdowns=column(columns[10]),
+            planned_balance_start=column(columns[11]),
+            planned_fixed_interest=column(columns[12]),
+            planned_floating_weight=column(columns[13]),
+            interest_date_index=column(interest_date_index, np.int64)
+        )
+        
+        logger.info(f"Portfolio accrual built: {accrual.rows_count} rows, {accrual.dates_count} dates")
+        return accrual
+    
+    @property
+    def rows_count(self) -> int:
+        """Количество строк (событий графиков)"""
+        return len(self.date_index)
+    
+    @property
+    def dates_count(self) -> int:
+        """Количество уникальных дат портфеля"""
+        return len(self.dates)
+    
+    def get_dates(self) -> List[date]:
+        """Даты портфеля в виде date"""
+        return self.dates.astype(object).tolist()
+    
+    def by_date(self, values: np.ndarray) -> np.ndarray:
+        """
+        Суммирование построчных значений по датам
+        
+        Args:
+            values: Массив (..., строки)
+            
+        Returns:
+            Массив (..., даты)
+        """
+        if self.rows_count == 0:
+            return np.zeros(values.shape[:-1] + (0,))
+        return np.add.reduceat(values, self._date_starts, axis=-1)
+    
+    def by_interest_date(self, values: np.ndarray) -> np.ndarray:
+        """
+        Суммирование построчных составляющих процентов по датам уплаты
+        
+        Args:
+            values: Массив (строки)
+            
+        Returns:
+            Массив (даты)
+        """
+        return np.bincount(self.interest_date_index, weights=values, minlength=self.dates_count)
+    
+    def rates_by_interest_date(self, base_rate_paths: np.ndarray, weights: np.ndarray) -> np.ndarray:
+        """
+        Проценты по датам уплаты: ставка на дату строки * вес строки
+        
+        Веса сводятся в пары (дата уплаты, дата ставки) одним bincount,
+        поэтому стоимость на сценарий - O(пары), а не O(строки).
+        
+        Args:
+            base_rate_paths: Массив (даты) или (сценарии, даты) ставок на даты портфеля
+            weights: Построчные веса ставки (floating_weight и т.п.)
+            
+        Returns:
+            Массив (даты) или (сценарии, даты)
+        """
+        paths = np.asarray(base_rate_paths, dtype=np.float64)
+        result = np.zeros(paths.shape[:-1] + (self.dates_count,))
+        if self.rows_count == 0:
+            return result
+        pair_weights = np.bincount(self._pair_index, weights=weights, minlength=len(self._pair_rate_dates))
+        contributions = paths[..., self._pair_rate_dates] * pair_weights
+        result[..., self._pair_interest_dates] = np.add.reduceat(contributions, self._pair_starts, axis=-1)
+        return result
+    
+    def rate_independent_interest_by_date(self) -> np.ndarray:
+        """Не зависящая от базовой ставки часть процентов по датам уплаты"""
+        return self.by_date(self.scheduled_interest) + self.by_interest_date(self.fixed_interest + self.margin_interest)
+    
+    @property
+    def planned_balance_end(self) -> np.ndarray:
+        """Вклад плановых выборок в остаток на конец"""
+        return self.planned_balance_start + self.planned_drawdowns
+    
+    def floating_weights(self) -> np.ndarray:
+        """
+        Чувствительность процентов каждой строки к базовой ставке
+        
+        Returns:
+            Массив (строки): d(проценты) / d(базовая ставка)
+        """
+        return self.floating_weight
+    
+    def rate_independent_interest(self) -> np.ndarray:
+        """
+        Часть процентов, не зависящая от базовой ставки
+        
+        Фиксированные ставки, маржа плавающих ставок и проценты из
+        фактических погашений.
+        
+        Returns:
+            Массив (строки)
+        """
+        return self.fixed_interest + self.margin_interest + self.scheduled_interest
+    
+    def interest(self, base_rates: Optional[Union[float, np.ndarray]] = None) -> np.ndarray:
+        """
+        Проценты по строкам при заданной базовой ставке
+        
+        Args:
+            base_rates: Базовая ставка - число, массив (строки) или массив
+                (сценарии, строки). Если None, плавающие выборки начисляются
+                по собственной ставке, как в планировщике без базовой ставки.
+                
+        Returns:
+            Массив процентов той же формы, что и base_rates (но не менее (строки))
+        """
+        if base_rates is None:
+            return self.fixed_interest + self.fallback_interest + self.scheduled_interest
+        
+        return self.rate_independent_interest() + np.asarray(base_rates, dtype=np.float64) * self.floating_weights()
+    
+    def interest_by_date(self, base_rate_paths: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Проценты портфеля по датам для набора траекторий базовой ставки
+        
+        Проценты линейны по базовой ставке, поэтому суммирование по строкам
+        выполняется один раз, а сценарии обрабатываются одной векторной
+        операцией: I[s, d] = I0[d] + sum(B[s, r] * W[d, r]) по датам ставок r
+        интервалов, уплачиваемых в дату d.
+        
+        Args:
+            base_rate_paths: Массив (даты) или (сценарии, даты) базовых ставок
+                на даты портфеля; None - без базовой ставки
+                
+        Returns:
+            Массив (даты) или (сценарии, даты)
+        """
+        if base_rate_paths is None:
+            return self.by_date(self.scheduled_interest) + self.by_interest_date(
+                self.fixed_interest + self.fallback_interest
+            )
+        
+        return self.rate_independent_interest_by_date() + self.rates_by_interest_date(
+            base_rate_paths, self.floating_weights()
+        )
@@ -0,0 +1,287 @@
+"""
+Графики погашения по типу договора (аннуитет, дифференцированный, в конце срока) в замкнутой форме
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, PaymentSchedule, PaymentScheduleItem
+from .day_count import DayCountService
+from .business_calendar import get_calendar, FREQUENCY_STEPS, DEFAULT_FREQUENCY_STEP
+from .money import to_minor, from_minor
+
+# Типы графиков с генератором в замкнутой форме (CUSTOM задается погашениями)
+AMORTIZATION_TYPES = ('annuity', 'differentiated', 'bullet')
+
+
+def periods_per_year(frequency: str) -> float:
+    """Количество периодов в году для периодичности платежей"""
+    months, days = FREQUENCY_STEPS.get(frequency, DEFAULT_FREQUENCY_STEP)
+    return 12.0 / months if months else 365.0 / days
+
+
+class AmortizationResult:
+    """
+    Графики погашения договоров в виде сложенных массивов
+    
+    Строки всех договоров идут подряд (договор, дата): первая строка
+    договора - выборка всей суммы на дату начала, далее платежи. Суммы - в
+    копейках (int64), как строки графиков для консолидации.
+    """
+    
+    def __init__(self,
+                 contract_ids: List[str],
+                 rates: np.ndarray,
+                 lanes: np.ndarray,
+                 ordinals: np.ndarray,
+                 drawdowns: np.ndarray,
+                 principal: np.ndarray,
+                 interest: np.ndarray,
+                 balance_start: np.ndarray,
+                 balance_end: np.ndarray,
+                 days: np.ndarray):
+        self.contract_ids = contract_ids
+        self.rates = rates
+        self.lanes = lanes
+        self.ordinals = ordinals
+        self.drawdowns = drawdowns
+        self.principal = principal
+        self.interest = interest
+        self.balance_start = balance_start
+        self.balance_end = balance_end
+        self.days = days
+    
+    def get_lane_bounds(self) -> np.ndarray:
+        """Границы строк договоров: строки договора i - [bounds[i], bounds[i + 1])"""
+        return np.searchsorted(self.lanes, np.arange(len(self.contract_ids) + 1))
+    
+    def consolidate(self) -> Dict[str, np.ndarray]:
+        """
+        Суммы всех договоров по датам (в копейках)
+        
+        Returns:
+            Словарь массивов: dates (datetime64[D]), drawdowns, principal,
+            interest, debt_balance (остаток на конец дат, по строкам графиков)
+        """
+        dates, index = np.unique(self.ordinals, return_inverse=True)
+        totals = {}
+        for name, values in (('drawdowns', self.drawdowns), ('principal', self.principal),
+                             ('interest', self.interest), ('debt_balance', self.balance_end)):
+            column = np.zeros(len(dates), dtype=np.int64)
+            np.add.at(column, index, values)
+            totals[name] = column
+        totals['dates'] = (dates - date(1970, 1, 1).toordinal()).astype('datetime64[D]')
+        return totals
+    
+    def to_payment_schedules(self, version_id: str) -> Dict[str, PaymentSchedule]:
+        """
+        Графики платежей договоров (со строками в копейках для консолидации)
+        
+        Args:
+            version_id: ID версии расчета
+            
+        Returns:
+            Словарь {ID договора: график}
+        """
+        bounds = self.get_lane_bounds()
+        columns = [
+            self.ordinals.tolist(), self.drawdowns.tolist(), self.principal.tolist(), self.interest.tolist(),
+            self.balance_start.tolist(), self.balance_end.tolist(), np.maximum(self.days, 1).tolist()
+        ]
+        calculation_date = date.today()
+        
+        schedules = {}
+        for lane, contract_id in enumerate(self.contract_ids):
+            rate = Decimal(str(float(self.rates[lane])))
+            items, minor_rows = [], []
+            for row in range(bounds[lane], bounds[lane + 1]):
+                ordinal, drawdown, principal, interest, balance_start, balance_end, days = (
+                    column[row] for column in columns
+                )
+                payment_date = date.fromordinal(ordinal)
+                items.append(PaymentScheduleItem(
+                    payment_date=payment_date,
+                    debt_balance_start=from_minor(balance_start),
+                    debt_balance_end=from_minor(balance_end),
+                    drawdown_amount=from_minor(drawdown),
+                    principal_payment=from_minor(principal),
+                    interest_payment=from_minor(interest),
+                    effective_rate=rate,
+                    days_in_period=days
+                ))
+                minor_rows.append((payment_date, drawdown, principal, interest, balance_end))
+            
+            schedule = PaymentSchedule(contract_id=contract_id, version_id=version_id, calculation_date=calculation_date)
+            schedule.add_items(items, minor_rows)
+            schedules[contract_id] = schedule
+        return schedules
+
+
+class AmortizationGenerator:
+    """
+    Генератор графиков погашения для многих договоров одной векторной операцией
+    
+    Остаток после k-го из n платежей задается формулой:
+    аннуитет - P * ((1 + i)^n - (1 + i)^k) / ((1 + i)^n - 1), i - ставка
+    периода (годовая / число периодов в году); дифференцированный -
+    P * (n - k) / n; в конце срока - P до последнего платежа. Погашение ОД -
+    разность соседних остатков (в копейках, сумма погашений равна P точно).
+    Проценты аннуитета - i * остаток, остальных типов - остаток * ставка *
+    доля года периода по базе расчета дней.
+    """
+    
+    def __init__(self,
+                 day_count_basis: str = 'Actual/360',
+                 calendar: str = 'russia',
+                 business_day_convention: str = 'unadjusted'):
+        """
+        Инициализация
+        
+        Args:
+            day_count_basis: База расчета дней для процентов
+            calendar: Календарь рабочих дней дат платежей
+            business_day_convention: Перенос дат платежей (BUSINESS_DAY_CONVENTIONS)
+        """
+        self.day_count = DayCountService(day_count_basis)
+        self.calendar = get_calendar(calendar)
+        self.business_day_convention = business_day_convention
+    
+    def generate(self,
+                 contracts: List[CreditContract],
+                 principals: Optional[Sequence[Decimal]] = None,
+                 rates: Optional[Sequence[Decimal]] = None) -> AmortizationResult:
+        """
+        Графики погашения договоров по payment_schedule_type
+        
+        Даты платежей - сетка principal_payment_frequency от даты начала до
+        даты окончания (последний платеж - в дату окончания).
+        
+        Args:
+            contracts: Кредитные договоры (тип графика не CUSTOM)
+            principals: Суммы кредита (по умолчанию - лимиты договоров)
+            rates: Годовые ставки, % (по умолчанию - маржа к базовой ставке договора)
+            
+        Returns:
+            Графики в виде сложенных массивов
+        """
+        types = [getattr(contract.payment_schedule_type, 'value', contract.payment_schedule_type)
+                 for contract in contracts]
+        unsupported = [contract.id for contract, schedule_type in zip(contracts, types)
+                       if schedule_type not in AMORTIZATION_TYPES]
+        if unsupported:
+            raise ValueError(
+                f"No closed-form amortization for contracts: {', '.join(unsupported)}. "
+                f"Supported schedule types: {', '.join(AMORTIZATION_TYPES)}"
+            )
+        
+        if principals is None:
+            principals = [contract.total_limit for contract in contracts]
+        if rates is None:
+            rates = [(contract.interest_rate_base or Decimal('0')) + (contract.margin or Decimal('0'))
+                     for contract in contracts]
+        frequencies = [contract.principal_payment_frequency for contract in contracts]
+        
+        starts = np.array([contract.start_date.toordinal() for contract in contracts], dtype=np.int64)
+        ends = np.array([contract.end_date.toordinal() for contract in contracts], dtype=np.int64)
+        lanes, ordinals = self._payment_grid(starts, ends, frequencies)
+        
+        annual_rates = np.array([float(rate) for rate in rates], dtype=np.float64)
+        return self.generate_arrays(
+            [contract.id for contract in contracts], types,
+            np.array([to_minor(principal) for principal in principals], dtype=np.int64),
+            annual_rates,
+            annual_rates / 100 / np.array([periods_per_year(frequency) for frequency in frequencies]),
+            lanes, ordinals
+        )
+    
+    def _payment_grid(self,
+                      starts: np.ndarray,
+                      ends: np.ndarray,
+                      frequencies: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """Даты договоров: дата начала, даты сетки внутри срока, дата окончания"""
+        grid_lanes, grid_ordinals = self.calendar.schedules(starts, ends, frequencies, self.business_day_convention)
+        inside = (grid_ordinals > starts[grid_lanes]) & (grid_ordinals < ends[grid_lanes])
+        
+        contracts_index = np.arange(len(starts), dtype=np.int64)
+        lanes = np.concatenate([contracts_index, grid_lanes[inside], contracts_index])
+        ordinals = np.concatenate([starts, grid_ordinals[inside], ends])
+        order = np.lexsort((ordinals, lanes))
+        return lanes[order], ordinals[order]
+    
+    def generate_arrays(self,
+                        contract_ids: List[str],
+                        schedule_types: List[str],
+                        principals: np.ndarray,
+                        annual_rates: np.ndarray,
+                        period_rates: np.ndarray,
+                        lanes: np.ndarray,
+                        ordinals: np.ndarray) -> AmortizationResult:
+        """
+        Графики по готовым датам
+        
+        Args:
+            contract_ids: ID договоров
+            schedule_types: Типы графиков (AMORTIZATION_TYPES)
+            principals: Суммы кредита, копейки
+            annual_rates: Годовые ставки, %
+            period_rates: Ставки периода аннуитета (доли)
+            lanes: Номер договора каждой строки (по возрастанию)
+            ordinals: Даты строк (date.toordinal()); первая строка договора - выборка
+            
+        Returns:
+            Графики в виде сложенных массивов
+        """
+        bounds = np.searchsorted(lanes, np.arange(len(contract_ids) + 1))
+        counts = np.diff(bounds)
+        # k - номер платежа (0 - строка выборки), n - число платежей договора
+        k = np.arange(len(lanes), dtype=np.int64) - bounds[lanes]
+        n = (counts - 1)[lanes]
+        
+        type_codes = np.array([AMORTIZATION_TYPES.index(schedule_type) for schedule_type in schedule_types],
+                              dtype=np.int64)[lanes]
+        principal = principals[lanes]
+        rate = period_rates[lanes]
+        
+        # Остаток после k-го платежа
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            growth_n = (1 + rate) ** n
+            annuity = principal * (growth_n - (1 + rate) ** k) / (growth_n - 1)
+        annuity = np.where(rate > 0, annuity, principal * (n - k) / np.maximum(n, 1))
+        differentiated = (principal * (n - k) * 2 + n) // (2 * np.maximum(n, 1))
+        bullet = np.where(k < n, principal, 0)
+        balance_end = np.select(
+            [type_codes == 0, type_codes == 1],
+            [np.rint(annuity).astype(np.int64), differentiated],
+            bullet
+        )
+        balance_end[k == n] = 0
+        
+        first = k == 0
+        balance_start = np.where(first, 0, np.roll(balance_end, 1))
+        drawdowns = np.where(first, principal, 0)
+        principal_payments = np.where(first, 0, balance_start - balance_end)
+        
+        # Проценты периода: аннуитет - по ставке периода, остальные - по доле года
+        previous_ordinals = np.where(first, ordinals, np.roll(ordinals, 1))
+        days = ordinals - previous_ordinals
+        year_fractions = self.day_count.year_fractions(previous_ordinals, ordinals)
+        interest = np.where(
+            type_codes == 0,
+            balance_start * rate,
+            balance_start * annual_rates[lanes] / 100 * year_fractions
+        )
+        interest = np.where(first, 0, np.rint(interest)).astype(np.int64)
+        
+        return AmortizationResult(
+            contract_ids, annual_rates, lanes, ordinals, drawdowns, principal_payments, interest,
+            balance_start, balance_end, days
+        )
@@ -0,0 +1,386 @@
+"""
+Календари рабочих дней: битовые карты по годам и векторные переносы дат
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .day_count import to_datetime64, DateArray, _EPOCH_ORDINAL
+
+# Правила переноса даты, выпавшей на выходной
+BUSINESS_DAY_CONVENTIONS = ('unadjusted', 'following', 'modified_following', 'preceding', 'modified_preceding')
+
+# Шаг периодичности платежей: (месяцы, дни); остальные периодичности - 30 дней
+FREQUENCY_STEPS = {
+    'daily': (0, 1),
+    'weekly': (0, 7),
+    'monthly': (1, 0),
+    'quarterly': (3, 0),
+    'semi_annually': (6, 0),
+    'annually': (12, 0)
+}
+DEFAULT_FREQUENCY_STEP = (0, 30)
+
+# Нерабочие праздничные дни РФ (ст. 112 ТК РФ): (месяц, число)
+RUSSIAN_NEW_YEAR_HOLIDAYS = [(1, day) for day in range(1, 9)]
+RUSSIAN_HOLIDAYS = [(2, 23), (3, 8), (5, 1), (5, 9), (6, 12), (11, 4)]
+
+
+def to_ordinals(values: DateArray) -> np.ndarray:
+    """
+    Приведение дат к порядковым номерам (date.toordinal())
+    
+    Args:
+        values: Массив порядковых номеров, datetime64 или date
+        
+    Returns:
+        Массив int64
+    """
+    return to_datetime64(values).astype(np.int64) + _EPOCH_ORDINAL
+
+
+def russian_holidays(year: int) -> List[date]:
+    """
+    Нерабочие праздничные дни РФ за год по правилам ТК РФ
+    
+    Праздник, совпавший с выходным, переносится на следующий рабочий день;
+    переносы новогодних праздников и другие переносы выходных задаются
+    ежегодным постановлением Правительства и передаются в календарь как
+    дополнительные праздники и рабочие дни.
+    
+    Args:
+        year: Год
+        
+    Returns:
+        Список праздничных и перенесенных выходных дней
+    """
+    holidays = [date(year, month, day) for month, day in RUSSIAN_NEW_YEAR_HOLIDAYS]
+    taken = set(holidays)
+    
+    for month, day in RUSSIAN_HOLIDAYS:
+        holiday = date(year, month, day)
+        holidays.append(holiday)
+        taken.add(holiday)
+        if holiday.weekday() >= 5:
+            transfer = holiday + timedelta(days=1)
+            while transfer.weekday() >= 5 or transfer in taken:
+                transfer += timedelta(days=1)
+            holidays.append(transfer)
+            taken.add(transfer)
+    
+    return holidays
+
+
+# Правила праздников календарей по имени: праздники РФ по ТК РФ или только выходные.
+# Отдельного календаря MOEX нет - торговые дни биржи, отличные от календаря РФ,
+# задаются дополнительными праздниками и рабочими днями (holidays, working_days)
+CALENDAR_RULES: Dict[str, Optional[Callable[[int], List[date]]]] = {
+    'russia': russian_holidays,
+    'weekends': None
+}
+
+
+class BusinessCalendar:
+    """
+    Календарь рабочих дней
+    
+    Для каждого года один раз строится битовая карта рабочих дней (выходные
+    по маске дней недели, праздники правила календаря и дополнительные
+    праздники, рабочие выходные). Карты годов склеиваются в непрерывный
+    диапазон, и все операции над массивами дат - поиск по отсортированному
+    массиву рабочих дней (np.searchsorted), без цикла по датам.
+    """
+    
+    def __init__(self,
+                 name: str = 'russia',
+                 holidays: Iterable[date] = (),
+                 working_days: Iterable[date] = (),
+                 weekend: Tuple[int, ...] = (5, 6)):
+        """
+        Инициализация
+        
+        Args:
+            name: Правила праздников (CALENDAR_RULES: 'russia' или 'weekends')
+            holidays: Дополнительные нерабочие дни (переносы по постановлениям
+                Правительства, дни без торгов биржи)
+            working_days: Выходные дни, объявленные рабочими
+            weekend: Дни недели выходных (0 - понедельник)
+        """
+        if name not in CALENDAR_RULES:
+            raise ValueError(f"Unknown calendar: {name}. Supported: {', '.join(CALENDAR_RULES)}")
+        
+        self.name = name
+        self.holidays = frozenset(holidays)
+        self.working_days = frozenset(working_days)
+        self.weekend = tuple(weekend)
+        self.key = (name, self.holidays, self.working_days, self.weekend)
+        self._rule = CALENDAR_RULES[name]
+        
+        self._year_bitmaps: Dict[int, np.ndarray] = {}
+        self._first_year: Optional[int] = None
+        self._last_year: Optional[int] = None
+        self._business_ordinals = np.empty(0, dtype=np.int64)
+    
+    def year_bitmap(self, year: int) -> np.ndarray:
+        """
+        Битовая карта рабочих дней года (True - рабочий день)
+        
+        Args:
+            year: Год
+            
+        Returns:
+            Массив bool длиной в число дней года
+        """
+        bitmap = self._year_bitmaps.get(year)
+        if bitmap is not None:
+            return bitmap
+        
+        first_ordinal = date(year, 1, 1).toordinal()
+        ordinals = np.arange(first_ordinal, date(year + 1, 1, 1).toordinal(), dtype=np.int64)
+        # date.fromordinal(1) - понедельник
+        bitmap = ~np.isin((ordinals - 1) % 7, self.weekend)
+        
+        holidays = set(self._rule(year)) if self._rule else set()
+        holidays.update(day for day in self.holidays if day.year == year)
+        for holiday in holidays:
+            bitmap[holiday.toordinal() - first_ordinal] = False
+        for working_day in self.working_days:
+            if working_day.year == year:
+                bitmap[working_day.toordinal() - first_ordinal] = True
+        
+        bitmap.flags.writeable = False
+        self._year_bitmaps[year] = bitmap
+        return bitmap
+    
+    def _ensure_years(self, first_year: int, last_year: int) -> None:
+        """Расширение непрерывного диапазона рабочих дней до годов [first_year, last_year]"""
+        if self._first_year is not None and self._first_year <= first_year and last_year <= self._last_year:
+            return
+        
+        if self._first_year is not None:
+            first_year = min(first_year, self._first_year)
+            last_year = max(last_year, self._last_year)
+        first_year, last_year = max(first_year, 1), min(last_year, 9998)
+        
+        bitmap = np.concatenate([self.year_bitmap(year) for year in range(first_year, last_year + 1)])
+        self._business_ordinals = np.flatnonzero(bitmap) + date(first_year, 1, 1).toordinal()
+        self._first_year, self._last_year = first_year, last_year
+    
+    def _ensure_ordinals(self, ordinals: np.ndarray, margin_days: int = 0) -> None:
+        """Диапазон, покрывающий даты с запасом в год (и margin_days) для переносов"""
+        if not len(ordinals):
+            return
+        first = date.fromordinal(max(int(ordinals.min()) - margin_days, 1)).year - 1
+        last = date.fromordinal(min(int(ordinals.max()) + margin_days, date(9998, 12, 31).toordinal())).year + 1
+        self._ensure_years(first, last)
+    
+    def is_business_day(self, dates: DateArray) -> np.ndarray:
+        """
+        Признак рабочего дня для массива дат
+        
+        Args:
+            dates: Даты (порядковые номера, datetime64 или date)
+            
+        Returns:
+            Массив bool
+        """
+        ordinals = to_ordinals(dates)
+        self._ensure_ordinals(ordinals)
+        index = np.searchsorted(self._business_ordinals, ordinals)
+        index = np.minimum(index, len(self._business_ordinals) - 1)
+        return self._business_ordinals[index] == ordinals
+    
+    def adjust(self, dates: DateArray, convention: str = 'following') -> np.ndarray:
+        """
+        Перенос дат на рабочие дни
+        
+        Args:
+            dates: Даты (порядковые номера, datetime64 или date)
+            convention: Правило переноса (BUSINESS_DAY_CONVENTIONS)
+            
+        Returns:
+            Массив порядковых номеров рабочих дней
+        """
+        if convention not in BUSINESS_DAY_CONVENTIONS:
+            raise ValueError(
+                f"Unknown business day convention: {convention}. "
+                f"Supported: {', '.join(BUSINESS_DAY_CONVENTIONS)}"
+            )
+        
+        ordinals = to_ordinals(dates)
+        if convention == 'unadjusted' or not len(ordinals):
+            return ordinals
+        self._ensure_ordinals(ordinals)
+        
+        following = self._business_ordinals[np.searchsorted(self._business_ordinals, ordinals, side='left')]
+        preceding = self._business_ordinals[np.searchsorted(self._business_ordinals, ordinals, side='right') - 1]
+        if convention == 'following':
+            return following
+        if convention == 'preceding':
+            return preceding
+        
+        # Модифицированные правила не переносят дату в другой месяц
+        months = to_datetime64(ordinals).astype('datetime64[M]')
+        if convention == 'modified_following':
+            return np.where(to_datetime64(following).astype('datetime64[M]') == months, following, preceding)
+        return np.where(to_datetime64(preceding).astype('datetime64[M]') == months, preceding, following)
+    
+    def advance(self, dates: DateArray, business_days) -> np.ndarray:
+        """
+        Сдвиг дат на число рабочих дней (как Calendar.advance в QuantLib)
+        
+        При сдвиге вперед результат - n-й рабочий день после даты, назад -
+        n-й рабочий день до даты; нулевой сдвиг переносит дату по правилу
+        following.
+        
+        Args:
+            dates: Даты (порядковые номера, datetime64 или date)
+            business_days: Число рабочих дней (скаляр или массив)
+            
+        Returns:
+            Массив порядковых номеров рабочих дней
+        """
+        ordinals = to_ordinals(dates)
+        business_days = np.broadcast_to(np.asarray(business_days, dtype=np.int64), ordinals.shape)
+        if not len(ordinals):
+            return ordinals
+        
+        # Запас диапазона: n рабочих дней - не больше 2n календарных
+        self._ensure_ordinals(ordinals, 2 * int(np.abs(business_days).max()) + 14)
+        
+        forward = np.searchsorted(self._business_ordinals, ordinals, side='right') + business_days - 1
+        backward = np.searchsorted(self._business_ordinals, ordinals, side='left') + business_days
+        index = np.where(business_days > 0, forward, backward)
+        return self._business_ordinals[index]
+    
+    def schedule(self,
+                 start_date: date,
+                 end_date: date,
+                 frequency: str,
+                 convention: str = 'unadjusted',
+                 end_of_month: bool = False) -> np.ndarray:
+        """
+        Даты платежей одного договора
+        
+        Args:
+            start_date: Дата начала
+            end_date: Последняя допустимая дата (до переноса)
+            frequency: Периодичность (FREQUENCY_STEPS)
+            convention: Правило переноса (BUSINESS_DAY_CONVENTIONS)
+            end_of_month: Дата начала в конце месяца - все даты в конце месяца
+            
+        Returns:
+            Отсортированный массив порядковых номеров дат
+        """
+        _, ordinals = self.schedules([start_date], [end_date], [frequency], convention, end_of_month)
+        return ordinals
+    
+    def schedules(self,
+                  start_dates: DateArray,
+                  end_dates: DateArray,
+                  frequencies: List[str],
+                  convention: str = 'unadjusted',
+                  end_of_month: bool = False) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Даты платежей многих договоров одной векторной операцией
+        
+        k-я дата договора - начало плюс k периодов (от начала, без накопления
+        сдвигов при коротких месяцах), даты после окончания отбрасываются,
+        остальные переносятся на рабочие дни, совпавшие после переноса даты
+        схлопываются.
+        
+        Args:
+            start_dates: Даты начала
+            end_dates: Последние допустимые даты (до переноса)
+            frequencies: Периодичность каждого договора (FREQUENCY_STEPS)
+            convention: Правило переноса (BUSINESS_DAY_CONVENTIONS)
+            end_of_month: Дата начала в конце месяца - все даты в конце месяца
+            
+        Returns:
+            Кортеж (номер договора, порядковый номер даты), отсортированный
+            по договору и дате
+        """
+        starts = to_ordinals(start_dates)
+        ends = to_ordinals(end_dates)
+        steps = np.array([FREQUENCY_STEPS.get(frequency, DEFAULT_FREQUENCY_STEP) for frequency in frequencies],
+                         dtype=np.int64).reshape(-1, 2)
+        month_steps, day_steps = steps[:, 0], steps[:, 1]
+        
+        # Верхняя оценка числа дат каждого договора
+        start_months = to_datetime64(starts).astype('datetime64[M]').astype(np.int64)
+        end_months = to_datetime64(ends).astype('datetime64[M]').astype(np.int64)
+        spans = np.where(
+            month_steps > 0,
+            (end_months - start_months) // np.maximum(month_steps, 1),
+            (ends - starts) // np.maximum(day_steps, 1)
+        )
+        counts = np.maximum(spans + 1, 0)
+        
+        lanes = np.repeat(np.arange(len(starts), dtype=np.int64), counts)
+        periods = np.arange(len(lanes), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+        ordinals = np.where(
+            month_steps[lanes] > 0,
+            add_months(starts[lanes], periods * month_steps[lanes], end_of_month),
+            starts[lanes] + periods * day_steps[lanes]
+        )
+        
+        keep = ordinals <= ends[lanes]
+        lanes, ordinals = lanes[keep], self.adjust(ordinals[keep], convention)
+        
+        # После переноса соседние даты могут совпасть
+        unique = np.ones(len(ordinals), dtype=bool)
+        unique[1:] = (lanes[1:] != lanes[:-1]) | (ordinals[1:] != ordinals[:-1])
+        return lanes[unique], ordinals[unique]
+
+
+def add_months(dates: DateArray, months, end_of_month: bool = False) -> np.ndarray:
+    """
+    Прибавление месяцев к датам с ограничением числа концом месяца
+    
+    Args:
+        dates: Даты (порядковые номера, datetime64 или date)
+        months: Число месяцев (скаляр или массив)
+        end_of_month: Даты в последний день месяца остаются в последнем дне
+        
+    Returns:
+        Массив порядковых номеров дат
+    """
+    days = to_datetime64(dates)
+    month_starts = days.astype('datetime64[M]')
+    day_numbers = (days - month_starts.astype('datetime64[D]')).astype(np.int64)
+    
+    target_months = month_starts + np.asarray(months, dtype=np.int64)
+    target_starts = target_months.astype('datetime64[D]')
+    target_lengths = ((target_months + 1).astype('datetime64[D]') - target_starts).astype(np.int64)
+    
+    offsets = np.minimum(day_numbers, target_lengths - 1)
+    if end_of_month:
+        month_ends = days == (month_starts + 1).astype('datetime64[D]') - 1
+        offsets = np.where(month_ends, target_lengths - 1, offsets)
+    return (target_starts + offsets).astype(np.int64) + _EPOCH_ORDINAL
+
+
+_CALENDARS: Dict[tuple, BusinessCalendar] = {}
+
+
+def get_calendar(name: str = 'russia',
+                 holidays: Iterable[date] = (),
+                 working_days: Iterable[date] = ()) -> BusinessCalendar:
+    """
+    Общий экземпляр календаря (битовые карты годов строятся один раз)
+    
+    Args:
+        name: Правила праздников (CALENDAR_RULES)
+        holidays: Дополнительные нерабочие дни
+        working_days: Выходные дни, объявленные рабочими
+        
+    Returns:
+        Календарь
+    """
+    key = (name, frozenset(holidays), frozenset(working_days))
+    calendar = _CALENDARS.get(key)
+    if calendar is None:
+        calendar = _CALENDARS[key] = BusinessCalendar(name, key[1], key[2])
+    return calendar
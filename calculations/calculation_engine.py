@@ -4,7 +4,8 @@
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Tuple
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Tuple, Iterator, Sequence, Set
 import logging
 
 import sys
@@ -15,10 +16,27 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from models import (
     CreditContract, Drawdown, Repayment, CalculationVersion,
-    PaymentSchedule, PortfolioCashflow, PortfolioCashflowItem
+    PaymentSchedule, PortfolioCashflow, PortfolioCashflowItem,
+    KeyRateCurve, KeyRatePoint
 )
 from .payment_scheduler import PaymentScheduler
 from .interest_calculator import InterestCalculator
+from .money import to_minor, from_minor, schedule_minor_rows
+from .accrual_arrays import PortfolioAccrual
+from .rate_sweep import RateSweepEngine, RateSweepResult
+from .daily_rates import DailyRateTable
+from .scenario_overlay import ScenarioOverlay
+from .cashflow_delta import CashflowDelta
+from .monte_carlo import MonteCarloRateSimulator, MonteCarloResult
+from .short_rate_models import ShortRateModel
+from .stress_grid import StressBasis, StressGridRunner
+from .sensitivity import RateSensitivityEngine, RateSensitivityResult
+from .portfolio_optimizer import UtilizationOptimizer, OptimizationResult
+from .reverse_stress import MonthlyStressBasis, ReverseStressSearch, ReverseStressResult
+from .discounting import DiscountingEngine, NPVResult
+from .xirr import XIRRSolver, XIRRResult
+from .amortization import AmortizationResult
+from .subsidies import SubsidyBook, SubsidyResult
 
 logger = logging.getLogger(__name__)
 
@@ -26,16 +44,45 @@ logger = logging.getLogger(__name__)
 class CalculationEngine:
     """Основной движок расчетов"""
     
-    def __init__(self, day_count_basis: str = 'Actual/360'):
+    def __init__(self,
+                 day_count_basis: str = 'Actual/360',
+                 accrual_mode: str = 'daily',
+                 calendar: str = 'russia',
+                 business_day_convention: str = 'unadjusted',
+                 repayment_allocation: str = 'fifo'):
         """
         Инициализация движка расчетов
         
         Args:
             day_count_basis: База для расчета дней
+            accrual_mode: Режим начисления процентов ('daily' или 'event')
+            calendar: Календарь рабочих дней ('russia', 'weekends')
+            business_day_convention: Перенос дат уплаты процентов на рабочие дни
+            repayment_allocation: Распределение погашений ОД по траншам ('fifo' или 'pro_rata')
         """
-        self.payment_scheduler = PaymentScheduler(day_count_basis)
+        self.payment_scheduler = PaymentScheduler(
+            day_count_basis, accrual_mode, calendar, business_day_convention, repayment_allocation
+        )
         self.interest_calculator = InterestCalculator(day_count_basis)
+        self.rate_sweep_engine = RateSweepEngine()
+        self.rate_simulator = MonteCarloRateSimulator()
+        self.stress_grid_runner = StressGridRunner()
+        self.sensitivity_engine = RateSensitivityEngine()
+        self.utilization_optimizer = UtilizationOptimizer()
+        self.reverse_stress_search = ReverseStressSearch()
+        self.discounting_engine = DiscountingEngine()
+        self.xirr_solver = XIRRSolver()
         self.day_count_basis = day_count_basis
+        self.accrual_mode = accrual_mode
+        self.business_day_convention = business_day_convention
+        self.repayment_allocation = repayment_allocation
+    
+    def get_cache_statistics(self) -> Dict[str, Any]:
+        """Статистика кэшей движка: сетки дат платежей и кривые дисконт-факторов"""
+        return {
+            'date_grids': self.payment_scheduler.date_grids.get_statistics(),
+            'discount_curves': self.discounting_engine.curve_cache.get_stats()
+        }
     
     def calculate_portfolio_cashflow(self, 
                                    contracts: List[CreditContract],
@@ -59,49 +106,10 @@ class CalculationEngine:
         try:
             logger.info(f"Calculating portfolio cashflow for version {version.id}")
             
-            # Получение параметров сценария
-            scenario_base_rate = version.get_base_rate() or current_base_rate
-            
-            # Создание консолидированного кэш-флоу
-            portfolio_cashflow = PortfolioCashflow(
-                version_id=version.id
+            payment_schedules = self.calculate_payment_schedules(
+                contracts, all_drawdowns, all_repayments, version, current_base_rate
             )
-            
-            # Получение всех дат из графиков платежей
-            all_dates = set()
-            payment_schedules = {}
-            
-            for contract in contracts:
-                # Получение данных по договору
-                contract_drawdowns = [d for d in all_drawdowns if d.contract_id == contract.id]
-                contract_repayments = [r for r in all_repayments if r.contract_id == contract.id]
-                
-                # Создание графика платежей
-                schedule = self.payment_scheduler.create_payment_schedule(
-                    contract=contract,
-                    drawdowns=contract_drawdowns,
-                    repayments=contract_repayments,
-                    version_id=version.id,
-                    current_base_rate=scenario_base_rate
-                )
-                
-                payment_schedules[contract.id] = schedule
-                
-                # Сбор всех дат
-                for item in schedule.schedule_items:
-                    all_dates.add(item.payment_date)
-            
-            # Консолидация по датам
-            for event_date in sorted(all_dates):
-                cashflow_item = self._create_consolidated_cashflow_item(
-                    event_date, payment_schedules, contracts
-                )
-                portfolio_cashflow.add_item(cashflow_item)
-            
-            # Установка периода отчета
-            if all_dates:
-                portfolio_cashflow.report_start_date = min(all_dates)
-                portfolio_cashflow.report_end_date = max(all_dates)
+            portfolio_cashflow = self.consolidate_schedules(version.id, payment_schedules, contracts)
             
             logger.info(f"Portfolio cashflow calculated with {len(portfolio_cashflow.cashflow_items)} items")
             return portfolio_cashflow
@@ -110,40 +118,542 @@ class CalculationEngine:
             logger.error(f"Error calculating portfolio cashflow: {e}")
             raise
     
-    def _create_consolidated_cashflow_item(self, 
-                                         event_date: date,
-                                         payment_schedules: Dict[str, PaymentSchedule],
-                                         contracts: List[CreditContract]) -> PortfolioCashflowItem:
-        """Создание консолидированного элемента кэш-флоу"""
-        
-        total_drawdowns = Decimal('0')
-        total_principal_payments = Decimal('0')
-        total_interest_payments = Decimal('0')
-        total_debt_balance = Decimal('0')
-        total_available_limit = Decimal('0')
-        
-        # Агрегация данных по всем договорам
+    def iter_payment_schedules(self,
+                               contracts: List[CreditContract],
+                               all_drawdowns: List[Drawdown],
+                               all_repayments: List[Repayment],
+                               version: CalculationVersion,
+                               current_base_rate: Optional[Decimal] = None,
+                               contract_ids: Optional[Set[str]] = None) -> Iterator[PaymentSchedule]:
+        """
+        Ленивое построение графиков платежей по договорам
+        
+        Графики строятся по одному договору за раз, поэтому потребитель
+        (например, потоковая выгрузка) не держит в памяти весь портфель.
+        События сценария (дополнительные выборки и погашения, стресс)
+        накладываются на снимок через ScenarioOverlay.
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки по портфелю
+            all_repayments: Все погашения по портфелю
+            version: Версия расчета
+            current_base_rate: Текущая базовая ставка
+            contract_ids: Строить графики только по этим договорам
+            
+        Yields:
+            График платежей по очередному договору
+        """
+        overlay = ScenarioOverlay.from_version(version)
+        
+        # Получение параметров сценария
+        scenario_base_rate = version.get_base_rate() or current_base_rate
+        base_rate_curve = self.resolve_base_rate_curve(version, current_base_rate)
+        
+        if overlay.rate_shock != 0:
+            if base_rate_curve is not None:
+                base_rate_curve = base_rate_curve.shifted(overlay.rate_shock)
+            elif scenario_base_rate is not None:
+                scenario_base_rate += overlay.rate_shock
+            else:
+                logger.warning(f"Rate shock ignored for version {version.id}: base rate is unknown")
+        
+        # Кривая базовой ставки разворачивается в дневную таблицу один раз на весь портфель
+        base_rate_table = None
+        if base_rate_curve is not None and contracts:
+            start_date, end_date = self._get_portfolio_horizon(contracts, all_drawdowns, all_repayments)
+            base_rate_table = DailyRateTable(base_rate_curve, start_date, end_date)
+        
+        drawdowns_by_contract, repayments_by_contract = self._group_by_contract(all_drawdowns, all_repayments)
+        
+        for contract in contracts:
+            if contract_ids is not None and contract.id not in contract_ids:
+                continue
+            
+            yield self.payment_scheduler.create_payment_schedule(
+                contract=contract,
+                drawdowns=overlay.apply_drawdowns(contract.id, drawdowns_by_contract.get(contract.id, [])),
+                repayments=overlay.apply_repayments(contract.id, repayments_by_contract.get(contract.id, [])),
+                version_id=version.id,
+                current_base_rate=scenario_base_rate,
+                base_rate_table=base_rate_table
+            )
+    
+    def calculate_payment_schedules(self,
+                                    contracts: List[CreditContract],
+                                    all_drawdowns: List[Drawdown],
+                                    all_repayments: List[Repayment],
+                                    version: CalculationVersion,
+                                    current_base_rate: Optional[Decimal] = None) -> Dict[str, PaymentSchedule]:
+        """
+        Графики платежей по всем договорам версии
+        
+        Returns:
+            Словарь {ID договора: график}
+        """
+        return {
+            schedule.contract_id: schedule
+            for schedule in self.iter_payment_schedules(
+                contracts, all_drawdowns, all_repayments, version, current_base_rate
+            )
+        }
+    
+    def calculate_scenario_schedules(self,
+                                     contracts: List[CreditContract],
+                                     all_drawdowns: List[Drawdown],
+                                     all_repayments: List[Repayment],
+                                     version: CalculationVersion,
+                                     base_version: CalculationVersion,
+                                     base_schedules: Dict[str, PaymentSchedule],
+                                     current_base_rate: Optional[Decimal] = None) -> Tuple[Dict[str, PaymentSchedule], Set[str]]:
+        """
+        Графики сценарной версии с переиспользованием графиков базовой
+        
+        Пересчитываются только договоры, затронутые сценарием; графики
+        остальных договоров берутся из базовой версии без копирования.
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки по портфелю
+            all_repayments: Все погашения по портфелю
+            version: Сценарная версия
+            base_version: Базовая версия сценария
+            base_schedules: Графики базовой версии
+            current_base_rate: Текущая базовая ставка
+            
+        Returns:
+            Кортеж (графики сценария по договорам, ID пересчитанных договоров)
+        """
+        scenario_schedules, affected = self._recalculate_scenario_contracts(
+            contracts, all_drawdowns, all_repayments, version, base_version, current_base_rate
+        )
+        
+        schedules = dict(base_schedules)
+        schedules.update(scenario_schedules)
+        return schedules, affected
+    
+    def calculate_scenario_delta(self,
+                                 contracts: List[CreditContract],
+                                 all_drawdowns: List[Drawdown],
+                                 all_repayments: List[Repayment],
+                                 version: CalculationVersion,
+                                 base_version: CalculationVersion,
+                                 base_schedules: Dict[str, PaymentSchedule],
+                                 current_base_rate: Optional[Decimal] = None) -> CashflowDelta:
+        """
+        Кэш-флоу сценарной версии в виде разницы с базовой
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки по портфелю
+            all_repayments: Все погашения по портфелю
+            version: Сценарная версия
+            base_version: Базовая версия сценария
+            base_schedules: Графики базовой версии
+            current_base_rate: Текущая базовая ставка
+            
+        Returns:
+            Дельта кэш-флоу (материализуется поверх кэш-флоу базовой версии)
+        """
+        scenario_schedules, affected = self._recalculate_scenario_contracts(
+            contracts, all_drawdowns, all_repayments, version, base_version, current_base_rate
+        )
+        
+        return CashflowDelta.from_schedules(
+            version_id=version.id,
+            base_version_id=base_version.id,
+            contracts=contracts,
+            base_schedules=base_schedules,
+            scenario_schedules=scenario_schedules,
+            affected_contract_ids=affected
+        )
+    
+    def _recalculate_scenario_contracts(self,
+                                        contracts: List[CreditContract],
+                                        all_drawdowns: List[Drawdown],
+                                        all_repayments: List[Repayment],
+                                        version: CalculationVersion,
+                                        base_version: CalculationVersion,
+                                        current_base_rate: Optional[Decimal]) -> Tuple[Dict[str, PaymentSchedule], Set[str]]:
+        """Графики договоров, затронутых сценарием относительно базовой версии"""
+        overlay = ScenarioOverlay.from_version(version)
+        
+        if ScenarioOverlay.from_version(base_version).is_empty:
+            drawdowns_by_contract, _ = self._group_by_contract(all_drawdowns, [])
+            rate_changed = ScenarioOverlay.rate_parameters(version) != ScenarioOverlay.rate_parameters(base_version)
+            affected = overlay.affected_contract_ids(contracts, drawdowns_by_contract, rate_changed)
+        else:
+            # Базовая версия со своими событиями сценария не переиспользуется
+            affected = {contract.id for contract in contracts}
+        
+        schedules = {
+            schedule.contract_id: schedule
+            for schedule in self.iter_payment_schedules(
+                contracts, all_drawdowns, all_repayments, version, current_base_rate, contract_ids=affected
+            )
+        }
+        
+        logger.info(
+            f"Scenario {version.id}: recalculated {len(affected)} of {len(contracts)} contracts"
+        )
+        return schedules, affected
+    
+    def consolidate_schedules(self,
+                              version_id: str,
+                              payment_schedules: Dict[str, PaymentSchedule],
+                              contracts: List[CreditContract]) -> PortfolioCashflow:
+        """
+        Консолидация графиков договоров в кэш-флоу портфеля (за один проход)
+        
+        Args:
+            version_id: ID версии
+            payment_schedules: Графики по договорам
+            contracts: Список договоров
+            
+        Returns:
+            Консолидированный кэш-флоу портфеля
+        """
+        portfolio_cashflow = PortfolioCashflow(version_id=version_id)
+        totals: Dict[date, List[int]] = {}  # Суммы в копейках
+        
         for contract in contracts:
             schedule = payment_schedules.get(contract.id)
             if not schedule:
                 continue
             
-            # Получение элемента графика на дату
-            cashflow_item = schedule.get_cashflow_by_date(event_date)
-            if cashflow_item:
-                total_drawdowns += cashflow_item.drawdown_amount
-                total_principal_payments += cashflow_item.principal_payment
-                total_interest_payments += cashflow_item.interest_payment
-                total_debt_balance += cashflow_item.debt_balance_end
-                total_available_limit += contract.available_limit
-        
-        return PortfolioCashflowItem(
-            cashflow_date=event_date,
-            total_drawdowns=total_drawdowns,
-            total_principal_payments=total_principal_payments,
-            total_interest_payments=total_interest_payments,
-            total_debt_balance=total_debt_balance,
-            total_available_limit=total_available_limit
+            available_limit = to_minor(contract.available_limit)
+            for event_date, drawdown_amount, principal_payment, interest_payment, debt_balance in schedule_minor_rows(schedule):
+                row = totals.get(event_date)
+                if row is None:
+                    row = totals[event_date] = [0] * 5
+                row[0] += drawdown_amount
+                row[1] += principal_payment
+                row[2] += interest_payment
+                row[3] += debt_balance
+                row[4] += available_limit
+        
+        portfolio_cashflow.add_items([
+            PortfolioCashflowItem(
+                cashflow_date=event_date,
+                total_drawdowns=from_minor(row[0]),
+                total_principal_payments=from_minor(row[1]),
+                total_interest_payments=from_minor(row[2]),
+                total_debt_balance=from_minor(row[3]),
+                total_available_limit=from_minor(row[4])
+            )
+            for event_date, row in sorted(totals.items())
+        ])
+        
+        # Установка периода отчета
+        if totals:
+            portfolio_cashflow.report_start_date = min(totals)
+            portfolio_cashflow.report_end_date = max(totals)
+        
+        return portfolio_cashflow
+    
+    def _group_by_contract(self,
+                           all_drawdowns: List[Drawdown],
+                           all_repayments: List[Repayment]) -> Tuple[Dict[str, List[Drawdown]], Dict[str, List[Repayment]]]:
+        """Группировка выборок и погашений по договорам за один проход"""
+        drawdowns_by_contract: Dict[str, List[Drawdown]] = defaultdict(list)
+        for drawdown in all_drawdowns:
+            drawdowns_by_contract[drawdown.contract_id].append(drawdown)
+        
+        repayments_by_contract: Dict[str, List[Repayment]] = defaultdict(list)
+        for repayment in all_repayments:
+            repayments_by_contract[repayment.contract_id].append(repayment)
+        
+        return drawdowns_by_contract, repayments_by_contract
+    
+    def resolve_base_rate_curve(self,
+                                version: CalculationVersion,
+                                current_base_rate: Optional[Decimal] = None) -> Optional[KeyRateCurve]:
+        """
+        Кривая базовой ставки для версии
+        
+        Используется явная кривая сценария (base_rate_curve); сценарий
+        изменения ставки (new_base_rate, rate_change_date) превращается в
+        ступенчатую кривую: до даты изменения действует текущая ставка.
+        
+        Args:
+            version: Версия расчета
+            current_base_rate: Текущая базовая ставка
+            
+        Returns:
+            Кривая или None, если версия задает не более одной плоской ставки
+        """
+        curve = version.get_base_rate_curve()
+        if curve is not None:
+            return curve
+        
+        new_base_rate = version.get_parameter('new_base_rate')
+        if new_base_rate is None:
+            return None
+        
+        new_base_rate = Decimal(str(new_base_rate))
+        rate_change_date = version.get_parameter('rate_change_date')
+        if not rate_change_date:
+            return KeyRateCurve.flat(new_base_rate)
+        
+        return KeyRateCurve(
+            points=[KeyRatePoint(effective_date=date.fromisoformat(rate_change_date), rate=new_base_rate)],
+            initial_rate=version.get_base_rate() or current_base_rate
+        )
+    
+    def _get_portfolio_horizon(self,
+                               contracts: List[CreditContract],
+                               all_drawdowns: List[Drawdown],
+                               all_repayments: List[Repayment]) -> Tuple[date, date]:
+        """Первая и последняя даты событий портфеля"""
+        dates = [contract.start_date for contract in contracts] + [contract.end_date for contract in contracts]
+        dates.extend(drawdown.drawdown_date for drawdown in all_drawdowns)
+        dates.extend(repayment.repayment_date for repayment in all_repayments)
+        return min(dates), max(dates)
+    
+    def build_portfolio_accrual(self,
+                                contracts: List[CreditContract],
+                                all_drawdowns: List[Drawdown],
+                                all_repayments: List[Repayment]) -> PortfolioAccrual:
+        """
+        Построение массивов начислений портфеля (не зависят от базовой ставки)
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки по портфелю
+            all_repayments: Все погашения по портфелю
+            
+        Returns:
+            Массивы начислений портфеля
+        """
+        return PortfolioAccrual.from_portfolio(
+            self.payment_scheduler, contracts, all_drawdowns, all_repayments
+        )
+    
+    def sweep_base_rates(self,
+                         accrual: PortfolioAccrual,
+                         base_rates: Sequence,
+                         scenario_labels: Optional[List[str]] = None) -> RateSweepResult:
+        """
+        Пакетный расчет кэш-флоу для набора сценариев базовой ставки
+        
+        Args:
+            accrual: Массивы начислений портфеля (см. build_portfolio_accrual)
+            base_rates: Список ставок или матрица траекторий (сценарии, даты)
+            scenario_labels: Наименования сценариев
+            
+        Returns:
+            Куб кэш-флоу сценарии x даты
+        """
+        return self.rate_sweep_engine.sweep(accrual, base_rates, scenario_labels)
+    
+    def calculate_rate_sensitivity(self,
+                                   accrual: PortfolioAccrual,
+                                   contract_currencies: List[str],
+                                   bump_bp: float = 1.0) -> RateSensitivityResult:
+        """
+        Чувствительность процентных расходов к базовой ставке (DV01)
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            contract_currencies: Валюты договоров в порядке accrual.contract_ids
+            bump_bp: Сдвиг базовой ставки, б.п.
+            
+        Returns:
+            DV01 по договорам и корзинам месяц x валюта
+        """
+        return self.sensitivity_engine.calculate(accrual, contract_currencies, bump_bp)
+    
+    def optimize_utilization(self,
+                             contract_ids: List[str],
+                             limits: Sequence[float],
+                             balances: Sequence[float],
+                             rates: Sequence[float],
+                             target_utilization: float,
+                             max_concentration: float = 1.0) -> OptimizationResult:
+        """
+        Распределение долга под целевую загрузку с минимальными процентами
+        
+        Args:
+            contract_ids: ID договоров
+            limits: Общие лимиты договоров
+            balances: Текущие остатки долга
+            rates: Ставки по договорам, % годовых
+            target_utilization: Целевая загрузка портфеля
+            max_concentration: Максимальная доля договора в долге портфеля
+            
+        Returns:
+            Целевые остатки и перераспределение
+        """
+        return self.utilization_optimizer.solve(
+            contract_ids, limits, balances, rates, target_utilization, max_concentration
+        )
+    
+    def build_stress_basis(self,
+                           accrual: PortfolioAccrual,
+                           base_rate: float,
+                           contract_limits: Optional[Sequence[float]] = None) -> StressBasis:
+        """
+        Подготовка снимка портфеля для сетки стресс-сценариев
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            base_rate: Текущая базовая ставка
+            contract_limits: Лимиты договоров в порядке accrual.contract_ids
+            
+        Returns:
+            Редуцированный снимок портфеля
+        """
+        return StressBasis(accrual, base_rate, contract_limits)
+    
+    def run_stress_grid(self,
+                        basis: StressBasis,
+                        grid: List[Dict[str, float]],
+                        limits: Optional[Dict[str, float]] = None,
+                        stop_on_breach: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый расчет сетки стресс-сценариев
+        
+        Args:
+            basis: Редуцированный снимок портфеля
+            grid: Сценарии (см. expand_stress_grid)
+            limits: Ограничения по сценарию
+            stop_on_breach: Остановиться на первом нарушении ограничений
+            
+        Yields:
+            Метрики очередного сценария
+        """
+        return self.stress_grid_runner.run(basis, grid, limits, stop_on_breach)
+    
+    def run_reverse_stress(self,
+                           accrual: PortfolioAccrual,
+                           base_rate: float,
+                           direction: Dict[str, float],
+                           limits: Dict[str, float],
+                           max_scale: float = 1.0) -> ReverseStressResult:
+        """
+        Обратный стресс-тест: минимальный шок, нарушающий помесячные ограничения
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            base_rate: Текущая базовая ставка
+            direction: Направление шока {'rate_shock', 'drawdown_shock'}
+            limits: Ограничения (min_net_cashflow, max_debt_service)
+            max_scale: Верхняя граница множителя направления
+            
+        Returns:
+            Минимальный шок и нарушение
+        """
+        direction, limits = self.reverse_stress_search.validate(direction, limits)
+        basis = MonthlyStressBasis(accrual, base_rate)
+        return self.reverse_stress_search.search(basis, direction, limits, max_scale)
+    
+    def npv_portfolio(self,
+                      schedules: Dict[str, Dict[str, PaymentSchedule]],
+                      curve: KeyRateCurve,
+                      valuation_date: Optional[date] = None) -> NPVResult:
+        """
+        NPV чистого потока договоров по версиям
+        
+        Args:
+            schedules: Графики по версиям: {ID версии: {ID договора: график}}
+            curve: Кривая ставки дисконтирования
+            valuation_date: Дата оценки (по умолчанию - первая дата графиков)
+            
+        Returns:
+            NPV по версиям и договорам
+        """
+        return self.discounting_engine.npv_portfolio(schedules, curve, valuation_date)
+    
+    def generate_amortization(self,
+                              contracts: List[CreditContract],
+                              principals: Optional[List[Decimal]] = None,
+                              rates: Optional[List[Decimal]] = None) -> AmortizationResult:
+        """
+        Графики погашения договоров по типу графика в виде сложенных массивов
+        
+        Args:
+            contracts: Кредитные договоры (тип графика не CUSTOM)
+            principals: Суммы кредита (по умолчанию - лимиты договоров)
+            rates: Годовые ставки, % (по умолчанию - маржа к базовой ставке договора)
+            
+        Returns:
+            Строки графиков всех договоров (суммы в копейках)
+        """
+        return self.payment_scheduler.amortization.generate(contracts, principals, rates)
+    
+    def calculate_effective_rates(self, schedules: Dict[str, PaymentSchedule]) -> XIRRResult:
+        """
+        Эффективная ставка (XIRR) договоров по фактическим датам графиков
+        
+        Args:
+            schedules: Словарь {ID договора: график}
+            
+        Returns:
+            Ставки по договорам и диагностика сходимости
+        """
+        return self.xirr_solver.solve_schedules(schedules)
+    
+    def build_subsidy_book(self,
+                           contracts: List[CreditContract],
+                           schedules: Dict[str, PaymentSchedule]) -> SubsidyBook:
+        """
+        Помесячные массивы субсидируемого портфеля (строятся один раз на графики)
+        
+        Args:
+            contracts: Кредитные договоры
+            schedules: Словарь {ID договора: график}
+            
+        Returns:
+            Массивы остатков, процентов и условий субсидий договоры x месяцы
+        """
+        return SubsidyBook(contracts, schedules)
+    
+    def calculate_subsidies(self,
+                            book: SubsidyBook,
+                            program_curves: Optional[Dict[str, KeyRateCurve]] = None) -> SubsidyResult:
+        """
+        Субсидии, чистые проценты и эффективные ставки субсидируемого портфеля
+        
+        Args:
+            book: Массивы субсидируемого портфеля
+            program_curves: Новые ставки субсидии по программам (None - условия договоров)
+            
+        Returns:
+            Помесячный результат по договорам
+        """
+        result = book.calculate(program_curves)
+        logger.info(
+            f"Subsidies calculated for {len(book.contract_ids)} contracts: "
+            f"subsidy {float(result.subsidy.sum()):.2f}, net interest {float(result.net_interest.sum()):.2f}"
+        )
+        return result
+    
+    def simulate_floating_interest(self,
+                                   accrual: PortfolioAccrual,
+                                   model: ShortRateModel,
+                                   initial_rate: float,
+                                   paths_count: int = 5000,
+                                   seed: Optional[int] = None,
+                                   valuation_date: Optional[date] = None) -> MonteCarloResult:
+        """
+        Стохастический расчет процентов по плавающим выборкам
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            model: Модель краткосрочной ставки
+            initial_rate: Текущая базовая ставка
+            paths_count: Количество траекторий
+            seed: Начальное значение генератора случайных чисел
+            valuation_date: Дата начала моделирования
+            
+        Returns:
+            Перцентильные полосы (P5/P50/P95) процентных расходов по месяцам
+        """
+        return self.rate_simulator.simulate(
+            accrual, model, initial_rate,
+            paths_count=paths_count,
+            seed=seed,
+            valuation_date=valuation_date
         )
     
     def calculate_scenario_impact(self, 
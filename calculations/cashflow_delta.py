@@ -0,0 +1,158 @@
+"""
+Разреженная разница кэш-флоу сценария относительно базовой версии
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Iterable, Set
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, PaymentSchedule, PortfolioCashflow, PortfolioCashflowItem
+from .money import to_minor, from_minor, schedule_minor_rows
+
+# Поля элемента кэш-флоу, которые хранит дельта (в порядке значений строки)
+DELTA_FIELDS = (
+    'total_drawdowns',
+    'total_principal_payments',
+    'total_interest_payments',
+    'total_debt_balance',
+    'total_available_limit'
+)
+
+
+class CashflowDelta:
+    """
+    Изменения консолидированного кэш-флоу сценария по датам (в копейках)
+    
+    Кэш-флоу портфеля - сумма вкладов договоров по датам, поэтому сценарий,
+    затронувший несколько договоров, отличается от базовой версии только на
+    датах их графиков. Дельта хранит разницу вкладов на этих датах и
+    материализуется поверх кэш-флоу базовой версии: элементы неизмененных
+    дат переиспользуются без копирования.
+    """
+    
+    __slots__ = ('version_id', 'base_version_id', 'changes', 'removed_dates', 'affected_contract_ids')
+    
+    def __init__(self,
+                 version_id: str,
+                 base_version_id: str,
+                 changes: Dict[date, List[int]],
+                 removed_dates: Set[date],
+                 affected_contract_ids: Set[str]):
+        self.version_id = version_id
+        self.base_version_id = base_version_id
+        self.changes = changes
+        self.removed_dates = removed_dates
+        self.affected_contract_ids = affected_contract_ids
+    
+    @classmethod
+    def from_schedules(cls,
+                       version_id: str,
+                       base_version_id: str,
+                       contracts: Iterable[CreditContract],
+                       base_schedules: Dict[str, PaymentSchedule],
+                       scenario_schedules: Dict[str, PaymentSchedule],
+                       affected_contract_ids: Set[str]) -> 'CashflowDelta':
+        """
+        Построение дельты по графикам затронутых договоров
+        
+        Args:
+            version_id: ID сценарной версии
+            base_version_id: ID базовой версии
+            contracts: Договоры портфеля
+            base_schedules: Графики базовой версии (все договоры)
+            scenario_schedules: Пересчитанные графики затронутых договоров
+            affected_contract_ids: ID затронутых договоров
+            
+        Returns:
+            Дельта кэш-флоу
+        """
+        changes: Dict[date, List[int]] = {}
+        base_dates: Set[date] = set()
+        scenario_dates: Set[date] = set()
+        
+        for contract in contracts:
+            if contract.id not in affected_contract_ids:
+                continue
+            
+            for schedules, sign, dates in (
+                (base_schedules, -1, base_dates),
+                (scenario_schedules, 1, scenario_dates)
+            ):
+                schedule = schedules.get(contract.id)
+                if not schedule:
+                    continue
+                available_limit = sign * to_minor(contract.available_limit)
+                for event_date, drawdown_amount, principal_payment, interest_payment, debt_balance in schedule_minor_rows(schedule):
+                    row = changes.get(event_date)
+                    if row is None:
+                        row = changes[event_date] = [0] * len(DELTA_FIELDS)
+                    row[0] += sign * drawdown_amount
+                    row[1] += sign * principal_payment
+                    row[2] += sign * interest_payment
+                    row[3] += sign * debt_balance
+                    row[4] += available_limit
+                    dates.add(event_date)
+        
+        # Даты, с которых ушли все вклады затронутых договоров, исчезают,
+        # только если на них нет событий других договоров
+        removed_dates = base_dates - scenario_dates
+        if removed_dates:
+            for contract_id, schedule in base_schedules.items():
+                if contract_id in affected_contract_ids:
+                    continue
+                removed_dates.difference_update(item.payment_date for item in schedule.schedule_items)
+                if not removed_dates:
+                    break
+        
+        changes = {
+            event_date: row for event_date, row in changes.items()
+            if event_date in scenario_dates - base_dates or event_date in removed_dates or any(row)
+        }
+        
+        return cls(version_id, base_version_id, changes, removed_dates, set(affected_contract_ids))
+    
+    @property
+    def changed_dates_count(self) -> int:
+        """Количество измененных дат"""
+        return len(self.changes)
+    
+    def materialize(self, base_cashflow: PortfolioCashflow) -> PortfolioCashflow:
+        """
+        Кэш-флоу сценария поверх кэш-флоу базовой версии
+        
+        Args:
+            base_cashflow: Кэш-флоу базовой версии
+            
+        Returns:
+            Кэш-флоу сценарной версии
+        """
+        items: Dict[date, PortfolioCashflowItem] = {
+            item.cashflow_date: item for item in base_cashflow.cashflow_items
+        }
+        
+        for event_date, row in self.changes.items():
+            if event_date in self.removed_dates:
+                items.pop(event_date, None)
+                continue
+            
+            base_item = items.get(event_date)
+            values = {
+                field: (getattr(base_item, field) if base_item is not None else Decimal('0')) + from_minor(change)
+                for field, change in zip(DELTA_FIELDS, row)
+            }
+            items[event_date] = PortfolioCashflowItem(cashflow_date=event_date, **values)
+        
+        cashflow = PortfolioCashflow(version_id=self.version_id)
+        cashflow.add_items([items[event_date] for event_date in sorted(items)])
+        
+        if items:
+            cashflow.report_start_date = min(items)
+            cashflow.report_end_date = max(items)
+        
+        return cashflow
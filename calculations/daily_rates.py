@@ -0,0 +1,103 @@
+"""
+Таблица дневных значений базовой ставки
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import KeyRateCurve
+from models.key_rate_curve import CurveInterpolation
+
+
+class DailyRateTable:
+    """
+    Значения кривой базовой ставки на каждый день горизонта
+    
+    Таблица строится один раз на расчет портфеля и разделяется всеми
+    договорами: ставка на дату - это обращение к массиву по смещению в днях,
+    поэтому многоступенчатая траектория ЦБ стоит столько же, сколько плоская
+    ставка. Даты вне горизонта получают крайние значения.
+    """
+    
+    def __init__(self, curve: KeyRateCurve, start_date: date, end_date: date):
+        """
+        Построение таблицы
+        
+        Args:
+            curve: Кривая базовой ставки
+            start_date: Первый день горизонта
+            end_date: Последний день горизонта
+        """
+        if end_date < start_date:
+            start_date, end_date = end_date, start_date
+        
+        self.curve = curve
+        self.start_date = start_date
+        self.end_date = end_date
+        self._start_ordinal = start_date.toordinal()
+        
+        points = curve.get_sorted_points()
+        point_days = np.array([point.effective_date.toordinal() for point in points], dtype=np.int64)
+        point_rates = np.array([float(point.rate) for point in points])
+        initial_rate = float(curve.initial_rate) if curve.initial_rate is not None else point_rates[0]
+        
+        days = np.arange(self._start_ordinal, end_date.toordinal() + 1, dtype=np.int64)
+        
+        if curve.interpolation == CurveInterpolation.LINEAR:
+            values = np.interp(days, point_days, point_rates)
+        else:
+            last_point = np.searchsorted(point_days, days, side='right') - 1
+            values = point_rates[np.maximum(last_point, 0)]
+        values = np.where(days < point_days[0], initial_rate, values)
+        
+        self.values = values
+        self._decimals: List[Optional[Decimal]] = [None] * len(values)  # Заполняется по мере обращения
+    
+    def __len__(self) -> int:
+        """Количество дней в горизонте"""
+        return len(self.values)
+    
+    def _offset(self, target_date: date) -> int:
+        """Смещение даты в таблице (с ограничением горизонтом)"""
+        return min(max(target_date.toordinal() - self._start_ordinal, 0), len(self.values) - 1)
+    
+    def rate_on(self, target_date: date) -> Decimal:
+        """
+        Ставка на дату
+        
+        Args:
+            target_date: Дата
+            
+        Returns:
+            Значение ставки
+        """
+        offset = self._offset(target_date)
+        rate = self._decimals[offset]
+        if rate is None:
+            rate = Decimal(repr(round(float(self.values[offset]), 10)))
+            self._decimals[offset] = rate
+        return rate
+    
+    def values_on(self, dates: np.ndarray) -> np.ndarray:
+        """
+        Ставки на массив дат (векторно)
+        
+        Args:
+            dates: Массив datetime64[D]
+            
+        Returns:
+            Массив ставок
+        """
+        offsets = dates.astype('datetime64[D]').astype(np.int64) - (
+            np.datetime64(self.start_date, 'D').astype(np.int64)
+        )
+        return self.values[np.clip(offsets, 0, len(self.values) - 1)]
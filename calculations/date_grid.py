@@ -0,0 +1,89 @@
+"""
+Общий кэш сеток дат платежей
+"""
+
+from collections import OrderedDict
+from datetime import date
+from typing import Any, Dict
+
+import numpy as np
+
+from .business_calendar import BusinessCalendar
+
+# Количество сеток дат в кэше по умолчанию
+DATE_GRID_CACHE_SIZE = 4096
+
+
+class DateGridCache:
+    """
+    Сетки дат платежей по ключу (начало, окончание, периодичность, календарь,
+    правило переноса) с вытеснением LRU
+    
+    Договоры с одинаковыми условиями (транши одного банка на одни даты)
+    получают один и тот же массив дат: сетка строится один раз и отдается
+    только для чтения.
+    """
+    
+    def __init__(self, max_size: int = DATE_GRID_CACHE_SIZE):
+        """
+        Инициализация
+        
+        Args:
+            max_size: Максимальное количество сеток в кэше
+        """
+        self.max_size = max_size
+        self._grids: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self,
+            calendar: BusinessCalendar,
+            start_date: date,
+            end_date: date,
+            frequency: str,
+            convention: str = 'unadjusted',
+            end_of_month: bool = False) -> np.ndarray:
+        """
+        Сетка дат из кэша или построенная календарем
+        
+        Args:
+            calendar: Календарь рабочих дней
+            start_date: Дата начала
+            end_date: Последняя допустимая дата (до переноса)
+            frequency: Периодичность (FREQUENCY_STEPS)
+            convention: Правило переноса (BUSINESS_DAY_CONVENTIONS)
+            end_of_month: Дата начала в конце месяца - все даты в конце месяца
+            
+        Returns:
+            Массив порядковых номеров дат (только для чтения)
+        """
+        key = (start_date, end_date, getattr(frequency, 'value', frequency), calendar.key, convention, end_of_month)
+        grid = self._grids.get(key)
+        if grid is not None:
+            self.hits += 1
+            self._grids.move_to_end(key)
+            return grid
+        
+        self.misses += 1
+        grid = calendar.schedule(start_date, end_date, frequency, convention, end_of_month)
+        grid.flags.writeable = False
+        self._grids[key] = grid
+        while len(self._grids) > self.max_size:
+            self._grids.popitem(last=False)
+        return grid
+    
+    def clear(self) -> None:
+        """Сброс кэша и счетчиков"""
+        self._grids.clear()
+        self.hits = 0
+        self.misses = 0
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """Статистика попаданий в кэш"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._grids),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
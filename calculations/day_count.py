@@ -0,0 +1,175 @@
+"""
+Векторный расчет долей года по базам расчета дней
+"""
+
+from datetime import date
+from typing import Union
+
+import numpy as np
+
+# Базы расчета дней и их синонимы
+DAY_COUNT_CONVENTIONS = {
+    'Actual/360': 'Actual/360',
+    'Actual/365': 'Actual/365F',
+    'Actual/365F': 'Actual/365F',
+    '30/360': '30/360',
+    'Actual/Actual': 'Actual/Actual',
+    'Act/Act': 'Actual/Actual'
+}
+
+# Порядковый номер 1970-01-01 в нумерации date.toordinal()
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+DateArray = Union[np.ndarray, list]
+
+
+def to_datetime64(values: DateArray) -> np.ndarray:
+    """
+    Приведение дат к массиву datetime64[D]
+    
+    Args:
+        values: Массив порядковых номеров (date.toordinal()), datetime64 или date
+        
+    Returns:
+        Массив datetime64[D]
+    """
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[D]')
+    if np.issubdtype(values.dtype, np.integer):
+        return (values.astype(np.int64) - _EPOCH_ORDINAL).astype('datetime64[D]')
+    return values.astype('datetime64[D]')
+
+
+def _split_dates(days: np.ndarray):
+    """Год, месяц и число для массива datetime64[D]"""
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]').astype(np.int64) + 1970
+    month_numbers = months.astype(np.int64) % 12 + 1
+    day_numbers = (days - months.astype('datetime64[D]')).astype(np.int64) + 1
+    return years, month_numbers, day_numbers
+
+
+class DayCountService:
+    """
+    Доли года и количество дней для массивов периодов
+    
+    Все базы считаются целыми операциями NumPy над датами, без обращения
+    к QuantLib на каждый период: Actual/360 и Actual/365F - разность
+    дат, 30/360 - правило Bond Basis (ISDA), Actual/Actual - правило ISDA
+    с разбиением периода по календарным годам.
+    """
+    
+    def __init__(self, day_count_basis: str = 'Actual/360'):
+        """
+        Инициализация
+        
+        Args:
+            day_count_basis: База расчета дней (DAY_COUNT_CONVENTIONS)
+        """
+        if day_count_basis not in DAY_COUNT_CONVENTIONS:
+            raise ValueError(
+                f"Unknown day count basis: {day_count_basis}. "
+                f"Supported: {', '.join(DAY_COUNT_CONVENTIONS)}"
+            )
+        self.day_count_basis = day_count_basis
+        self.convention = DAY_COUNT_CONVENTIONS[day_count_basis]
+    
+    def day_counts(self, start_dates: DateArray, end_dates: DateArray) -> np.ndarray:
+        """
+        Количество дней периодов по базе
+        
+        Args:
+            start_dates: Даты начала периодов
+            end_dates: Даты окончания периодов
+            
+        Returns:
+            Массив количества дней
+        """
+        start = to_datetime64(start_dates)
+        end = to_datetime64(end_dates)
+        
+        if self.convention != '30/360':
+            return (end - start).astype(np.int64)
+        
+        start_years, start_months, start_days = _split_dates(start)
+        end_years, end_months, end_days = _split_dates(end)
+        start_days = np.minimum(start_days, 30)
+        end_days = np.where((end_days == 31) & (start_days == 30), 30, end_days)
+        return 360 * (end_years - start_years) + 30 * (end_months - start_months) + (end_days - start_days)
+    
+    def year_fractions(self, start_dates: DateArray, end_dates: DateArray) -> np.ndarray:
+        """
+        Доли года периодов по базе
+        
+        Args:
+            start_dates: Даты начала периодов
+            end_dates: Даты окончания периодов
+            
+        Returns:
+            Массив долей года
+        """
+        if self.convention == 'Actual/360':
+            return self.day_counts(start_dates, end_dates) / 360.0
+        if self.convention == 'Actual/365F':
+            return self.day_counts(start_dates, end_dates) / 365.0
+        if self.convention == '30/360':
+            return self.day_counts(start_dates, end_dates) / 360.0
+        
+        # Actual/Actual (ISDA): остаток года начала + целые годы + начало года окончания
+        start = to_datetime64(start_dates)
+        end = to_datetime64(end_dates)
+        start_year = start.astype('datetime64[Y]')
+        end_year = end.astype('datetime64[Y]')
+        start_year_days = ((start_year + 1).astype('datetime64[D]') - start_year.astype('datetime64[D]')).astype(np.int64)
+        end_year_days = ((end_year + 1).astype('datetime64[D]') - end_year.astype('datetime64[D]')).astype(np.int64)
+        
+        return (
+            ((start_year + 1).astype('datetime64[D]') - start).astype(np.int64) / start_year_days
+            + (end_year - start_year).astype(np.int64) - 1
+            + (end - end_year.astype('datetime64[D]')).astype(np.int64) / end_year_days
+        )
+    
+    def year_fraction_ratios(self, start_dates: DateArray, end_dates: DateArray):
+        """
+        Доли года периодов в виде точных дробей числитель / знаменатель
+        
+        Нужны для расчетов в целых числах (см. money.accrue_interest).
+        
+        Args:
+            start_dates: Даты начала периодов
+            end_dates: Даты окончания периодов
+            
+        Returns:
+            Кортеж массивов int64 (числители, знаменатели)
+        """
+        if self.convention != 'Actual/Actual':
+            days = self.day_counts(start_dates, end_dates)
+            basis = 365 if self.convention == 'Actual/365F' else 360
+            return days, np.full(days.shape, basis, dtype=np.int64)
+        
+        start = to_datetime64(start_dates)
+        end = to_datetime64(end_dates)
+        start_year = start.astype('datetime64[Y]')
+        end_year = end.astype('datetime64[Y]')
+        start_year_days = ((start_year + 1).astype('datetime64[D]') - start_year.astype('datetime64[D]')).astype(np.int64)
+        end_year_days = ((end_year + 1).astype('datetime64[D]') - end_year.astype('datetime64[D]')).astype(np.int64)
+        
+        head = ((start_year + 1).astype('datetime64[D]') - start).astype(np.int64)
+        years = (end_year - start_year).astype(np.int64) - 1
+        tail = (end - end_year.astype('datetime64[D]')).astype(np.int64)
+        numerators = head * end_year_days + years * start_year_days * end_year_days + tail * start_year_days
+        return numerators, start_year_days * end_year_days
+    
+    def year_fraction(self, start_date: date, end_date: date) -> float:
+        """
+        Доля года одного периода
+        
+        Args:
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+            
+        Returns:
+            Доля года
+        """
+        return float(self.year_fractions([start_date.toordinal()], [end_date.toordinal()])[0])
@@ -0,0 +1,237 @@
+"""
+Дисконтирование графиков платежей: кривые дисконт-факторов и NPV портфеля
+"""
+
+from collections import OrderedDict
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Union
+import json
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import KeyRateCurve, PaymentSchedule
+from .daily_rates import DailyRateTable
+from .money import schedule_minor_rows, MINOR_UNITS
+
+logger = logging.getLogger(__name__)
+
+# Дней в году для дисконтирования (как в InterestCalculator.calculate_net_present_value)
+DISCOUNT_DAY_BASIS = 365.25
+
+
+class DiscountCurve:
+    """
+    Дисконт-факторы на каждый день горизонта от даты оценки
+    
+    Ставка кривой на день - годовая ставка с ежегодной капитализацией, поэтому
+    фактор дня равен (1 + r / 100) ^ (-1 / DISCOUNT_DAY_BASIS), а фактор даты -
+    произведение факторов предшествующих дней (накопленная сумма логарифмов).
+    Для плоской ставки это (1 + r) ^ (-дни / DISCOUNT_DAY_BASIS).
+    """
+    
+    def __init__(self, curve: KeyRateCurve, valuation_date: date, end_date: date):
+        """
+        Построение кривой
+        
+        Args:
+            curve: Кривая ставки дисконтирования (% годовых)
+            valuation_date: Дата оценки (фактор 1)
+            end_date: Последний день горизонта
+        """
+        self.curve = curve
+        self.valuation_date = valuation_date
+        self.end_date = max(end_date, valuation_date)
+        self._start_ordinal = valuation_date.toordinal()
+        
+        rates = DailyRateTable(curve, valuation_date, self.end_date).values
+        log_factors = -np.log1p(rates / 100.0) / DISCOUNT_DAY_BASIS
+        self.factors = np.exp(np.concatenate(([0.0], np.cumsum(log_factors[:-1]))))
+    
+    def covers(self, end_date: date) -> bool:
+        """Горизонт кривой включает дату"""
+        return end_date <= self.end_date
+    
+    def factors_on(self, ordinals: np.ndarray) -> np.ndarray:
+        """
+        Дисконт-факторы на массив дат
+        
+        Args:
+            ordinals: Даты (date.toordinal()) не раньше даты оценки
+            
+        Returns:
+            Массив факторов
+        """
+        offsets = np.asarray(ordinals, dtype=np.int64) - self._start_ordinal
+        return self.factors[np.clip(offsets, 0, len(self.factors) - 1)]
+
+
+class DiscountCurveCache:
+    """Кэш кривых дисконт-факторов по (кривая, дата оценки) с вытеснением LRU"""
+    
+    def __init__(self, max_size: int = 16):
+        """
+        Инициализация
+        
+        Args:
+            max_size: Максимальное количество кривых в кэше
+        """
+        self.max_size = max_size
+        self._curves: "OrderedDict[tuple, DiscountCurve]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    
+    def get(self, curve: KeyRateCurve, valuation_date: date, end_date: date) -> DiscountCurve:
+        """
+        Кривая из кэша или новая (при нехватке горизонта - перестроенная)
+        
+        Args:
+            curve: Кривая ставки дисконтирования
+            valuation_date: Дата оценки
+            end_date: Последняя дата, на которую нужны факторы
+            
+        Returns:
+            Кривая дисконт-факторов
+        """
+        key = (json.dumps(curve.to_parameters(), sort_keys=True), valuation_date)
+        discount_curve = self._curves.get(key)
+        if discount_curve is not None and discount_curve.covers(end_date):
+            self.hits += 1
+            self._curves.move_to_end(key)
+            return discount_curve
+        
+        self.misses += 1
+        discount_curve = DiscountCurve(curve, valuation_date, end_date)
+        self._curves[key] = discount_curve
+        self._curves.move_to_end(key)
+        while len(self._curves) > self.max_size:
+            self._curves.popitem(last=False)
+        return discount_curve
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика кэша"""
+        return {'size': len(self._curves), 'hits': self.hits, 'misses': self.misses}
+
+
+class NPVResult:
+    """NPV чистого потока графиков: версии x договоры"""
+    
+    def __init__(self,
+                 version_ids: List[str],
+                 contract_ids: List[str],
+                 values: np.ndarray,
+                 valuation_date: Optional[date]):
+        self.version_ids = version_ids
+        self.contract_ids = contract_ids
+        self.values = values
+        self.valuation_date = valuation_date
+    
+    def get_portfolio_npv(self) -> Dict[str, float]:
+        """NPV портфеля по версиям"""
+        totals = self.values.sum(axis=1)
+        return {version_id: float(totals[index]) for index, version_id in enumerate(self.version_ids)}
+    
+    def get_contract_npv(self, version_id: str) -> Dict[str, float]:
+        """NPV договоров версии"""
+        row = self.values[self.version_ids.index(version_id)]
+        return {contract_id: float(row[index]) for index, contract_id in enumerate(self.contract_ids)}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'valuation_date': self.valuation_date.isoformat() if self.valuation_date else None,
+            'portfolio_npv': self.get_portfolio_npv(),
+            'contracts': {version_id: self.get_contract_npv(version_id) for version_id in self.version_ids}
+        }
+
+
+class DiscountingEngine:
+    """
+    NPV графиков платежей всех договоров и версий за одну операцию
+    
+    Потоки всех графиков (выборки минус погашения и проценты) собираются в
+    разреженную матрицу: строка - пара версия x договор, столбец - дата.
+    NPV всех строк - произведение этой матрицы на вектор дисконт-факторов
+    дат, которое считается одним np.bincount. Кривая факторов строится один
+    раз на (кривая, дата оценки) и берется из кэша.
+    """
+    
+    def __init__(self, cache_size: int = 16):
+        """
+        Инициализация
+        
+        Args:
+            cache_size: Количество кривых дисконт-факторов в кэше
+        """
+        self.curve_cache = DiscountCurveCache(cache_size)
+    
+    def npv_portfolio(self,
+                      schedules: Dict[str, Dict[str, PaymentSchedule]],
+                      curve: Union[KeyRateCurve, Decimal, float],
+                      valuation_date: Optional[date] = None) -> NPVResult:
+        """
+        NPV графиков на дату оценки
+        
+        Args:
+            schedules: Графики по версиям: {ID версии: {ID договора: график}}
+            curve: Кривая ставки дисконтирования или плоская ставка, % годовых
+            valuation_date: Дата оценки (по умолчанию - первая дата графиков);
+                потоки до нее не учитываются
+                
+        Returns:
+            NPV по версиям и договорам
+        """
+        if not isinstance(curve, KeyRateCurve):
+            curve = KeyRateCurve.flat(Decimal(str(curve)))
+        
+        version_index: Dict[str, int] = {}
+        contract_index: Dict[str, int] = {}
+        schedule_versions, schedule_contracts, rows_counts, ordinals, flows = [], [], [], [], []
+        
+        for version_id, version_schedules in schedules.items():
+            version = version_index.setdefault(version_id, len(version_index))
+            for contract_id, schedule in version_schedules.items():
+                rows = schedule_minor_rows(schedule)
+                schedule_versions.append(version)
+                schedule_contracts.append(contract_index.setdefault(contract_id, len(contract_index)))
+                rows_counts.append(len(rows))
+                ordinals.extend(row[0].toordinal() for row in rows)
+                # Чистый поток строки: выборка - погашение ОД - проценты
+                flows.extend(row[1] - row[2] - row[3] for row in rows)
+        
+        versions_count, contracts_count = len(version_index), len(contract_index)
+        if not ordinals:
+            return NPVResult(
+                list(version_index), list(contract_index), np.zeros((versions_count, contracts_count)), valuation_date
+            )
+        
+        # Строка матрицы потоков для каждого потока: версия x договор его графика
+        lane_index = np.repeat(
+            np.array(schedule_versions, dtype=np.int64) * contracts_count + np.array(schedule_contracts, dtype=np.int64),
+            rows_counts
+        )
+        ordinals = np.array(ordinals, dtype=np.int64)
+        flows = np.array(flows, dtype=np.float64) / MINOR_UNITS
+        
+        valuation_date = valuation_date or date.fromordinal(int(ordinals.min()))
+        discount_curve = self.curve_cache.get(curve, valuation_date, date.fromordinal(int(ordinals.max())))
+        
+        included = ordinals >= valuation_date.toordinal()
+        values = np.bincount(
+            lane_index[included],
+            weights=flows[included] * discount_curve.factors_on(ordinals[included]),
+            minlength=versions_count * contracts_count
+        ).reshape(versions_count, contracts_count)
+        
+        logger.info(
+            f"NPV calculated: {versions_count} versions x {contracts_count} contracts, "
+            f"{int(included.sum())} cashflows"
+        )
+        return NPVResult(list(version_index), list(contract_index), values, valuation_date)
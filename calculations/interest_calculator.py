@@ -1,13 +1,19 @@
 """
-Калькулятор процентных ставок с использованием Quantlib
+Калькулятор процентных ставок
 """
 
-import QuantLib as ql
 from datetime import date, datetime
 from decimal import Decimal
-from typing import Optional
+from typing import Optional, Sequence
 import logging
 
+import numpy as np
+
+from .day_count import DayCountService, DAY_COUNT_CONVENTIONS
+from .money import to_minor, from_minor, to_rate_units, accrue_interest
+from .discounting import DISCOUNT_DAY_BASIS
+from .xirr import XIRRSolver
+
 logger = logging.getLogger(__name__)
 
 
@@ -19,25 +25,17 @@ class InterestCalculator:
         Инициализация калькулятора
         
         Args:
-            day_count_basis: База для расчета дней (Actual/360, Actual/365, 30/360)
+            day_count_basis: База для расчета дней (Actual/360, Actual/365F, 30/360, Actual/Actual)
         """
         self.day_count_basis = day_count_basis
-        self._setup_quantlib()
+        self._setup_day_count()
     
-    def _setup_quantlib(self):
-        """Настройка Quantlib"""
-        # Установка календаря (рабочие дни)
-        self.calendar = ql.NullCalendar()  # Можно заменить на конкретный календарь
-        
-        # Установка базы для расчета дней
-        if self.day_count_basis == 'Actual/360':
-            self.day_count = ql.Actual360()
-        elif self.day_count_basis == 'Actual/365':
-            self.day_count = ql.Actual365Fixed()
-        elif self.day_count_basis == '30/360':
-            self.day_count = ql.Thirty360()
+    def _setup_day_count(self):
+        """Настройка базы расчета дней"""
+        if self.day_count_basis in DAY_COUNT_CONVENTIONS:
+            self.day_count = DayCountService(self.day_count_basis)
         else:
-            self.day_count = ql.Actual360()  # По умолчанию
+            self.day_count = DayCountService('Actual/360')  # По умолчанию
     
     def calculate_interest(self, 
                           principal: Decimal, 
@@ -57,22 +55,83 @@ class InterestCalculator:
             Сумма процентов
         """
         try:
-            # Конвертация в Quantlib типы
-            ql_start_date = ql.Date(start_date.day, start_date.month, start_date.year)
-            ql_end_date = ql.Date(end_date.day, end_date.month, end_date.year)
-            
-            # Расчет количества дней
-            days = self.day_count.dayCount(ql_start_date, ql_end_date)
-            
-            # Расчет процентов
-            interest = float(principal) * float(rate) * days / self.day_count.yearFraction(ql_start_date, ql_end_date)
-            
-            return Decimal(str(round(interest, 2)))
+            numerators, denominators = self.day_count.year_fraction_ratios(
+                [start_date.toordinal()], [end_date.toordinal()]
+            )
+            interest = accrue_interest(
+                to_minor(principal), to_rate_units(Decimal(rate) * 100), int(numerators[0]), int(denominators[0])
+            )
+            return from_minor(interest)
             
         except Exception as e:
             logger.error(f"Interest calculation error: {e}")
             return Decimal('0')
     
+    def year_fraction(self, start_date: date, end_date: date) -> float:
+        """
+        Доля года между датами по базе расчета дней
+        
+        Args:
+            start_date: Дата начала периода
+            end_date: Дата окончания периода
+            
+        Returns:
+            Доля года
+        """
+        return self.day_count.year_fraction(start_date, end_date)
+    
+    def year_fractions(self, start_dates: Sequence[date], end_dates: Sequence[date]) -> np.ndarray:
+        """
+        Доли года для массива периодов одной векторной операцией
+        
+        Args:
+            start_dates: Даты начала периодов
+            end_dates: Даты окончания периодов
+            
+        Returns:
+            Массив долей года
+        """
+        return self.day_count.year_fractions(
+            np.fromiter((day.toordinal() for day in start_dates), dtype=np.int64, count=len(start_dates)),
+            np.fromiter((day.toordinal() for day in end_dates), dtype=np.int64, count=len(end_dates))
+        )
+    
+    def year_fraction_ratios(self, start_dates: Sequence[date], end_dates: Sequence[date]):
+        """
+        Доли года для массива периодов в виде точных дробей
+        
+        Args:
+            start_dates: Даты начала периодов
+            end_dates: Даты окончания периодов
+            
+        Returns:
+            Кортеж массивов int64 (числители, знаменатели)
+        """
+        return self.day_count.year_fraction_ratios(
+            np.fromiter((day.toordinal() for day in start_dates), dtype=np.int64, count=len(start_dates)),
+            np.fromiter((day.toordinal() for day in end_dates), dtype=np.int64, count=len(end_dates))
+        )
+    
+    def calculate_interest_batch(self,
+                                 principals: np.ndarray,
+                                 rates: np.ndarray,
+                                 start_ordinals: np.ndarray,
+                                 end_ordinals: np.ndarray) -> np.ndarray:
+        """
+        Расчет процентов для массива периодов
+        
+        Args:
+            principals: Основные суммы
+            rates: Процентные ставки (в десятичном виде)
+            start_ordinals: Даты начала периодов (date.toordinal())
+            end_ordinals: Даты окончания периодов (date.toordinal())
+            
+        Returns:
+            Массив сумм процентов
+        """
+        year_fractions = self.day_count.year_fractions(start_ordinals, end_ordinals)
+        return np.asarray(principals, dtype=np.float64) * np.asarray(rates, dtype=np.float64) * year_fractions
+    
     def calculate_compound_interest(self, 
                                    principal: Decimal, 
                                    rate: Decimal, 
@@ -94,7 +153,7 @@ class InterestCalculator:
             # Формула сложных процентов: A = P(1 + r/n)^(nt)
             # где P - основная сумма, r - ставка, n - частота начисления, t - время
             amount = float(principal) * (1 + float(rate) / compounding_frequency) ** (compounding_frequency * periods / 12)
-            return Decimal(str(round(amount, 2)))
+            return from_minor(to_minor(amount))
             
         except Exception as e:
             logger.error(f"Compound interest calculation error: {e}")
@@ -128,7 +187,7 @@ class InterestCalculator:
             else:
                 payment = float(principal) * (rate_float * (1 + rate_float) ** periods_float) / ((1 + rate_float) ** periods_float - 1)
             
-            return Decimal(str(round(payment, 2)))
+            return from_minor(to_minor(payment))
             
         except Exception as e:
             logger.error(f"Annuity payment calculation error: {e}")
@@ -185,7 +244,7 @@ class InterestCalculator:
             
             present_value = float(future_value) / (1 + rate_float) ** periods_float
             
-            return Decimal(str(round(present_value, 2)))
+            return from_minor(to_minor(present_value))
             
         except Exception as e:
             logger.error(f"Present value calculation error: {e}")
@@ -205,15 +264,16 @@ class InterestCalculator:
             Чистая приведенная стоимость
         """
         try:
-            npv = Decimal('0')
-            base_date = cashflows[0]['date'] if cashflows else date.today()
+            if not cashflows:
+                return Decimal('0')
             
-            for cf in cashflows:
-                periods = (cf['date'] - base_date).days / 365.25  # В годах
-                pv = self.calculate_present_value(cf['amount'], discount_rate, periods)
-                npv += pv
+            # Все потоки одним векторным выражением: PV = FV / (1 + r)^t, t - в годах
+            base_date = cashflows[0]['date']
+            amounts = np.array([float(cf['amount']) for cf in cashflows])
+            years = np.array([(cf['date'] - base_date).days for cf in cashflows]) / DISCOUNT_DAY_BASIS
+            npv = float(amounts @ (1 + float(discount_rate)) ** -years)
             
-            return npv
+            return from_minor(to_minor(npv))
             
         except Exception as e:
             logger.error(f"NPV calculation error: {e}")
@@ -223,41 +283,32 @@ class InterestCalculator:
                                         cashflows: list, 
                                         initial_guess: Decimal = Decimal('0.1')) -> Optional[Decimal]:
         """
-        Расчет внутренней нормы доходности
+        Расчет внутренней нормы доходности (XIRR по датам потоков)
         
         Args:
-            cashflows: Список денежных потоков
+            cashflows: Список денежных потоков (словари с 'amount' и 'date';
+                без дат потоки считаются ежемесячными)
             initial_guess: Начальное приближение для IRR
             
         Returns:
             Внутренняя норма доходности или None если не найдена
         """
         try:
-            # Простая реализация методом Ньютона-Рафсона
-            guess = float(initial_guess)
-            tolerance = 1e-6
-            max_iterations = 100
+            if not cashflows:
+                return None
             
-            for _ in range(max_iterations):
-                npv = 0
-                npv_derivative = 0
-                
-                for i, cf in enumerate(cashflows):
-                    periods = i / 12.0  # Предполагаем ежемесячные платежи
-                    amount = float(cf['amount'])
-                    
-                    npv += amount / (1 + guess) ** periods
-                    npv_derivative -= periods * amount / (1 + guess) ** (periods + 1)
-                
-                if abs(npv) < tolerance:
-                    return Decimal(str(round(guess, 6)))
-                
-                if abs(npv_derivative) < tolerance:
-                    break
-                
-                guess = guess - npv / npv_derivative
+            solver = XIRRSolver(initial_guess=float(initial_guess))
+            amounts = np.array([float(cf['amount']) for cf in cashflows])
+            lane_index = np.zeros(len(cashflows), dtype=np.int64)
             
-            return None
+            if all('date' in cf for cf in cashflows):
+                ordinals = np.array([cf['date'].toordinal() for cf in cashflows])
+                result = solver.solve_dates(['irr'], lane_index, ordinals, amounts)
+            else:
+                result = solver.solve(['irr'], lane_index, np.arange(len(cashflows)) / 12.0, amounts)
+            
+            rate = result.get_rate('irr')
+            return Decimal(str(round(rate, 6))) if rate is not None else None
             
         except Exception as e:
             logger.error(f"IRR calculation error: {e}")
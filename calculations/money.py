@@ -0,0 +1,128 @@
+"""
+Денежные суммы в целых минимальных единицах (копейках) и ставки в целых единицах
+"""
+
+from datetime import date
+from decimal import Decimal, ROUND_HALF_EVEN
+from typing import List, Tuple, Union
+
+# Минимальных единиц (копеек, центов) в единице валюты
+MINOR_UNITS = 100
+MINOR_DIGITS = 2
+
+# Целых единиц ставки в одном проценте: 12.5% = 12_500_000
+RATE_SCALE = 10 ** 6
+RATE_DIGITS = 6
+
+# Политика округления: банковское (половина - к четному)
+ROUNDING = ROUND_HALF_EVEN
+
+Number = Union[Decimal, int, float, str]
+
+
+def _to_units(value: Number, digits: int) -> int:
+    """Округление значения до целого числа единиц 10^-digits"""
+    if isinstance(value, int):
+        return value * 10 ** digits
+    if not isinstance(value, Decimal):
+        value = Decimal(repr(value) if isinstance(value, float) else value)
+    return int(value.scaleb(digits).to_integral_value(rounding=ROUNDING))
+
+
+def to_minor(value: Number) -> int:
+    """
+    Сумма в минимальных единицах с банковским округлением
+    
+    Args:
+        value: Сумма (Decimal, int, float или строка)
+        
+    Returns:
+        Сумма в копейках
+    """
+    return _to_units(value, MINOR_DIGITS)
+
+
+def from_minor(units: int) -> Decimal:
+    """
+    Сумма в минимальных единицах как Decimal с двумя знаками
+    
+    Args:
+        units: Сумма в копейках
+        
+    Returns:
+        Сумма
+    """
+    return Decimal(int(units)).scaleb(-MINOR_DIGITS)
+
+
+def to_rate_units(rate: Number) -> int:
+    """
+    Ставка в процентах в целых единицах RATE_SCALE с банковским округлением
+    
+    Args:
+        rate: Ставка, % годовых
+        
+    Returns:
+        Ставка в единицах RATE_SCALE
+    """
+    return _to_units(rate, RATE_DIGITS)
+
+
+def divide_half_even(numerator: int, denominator: int) -> int:
+    """
+    Целочисленное деление с банковским округлением
+    
+    Args:
+        numerator: Делимое
+        denominator: Делитель (положительный)
+        
+    Returns:
+        Частное, округленное до целого (половина - к четному)
+    """
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2):
+        quotient += 1
+    return quotient
+
+
+def accrue_interest(balance: int, rate_units: int, numerator: int, denominator: int) -> int:
+    """
+    Проценты в минимальных единицах: остаток * ставка / 100 * доля года
+    
+    Произведение считается точно в целых числах, округляется один раз.
+    
+    Args:
+        balance: Остаток в копейках
+        rate_units: Ставка в единицах RATE_SCALE
+        numerator: Числитель доли года
+        denominator: Знаменатель доли года
+        
+    Returns:
+        Проценты в копейках
+    """
+    return divide_half_even(balance * rate_units * numerator, 100 * RATE_SCALE * denominator)
+
+
+def schedule_minor_rows(schedule) -> List[Tuple[date, int, int, int, int]]:
+    """
+    Строки графика платежей в копейках
+    
+    Берутся из графика, если их передал планировщик, иначе переводятся из
+    Decimal элементов графика.
+    
+    Args:
+        schedule: График платежей (PaymentSchedule)
+        
+    Returns:
+        Список (дата, выборка, погашение ОД, проценты, остаток на конец)
+    """
+    rows = schedule.get_minor_rows()
+    if rows is not None:
+        return rows
+    return [
+        (item.payment_date, to_minor(item.drawdown_amount), to_minor(item.principal_payment),
+         to_minor(item.interest_payment), to_minor(item.debt_balance_end))
+        for item in schedule.schedule_items
+    ]
+
@@ -0,0 +1,258 @@
+"""
+Моделирование процентных расходов по плавающим выборкам методом Монте-Карло
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+import multiprocessing
+import os
+import threading
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from .accrual_arrays import PortfolioAccrual, ACCRUAL_DAY_BASIS
+from .short_rate_models import ShortRateModel
+
+logger = logging.getLogger(__name__)
+
+# Максимальное количество траекторий за расчет: матрица (траектории x месяцы)
+# для перцентилей держится в памяти целиком
+MAX_PATHS_COUNT = 50_000
+
+
+def _simulate_chunk(model: ShortRateModel,
+                    initial_rate: float,
+                    times: np.ndarray,
+                    loadings: np.ndarray,
+                    paths_count: int,
+                    seed_sequence: np.random.SeedSequence) -> np.ndarray:
+    """
+    Расчет порции траекторий (выполняется в отдельном процессе)
+    
+    Returns:
+        Массив (траектории, месяцы) процентов, зависящих от базовой ставки
+    """
+    rng = np.random.default_rng(seed_sequence)
+    rates = model.simulate(initial_rate, np.r_[0.0, times], paths_count, rng)[:, 1:]
+    return rates @ loadings
+
+
+class MonteCarloResult:
+    """Распределение помесячных процентных расходов по траекториям ставки"""
+    
+    def __init__(self,
+                 months: List[str],
+                 percentiles: Sequence[float],
+                 floating_bands: np.ndarray,
+                 total_bands: np.ndarray,
+                 floating_mean: np.ndarray,
+                 fixed_interest: np.ndarray,
+                 paths_count: int,
+                 seed: int,
+                 model_parameters: Dict[str, Any],
+                 initial_rate: float,
+                 valuation_date: date):
+        self.months = months
+        self.percentiles = list(percentiles)
+        self.floating_bands = floating_bands
+        self.total_bands = total_bands
+        self.floating_mean = floating_mean
+        self.fixed_interest = fixed_interest
+        self.paths_count = paths_count
+        self.seed = seed
+        self.model_parameters = model_parameters
+        self.initial_rate = initial_rate
+        self.valuation_date = valuation_date
+    
+    def get_band(self, percentile: float, total: bool = False) -> np.ndarray:
+        """
+        Помесячный ряд для перцентиля
+        
+        Args:
+            percentile: Перцентиль из рассчитанных
+            total: True - все проценты портфеля, False - только плавающие выборки
+            
+        Returns:
+            Массив по месяцам
+        """
+        index = self.percentiles.index(percentile)
+        return (self.total_bands if total else self.floating_bands)[index]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        def bands(values: np.ndarray) -> Dict[str, List[float]]:
+            return {
+                f"P{percentile:g}": values[index].tolist()
+                for index, percentile in enumerate(self.percentiles)
+            }
+        
+        return {
+            'months': self.months,
+            'floating_interest': bands(self.floating_bands),
+            'floating_interest_mean': self.floating_mean.tolist(),
+            'fixed_interest': self.fixed_interest.tolist(),
+            'total_interest': bands(self.total_bands),
+            'paths_count': self.paths_count,
+            'seed': self.seed,
+            'model': self.model_parameters,
+            'initial_rate': self.initial_rate,
+            'valuation_date': self.valuation_date.isoformat()
+        }
+
+
+class MonteCarloRateSimulator:
+    """
+    Стохастический расчет процентов по плавающим выборкам
+    
+    Траектории базовой ставки строятся на датах событий портфеля, проценты
+    по плавающим выборкам линейны по ставке, поэтому помесячные расходы для
+    порции траекторий получаются одним матричным умножением
+    (траектории x даты) @ (даты x месяцы). Порции считаются в пуле
+    процессов; у каждой порции свой поток случайных чисел, порожденный от
+    общего seed, так что результат не зависит от числа процессов.
+    
+    Пул процессов (spawn) создается при первом расчете и переиспользуется
+    всеми последующими: fork многопоточного процесса API небезопасен, а
+    запуск spawn-процессов на каждый запрос слишком дорог.
+    """
+    
+    def __init__(self, max_workers: Optional[int] = None, chunk_size: int = 1000):
+        """
+        Инициализация симулятора
+        
+        Args:
+            max_workers: Количество процессов (по умолчанию - число CPU; 1 - без пула)
+            chunk_size: Количество траекторий в порции
+        """
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+    
+    def shutdown(self) -> None:
+        """Остановка пула процессов (при следующем расчете пул создается заново)"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+    
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Общий пул процессов симулятора"""
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            return self._executor
+    
+    def simulate(self,
+                 accrual: PortfolioAccrual,
+                 model: ShortRateModel,
+                 initial_rate: float,
+                 paths_count: int = 5000,
+                 seed: Optional[int] = None,
+                 valuation_date: Optional[date] = None,
+                 percentiles: Sequence[float] = (5, 50, 95)) -> MonteCarloResult:
+        """
+        Расчет распределения процентных расходов по месяцам
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            model: Модель краткосрочной ставки
+            initial_rate: Текущая базовая ставка, %
+            paths_count: Количество траекторий (не больше MAX_PATHS_COUNT)
+            seed: Начальное значение генератора (None - случайное, возвращается в результате)
+            valuation_date: Дата начала моделирования (до нее ставка равна текущей)
+            percentiles: Рассчитываемые перцентили
+            
+        Returns:
+            Перцентильные полосы процентов по месяцам
+        """
+        if paths_count <= 0:
+            raise ValueError("paths_count must be positive")
+        if paths_count > MAX_PATHS_COUNT:
+            raise ValueError(f"paths_count must not exceed {MAX_PATHS_COUNT}")
+        
+        valuation_date = valuation_date or date.today()
+        if seed is None:
+            seed = int(np.random.SeedSequence().entropy % (2 ** 63))
+        
+        # Время от даты оценки в годах; прошедшие даты - в момент 0
+        elapsed_days = (accrual.dates - np.datetime64(valuation_date, 'D')).astype(np.int64)
+        times = np.maximum(elapsed_days, 0) / ACCRUAL_DAY_BASIS
+        
+        months, month_index = self._month_index(accrual)
+        
+        # Нагрузки дат ставки на месяцы уплаты: проценты = ставка на дату строки * вес
+        # плавающего остатка, относятся на месяц даты уплаты строки
+        loadings = np.zeros((accrual.dates_count, len(months)))
+        np.add.at(
+            loadings, (accrual.date_index, month_index[accrual.interest_date_index]), accrual.floating_weights()
+        )
+        
+        margin_interest = accrual.by_interest_date(accrual.margin_interest)
+        floating_fixed_part = np.bincount(month_index, weights=margin_interest, minlength=len(months))
+        fixed_interest = np.bincount(
+            month_index,
+            weights=accrual.rate_independent_interest_by_date() - margin_interest,
+            minlength=len(months)
+        )
+        
+        chunk_sizes = [
+            min(self.chunk_size, paths_count - start)
+            for start in range(0, paths_count, self.chunk_size)
+        ]
+        seed_sequences = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+        
+        logger.info(
+            f"Monte Carlo simulation: {paths_count} paths, {accrual.dates_count} dates, "
+            f"{len(chunk_sizes)} chunks, model {model.name}, seed {seed}"
+        )
+        
+        arguments = [
+            (model, initial_rate, times, loadings, size, sequence)
+            for size, sequence in zip(chunk_sizes, seed_sequences)
+        ]
+        if self.max_workers > 1 and len(chunk_sizes) > 1:
+            chunks = self._get_executor().map(_simulate_chunk, *zip(*arguments))
+        else:
+            chunks = (_simulate_chunk(*chunk_arguments) for chunk_arguments in arguments)
+        
+        # Порции записываются в одну заранее выделенную матрицу (без копии vstack)
+        floating_interest = np.empty((paths_count, len(months)))
+        start = 0
+        for chunk in chunks:
+            floating_interest[start:start + len(chunk)] = chunk
+            start += len(chunk)
+        floating_interest += floating_fixed_part
+        floating_bands = np.percentile(floating_interest, percentiles, axis=0)
+        
+        return MonteCarloResult(
+            months=months,
+            percentiles=percentiles,
+            floating_bands=floating_bands,
+            total_bands=floating_bands + fixed_interest,
+            floating_mean=floating_interest.mean(axis=0),
+            fixed_interest=fixed_interest,
+            paths_count=paths_count,
+            seed=seed,
+            model_parameters=model.get_parameters(),
+            initial_rate=initial_rate,
+            valuation_date=valuation_date
+        )
+    
+    def _month_index(self, accrual: PortfolioAccrual) -> Tuple[List[str], np.ndarray]:
+        """Месяцы портфеля ('YYYY-MM') и индекс месяца для каждой даты"""
+        month_values = accrual.dates.astype('datetime64[M]')
+        unique_months, month_index = np.unique(month_values, return_inverse=True)
+        return [str(month) for month in unique_months], month_index.reshape(-1)
+
@@ -4,9 +4,11 @@
 
 from datetime import date, datetime, timedelta
 from decimal import Decimal
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Set
 import logging
 
+import numpy as np
+
 import sys
 from pathlib import Path
 
@@ -14,30 +16,74 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from models import CreditContract, Drawdown, Repayment, PaymentSchedule, PaymentScheduleItem
+from models.drawdown import DrawdownStatus
 from .interest_calculator import InterestCalculator
+from .daily_rates import DailyRateTable
+from .money import to_minor, from_minor, to_rate_units, accrue_interest, MINOR_UNITS
+from .accrual_arrays import ACCRUAL_DAY_BASIS
+from .business_calendar import (
+    get_calendar, add_months, BUSINESS_DAY_CONVENTIONS, FREQUENCY_STEPS, DEFAULT_FREQUENCY_STEP
+)
+from .date_grid import DateGridCache
+from .amortization import AmortizationGenerator
+from .tranches import TrancheBook, REPAYMENT_ALLOCATIONS
 
 logger = logging.getLogger(__name__)
 
+# Режимы начисления процентов: 'daily' - проценты за один день на каждом
+# событии графика, 'event' - за фактический интервал между событиями по базе
+# расчета дней с уплатой в даты interest_payment_frequency
+ACCRUAL_MODES = ('daily', 'event')
+
 
 class PaymentScheduler:
     """Планировщик платежей"""
     
-    def __init__(self, day_count_basis: str = 'Actual/360'):
+    def __init__(self,
+                 day_count_basis: str = 'Actual/360',
+                 accrual_mode: str = 'daily',
+                 calendar: str = 'russia',
+                 business_day_convention: str = 'unadjusted',
+                 repayment_allocation: str = 'fifo'):
         """
         Инициализация планировщика
         
         Args:
             day_count_basis: База для расчета дней
+            accrual_mode: Режим начисления процентов (ACCRUAL_MODES)
+            calendar: Календарь рабочих дней (CALENDAR_RULES)
+            business_day_convention: Перенос дат уплаты процентов (BUSINESS_DAY_CONVENTIONS)
+            repayment_allocation: Распределение погашений ОД по траншам (REPAYMENT_ALLOCATIONS)
         """
+        if accrual_mode not in ACCRUAL_MODES:
+            raise ValueError(f"Unknown accrual mode: {accrual_mode}. Supported modes: {', '.join(ACCRUAL_MODES)}")
+        if repayment_allocation not in REPAYMENT_ALLOCATIONS:
+            raise ValueError(
+                f"Unknown repayment allocation: {repayment_allocation}. "
+                f"Supported: {', '.join(REPAYMENT_ALLOCATIONS)}"
+            )
+        if business_day_convention not in BUSINESS_DAY_CONVENTIONS:
+            raise ValueError(
+                f"Unknown business day convention: {business_day_convention}. "
+                f"Supported: {', '.join(BUSINESS_DAY_CONVENTIONS)}"
+            )
+        
         self.interest_calculator = InterestCalculator(day_count_basis)
+        self.calendar = get_calendar(calendar)
+        self.date_grids = DateGridCache()
+        self.amortization = AmortizationGenerator(day_count_basis, calendar, business_day_convention)
         self.day_count_basis = day_count_basis
+        self.accrual_mode = accrual_mode
+        self.business_day_convention = business_day_convention
+        self.repayment_allocation = repayment_allocation
     
     def create_payment_schedule(self, 
                                contract: CreditContract,
                                drawdowns: List[Drawdown],
                                repayments: List[Repayment],
                                version_id: str,
-                               current_base_rate: Optional[Decimal] = None) -> PaymentSchedule:
+                               current_base_rate: Optional[Decimal] = None,
+                               base_rate_table: Optional[DailyRateTable] = None) -> PaymentSchedule:
         """
         Создать график платежей по кредиту
         
@@ -47,6 +93,7 @@ class PaymentScheduler:
             repayments: Список погашений
             version_id: ID версии расчета
             current_base_rate: Текущая базовая ставка для плавающих ставок
+            base_rate_table: Дневная таблица кривой базовой ставки (приоритетнее current_base_rate)
             
         Returns:
             График платежей
@@ -64,53 +111,112 @@ class PaymentScheduler:
                 calculation_date=date.today()
             )
             
-            # Расчет по каждой дате
-            debt_balance = Decimal('0')
-            available_limit = contract.available_limit
+            # Расчет по каждой дате: суммы - в копейках, ставки - в единицах RATE_SCALE
+            debt_balance = 0
+            available_limit = to_minor(contract.available_limit)
+            
+            # Остатки и ставки по траншам: проценты начисляются на остаток
+            # каждого транша по его ставке, погашения распределяются по траншам
+            tranches = TrancheBook(drawdowns, self.repayment_allocation)
+            no_flows = np.zeros(len(tranches), dtype=np.int64)
             
-            for event_date in sorted(timeline.keys()):
+            # Режим event: проценты копятся по интервалам и уплачиваются в даты уплаты
+            event_mode = self.accrual_mode == 'event'
+            payment_dates = self._get_interest_payment_dates(contract, timeline) if event_mode else set()
+            period_rates = tranches.rate_units
+            previous_date: Optional[date] = None
+            
+            event_dates = sorted(timeline.keys())
+            if event_mode:
+                numerators, denominators = self._get_interval_ratios(event_dates)
+            
+            # Субсидия: ставка (единицы RATE_SCALE) и субсидируемая сумма на даты
+            # событий; возмещение начисляется на min(остаток, сумма) как проценты
+            subsidy_rates, subsidy_caps = self._get_subsidy_terms(contract, event_dates)
+            subsidy_accrued = 0
+            
+            items = []
+            minor_rows = []
+            for position, event_date in enumerate(event_dates):
                 events = timeline[event_date]
                 
                 # Остаток долга на начало дня
                 debt_balance_start = debt_balance
                 
+                # Базовая ставка на дату и ставки траншей
+                base_rate = base_rate_table.rate_on(event_date) if base_rate_table is not None else current_base_rate
+                rates = tranches.current_rates(base_rate)
+                
+                # Проценты за интервал с предыдущего события по ставкам на его начало
+                if event_mode and previous_date is not None and debt_balance_start != 0:
+                    tranches.accrue(period_rates, int(numerators[position - 1]), int(denominators[position - 1]))
+                    if subsidy_rates is not None and subsidy_rates[position - 1]:
+                        subsidy_accrued += accrue_interest(
+                            self._get_subsidized_balance(debt_balance_start, subsidy_caps[position - 1]),
+                            subsidy_rates[position - 1], int(numerators[position - 1]), int(denominators[position - 1])
+                        )
+                
+                # Расчет процентов за период на остаток начала дня (если это дата начисления)
+                tranche_interest = no_flows
+                if not event_mode and self._is_interest_payment_date(contract, event_date):
+                    tranche_interest = self._calculate_interest_for_period(tranches, rates)
+                    if subsidy_rates is not None and subsidy_rates[position] and debt_balance_start != 0:
+                        subsidy_accrued += accrue_interest(
+                            self._get_subsidized_balance(debt_balance_start, subsidy_caps[position]),
+                            subsidy_rates[position], 1, int(ACCRUAL_DAY_BASIS)
+                        )
+                
                 # Обработка выборок
                 drawdown_amount = sum(event['amount'] for event in events if event['type'] == 'drawdown')
                 if drawdown_amount > 0:
                     debt_balance += drawdown_amount
                     available_limit -= drawdown_amount
+                    tranches.draw(event_date)
                 
                 # Обработка погашений
                 principal_payment = sum(event['principal'] for event in events if event['type'] == 'repayment')
                 interest_payment = sum(event['interest'] for event in events if event['type'] == 'repayment')
                 
+                tranche_principal = no_flows
                 if principal_payment > 0 or interest_payment > 0:
                     debt_balance -= principal_payment
                     available_limit += principal_payment  # Для возобновляемых кредитов
+                    tranche_principal = tranches.repay(principal_payment)
                 
-                # Расчет процентов за период (если это дата начисления)
-                if self._is_interest_payment_date(contract, event_date):
-                    interest_for_period = self._calculate_interest_for_period(
-                        contract, drawdowns, debt_balance_start, event_date, current_base_rate
-                    )
-                    interest_payment += interest_for_period
+                effective_rate = tranches.weighted_rate(rates)
                 
-                # Остаток долга на конец дня
-                debt_balance_end = debt_balance
+                subsidy_payment = 0
+                if event_mode:
+                    # Уплата накопленных процентов и возмещение субсидии в дату уплаты
+                    if event_date in payment_dates:
+                        tranche_interest = tranches.settle()
+                        subsidy_payment, subsidy_accrued = subsidy_accrued, 0
+                    period_rates = rates
+                    days_in_period = (event_date - previous_date).days if previous_date is not None else 1
+                else:
+                    subsidy_payment, subsidy_accrued = subsidy_accrued, 0
+                    days_in_period = self._get_days_in_period(event_date, timeline)
+                if tranche_principal is not no_flows or tranche_interest is not no_flows:
+                    interest_payment += int(tranche_interest.sum())
+                    tranches.record(event_date, tranche_principal, tranche_interest)
                 
-                # Создание элемента графика
-                schedule_item = PaymentScheduleItem(
+                # Создание элемента графика (остаток на конец дня - debt_balance)
+                items.append(PaymentScheduleItem(
                     payment_date=event_date,
-                    debt_balance_start=debt_balance_start,
-                    debt_balance_end=debt_balance_end,
-                    drawdown_amount=drawdown_amount,
-                    principal_payment=principal_payment,
-                    interest_payment=interest_payment,
-                    effective_rate=self._get_effective_rate(contract, drawdowns, event_date, current_base_rate),
-                    days_in_period=self._get_days_in_period(event_date, timeline)
-                )
-                
-                schedule.add_item(schedule_item)
+                    debt_balance_start=from_minor(debt_balance_start),
+                    debt_balance_end=from_minor(debt_balance),
+                    drawdown_amount=from_minor(drawdown_amount),
+                    principal_payment=from_minor(principal_payment),
+                    interest_payment=from_minor(interest_payment),
+                    subsidy_payment=from_minor(subsidy_payment),
+                    effective_rate=effective_rate,
+                    days_in_period=days_in_period
+                ))
+                minor_rows.append((event_date, drawdown_amount, principal_payment, interest_payment, debt_balance))
+                previous_date = event_date
+            
+            schedule.add_items(items, minor_rows)
+            schedule.set_tranches(tranches)
             
             logger.info(f"Payment schedule created with {len(schedule.schedule_items)} items")
             return schedule
@@ -119,11 +225,118 @@ class PaymentScheduler:
             logger.error(f"Error creating payment schedule: {e}")
             raise
     
-    def _create_timeline(self, 
+    def build_accrual_rows(self,
+                           contract: CreditContract,
+                           drawdowns: List[Drawdown],
+                           repayments: List[Repayment]) -> List[Tuple]:
+        """
+        Построение строк начисления по договору без привязки к базовой ставке
+        
+        Строки повторяют create_payment_schedule дата в дату, но вместо
+        готовых процентов содержат составляющие процентов строки, поэтому
+        проценты при любой базовой ставке B получаются как
+        fixed_interest + margin_interest + B * floating_weight. Остатки от
+        ставки не зависят. В режиме event строка содержит составляющие
+        интервала от своей даты до следующего события (базовая ставка - на
+        дату строки, как в create_payment_schedule), а проценты по ним
+        относятся на дату уплаты, закрывающую интервал (последний элемент
+        строки); в режиме daily дата уплаты совпадает с датой строки.
+        
+        Args:
+            contract: Кредитный договор
+            drawdowns: Список выборок
+            repayments: Список погашений
+            
+        Returns:
+            Список кортежей (дата, остаток на начало, выборки, погашение ОД,
+            проценты по погашениям, остаток на конец, проценты по фиксированной
+            ставке, проценты по марже, вес базовой ставки, проценты плавающих
+            выборок без базовой ставки, плановые выборки, накопленные плановые
+            выборки на начало, проценты плановых выборок без базовой ставки,
+            вес базовой ставки плановых выборок, дата уплаты процентов строки)
+        """
+        timeline = self._create_timeline(contract, drawdowns, repayments)
+        event_mode = self.accrual_mode == 'event'
+        payment_dates = self._get_interest_payment_dates(contract, timeline) if event_mode else set()
+        tranches = TrancheBook(drawdowns, self.repayment_allocation)
+        
+        rows = []
+        debt_balance = 0  # Копейки
+        planned_balance = 0
+        
+        event_dates = sorted(timeline.keys())
+        if event_mode:
+            interval_fractions = self._get_interval_fractions(event_dates) / 100.0
+            # Дата уплаты интервала, начинающегося с события: ближайшая дата уплаты после него
+            settlement_dates = list(event_dates)
+            for position in range(len(event_dates) - 2, -1, -1):
+                following = event_dates[position + 1]
+                settlement_dates[position] = following if following in payment_dates else settlement_dates[position + 1]
+        else:
+            settlement_dates = event_dates
+        
+        for position, event_date in enumerate(event_dates):
+            events = timeline[event_date]
+            debt_balance_start = debt_balance
+            
+            # Режим daily: один день по остаткам на начало дня
+            components = [0.0] * 6
+            if not event_mode:
+                self._accrue_components(components, tranches, 1 / (100 * ACCRUAL_DAY_BASIS))
+            
+            drawdown_amount = sum(event['amount'] for event in events if event['type'] == 'drawdown')
+            principal_payment = sum(event['principal'] for event in events if event['type'] == 'repayment')
+            interest_payment = sum(event['interest'] for event in events if event['type'] == 'repayment')
+            debt_balance += drawdown_amount - principal_payment
+            if drawdown_amount > 0:
+                tranches.draw(event_date)
+            if principal_payment > 0:
+                tranches.repay(principal_payment)
+            
+            planned_balance_start = planned_balance
+            planned_amount = sum(
+                event['amount'] for event in events if event['type'] == 'drawdown' and event['planned']
+            )
+            planned_balance += planned_amount
+            
+            # Режим event: интервал до следующего события - по остаткам после событий дня
+            if event_mode and position + 1 < len(event_dates):
+                self._accrue_components(components, tranches, float(interval_fractions[position]))
+            
+            rows.append((
+                event_date, debt_balance_start / MINOR_UNITS, drawdown_amount / MINOR_UNITS,
+                principal_payment / MINOR_UNITS, interest_payment / MINOR_UNITS, debt_balance / MINOR_UNITS,
+                *components[:4], planned_amount / MINOR_UNITS, planned_balance_start / MINOR_UNITS, *components[4:],
+                settlement_dates[position]
+            ))
+        
+        return rows
+    
+    @staticmethod
+    def _accrue_components(components: List[float],
+                           tranches: TrancheBook,
+                           year_fraction: float) -> None:
+        """
+        Добавление составляющих процентов по остаткам и условиям траншей
+        
+        Args:
+            components: Накопитель (фиксированная ставка, маржа, вес базовой
+                ставки, без базовой ставки, плановые без базовой ставки, вес
+                базовой ставки плановых)
+            tranches: Транши договора (остатки на начало интервала)
+            year_fraction: Доля года интервала (в единицах ставки)
+        """
+        if tranches.drawn == 0:
+            return
+        
+        for position, weight in enumerate(tranches.component_weights()):
+            components[position] += weight * year_fraction
+    
+    def _create_timeline(self,
                         contract: CreditContract, 
                         drawdowns: List[Drawdown], 
                         repayments: List[Repayment]) -> Dict[date, List[Dict[str, Any]]]:
-        """Создание временной сетки событий"""
+        """Создание временной сетки событий (суммы - в копейках)"""
         timeline = {}
         
         # Добавление граничных дат
@@ -136,8 +349,9 @@ class PaymentScheduler:
                 timeline[drawdown.drawdown_date] = []
             timeline[drawdown.drawdown_date].append({
                 'type': 'drawdown',
-                'amount': drawdown.amount,
-                'drawdown_id': drawdown.id
+                'amount': to_minor(drawdown.amount),
+                'drawdown_id': drawdown.id,
+                'planned': drawdown.status == DrawdownStatus.PLANNED
             })
         
         # Добавление погашений
@@ -146,8 +360,8 @@ class PaymentScheduler:
                 timeline[repayment.repayment_date] = []
             timeline[repayment.repayment_date].append({
                 'type': 'repayment',
-                'principal': repayment.principal_amount,
-                'interest': repayment.interest_amount,
+                'principal': to_minor(repayment.principal_amount),
+                'interest': to_minor(repayment.interest_amount),
                 'repayment_id': repayment.id
             })
         
@@ -158,89 +372,83 @@ class PaymentScheduler:
                 timeline[interest_date] = []
             timeline[interest_date].append({
                 'type': 'interest_calculation',
-                'amount': Decimal('0')
+                'amount': 0
             })
         
         return timeline
     
     def _generate_interest_dates(self, contract: CreditContract) -> List[date]:
-        """Генерация дат начисления процентов"""
-        dates = []
-        current_date = contract.start_date
+        """Генерация дат начисления процентов (календарные периоды от даты начала, перенос по календарю)"""
+        ordinals = self.date_grids.get(
+            self.calendar, contract.start_date, contract.end_date,
+            contract.interest_payment_frequency, self.business_day_convention
+        )
+        return [date.fromordinal(ordinal) for ordinal in ordinals.tolist()]
+    
+    def _add_period(self, start_date: date, frequency: str) -> date:
+        """Добавить период к дате (месяцы - с ограничением числа концом месяца)"""
+        months, days = FREQUENCY_STEPS.get(frequency, DEFAULT_FREQUENCY_STEP)
+        if months:
+            return date.fromordinal(int(add_months([start_date.toordinal()], months)[0]))
+        return start_date + timedelta(days=days)
+    
+    def _get_interest_payment_dates(self,
+                                    contract: CreditContract,
+                                    timeline: Dict[date, List[Dict[str, Any]]]) -> Set[date]:
+        """Даты уплаты процентов: по interest_payment_frequency, окончание договора и последнее событие"""
+        payment_dates = set(self._generate_interest_dates(contract))
+        payment_dates.add(contract.end_date)
+        payment_dates.add(max(timeline))
+        return payment_dates
+    
+    def _get_interval_fractions(self, event_dates: List[date]) -> np.ndarray:
+        """Доли года интервалов между соседними датами событий (одной векторной операцией)"""
+        return self.interest_calculator.year_fractions(event_dates[:-1], event_dates[1:])
+    
+    def _get_interval_ratios(self, event_dates: List[date]) -> Tuple[np.ndarray, np.ndarray]:
+        """Доли года интервалов между соседними датами событий в виде точных дробей"""
+        return self.interest_calculator.year_fraction_ratios(event_dates[:-1], event_dates[1:])
+    
+    def _get_subsidy_terms(self,
+                           contract: CreditContract,
+                           event_dates: List[date]) -> Tuple[Optional[List[int]], Optional[List[int]]]:
+        """
+        Условия субсидии на даты событий (одним поиском по узлам условий)
         
-        while current_date <= contract.end_date:
-            dates.append(current_date)
-            current_date = self._add_period(current_date, contract.interest_payment_frequency)
+        Returns:
+            Кортеж (ставки субсидии в единицах RATE_SCALE, субсидируемые суммы в
+            копейках, -1 - весь остаток) или (None, None) без субсидии
+        """
+        if contract.subsidy is None:
+            return None, None
         
-        return dates
+        points = contract.subsidy.get_sorted_points()
+        point_days = np.array([point.effective_date.toordinal() for point in points], dtype=np.int64)
+        # Нулевой узел - условия до первой даты (субсидии нет)
+        point_rates = [0] + [to_rate_units(point.subsidy_rate) for point in points]
+        point_caps = [-1] + [
+            to_minor(point.subsidized_amount) if point.subsidized_amount is not None else -1 for point in points
+        ]
+        event_days = np.array([event_date.toordinal() for event_date in event_dates], dtype=np.int64)
+        positions = np.searchsorted(point_days, event_days, side='right').tolist()
+        return [point_rates[position] for position in positions], [point_caps[position] for position in positions]
     
-    def _add_period(self, start_date: date, frequency: str) -> date:
-        """Добавить период к дате"""
-        if frequency == 'daily':
-            return start_date + timedelta(days=1)
-        elif frequency == 'weekly':
-            return start_date + timedelta(weeks=1)
-        elif frequency == 'monthly':
-            # Простое добавление месяца
-            if start_date.month == 12:
-                return start_date.replace(year=start_date.year + 1, month=1)
-            else:
-                return start_date.replace(month=start_date.month + 1)
-        elif frequency == 'quarterly':
-            return start_date + timedelta(days=90)  # Приблизительно
-        elif frequency == 'semi_annually':
-            return start_date + timedelta(days=180)  # Приблизительно
-        elif frequency == 'annually':
-            return start_date.replace(year=start_date.year + 1)
-        else:
-            return start_date + timedelta(days=30)  # По умолчанию
+    @staticmethod
+    def _get_subsidized_balance(balance: int, cap: int) -> int:
+        """Субсидируемая часть остатка в копейках (cap = -1 - весь остаток)"""
+        return balance if cap < 0 else min(balance, cap)
     
     def _is_interest_payment_date(self, contract: CreditContract, event_date: date) -> bool:
         """Проверка, является ли дата датой начисления процентов"""
         # Упрощенная логика - можно расширить
         return True  # Для простоты считаем, что проценты начисляются каждый день
     
-    def _calculate_interest_for_period(self, 
-                                     contract: CreditContract,
-                                     drawdowns: List[Drawdown],
-                                     debt_balance: Decimal,
-                                     event_date: date,
-                                     current_base_rate: Optional[Decimal]) -> Decimal:
-        """Расчет процентов за период"""
-        if debt_balance == 0:
-            return Decimal('0')
-        
-        # Определение эффективной ставки
-        effective_rate = self._get_effective_rate(contract, drawdowns, event_date, current_base_rate)
-        
-        # Расчет процентов за один день (упрощенно)
-        daily_rate = effective_rate / Decimal('365')
-        return debt_balance * daily_rate
-    
-    def _get_effective_rate(self, 
-                           contract: CreditContract,
-                           drawdowns: List[Drawdown],
-                           event_date: date,
-                           current_base_rate: Optional[Decimal]) -> Decimal:
-        """Получение эффективной ставки на дату"""
-        # Поиск активной выборки на дату
-        active_drawdown = None
-        for drawdown in sorted(drawdowns, key=lambda x: x.drawdown_date, reverse=True):
-            if drawdown.drawdown_date <= event_date:
-                active_drawdown = drawdown
-                break
-        
-        if not active_drawdown:
-            return Decimal('0')
-        
-        # Получение эффективной ставки
-        if active_drawdown.is_floating_rate():
-            if current_base_rate is not None:
-                return active_drawdown.get_effective_rate(current_base_rate)
-            else:
-                return active_drawdown.interest_rate
-        else:
-            return active_drawdown.interest_rate
+    def _calculate_interest_for_period(self, tranches: TrancheBook, rates: np.ndarray) -> np.ndarray:
+        """Расчет процентов за период по траншам в копейках (ставки в единицах RATE_SCALE)"""
+        # Расчет процентов за один день (упрощенно): остаток * ставка % / 100 / 365 -
+        # в том же масштабе, что и режим event
+        tranches.accrue(rates, 1, int(ACCRUAL_DAY_BASIS))
+        return tranches.settle()
     
     def _get_days_in_period(self, event_date: date, timeline: Dict[date, List[Dict[str, Any]]]) -> int:
         """Получение количества дней в периоде"""
@@ -264,53 +472,45 @@ class PaymentScheduler:
             version_id: ID версии расчета
             
         Returns:
-            Аннуитетный график платежей
+            Аннуитетный график платежей (выборка на дату начала и ежемесячные платежи)
         """
         try:
-            # Расчет аннуитетного платежа
-            annuity_payment = self.interest_calculator.calculate_annuity_payment(principal, rate, periods)
-            
-            schedule = PaymentSchedule(
-                contract_id=contract.id,
-                version_id=version_id,
-                calculation_date=date.today()
+            ordinals = add_months(
+                np.full(periods + 1, contract.start_date.toordinal()), np.arange(periods + 1)
             )
+            result = self.amortization.generate_arrays(
+                [contract.id], ['annuity'],
+                np.array([to_minor(principal)], dtype=np.int64),
+                np.array([float(rate) * 12 * 100]),
+                np.array([float(rate)]),
+                np.zeros(periods + 1, dtype=np.int64), ordinals
+            )
+            return result.to_payment_schedules(version_id)[contract.id]
             
-            remaining_principal = principal
-            current_date = contract.start_date
-            
-            for period in range(periods):
-                # Расчет процентов за период
-                interest_payment = remaining_principal * rate
-                
-                # Расчет погашения основного долга
-                principal_payment = annuity_payment - interest_payment
-                
-                # Корректировка последнего платежа
-                if period == periods - 1:
-                    principal_payment = remaining_principal
-                    annuity_payment = principal_payment + interest_payment
-                
-                # Создание элемента графика
-                schedule_item = PaymentScheduleItem(
-                    payment_date=current_date,
-                    debt_balance_start=remaining_principal,
-                    debt_balance_end=remaining_principal - principal_payment,
-                    drawdown_amount=Decimal('0'),
-                    principal_payment=principal_payment,
-                    interest_payment=interest_payment,
-                    effective_rate=rate,
-                    days_in_period=30  # Приблизительно
-                )
-                
-                schedule.add_item(schedule_item)
-                
-                # Обновление остатка
-                remaining_principal -= principal_payment
-                current_date = self._add_period(current_date, 'monthly')
+        except Exception as e:
+            logger.error(f"Error creating annuity schedule: {e}")
+            raise
+    
+    def create_amortization_schedules(self,
+                                      contracts: List[CreditContract],
+                                      version_id: str,
+                                      principals: Optional[List[Decimal]] = None,
+                                      rates: Optional[List[Decimal]] = None) -> Dict[str, PaymentSchedule]:
+        """
+        Графики погашения договоров по типу графика (аннуитет, дифференцированный, в конце срока)
+        
+        Args:
+            contracts: Кредитные договоры
+            version_id: ID версии расчета
+            principals: Суммы кредита (по умолчанию - лимиты договоров)
+            rates: Годовые ставки, % (по умолчанию - маржа к базовой ставке договора)
             
-            return schedule
+        Returns:
+            Словарь {ID договора: график}
+        """
+        try:
+            return self.amortization.generate(contracts, principals, rates).to_payment_schedules(version_id)
             
         except Exception as e:
-            logger.error(f"Error creating annuity schedule: {e}")
+            logger.error(f"Error creating amortization schedules: {e}")
             raise
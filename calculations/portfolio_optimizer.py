@@ -0,0 +1,204 @@
+"""
+Оптимизация распределения долга по договорам (целевая загрузка и концентрация)
+"""
+
+from datetime import date
+from typing import List, Dict, Any, Optional, Sequence
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Изменения остатка меньше этой суммы не превращаются в выборки и погашения
+MIN_REALLOCATION_AMOUNT = 0.01
+
+
+class OptimizationResult:
+    """Предлагаемые остатки по договорам и переход к ним от текущих"""
+    
+    def __init__(self,
+                 contract_ids: List[str],
+                 current_balances: np.ndarray,
+                 target_balances: np.ndarray,
+                 rates: np.ndarray,
+                 total_limit: float,
+                 target_utilization: float,
+                 max_concentration: float,
+                 feasible: bool):
+        self.contract_ids = contract_ids
+        self.current_balances = current_balances
+        self.target_balances = target_balances
+        self.rates = rates
+        self.total_limit = total_limit
+        self.target_utilization = target_utilization
+        self.max_concentration = max_concentration
+        self.feasible = feasible
+    
+    @property
+    def changes(self) -> np.ndarray:
+        """Изменения остатков (выборка > 0, погашение < 0)"""
+        return self.target_balances - self.current_balances
+    
+    def annual_interest(self, balances: np.ndarray) -> float:
+        """Годовые проценты при заданных остатках"""
+        return float(balances @ self.rates / 100.0)
+    
+    def get_concentration(self) -> float:
+        """Максимальная доля одного договора в итоговом долге"""
+        total = self.target_balances.sum()
+        return float(self.target_balances.max() / total) if total > 0 else 0.0
+    
+    def to_scenario_parameters(self,
+                               effective_date: date,
+                               drawdown_terms: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+        """
+        Выборки и погашения для сценарной версии (см. ScenarioOverlay)
+        
+        Args:
+            effective_date: Дата перераспределения
+            drawdown_terms: Условия новых выборок по договорам
+                (interest_rate_type, interest_rate, margin)
+                
+        Returns:
+            Параметры additional_drawdowns и additional_repayments
+        """
+        drawdown_terms = drawdown_terms or {}
+        additional_drawdowns = []
+        additional_repayments = []
+        
+        for index in np.flatnonzero(np.abs(self.changes) >= MIN_REALLOCATION_AMOUNT):
+            contract_id = self.contract_ids[index]
+            amount = round(float(self.changes[index]), 2)
+            if amount > 0:
+                additional_drawdowns.append({
+                    'contract_id': contract_id,
+                    'amount': amount,
+                    'date': effective_date.isoformat(),
+                    **drawdown_terms.get(contract_id, {})
+                })
+            else:
+                additional_repayments.append({
+                    'contract_id': contract_id,
+                    'principal_amount': -amount,
+                    'interest_amount': 0.0,
+                    'date': effective_date.isoformat()
+                })
+        
+        return {
+            'additional_drawdowns': additional_drawdowns,
+            'additional_repayments': additional_repayments
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        changes = self.changes
+        moved = np.flatnonzero(np.abs(changes) >= MIN_REALLOCATION_AMOUNT)
+        return {
+            'feasible': self.feasible,
+            'target_utilization': self.target_utilization,
+            'max_concentration': self.max_concentration,
+            'utilization_before': float(self.current_balances.sum() / self.total_limit) if self.total_limit else 0.0,
+            'utilization_after': float(self.target_balances.sum() / self.total_limit) if self.total_limit else 0.0,
+            'concentration_after': self.get_concentration(),
+            'annual_interest_before': self.annual_interest(self.current_balances),
+            'annual_interest_after': self.annual_interest(self.target_balances),
+            'total_drawdowns': float(changes[changes > 0].sum()),
+            'total_repayments': float(-changes[changes < 0].sum()),
+            'reallocations': [
+                {
+                    'contract_id': self.contract_ids[index],
+                    'rate': float(self.rates[index]),
+                    'balance_before': float(self.current_balances[index]),
+                    'balance_after': float(self.target_balances[index]),
+                    'change': float(changes[index])
+                }
+                for index in moved
+            ]
+        }
+
+
+class UtilizationOptimizer:
+    """
+    Распределение долга под целевую загрузку с минимальными процентами
+    
+    Задача: остатки x_i в [min_i, limit_i], сумма x_i = target_utilization *
+    сумма лимитов, доля каждого договора не выше max_concentration, сумма
+    rate_i * x_i минимальна. При фиксированной сумме ограничение
+    концентрации - это верхняя граница остатка, поэтому задача сводится к
+    непрерывному рюкзаку: после нижних границ объем распределяется по
+    договорам в порядке возрастания ставки до их верхних границ. Жадное
+    решение здесь оптимально и считается сортировкой и кумулятивной суммой
+    по массивам, без LP-решателя.
+    """
+    
+    def solve(self,
+              contract_ids: List[str],
+              limits: Sequence[float],
+              balances: Sequence[float],
+              rates: Sequence[float],
+              target_utilization: float,
+              max_concentration: float = 1.0,
+              min_balances: Optional[Sequence[float]] = None) -> OptimizationResult:
+        """
+        Расчет целевых остатков
+        
+        Args:
+            contract_ids: ID договоров
+            limits: Общие лимиты договоров
+            balances: Текущие остатки долга
+            rates: Ставки по договорам, % годовых
+            target_utilization: Целевая загрузка портфеля (доля от суммы лимитов)
+            max_concentration: Максимальная доля договора в долге портфеля
+            min_balances: Нижние границы остатков (например, непогашаемая часть)
+            
+        Returns:
+            Целевые остатки; feasible=False, если цели недостижимы одновременно
+            (тогда объем распределяется максимально близко к цели)
+        """
+        if not 0 <= target_utilization <= 1:
+            raise ValueError("target_utilization must be between 0 and 1")
+        if not 0 < max_concentration <= 1:
+            raise ValueError("max_concentration must be in (0, 1]")
+        
+        limits = np.asarray(limits, dtype=np.float64)
+        balances = np.asarray(balances, dtype=np.float64)
+        rates = np.asarray(rates, dtype=np.float64)
+        lower = np.zeros_like(limits) if min_balances is None else np.asarray(min_balances, dtype=np.float64)
+        
+        if not (len(contract_ids) == len(limits) == len(balances) == len(rates) == len(lower)):
+            raise ValueError("Contract arrays must have equal length")
+        
+        total_limit = float(limits.sum())
+        target_total = target_utilization * total_limit
+        upper = np.minimum(limits, max_concentration * target_total)
+        lower = np.minimum(lower, limits)
+        
+        feasible = bool(lower.sum() <= target_total <= upper.sum() and np.all(lower <= upper))
+        upper = np.maximum(upper, lower)
+        
+        # Объем сверх нижних границ - в самые дешевые договоры
+        remaining = min(max(target_total - lower.sum(), 0.0), float((upper - lower).sum()))
+        order = np.argsort(rates, kind='stable')
+        capacity = (upper - lower)[order]
+        filled_before = np.cumsum(capacity) - capacity
+        allocation = np.clip(remaining - filled_before, 0.0, capacity)
+        
+        targets = lower.copy()
+        targets[order] += allocation
+        
+        logger.info(
+            f"Utilization optimization: {len(contract_ids)} contracts, target {target_utilization:.2%}, "
+            f"max concentration {max_concentration:.2%}, feasible {feasible}"
+        )
+        
+        return OptimizationResult(
+            contract_ids=list(contract_ids),
+            current_balances=balances,
+            target_balances=targets,
+            rates=rates,
+            total_limit=total_limit,
+            target_utilization=target_utilization,
+            max_concentration=max_concentration,
+            feasible=feasible
+        )
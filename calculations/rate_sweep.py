@@ -0,0 +1,203 @@
+"""
+Пакетный расчет сценариев базовой ставки (sweep)
+"""
+
+from datetime import date
+from typing import List, Dict, Any, Optional, Sequence
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import KeyRateCurve
+from .accrual_arrays import PortfolioAccrual
+from .daily_rates import DailyRateTable
+
+logger = logging.getLogger(__name__)
+
+
+class RateSweepResult:
+    """
+    Куб кэш-флоу сценарии x даты
+    
+    Выборки, погашения основного долга и остатки от ставки не зависят и
+    хранятся одним рядом по датам; проценты - матрицей (сценарии, даты).
+    """
+    
+    # Поля куба в порядке последней оси (имена как в PortfolioCashflowItem)
+    CUBE_FIELDS = (
+        'total_drawdowns',
+        'total_principal_payments',
+        'total_interest_payments',
+        'total_debt_balance'
+    )
+    
+    def __init__(self,
+                 dates: List[date],
+                 scenario_labels: List[str],
+                 base_rate_paths: np.ndarray,
+                 interest: np.ndarray,
+                 drawdowns: np.ndarray,
+                 principal: np.ndarray,
+                 debt_balance: np.ndarray):
+        self.dates = dates
+        self.scenario_labels = scenario_labels
+        self.base_rate_paths = base_rate_paths
+        self.interest = interest
+        self.drawdowns = drawdowns
+        self.principal = principal
+        self.debt_balance = debt_balance
+    
+    @property
+    def scenarios_count(self) -> int:
+        """Количество сценариев"""
+        return self.interest.shape[0]
+    
+    def to_cube(self) -> np.ndarray:
+        """
+        Полный куб кэш-флоу
+        
+        Returns:
+            Массив (сценарии, даты, CUBE_FIELDS)
+        """
+        scenarios, dates = self.interest.shape
+        cube = np.empty((scenarios, dates, len(self.CUBE_FIELDS)))
+        cube[:, :, 0] = self.drawdowns
+        cube[:, :, 1] = self.principal
+        cube[:, :, 2] = self.interest
+        cube[:, :, 3] = self.debt_balance
+        return cube
+    
+    def total_interest(self) -> np.ndarray:
+        """Суммарные проценты по каждому сценарию"""
+        return self.interest.sum(axis=1)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'dates': [d.isoformat() for d in self.dates],
+            'scenarios': [
+                {
+                    'label': label,
+                    'base_rates': self.base_rate_paths[index].tolist(),
+                    'interest_payments': self.interest[index].tolist(),
+                    'total_interest': float(self.interest[index].sum())
+                }
+                for index, label in enumerate(self.scenario_labels)
+            ],
+            'total_drawdowns': self.drawdowns.tolist(),
+            'total_principal_payments': self.principal.tolist(),
+            'total_debt_balance': self.debt_balance.tolist()
+        }
+
+
+class RateSweepEngine:
+    """
+    Движок пакетного расчета сценариев базовой ставки
+    
+    Вместо построения версии и полного пересчета кэш-флоу на каждую ставку
+    графики портфеля раскладываются в массивы начислений один раз
+    (PortfolioAccrual), а проценты для всех сценариев считаются одной
+    матричной операцией. Результат совпадает с calculate_portfolio_cashflow
+    для версии с той же базовой ставкой (или кривой) с точностью до
+    округления процентов планировщика до копейки, в обоих режимах начисления.
+    """
+    
+    def sweep(self,
+              accrual: PortfolioAccrual,
+              base_rates: Sequence,
+              scenario_labels: Optional[List[str]] = None) -> RateSweepResult:
+        """
+        Расчет набора сценариев базовой ставки
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            base_rates: Сценарии базовой ставки: список чисел (плоская ставка
+                на весь горизонт), кривых KeyRateCurve (или их параметров)
+                либо матрица (сценарии, даты портфеля)
+            scenario_labels: Наименования сценариев
+            
+        Returns:
+            Куб кэш-флоу сценарии x даты
+        """
+        paths = self.normalize_paths(self._expand_curves(base_rates, accrual), accrual.dates_count)
+        
+        if scenario_labels is None:
+            scenario_labels = [self._default_label(path) for path in paths]
+        elif len(scenario_labels) != len(paths):
+            raise ValueError(
+                f"Expected {len(paths)} scenario labels, got {len(scenario_labels)}"
+            )
+        
+        logger.info(f"Running rate sweep: {len(paths)} scenarios x {accrual.dates_count} dates")
+        
+        return RateSweepResult(
+            dates=accrual.get_dates(),
+            scenario_labels=scenario_labels,
+            base_rate_paths=paths,
+            interest=accrual.interest_by_date(paths),
+            drawdowns=accrual.by_date(accrual.drawdowns),
+            principal=accrual.by_date(accrual.principal),
+            debt_balance=accrual.by_date(accrual.balance_end)
+        )
+    
+    def normalize_paths(self, base_rates: Sequence, dates_count: int) -> np.ndarray:
+        """
+        Приведение сценариев к матрице (сценарии, даты)
+        
+        Args:
+            base_rates: Список ставок или матрица траекторий
+            dates_count: Количество дат портфеля
+            
+        Returns:
+            Матрица базовых ставок
+        """
+        paths = np.asarray(base_rates, dtype=np.float64)
+        
+        if paths.ndim == 1:
+            paths = np.repeat(paths[:, np.newaxis], dates_count, axis=1)
+        elif paths.ndim != 2 or paths.shape[1] != dates_count:
+            raise ValueError(
+                f"Base rate paths must be a list of rates or a (scenarios, {dates_count}) matrix, "
+                f"got shape {paths.shape}"
+            )
+        
+        if paths.shape[0] == 0:
+            raise ValueError("At least one base rate scenario is required")
+        if not np.isfinite(paths).all():
+            raise ValueError("Base rate paths must be finite numbers")
+        
+        return paths
+    
+    def _expand_curves(self, base_rates: Sequence, accrual: PortfolioAccrual) -> Sequence:
+        """Разворачивание кривых ставки в траектории на даты портфеля"""
+        if isinstance(base_rates, np.ndarray):
+            return base_rates
+        
+        base_rates = list(base_rates)
+        if not any(isinstance(item, (KeyRateCurve, dict)) for item in base_rates):
+            return base_rates
+        if not accrual.dates_count:
+            raise ValueError("Portfolio has no accrual dates to apply base rate curves")
+        
+        start_date, end_date = accrual.get_dates()[0], accrual.get_dates()[-1]
+        paths = []
+        for item in base_rates:
+            if isinstance(item, dict):
+                item = KeyRateCurve.from_parameters(item)
+            if isinstance(item, KeyRateCurve):
+                paths.append(DailyRateTable(item, start_date, end_date).values_on(accrual.dates))
+            else:
+                paths.append(np.full(accrual.dates_count, item, dtype=np.float64))
+        return paths
+    
+    def _default_label(self, path: np.ndarray) -> str:
+        """Наименование сценария по умолчанию"""
+        if path.size and np.all(path == path[0]):
+            return f"base_rate={path[0]:g}"
+        return f"path {path.min():g}..{path.max():g}"
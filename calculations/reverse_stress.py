@@ -0,0 +1,278 @@
+"""
+Обратный стресс-тест: минимальный шок, нарушающий ограничение ликвидности
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from .accrual_arrays import PortfolioAccrual
+from .stress_grid import STRESS_GRID_PARAMETERS
+
+logger = logging.getLogger(__name__)
+
+# Ограничения обратного стресс-теста по месяцам
+REVERSE_STRESS_LIMITS = ('min_net_cashflow', 'max_debt_service')
+
+
+class MonthlyStressBasis:
+    """
+    Помесячный снимок портфеля для поиска по шокам
+    
+    Выборки, погашения и проценты месяца линейны по базовой ставке и по
+    множителю плановых выборок (1 + drawdown_shock), поэтому строки
+    графиков сводятся к нескольким рядам по месяцам один раз. Каждый шаг
+    поиска пересчитывает только проценты - O(месяцы) на сценарий.
+    """
+    
+    def __init__(self, accrual: PortfolioAccrual, base_rate: float):
+        """
+        Построение базиса
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            base_rate: Текущая базовая ставка, %
+        """
+        self.base_rate = float(base_rate)
+        
+        months, month_index = np.unique(accrual.dates.astype('datetime64[M]'), return_inverse=True)
+        month_index = month_index.reshape(-1)
+        row_month = month_index[accrual.date_index]
+        interest_month = month_index[accrual.interest_date_index]
+        self.months = [str(month) for month in months]
+        
+        def by_month(values: np.ndarray, index: np.ndarray = row_month) -> np.ndarray:
+            return np.bincount(index, weights=values, minlength=len(months))
+        
+        self.drawdowns = by_month(accrual.drawdowns)
+        self.planned_drawdowns = by_month(accrual.planned_drawdowns)
+        self.principal = by_month(accrual.principal)
+        
+        # Проценты месяца уплаты: I0 + s * I1 + B * (W0 + s * W1)
+        self.interest_fixed = by_month(accrual.scheduled_interest) + by_month(
+            accrual.fixed_interest + accrual.margin_interest, interest_month
+        )
+        self.interest_fixed_planned = by_month(accrual.planned_fixed_interest, interest_month)
+        self.floating_weights = by_month(accrual.floating_weight, interest_month)
+        self.floating_weights_planned = by_month(accrual.planned_floating_weight, interest_month)
+    
+    def interest(self, rate_shocks: np.ndarray, drawdown_shocks: np.ndarray) -> np.ndarray:
+        """
+        Проценты по месяцам для набора сценариев
+        
+        Args:
+            rate_shocks: Сдвиги базовой ставки, доли (0.02 = +2 п.п.)
+            drawdown_shocks: Относительные изменения плановых выборок
+            
+        Returns:
+            Массив (сценарии, месяцы)
+        """
+        rates = (self.base_rate + rate_shocks * 100.0)[:, np.newaxis]
+        shocks = drawdown_shocks[:, np.newaxis]
+        return (
+            self.interest_fixed + shocks * self.interest_fixed_planned
+            + rates * (self.floating_weights + shocks * self.floating_weights_planned)
+        )
+    
+    def metrics(self, rate_shocks: np.ndarray, drawdown_shocks: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Чистый поток и обслуживание долга по месяцам
+        
+        Args:
+            rate_shocks: Сдвиги базовой ставки, доли
+            drawdown_shocks: Относительные изменения плановых выборок
+            
+        Returns:
+            Словарь {'net_cashflow', 'debt_service'} массивов (сценарии, месяцы)
+        """
+        interest = self.interest(rate_shocks, drawdown_shocks)
+        drawdowns = self.drawdowns + drawdown_shocks[:, np.newaxis] * self.planned_drawdowns
+        debt_service = self.principal + interest
+        return {
+            'net_cashflow': drawdowns - debt_service,
+            'debt_service': debt_service
+        }
+
+
+class ReverseStressResult:
+    """Найденный минимальный шок и нарушенное им ограничение"""
+    
+    def __init__(self,
+                 direction: Dict[str, float],
+                 scale: Optional[float],
+                 limits: Dict[str, float],
+                 breach: Optional[Dict[str, Any]],
+                 evaluations: int):
+        self.direction = direction
+        self.scale = scale
+        self.limits = limits
+        self.breach = breach
+        self.evaluations = evaluations
+    
+    @property
+    def found(self) -> bool:
+        """Нарушение найдено в пределах диапазона поиска"""
+        return self.scale is not None
+    
+    def get_shocks(self) -> Optional[Dict[str, float]]:
+        """Шоки найденного сценария (stress_parameters)"""
+        if self.scale is None:
+            return None
+        return {name: self.scale * self.direction[name] for name in STRESS_GRID_PARAMETERS}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'found': self.found,
+            'direction': self.direction,
+            'scale': self.scale,
+            'stress_parameters': self.get_shocks(),
+            'limits': self.limits,
+            'breach': self.breach,
+            'evaluations': self.evaluations
+        }
+
+
+class ReverseStressSearch:
+    """
+    Поиск минимального шока вдоль заданного направления
+    
+    Шоки задаются как scale * direction (например, direction
+    {'rate_shock': 1} - поиск сдвига ставки). Диапазон [0, max_scale]
+    сначала просматривается сеткой одной векторной операцией, затем
+    граница первого нарушения уточняется бисекцией между соседними точками
+    сетки. Проверка одного шага - O(месяцы) по MonthlyStressBasis.
+    """
+    
+    def __init__(self, scan_points: int = 64, tolerance: float = 1e-6, max_iterations: int = 60):
+        """
+        Инициализация
+        
+        Args:
+            scan_points: Количество точек начального просмотра диапазона
+            tolerance: Точность определения шока
+            max_iterations: Максимальное количество шагов бисекции
+        """
+        self.scan_points = scan_points
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+    
+    def validate(self,
+                 direction: Dict[str, float],
+                 limits: Dict[str, float]) -> Tuple[Dict[str, float], Dict[str, float]]:
+        """Проверка направления поиска и ограничений"""
+        unknown = set(direction) - set(STRESS_GRID_PARAMETERS)
+        if unknown:
+            raise ValueError(
+                f"Unknown stress parameters: {', '.join(sorted(unknown))}. "
+                f"Supported parameters: {', '.join(STRESS_GRID_PARAMETERS)}"
+            )
+        direction = {name: float(direction.get(name, 0.0)) for name in STRESS_GRID_PARAMETERS}
+        if not any(direction.values()):
+            raise ValueError("Search direction must have a non-zero shock")
+        
+        unknown = set(limits or {}) - set(REVERSE_STRESS_LIMITS)
+        if unknown:
+            raise ValueError(
+                f"Unknown reverse stress limits: {', '.join(sorted(unknown))}. "
+                f"Supported limits: {', '.join(REVERSE_STRESS_LIMITS)}"
+            )
+        if not limits:
+            raise ValueError(f"At least one limit is required: {', '.join(REVERSE_STRESS_LIMITS)}")
+        
+        return direction, {name: float(value) for name, value in limits.items()}
+    
+    def search(self,
+               basis: MonthlyStressBasis,
+               direction: Dict[str, float],
+               limits: Dict[str, float],
+               max_scale: float = 1.0) -> ReverseStressResult:
+        """
+        Поиск минимального шока, нарушающего ограничения
+        
+        Args:
+            basis: Помесячный снимок портфеля
+            direction: Направление шока {'rate_shock', 'drawdown_shock'}
+            limits: Ограничения (REVERSE_STRESS_LIMITS): чистый поток месяца
+                не ниже min_net_cashflow, обслуживание долга месяца не выше
+                max_debt_service
+            max_scale: Верхняя граница множителя направления
+            
+        Returns:
+            Минимальный шок и нарушение (или found=False)
+        """
+        direction, limits = self.validate(direction, limits)
+        if max_scale <= 0:
+            raise ValueError("max_scale must be positive")
+        
+        evaluations = 0
+        
+        def breached(scales: np.ndarray) -> np.ndarray:
+            nonlocal evaluations
+            evaluations += len(scales)
+            metrics = basis.metrics(scales * direction['rate_shock'], scales * direction['drawdown_shock'])
+            result = np.zeros(len(scales), dtype=bool)
+            if 'min_net_cashflow' in limits:
+                result |= (metrics['net_cashflow'] < limits['min_net_cashflow']).any(axis=1)
+            if 'max_debt_service' in limits:
+                result |= (metrics['debt_service'] > limits['max_debt_service']).any(axis=1)
+            return result
+        
+        grid = np.linspace(0.0, max_scale, self.scan_points + 1)
+        hits = np.flatnonzero(breached(grid))
+        if not len(hits):
+            logger.info(f"Reverse stress: no breach up to scale {max_scale}")
+            return ReverseStressResult(direction, None, limits, None, evaluations)
+        
+        first = hits[0]
+        if first == 0:
+            scale = 0.0
+        else:
+            low, high = grid[first - 1], grid[first]
+            for _ in range(self.max_iterations):
+                if high - low <= self.tolerance:
+                    break
+                middle = (low + high) / 2
+                if breached(np.array([middle]))[0]:
+                    high = middle
+                else:
+                    low = middle
+            scale = float(high)
+        
+        breach = self._describe_breach(basis, direction, limits, scale)
+        logger.info(f"Reverse stress: breach at scale {scale:.6f} after {evaluations} evaluations")
+        return ReverseStressResult(direction, scale, limits, breach, evaluations)
+    
+    def _describe_breach(self,
+                         basis: MonthlyStressBasis,
+                         direction: Dict[str, float],
+                         limits: Dict[str, float],
+                         scale: float) -> Dict[str, Any]:
+        """Месяц и показатель с наибольшим нарушением в найденном сценарии"""
+        metrics = basis.metrics(
+            np.array([scale * direction['rate_shock']]), np.array([scale * direction['drawdown_shock']])
+        )
+        candidates: List[Tuple[float, str, int]] = []
+        if 'min_net_cashflow' in limits:
+            excess = limits['min_net_cashflow'] - metrics['net_cashflow'][0]
+            month = int(np.argmax(excess))
+            candidates.append((float(excess[month]), 'net_cashflow', month))
+        if 'max_debt_service' in limits:
+            excess = metrics['debt_service'][0] - limits['max_debt_service']
+            month = int(np.argmax(excess))
+            candidates.append((float(excess[month]), 'debt_service', month))
+        
+        excess, metric, month = max(candidates)
+        return {
+            'metric': metric,
+            'month': basis.months[month],
+            'value': float(metrics[metric][0, month]),
+            'excess': excess
+        }
@@ -0,0 +1,285 @@
+"""
+Куб результатов сценариев (сценарии x даты x показатели x валюты) в файле
+"""
+
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+import logging
+import json
+import os
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, PaymentSchedule
+
+logger = logging.getLogger(__name__)
+
+# Показатели куба (в порядке третьей оси)
+CUBE_MEASURES = (
+    'drawdowns',
+    'principal_payments',
+    'interest_payments',
+    'net_cashflow',
+    'debt_balance'
+)
+
+
+class ScenarioCube:
+    """
+    Результаты сценариев в отображаемом в память файле .npy
+    
+    Значения хранятся массивом float64 формы (сценарии, даты, показатели,
+    валюты), оси - в соседнем JSON-файле. Срезы читают из файла только
+    нужные элементы: выбор показателя и валюты - срез массива, диапазон
+    дат - бинарный поиск по отсортированной оси дат, поэтому запросы вида
+    "чистый поток всех сценариев за квартал" не требуют разбора кэш-флоу
+    версий. Значения на дату считаются так же, как в PortfolioCashflow.
+    """
+    
+    def __init__(self,
+                 path: Path,
+                 data: np.ndarray,
+                 scenario_ids: List[str],
+                 dates: np.ndarray,
+                 segments: List[str]):
+        self.path = Path(path)
+        self.data = data
+        self.scenario_ids = scenario_ids
+        self.dates = dates
+        self.measures = list(CUBE_MEASURES)
+        self.segments = segments
+        self._scenario_index = {scenario_id: index for index, scenario_id in enumerate(scenario_ids)}
+    
+    @classmethod
+    def build(cls,
+              path: str,
+              scenarios: Iterable[Tuple[str, Dict[str, PaymentSchedule]]],
+              contracts: List[CreditContract]) -> 'ScenarioCube':
+        """
+        Построение куба по графикам платежей сценариев
+        
+        Args:
+            path: Путь к файлу куба (.npy; оси пишутся в файл .json рядом)
+            scenarios: Пары (ID версии, графики по договорам)
+            contracts: Договоры портфеля (валюта - ось сегментов)
+            
+        Returns:
+            Куб, открытый только для чтения
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        
+        segments = sorted({contract.currency.value for contract in contracts})
+        segment_index = {segment: index for index, segment in enumerate(segments)}
+        
+        # Первый проход: строки графиков сценариев в массивы
+        scenario_ids = []
+        columns = []
+        for scenario_id, schedules in scenarios:
+            ordinals, contract_segments, values = [], [], []
+            for contract in contracts:
+                schedule = schedules.get(contract.id)
+                if not schedule:
+                    continue
+                segment = segment_index[contract.currency.value]
+                for item in schedule.schedule_items:
+                    ordinals.append(item.payment_date.toordinal())
+                    contract_segments.append(segment)
+                    values.append((
+                        float(item.drawdown_amount),
+                        float(item.principal_payment),
+                        float(item.interest_payment),
+                        float(item.debt_balance_end)
+                    ))
+            scenario_ids.append(scenario_id)
+            columns.append((
+                np.array(ordinals, dtype=np.int64),
+                np.array(contract_segments, dtype=np.int64),
+                np.array(values, dtype=np.float64).reshape(-1, 4)
+            ))
+        
+        ordinals = np.unique(np.concatenate([column[0] for column in columns])) if columns else np.zeros(0, np.int64)
+        dates_count, segments_count = len(ordinals), len(segments)
+        
+        # Второй проход: запись сценариев в файл по одному
+        tmp_path = path.with_suffix('.part')
+        data = np.lib.format.open_memmap(
+            tmp_path, mode='w+', dtype=np.float64,
+            shape=(len(scenario_ids), dates_count, len(CUBE_MEASURES), segments_count)
+        )
+        for index, (scenario_ordinals, scenario_segments, values) in enumerate(columns):
+            cell = np.searchsorted(ordinals, scenario_ordinals) * segments_count + scenario_segments
+            slab = np.empty((len(CUBE_MEASURES), dates_count * segments_count))
+            for measure, column in ((0, 0), (1, 1), (2, 2), (4, 3)):
+                slab[measure] = np.bincount(cell, weights=values[:, column], minlength=dates_count * segments_count)
+            slab[3] = slab[0] - slab[1] - slab[2]
+            data[index] = slab.reshape(len(CUBE_MEASURES), dates_count, segments_count).transpose(1, 0, 2)
+        data.flush()
+        del data
+        os.replace(tmp_path, path)
+        
+        first_date = date.fromordinal(int(ordinals[0])) if dates_count else None
+        with open(path.with_suffix('.json'), 'w', encoding='utf-8') as axes_file:
+            json.dump({
+                'scenarios': scenario_ids,
+                'start_date': first_date.isoformat() if first_date else None,
+                'date_offsets': (ordinals - ordinals[0]).tolist() if dates_count else [],
+                'measures': list(CUBE_MEASURES),
+                'segments': segments
+            }, axes_file)
+        
+        logger.info(f"Scenario cube built: {len(scenario_ids)} scenarios x {dates_count} dates x {segments_count} segments")
+        return cls.open(str(path))
+    
+    @classmethod
+    def open(cls, path: str) -> 'ScenarioCube':
+        """
+        Открытие куба из файла (без чтения значений в память)
+        
+        Args:
+            path: Путь к файлу куба
+            
+        Returns:
+            Куб
+        """
+        path = Path(path)
+        with open(path.with_suffix('.json'), encoding='utf-8') as axes_file:
+            axes = json.load(axes_file)
+        
+        if axes['measures'] != list(CUBE_MEASURES):
+            raise ValueError(f"Unsupported cube measures: {axes['measures']}")
+        
+        dates = np.array(axes['date_offsets'], dtype=np.int64)
+        if axes['start_date']:
+            dates = np.datetime64(axes['start_date'], 'D') + dates
+        
+        return cls(
+            path=path,
+            data=np.load(path, mmap_mode='r'),
+            scenario_ids=axes['scenarios'],
+            dates=dates.astype('datetime64[D]'),
+            segments=axes['segments']
+        )
+    
+    def remove(self) -> None:
+        """Удаление файлов куба"""
+        self.data = None
+        for file_path in (self.path, self.path.with_suffix('.json')):
+            try:
+                file_path.unlink()
+            except FileNotFoundError:
+                pass
+    
+    def _measure_index(self, measure: str) -> int:
+        """Позиция показателя на оси показателей"""
+        if measure not in CUBE_MEASURES:
+            raise ValueError(f"Unknown measure: {measure}. Supported measures: {', '.join(CUBE_MEASURES)}")
+        return CUBE_MEASURES.index(measure)
+    
+    def _date_slice(self, start_date: Optional[date], end_date: Optional[date]) -> slice:
+        """Диапазон оси дат для периода (границы включительно)"""
+        start = np.searchsorted(self.dates, np.datetime64(start_date, 'D')) if start_date else 0
+        end = np.searchsorted(self.dates, np.datetime64(end_date, 'D'), side='right') if end_date else len(self.dates)
+        return slice(int(start), int(end))
+    
+    def _scenario_rows(self, scenario_ids: Optional[List[str]]):
+        """Позиции сценариев на оси сценариев"""
+        if scenario_ids is None:
+            return slice(None)
+        unknown = [scenario_id for scenario_id in scenario_ids if scenario_id not in self._scenario_index]
+        if unknown:
+            raise ValueError(f"Scenarios not in cube: {', '.join(unknown)}")
+        return [self._scenario_index[scenario_id] for scenario_id in scenario_ids]
+    
+    def _segment_values(self, values: np.ndarray, segment: Optional[str]) -> np.ndarray:
+        """Значения по валюте (последняя ось) или сумма по всем валютам"""
+        if segment is None:
+            return values.sum(axis=-1)
+        if segment not in self.segments:
+            raise ValueError(f"Unknown segment: {segment}")
+        return values[..., self.segments.index(segment)]
+    
+    def select(self,
+               measure: str,
+               scenario_ids: Optional[List[str]] = None,
+               start_date: Optional[date] = None,
+               end_date: Optional[date] = None,
+               segment: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Срез показателя по сценариям и датам
+        
+        Args:
+            measure: Показатель (CUBE_MEASURES)
+            scenario_ids: Сценарии (по умолчанию - все)
+            start_date: Начало периода включительно
+            end_date: Конец периода включительно
+            segment: Валюта (по умолчанию - сумма по валютам)
+            
+        Returns:
+            Кортеж (даты среза, значения формы (сценарии, даты))
+        """
+        dates = self._date_slice(start_date, end_date)
+        values = self.data[self._scenario_rows(scenario_ids), dates, self._measure_index(measure)]
+        return self.dates[dates], self._segment_values(values, segment)
+    
+    def period_totals(self,
+                      measure: str,
+                      start_date: Optional[date] = None,
+                      end_date: Optional[date] = None,
+                      segment: Optional[str] = None) -> Dict[str, float]:
+        """
+        Сумма показателя за период по каждому сценарию
+        
+        Args:
+            measure: Показатель (CUBE_MEASURES)
+            start_date: Начало периода включительно
+            end_date: Конец периода включительно
+            segment: Валюта (по умолчанию - сумма по валютам)
+            
+        Returns:
+            Словарь {ID сценария: сумма}
+        """
+        _, values = self.select(measure, start_date=start_date, end_date=end_date, segment=segment)
+        totals = values.sum(axis=1)
+        return {scenario_id: float(totals[index]) for index, scenario_id in enumerate(self.scenario_ids)}
+    
+    def on_date(self,
+                measure: str,
+                as_of: date,
+                segment: Optional[str] = None) -> Dict[str, float]:
+        """
+        Значение показателя на дату по каждому сценарию
+        
+        Берется последняя дата куба не позже as_of.
+        
+        Args:
+            measure: Показатель (CUBE_MEASURES)
+            as_of: Дата
+            segment: Валюта (по умолчанию - сумма по валютам)
+            
+        Returns:
+            Словарь {ID сценария: значение}
+        """
+        position = int(np.searchsorted(self.dates, np.datetime64(as_of, 'D'), side='right')) - 1
+        if position < 0:
+            return {scenario_id: 0.0 for scenario_id in self.scenario_ids}
+        
+        values = self._segment_values(self.data[:, position, self._measure_index(measure)], segment)
+        return {scenario_id: float(values[index]) for index, scenario_id in enumerate(self.scenario_ids)}
+    
+    def get_axes(self) -> Dict[str, Any]:
+        """Оси куба для API"""
+        return {
+            'scenarios': self.scenario_ids,
+            'start_date': str(self.dates[0]) if len(self.dates) else None,
+            'end_date': str(self.dates[-1]) if len(self.dates) else None,
+            'dates_count': len(self.dates),
+            'measures': self.measures,
+            'segments': self.segments
+        }
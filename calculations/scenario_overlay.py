@@ -0,0 +1,212 @@
+"""
+Наложение сценарных событий на снимок портфеля
+"""
+
+from datetime import date
+from decimal import Decimal
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Set, Iterable
+import logging
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, Drawdown, Repayment, CalculationVersion
+from models.drawdown import InterestRateType, DrawdownStatus
+from models.repayment import RepaymentStatus, RepaymentType
+
+logger = logging.getLogger(__name__)
+
+# Параметры версии, от которых зависит базовая ставка
+RATE_PARAMETERS = ('base_rate', 'base_rate_curve', 'new_base_rate', 'rate_change_date')
+
+
+class ScenarioOverlay:
+    """
+    Сценарные события как дельта к снимку портфеля
+    
+    Снимок (договоры, выборки, погашения) не копируется: оверлей хранит
+    только добавленные события по договорам и множитель плановых выборок
+    стресс-теста и подмешивает их к спискам договора при построении
+    графика. affected_contract_ids() возвращает договоры, графики которых
+    отличаются от базовой версии, - остальные можно переиспользовать.
+    """
+    
+    def __init__(self,
+                 version_id: str,
+                 extra_drawdowns: Optional[Dict[str, List[Drawdown]]] = None,
+                 extra_repayments: Optional[Dict[str, List[Repayment]]] = None,
+                 rate_shock: Decimal = Decimal('0'),
+                 drawdown_shock: Decimal = Decimal('0')):
+        """
+        Инициализация оверлея
+        
+        Args:
+            version_id: ID сценарной версии
+            extra_drawdowns: Дополнительные выборки по договорам
+            extra_repayments: Дополнительные погашения по договорам
+            rate_shock: Сдвиг базовой ставки, п.п.
+            drawdown_shock: Относительное увеличение плановых выборок
+        """
+        self.version_id = version_id
+        self.extra_drawdowns = extra_drawdowns or {}
+        self.extra_repayments = extra_repayments or {}
+        self.rate_shock = rate_shock
+        self.drawdown_shock = drawdown_shock
+    
+    @classmethod
+    def from_version(cls, version: CalculationVersion) -> 'ScenarioOverlay':
+        """
+        Построение оверлея по параметрам версии
+        
+        Поддерживаются additional_drawdowns, additional_repayments и
+        stress_parameters (rate_shock и drawdown_shock - доли: 0.02 = +2 п.п.
+        к базовой ставке и +2% к плановым выборкам).
+        
+        Args:
+            version: Версия расчета
+            
+        Returns:
+            Оверлей (пустой для базовой версии)
+        """
+        extra_drawdowns: Dict[str, List[Drawdown]] = defaultdict(list)
+        for index, item in enumerate(version.get_parameter('additional_drawdowns') or []):
+            drawdown = cls._build_drawdown(version.id, index, item)
+            extra_drawdowns[drawdown.contract_id].append(drawdown)
+        
+        extra_repayments: Dict[str, List[Repayment]] = defaultdict(list)
+        for index, item in enumerate(version.get_parameter('additional_repayments') or []):
+            repayment = cls._build_repayment(version.id, index, item)
+            extra_repayments[repayment.contract_id].append(repayment)
+        
+        stress_parameters = version.get_parameter('stress_parameters') or {}
+        rate_shock = Decimal(str(stress_parameters.get('rate_shock', 0))) * Decimal('100')
+        drawdown_shock = Decimal(str(stress_parameters.get('drawdown_shock', 0)))
+        
+        return cls(
+            version_id=version.id,
+            extra_drawdowns=dict(extra_drawdowns),
+            extra_repayments=dict(extra_repayments),
+            rate_shock=rate_shock,
+            drawdown_shock=drawdown_shock
+        )
+    
+    @staticmethod
+    def _build_drawdown(version_id: str, index: int, item: Dict[str, Any]) -> Drawdown:
+        """Сценарная выборка из параметров (по умолчанию - фиксированная ставка 0)"""
+        return Drawdown(
+            id=item.get('id') or f"{version_id}_drawdown_{index}",
+            contract_id=item['contract_id'],
+            drawdown_date=date.fromisoformat(item['date']) if isinstance(item['date'], str) else item['date'],
+            amount=Decimal(str(item['amount'])),
+            interest_rate_type=item.get('interest_rate_type', InterestRateType.FIXED),
+            interest_rate=Decimal(str(item.get('interest_rate', 0))),
+            margin=Decimal(str(item['margin'])) if item.get('margin') is not None else None,
+            status=DrawdownStatus.PLANNED
+        )
+    
+    @staticmethod
+    def _build_repayment(version_id: str, index: int, item: Dict[str, Any]) -> Repayment:
+        """Сценарное погашение из параметров"""
+        return Repayment(
+            id=item.get('id') or f"{version_id}_repayment_{index}",
+            contract_id=item['contract_id'],
+            repayment_date=date.fromisoformat(item['date']) if isinstance(item['date'], str) else item['date'],
+            principal_amount=Decimal(str(item['principal_amount'])),
+            interest_amount=Decimal(str(item['interest_amount'])),
+            status=RepaymentStatus.PLANNED,
+            repayment_type=item.get('repayment_type', RepaymentType.PRINCIPAL)
+        )
+    
+    @property
+    def is_empty(self) -> bool:
+        """Оверлей не меняет события портфеля"""
+        return (
+            not self.extra_drawdowns
+            and not self.extra_repayments
+            and self.rate_shock == 0
+            and self.drawdown_shock == 0
+        )
+    
+    def apply_drawdowns(self, contract_id: str, drawdowns: List[Drawdown]) -> List[Drawdown]:
+        """
+        Выборки договора с учетом сценария
+        
+        Args:
+            contract_id: ID договора
+            drawdowns: Выборки договора из снимка
+            
+        Returns:
+            Исходный список, если сценарий его не меняет, иначе новый список
+        """
+        extra = self.extra_drawdowns.get(contract_id)
+        if self.drawdown_shock == 0 and not extra:
+            return drawdowns
+        
+        result = []
+        for drawdown in drawdowns:
+            if self.drawdown_shock != 0 and drawdown.status == DrawdownStatus.PLANNED:
+                drawdown = drawdown.model_copy(
+                    update={'amount': drawdown.amount * (Decimal('1') + self.drawdown_shock)}
+                )
+            result.append(drawdown)
+        
+        return result + (extra or [])
+    
+    def apply_repayments(self, contract_id: str, repayments: List[Repayment]) -> List[Repayment]:
+        """
+        Погашения договора с учетом сценария
+        
+        Args:
+            contract_id: ID договора
+            repayments: Погашения договора из снимка
+            
+        Returns:
+            Исходный список, если сценарий его не меняет, иначе новый список
+        """
+        extra = self.extra_repayments.get(contract_id)
+        if not extra:
+            return repayments
+        return repayments + extra
+    
+    def affected_contract_ids(self,
+                              contracts: Iterable[CreditContract],
+                              drawdowns_by_contract: Dict[str, List[Drawdown]],
+                              rate_changed: bool = False) -> Set[str]:
+        """
+        Договоры, графики которых отличаются от базовой версии
+        
+        Args:
+            contracts: Договоры портфеля
+            drawdowns_by_contract: Выборки снимка по договорам
+            rate_changed: Базовая ставка сценария отличается от базовой версии
+            
+        Returns:
+            Множество ID договоров
+        """
+        affected = set(self.extra_drawdowns) | set(self.extra_repayments)
+        rate_changed = rate_changed or self.rate_shock != 0
+        
+        if not rate_changed and self.drawdown_shock == 0:
+            return affected
+        
+        for contract in contracts:
+            if contract.id in affected:
+                continue
+            drawdowns = drawdowns_by_contract.get(contract.id, [])
+            if rate_changed and any(drawdown.is_floating_rate() for drawdown in drawdowns):
+                affected.add(contract.id)
+            elif self.drawdown_shock != 0 and any(
+                drawdown.status == DrawdownStatus.PLANNED for drawdown in drawdowns
+            ):
+                affected.add(contract.id)
+        
+        return affected
+    
+    @staticmethod
+    def rate_parameters(version: CalculationVersion) -> Dict[str, Any]:
+        """Параметры версии, определяющие базовую ставку"""
+        return {key: version.get_parameter(key) for key in RATE_PARAMETERS}
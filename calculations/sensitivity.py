@@ -0,0 +1,139 @@
+"""
+Чувствительность процентных расходов к базовой ставке (DV01)
+"""
+
+from typing import List, Dict, Any
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from .accrual_arrays import PortfolioAccrual
+
+logger = logging.getLogger(__name__)
+
+# Базисный пункт в единицах ставки (ставки хранятся в процентах)
+BASIS_POINT = 0.01
+
+
+class RateSensitivityResult:
+    """DV01 процентных расходов: по договорам и по корзинам месяц x валюта"""
+    
+    def __init__(self,
+                 bump_bp: float,
+                 contract_ids: List[str],
+                 contract_currencies: List[str],
+                 contract_dv01: np.ndarray,
+                 months: List[str],
+                 currencies: List[str],
+                 bucket_dv01: np.ndarray):
+        self.bump_bp = bump_bp
+        self.contract_ids = contract_ids
+        self.contract_currencies = contract_currencies
+        self.contract_dv01 = contract_dv01
+        self.months = months
+        self.currencies = currencies
+        self.bucket_dv01 = bucket_dv01
+    
+    @property
+    def portfolio_dv01(self) -> float:
+        """DV01 портфеля"""
+        return float(self.contract_dv01.sum())
+    
+    def get_dv01_by_currency(self) -> Dict[str, float]:
+        """DV01 по валютам"""
+        totals = self.bucket_dv01.sum(axis=0)
+        return {currency: float(totals[index]) for index, currency in enumerate(self.currencies)}
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'bump_bp': self.bump_bp,
+            'portfolio_dv01': self.portfolio_dv01,
+            'dv01_by_currency': self.get_dv01_by_currency(),
+            'buckets': [
+                {
+                    'month': month,
+                    'dv01': {
+                        currency: float(self.bucket_dv01[month_index, currency_index])
+                        for currency_index, currency in enumerate(self.currencies)
+                    }
+                }
+                for month_index, month in enumerate(self.months)
+            ],
+            'contracts': [
+                {
+                    'contract_id': contract_id,
+                    'currency': self.contract_currencies[index],
+                    'dv01': float(self.contract_dv01[index])
+                }
+                for index, contract_id in enumerate(self.contract_ids)
+                if self.contract_dv01[index] != 0
+            ]
+        }
+
+
+class RateSensitivityEngine:
+    """
+    Аналитический расчет DV01 по плавающим выборкам
+    
+    Проценты линейны по базовой ставке, поэтому производная процентов
+    каждой строки графика равна ее весу floating_weights(), а изменение при
+    сдвиге на любое число базисных пунктов - вес, умноженный на сдвиг.
+    Вместо двух версий и их сравнения достаточно одного прохода по
+    массивам начислений с группировкой по договорам и корзинам.
+    """
+    
+    def calculate(self,
+                  accrual: PortfolioAccrual,
+                  contract_currencies: List[str],
+                  bump_bp: float = 1.0) -> RateSensitivityResult:
+        """
+        Расчет чувствительности
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            contract_currencies: Валюты договоров в порядке accrual.contract_ids
+            bump_bp: Сдвиг базовой ставки, б.п.
+            
+        Returns:
+            DV01 по договорам и корзинам месяц x валюта
+        """
+        if len(contract_currencies) != len(accrual.contract_ids):
+            raise ValueError(
+                f"Expected {len(accrual.contract_ids)} contract currencies, got {len(contract_currencies)}"
+            )
+        
+        row_dv01 = accrual.floating_weights() * (BASIS_POINT * bump_bp)
+        contracts_count = len(accrual.contract_ids)
+        contract_dv01 = np.bincount(accrual.contract_index, weights=row_dv01, minlength=contracts_count)
+        
+        currencies, currency_index = np.unique(np.asarray(contract_currencies, dtype=object), return_inverse=True)
+        currency_index = currency_index.reshape(-1)
+        months, month_index = np.unique(accrual.dates.astype('datetime64[M]'), return_inverse=True)
+        month_index = month_index.reshape(-1)
+        
+        # Корзина строки: месяц даты уплаты процентов строки x валюта договора
+        bucket_index = (
+            month_index[accrual.interest_date_index] * len(currencies) + currency_index[accrual.contract_index]
+        )
+        bucket_dv01 = np.bincount(
+            bucket_index, weights=row_dv01, minlength=len(months) * len(currencies)
+        ).reshape(len(months), len(currencies))
+        
+        logger.info(f"Rate sensitivity calculated: {accrual.rows_count} rows, {len(months)} months")
+        
+        return RateSensitivityResult(
+            bump_bp=bump_bp,
+            contract_ids=accrual.contract_ids,
+            contract_currencies=list(contract_currencies),
+            contract_dv01=contract_dv01,
+            months=[str(month) for month in months],
+            currencies=[str(currency) for currency in currencies],
+            bucket_dv01=bucket_dv01
+        )
@@ -0,0 +1,218 @@
+"""
+Модели краткосрочной ставки для стохастического моделирования ключевой ставки
+"""
+
+from typing import Dict, Any, Optional, Sequence
+
+import numpy as np
+
+# Ориентировочные параметры для ключевой ставки ЦБ РФ (ставки в процентах годовых):
+# скорость возврата к среднему, долгосрочный уровень, волатильность (п.п. / sqrt(год))
+CBR_CALIBRATION = {
+    'mean_reversion': 0.6,
+    'long_term_rate': 9.0,
+    'volatility': 2.5
+}
+
+
+class ShortRateModel:
+    """
+    Базовая модель краткосрочной ставки
+    
+    Модель задает переход r(t) -> r(t + dt) при нормальном шоке. Переход
+    считается по точной формуле для процесса Орнштейна-Уленбека, поэтому
+    шаги сетки могут быть неравными (даты событий портфеля).
+    """
+    
+    name = 'base'
+    
+    def __init__(self, mean_reversion: float, volatility: float):
+        """
+        Инициализация модели
+        
+        Args:
+            mean_reversion: Скорость возврата к среднему (a > 0)
+            volatility: Волатильность ставки, п.п. / sqrt(год)
+        """
+        if mean_reversion <= 0:
+            raise ValueError("mean_reversion must be positive")
+        if volatility < 0:
+            raise ValueError("volatility must be non-negative")
+        
+        self.mean_reversion = float(mean_reversion)
+        self.volatility = float(volatility)
+    
+    def mean_level(self, times: np.ndarray) -> np.ndarray:
+        """
+        Уровень, к которому возвращается ставка на каждом шаге
+        
+        Args:
+            times: Начала шагов в годах
+            
+        Returns:
+            Массив уровней той же формы
+        """
+        raise NotImplementedError
+    
+    def simulate(self,
+                 initial_rate: float,
+                 times: np.ndarray,
+                 paths_count: int,
+                 rng: np.random.Generator) -> np.ndarray:
+        """
+        Генерация траекторий ставки
+        
+        Args:
+            initial_rate: Ставка в момент 0
+            times: Неубывающая сетка времени в годах (первый узел - 0)
+            paths_count: Количество траекторий
+            rng: Генератор случайных чисел
+            
+        Returns:
+            Массив (траектории, узлы сетки)
+        """
+        times = np.asarray(times, dtype=np.float64)
+        steps = np.diff(times)
+        
+        a = self.mean_reversion
+        decay = np.exp(-a * steps)
+        drift = self.mean_level(times[:-1]) * (1.0 - decay)
+        noise_scale = self.volatility * np.sqrt((1.0 - decay * decay) / (2.0 * a))
+        
+        shocks = rng.standard_normal((paths_count, len(steps)))
+        
+        rates = np.empty((paths_count, len(times)))
+        rates[:, 0] = initial_rate
+        for step in range(len(steps)):
+            rates[:, step + 1] = rates[:, step] * decay[step] + drift[step] + noise_scale[step] * shocks[:, step]
+        
+        return rates
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        """Параметры модели"""
+        return {
+            'model': self.name,
+            'mean_reversion': self.mean_reversion,
+            'volatility': self.volatility
+        }
+
+
+class VasicekModel(ShortRateModel):
+    """Модель Васичека: dr = a (b - r) dt + sigma dW"""
+    
+    name = 'vasicek'
+    
+    def __init__(self,
+                 mean_reversion: float = CBR_CALIBRATION['mean_reversion'],
+                 long_term_rate: float = CBR_CALIBRATION['long_term_rate'],
+                 volatility: float = CBR_CALIBRATION['volatility']):
+        """
+        Инициализация модели
+        
+        Args:
+            mean_reversion: Скорость возврата к среднему
+            long_term_rate: Долгосрочный уровень ставки, %
+            volatility: Волатильность ставки, п.п. / sqrt(год)
+        """
+        super().__init__(mean_reversion, volatility)
+        self.long_term_rate = float(long_term_rate)
+    
+    def mean_level(self, times: np.ndarray) -> np.ndarray:
+        """Постоянный долгосрочный уровень"""
+        return np.full(len(times), self.long_term_rate)
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        """Параметры модели"""
+        parameters = super().get_parameters()
+        parameters['long_term_rate'] = self.long_term_rate
+        return parameters
+
+
+class HullWhiteModel(ShortRateModel):
+    """
+    Модель Халла-Уайта: dr = (theta(t) - a r) dt + sigma dW
+    
+    theta(t) подбирается под кривую форвардных ставок:
+    theta(t) = f'(t) + a f(t) + sigma^2 / (2a) (1 - exp(-2at)).
+    Кривая задается узлами (годы, ставки) и интерполируется линейно; без
+    кривой модель совпадает с Васичеком с уровнем CBR_CALIBRATION.
+    """
+    
+    name = 'hull_white'
+    
+    def __init__(self,
+                 mean_reversion: float = CBR_CALIBRATION['mean_reversion'],
+                 volatility: float = CBR_CALIBRATION['volatility'],
+                 forward_times: Optional[Sequence[float]] = None,
+                 forward_rates: Optional[Sequence[float]] = None):
+        """
+        Инициализация модели
+        
+        Args:
+            mean_reversion: Скорость возврата к среднему
+            volatility: Волатильность ставки, п.п. / sqrt(год)
+            forward_times: Узлы кривой форвардных ставок, годы
+            forward_rates: Форвардные ставки в узлах, %
+        """
+        super().__init__(mean_reversion, volatility)
+        
+        if forward_times is None or forward_rates is None:
+            forward_times = [0.0]
+            forward_rates = [CBR_CALIBRATION['long_term_rate']]
+        
+        self.forward_times = np.asarray(forward_times, dtype=np.float64)
+        self.forward_rates = np.asarray(forward_rates, dtype=np.float64)
+        
+        if self.forward_times.shape != self.forward_rates.shape or not len(self.forward_times):
+            raise ValueError("forward_times and forward_rates must be non-empty and of equal length")
+        if np.any(np.diff(self.forward_times) <= 0):
+            raise ValueError("forward_times must be strictly increasing")
+    
+    def forward_rate(self, times: np.ndarray) -> np.ndarray:
+        """Форвардная ставка на моменты времени"""
+        return np.interp(times, self.forward_times, self.forward_rates)
+    
+    def mean_level(self, times: np.ndarray) -> np.ndarray:
+        """Уровень theta(t) / a, согласованный с кривой форвардных ставок"""
+        a = self.mean_reversion
+        bump = 1.0 / 365.0
+        forward = self.forward_rate(times)
+        forward_slope = (self.forward_rate(times + bump) - forward) / bump
+        theta = forward_slope + a * forward + self.volatility ** 2 / (2.0 * a) * (1.0 - np.exp(-2.0 * a * times))
+        return theta / a
+    
+    def get_parameters(self) -> Dict[str, Any]:
+        """Параметры модели"""
+        parameters = super().get_parameters()
+        parameters['forward_times'] = self.forward_times.tolist()
+        parameters['forward_rates'] = self.forward_rates.tolist()
+        return parameters
+
+
+SHORT_RATE_MODELS = {
+    VasicekModel.name: VasicekModel,
+    HullWhiteModel.name: HullWhiteModel
+}
+
+
+def create_short_rate_model(name: str, parameters: Optional[Dict[str, Any]] = None) -> ShortRateModel:
+    """
+    Создание модели по имени
+    
+    Args:
+        name: Имя модели (vasicek, hull_white)
+        parameters: Параметры конструктора модели
+        
+    Returns:
+        Модель краткосрочной ставки
+    """
+    model_class = SHORT_RATE_MODELS.get(name)
+    if model_class is None:
+        raise ValueError(
+            f"Unknown short rate model: {name}. Supported models: {', '.join(SHORT_RATE_MODELS)}"
+        )
+    
+    try:
+        return model_class(**(parameters or {}))
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for {name} model: {e}")
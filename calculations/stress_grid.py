@@ -0,0 +1,252 @@
+"""
+Сетка стресс-сценариев (rate_shock x drawdown_shock)
+"""
+
+from itertools import product
+from typing import List, Dict, Any, Optional, Iterator, Sequence
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from .accrual_arrays import PortfolioAccrual
+
+logger = logging.getLogger(__name__)
+
+# Параметры стресс-теста и количество точек диапазона по умолчанию
+STRESS_GRID_PARAMETERS = ('rate_shock', 'drawdown_shock')
+DEFAULT_GRID_STEPS = 5
+
+# Ограничения, проверяемые по каждому сценарию
+STRESS_LIMITS = ('max_total_interest', 'max_peak_debt_balance', 'max_breached_contracts')
+
+
+def expand_stress_grid(ranges: Dict[str, Any]) -> List[Dict[str, float]]:
+    """
+    Развертывание диапазонов параметров в декартово произведение
+    
+    Значение параметра - число, список значений или диапазон
+    {'min', 'max', 'steps'} (как в шаблоне stress_test).
+    
+    Args:
+        ranges: Диапазоны rate_shock и drawdown_shock
+        
+    Returns:
+        Список сценариев {'rate_shock', 'drawdown_shock'}
+    """
+    unknown = set(ranges) - set(STRESS_GRID_PARAMETERS)
+    if unknown:
+        raise ValueError(
+            f"Unknown stress parameters: {', '.join(sorted(unknown))}. "
+            f"Supported parameters: {', '.join(STRESS_GRID_PARAMETERS)}"
+        )
+    
+    axes = []
+    for name in STRESS_GRID_PARAMETERS:
+        value = ranges.get(name, 0.0)
+        if isinstance(value, dict):
+            if 'min' not in value or 'max' not in value:
+                raise ValueError(f"{name} range must have min and max")
+            steps = int(value.get('steps', DEFAULT_GRID_STEPS))
+            if steps < 1:
+                raise ValueError(f"{name} steps must be positive")
+            axes.append(np.linspace(float(value['min']), float(value['max']), steps).tolist())
+        elif isinstance(value, (list, tuple)):
+            if not value:
+                raise ValueError(f"{name} must have at least one value")
+            axes.append([float(item) for item in value])
+        else:
+            axes.append([float(value)])
+    
+    return [dict(zip(STRESS_GRID_PARAMETERS, values)) for values in product(*axes)]
+
+
+class StressBasis:
+    """
+    Редуцированный снимок портфеля для стресс-тестов
+    
+    Остатки линейны по множителю плановых выборок (1 + drawdown_shock), а
+    проценты - по базовой ставке и этому множителю, поэтому проход по
+    строкам графиков выполняется один раз: суммы процентов сводятся к
+    нескольким числам, остатки - к рядам по датам, лимиты - к порогу
+    drawdown_shock для каждого договора. Сценарий после этого считается за
+    O(даты + договоры) независимо от числа строк.
+    """
+    
+    def __init__(self,
+                 accrual: PortfolioAccrual,
+                 base_rate: float,
+                 contract_limits: Optional[Sequence[float]] = None):
+        """
+        Построение базиса
+        
+        Args:
+            accrual: Массивы начислений портфеля
+            base_rate: Текущая базовая ставка, %
+            contract_limits: Лимиты договоров в порядке accrual.contract_ids
+        """
+        self.base_rate = float(base_rate)
+        self.contract_ids = accrual.contract_ids
+        
+        # Проценты: I0 + s * I1 + (B + dB) * (W0 + s * W1) + проценты из погашений
+        self.interest_fixed = float(accrual.fixed_interest.sum() + accrual.margin_interest.sum())
+        self.interest_fixed_planned = float(accrual.planned_fixed_interest.sum())
+        self.floating_balance = float(accrual.floating_weight.sum())
+        self.floating_balance_planned = float(accrual.planned_floating_weight.sum())
+        self.scheduled_interest = float(accrual.scheduled_interest.sum())
+        
+        self.drawdowns = float(accrual.drawdowns.sum())
+        self.planned_drawdowns = float(accrual.planned_drawdowns.sum())
+        
+        self.debt_balance = accrual.by_date(accrual.balance_end)
+        self.planned_debt_balance = accrual.by_date(accrual.planned_balance_end)
+        
+        # Порог drawdown_shock, выше которого остаток договора превышает лимит
+        contracts_count = len(accrual.contract_ids)
+        self.breach_thresholds = np.full(contracts_count, np.inf)
+        if contract_limits is not None and accrual.rows_count:
+            limits = np.asarray(contract_limits, dtype=np.float64)[accrual.contract_index]
+            planned_end = accrual.planned_balance_end
+            headroom = limits - accrual.balance_end
+            with np.errstate(divide='ignore', invalid='ignore'):
+                thresholds = np.where(
+                    planned_end > 0,
+                    headroom / planned_end,
+                    np.where(headroom < 0, -np.inf, np.inf)
+                )
+            np.minimum.at(self.breach_thresholds, accrual.contract_index, thresholds)
+        
+        self.base_total_interest = self.total_interest(np.zeros(1), np.zeros(1))[0]
+    
+    def total_interest(self, rate_shocks: np.ndarray, drawdown_shocks: np.ndarray) -> np.ndarray:
+        """
+        Суммарные проценты для набора сценариев
+        
+        Args:
+            rate_shocks: Сдвиги базовой ставки, доли (0.02 = +2 п.п.)
+            drawdown_shocks: Относительные изменения плановых выборок
+            
+        Returns:
+            Массив сумм процентов по сценариям
+        """
+        rates = self.base_rate + rate_shocks * 100.0
+        return (
+            self.interest_fixed + drawdown_shocks * self.interest_fixed_planned
+            + rates * (self.floating_balance + drawdown_shocks * self.floating_balance_planned)
+            + self.scheduled_interest
+        )
+    
+    def evaluate(self, scenarios: List[Dict[str, float]], limits: Dict[str, float]) -> List[Dict[str, Any]]:
+        """
+        Метрики порции сценариев
+        
+        Args:
+            scenarios: Сценарии {'rate_shock', 'drawdown_shock'}
+            limits: Ограничения (STRESS_LIMITS)
+            
+        Returns:
+            Метрики по каждому сценарию
+        """
+        rate_shocks = np.array([scenario['rate_shock'] for scenario in scenarios])
+        drawdown_shocks = np.array([scenario['drawdown_shock'] for scenario in scenarios])
+        
+        total_interest = self.total_interest(rate_shocks, drawdown_shocks)
+        debt_balance = self.debt_balance + drawdown_shocks[:, np.newaxis] * self.planned_debt_balance
+        peak_debt_balance = debt_balance.max(axis=1) if debt_balance.shape[1] else np.zeros(len(scenarios))
+        
+        # Нарушения лимитов, которых нет в базовом портфеле
+        already_breached = self.breach_thresholds < 0
+        
+        results = []
+        for index, scenario in enumerate(scenarios):
+            breached = np.flatnonzero(~already_breached & (drawdown_shocks[index] > self.breach_thresholds))
+            metrics = {
+                'rate_shock': scenario['rate_shock'],
+                'drawdown_shock': scenario['drawdown_shock'],
+                'total_interest': float(total_interest[index]),
+                'interest_change': float(total_interest[index] - self.base_total_interest),
+                'total_drawdowns': float(self.drawdowns + drawdown_shocks[index] * self.planned_drawdowns),
+                'peak_debt_balance': float(peak_debt_balance[index]),
+                'breached_contracts': [self.contract_ids[contract] for contract in breached]
+            }
+            
+            breaches = []
+            if metrics['total_interest'] > limits.get('max_total_interest', np.inf):
+                breaches.append('max_total_interest')
+            if metrics['peak_debt_balance'] > limits.get('max_peak_debt_balance', np.inf):
+                breaches.append('max_peak_debt_balance')
+            if len(breached) > limits.get('max_breached_contracts', 0):
+                breaches.append('max_breached_contracts')
+            metrics['limit_breaches'] = breaches
+            
+            results.append(metrics)
+        
+        return results
+
+
+class StressGridRunner:
+    """
+    Расчет сетки стресс-сценариев с потоковой выдачей результатов
+    
+    Сценарии считаются порциями по общему StressBasis; результаты
+    отдаются генератором по мере расчета, при stop_on_breach расчет
+    прекращается на первом сценарии с нарушением ограничений.
+    """
+    
+    def __init__(self, chunk_size: int = 256):
+        """
+        Инициализация
+        
+        Args:
+            chunk_size: Количество сценариев в порции
+        """
+        self.chunk_size = chunk_size
+    
+    def run(self,
+            basis: StressBasis,
+            grid: List[Dict[str, float]],
+            limits: Optional[Dict[str, float]] = None,
+            stop_on_breach: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Расчет сетки
+        
+        Args:
+            basis: Редуцированный снимок портфеля
+            grid: Сценарии (см. expand_stress_grid)
+            limits: Ограничения (STRESS_LIMITS)
+            stop_on_breach: Остановиться на первом нарушении
+            
+        Yields:
+            Метрики очередного сценария (с порядковым номером index)
+        """
+        limits = self.validate_limits(limits)
+        
+        logger.info(f"Running stress grid: {len(grid)} scenarios")
+        
+        for start in range(0, len(grid), self.chunk_size):
+            chunk = grid[start:start + self.chunk_size]
+            for offset, metrics in enumerate(basis.evaluate(chunk, limits)):
+                metrics['index'] = start + offset
+                yield metrics
+                
+                if stop_on_breach and metrics['limit_breaches']:
+                    logger.info(
+                        f"Stress grid stopped at scenario {start + offset}: {', '.join(metrics['limit_breaches'])}"
+                    )
+                    return
+    
+    def validate_limits(self, limits: Optional[Dict[str, float]]) -> Dict[str, float]:
+        """Проверка ограничений"""
+        limits = dict(limits or {})
+        unknown = set(limits) - set(STRESS_LIMITS)
+        if unknown:
+            raise ValueError(
+                f"Unknown stress limits: {', '.join(sorted(unknown))}. "
+                f"Supported limits: {', '.join(STRESS_LIMITS)}"
+            )
+        return {name: float(value) for name, value in limits.items()}
@@ -0,0 +1,351 @@
+"""
+Субсидируемые ставки: помесячные массивы ставок, субсидий и чистых процентов по портфелю
+"""
+
+from datetime import date
+from typing import List, Dict, Any, Optional, Tuple
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, PaymentSchedule, KeyRateCurve, SubsidyProgram
+from .daily_rates import DailyRateTable
+from .money import schedule_minor_rows, MINOR_UNITS
+
+logger = logging.getLogger(__name__)
+
+# Дней в году для помесячных процентов и субсидий (как ACCRUAL_DAY_BASIS)
+SUBSIDY_DAY_BASIS = 365.0
+
+# Шаг ключа (линия, дата) для поиска по всем линиям одним searchsorted
+ORDINAL_STRIDE = 10 ** 7
+
+
+def _find_nodes(lanes: np.ndarray,
+                ordinals: np.ndarray,
+                query_lanes: np.ndarray,
+                query_ordinals: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Последний узел линии с датой не позже запрошенной (одним searchsorted по ключу линия-дата)
+    
+    Args:
+        lanes, ordinals: Узлы, упорядоченные по линии и дате
+        query_lanes, query_ordinals: Запросы (линия, дата)
+        
+    Returns:
+        Номера узлов и маска запросов, для которых узел найден
+    """
+    keys = lanes * ORDINAL_STRIDE + ordinals
+    last = np.searchsorted(keys, query_lanes * ORDINAL_STRIDE + query_ordinals, side='right') - 1
+    found = last >= 0
+    found[found] = lanes[last[found]] == query_lanes[found]
+    return np.maximum(last, 0), found
+
+
+def _step_integrals(lanes: np.ndarray,
+                    ordinals: np.ndarray,
+                    values: np.ndarray,
+                    lanes_count: int,
+                    boundaries: np.ndarray) -> np.ndarray:
+    """
+    Интегралы ступенчатых функций линий от начала до каждой границы
+    
+    Значение узла действует с его даты до следующего узла линии (после
+    последнего - бессрочно), до первого узла функция равна нулю.
+    
+    Args:
+        lanes: Линия каждого узла
+        ordinals: Дата узла (date.toordinal())
+        values: Значение с даты узла
+        lanes_count: Количество линий
+        boundaries: Границы (date.toordinal()), по возрастанию
+        
+    Returns:
+        Массив (линии x границы): сумма значений по дням до границы
+    """
+    if not len(lanes):
+        return np.zeros((lanes_count, len(boundaries)))
+    order = np.lexsort((ordinals, lanes))
+    lanes, ordinals, values = lanes[order], ordinals[order], values[order]
+    
+    # Накопленный интеграл на дату каждого узла внутри его линии
+    same_lane = np.append(lanes[1:] == lanes[:-1], False)
+    spans = np.where(same_lane, np.append(np.diff(ordinals), 0), 0)
+    segments = values * spans
+    cumulative = np.cumsum(segments) - segments
+    cumulative -= cumulative[np.searchsorted(lanes, lanes)]
+    
+    query_lanes = np.repeat(np.arange(lanes_count, dtype=np.int64), len(boundaries))
+    query_ordinals = np.tile(boundaries, lanes_count)
+    last, found = _find_nodes(lanes, ordinals, query_lanes, query_ordinals)
+    
+    integrals = np.where(found, cumulative[last] + values[last] * (query_ordinals - ordinals[last]), 0.0)
+    return integrals.reshape(lanes_count, len(boundaries))
+
+
+def _step_values(lanes: np.ndarray,
+                 ordinals: np.ndarray,
+                 values: np.ndarray,
+                 lanes_count: int,
+                 dates: np.ndarray,
+                 default: float) -> np.ndarray:
+    """
+    Значения ступенчатых функций линий на даты (до первого узла - default)
+    
+    Returns:
+        Массив (линии x даты)
+    """
+    if not len(lanes):
+        return np.full((lanes_count, len(dates)), default)
+    order = np.lexsort((ordinals, lanes))
+    lanes, ordinals, values = lanes[order], ordinals[order], values[order]
+    
+    query_lanes = np.repeat(np.arange(lanes_count, dtype=np.int64), len(dates))
+    last, found = _find_nodes(lanes, ordinals, query_lanes, np.tile(dates, lanes_count))
+    return np.where(found, values[last], default).reshape(lanes_count, len(dates))
+
+
+class SubsidyResult:
+    """Помесячные проценты, субсидии и ставки субсидируемых договоров (договоры x месяцы)"""
+    
+    def __init__(self,
+                 contract_ids: List[str],
+                 programs: List[str],
+                 months: np.ndarray,
+                 days: np.ndarray,
+                 balances: np.ndarray,
+                 subsidized_balances: np.ndarray,
+                 gross_interest: np.ndarray,
+                 subsidy_rates: np.ndarray):
+        self.contract_ids = contract_ids
+        self.programs = programs
+        self.months = months
+        self.days = days
+        self.balances = balances
+        self.subsidized_balances = subsidized_balances
+        self.gross_interest = gross_interest
+        self.subsidy_rates = subsidy_rates
+        self.subsidy = subsidy_rates * subsidized_balances * days / (100 * SUBSIDY_DAY_BASIS)
+        self.net_interest = gross_interest - self.subsidy
+    
+    def _annualize(self, interest: np.ndarray, balance_days: np.ndarray) -> np.ndarray:
+        """Годовая ставка, %: проценты к остатку-дням (0 без остатка)"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rates = interest * 100 * SUBSIDY_DAY_BASIS / balance_days
+        return np.where(balance_days > 0, rates, 0.0)
+    
+    @property
+    def gross_rates(self) -> np.ndarray:
+        """Ставка по договору, % (средняя за месяц по остатку)"""
+        return self._annualize(self.gross_interest, self.balances * self.days)
+    
+    @property
+    def effective_rates(self) -> np.ndarray:
+        """Эффективная ставка, %: ставка минус субсидия на субсидируемую долю остатка"""
+        return self._annualize(self.net_interest, self.balances * self.days)
+    
+    def get_monthly_totals(self) -> List[Dict[str, Any]]:
+        """Итоги по месяцам: остаток, субсидируемая сумма, проценты, субсидия, чистые проценты"""
+        balances = self.balances.sum(axis=0)
+        subsidized = self.subsidized_balances.sum(axis=0)
+        gross = self.gross_interest.sum(axis=0)
+        subsidy = self.subsidy.sum(axis=0)
+        net = self.net_interest.sum(axis=0)
+        effective = self._annualize(net, balances * self.days)
+        return [
+            {
+                'month': str(month),
+                'balance': float(balances[index]),
+                'subsidized_balance': float(subsidized[index]),
+                'gross_interest': float(gross[index]),
+                'subsidy': float(subsidy[index]),
+                'net_interest': float(net[index]),
+                'effective_rate': float(effective[index])
+            }
+            for index, month in enumerate(self.months)
+        ]
+    
+    def get_program_totals(self) -> Dict[str, Dict[str, float]]:
+        """Итоги по программам субсидирования за весь горизонт"""
+        programs = np.array(self.programs, dtype=object)
+        totals = {}
+        for program in sorted(set(self.programs)):
+            rows = programs == program
+            totals[program] = {
+                'contracts': int(rows.sum()),
+                'gross_interest': float(self.gross_interest[rows].sum()),
+                'subsidy': float(self.subsidy[rows].sum()),
+                'net_interest': float(self.net_interest[rows].sum())
+            }
+        return totals
+    
+    def get_contract_totals(self) -> Dict[str, Dict[str, float]]:
+        """Итоги по договорам: проценты, субсидия, чистые проценты и эффективная ставка за горизонт"""
+        balance_days = (self.balances * self.days).sum(axis=1)
+        gross = self.gross_interest.sum(axis=1)
+        subsidy = self.subsidy.sum(axis=1)
+        net = self.net_interest.sum(axis=1)
+        effective = self._annualize(net, balance_days)
+        return {
+            contract_id: {
+                'program': self.programs[index],
+                'gross_interest': float(gross[index]),
+                'subsidy': float(subsidy[index]),
+                'net_interest': float(net[index]),
+                'effective_rate': float(effective[index])
+            }
+            for index, contract_id in enumerate(self.contract_ids)
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'contracts': len(self.contract_ids),
+            'months': len(self.months),
+            'total_gross_interest': float(self.gross_interest.sum()),
+            'total_subsidy': float(self.subsidy.sum()),
+            'total_net_interest': float(self.net_interest.sum()),
+            'by_month': self.get_monthly_totals(),
+            'by_program': self.get_program_totals(),
+            'by_contract': self.get_contract_totals()
+        }
+
+
+class SubsidyBook:
+    """
+    Субсидируемый портфель в виде массивов договоры x месяцы
+    
+    Средний остаток, проценты по ставке договора и доля месяца под
+    субсидией считаются один раз из графиков точным интегрированием
+    ступенчатых функций по всем договорам сразу. Ставки субсидии - тоже
+    помесячные массивы, поэтому пересчет чистых процентов всего портфеля
+    при изменении условий программ - несколько векторных операций без
+    перестроения графиков. Субсидируемая сумма берется на начало месяца,
+    субсидия месяца - ставка субсидии * min(средний остаток, сумма).
+    """
+    
+    def __init__(self, contracts: List[CreditContract], schedules: Dict[str, PaymentSchedule]):
+        """
+        Построение массивов по субсидируемым договорам с графиками
+        
+        Args:
+            contracts: Кредитные договоры (без условий субсидирования пропускаются)
+            schedules: Словарь {ID договора: график}
+        """
+        subsidized = [
+            contract for contract in contracts
+            if contract.subsidy is not None and contract.id in schedules and schedules[contract.id].schedule_items
+        ]
+        self.contract_ids = [contract.id for contract in subsidized]
+        self.programs = [contract.subsidy.program.value for contract in subsidized]
+        lanes_count = len(subsidized)
+        
+        # Строки графиков: остаток на конец дня и ставка действуют до следующей
+        # строки, остаток последней строки - до конца ее месяца
+        row_lanes, row_ordinals, row_balances, row_rates = [], [], [], []
+        for lane, contract in enumerate(subsidized):
+            schedule = schedules[contract.id]
+            rows = schedule_minor_rows(schedule)
+            last_date = rows[-1][0]
+            month_end = date(last_date.year + last_date.month // 12, last_date.month % 12 + 1, 1)
+            row_lanes.extend([lane] * (len(rows) + 1))
+            row_ordinals.extend(row[0].toordinal() for row in rows)
+            row_ordinals.append(month_end.toordinal())
+            row_balances.extend(row[4] for row in rows)
+            row_balances.append(0)
+            row_rates.extend(float(item.effective_rate) for item in schedule.schedule_items)
+            row_rates.append(0.0)
+        row_lanes = np.array(row_lanes, dtype=np.int64)
+        row_ordinals = np.array(row_ordinals, dtype=np.int64)
+        row_balances = np.array(row_balances, dtype=np.float64) / MINOR_UNITS
+        row_rates = np.array(row_rates, dtype=np.float64)
+        
+        # Сетка месяцев от первой до последней даты графиков
+        if lanes_count:
+            first = np.datetime64(date.fromordinal(int(row_ordinals.min())), 'M')
+            last = np.datetime64(date.fromordinal(int(row_ordinals.max())), 'M') - 1
+            self.months = np.arange(first, last + 1)
+        else:
+            self.months = np.array([], dtype='datetime64[M]')
+        month_starts = np.append(self.months, self.months[-1] + 1) if len(self.months) else self.months
+        self._month_starts = month_starts.astype('datetime64[D]')
+        boundaries = self._month_starts.astype(np.int64) + date(1970, 1, 1).toordinal()
+        self.days = np.diff(boundaries).astype(np.float64)
+        
+        # Условия субсидий договоров: узлы (линия, дата, ставка, сумма; без суммы - весь остаток)
+        point_lanes, point_ordinals, point_rates, point_caps = [], [], [], []
+        for lane, contract in enumerate(subsidized):
+            for point in contract.subsidy.get_sorted_points():
+                point_lanes.append(lane)
+                point_ordinals.append(point.effective_date.toordinal())
+                point_rates.append(float(point.subsidy_rate))
+                point_caps.append(float(point.subsidized_amount) if point.subsidized_amount is not None else np.inf)
+        point_lanes = np.array(point_lanes, dtype=np.int64)
+        point_ordinals = np.array(point_ordinals, dtype=np.int64)
+        
+        def monthly(lanes: np.ndarray, ordinals: np.ndarray, values: np.ndarray) -> np.ndarray:
+            return np.diff(_step_integrals(lanes, ordinals, values, lanes_count, boundaries), axis=1)
+        
+        # Средний остаток, проценты по ставке договора, ставка субсидии и доля дней под субсидией
+        self.balances = monthly(row_lanes, row_ordinals, row_balances) / self.days
+        self.gross_interest = monthly(row_lanes, row_ordinals, row_balances * row_rates) / (100 * SUBSIDY_DAY_BASIS)
+        self.subsidy_rates = monthly(point_lanes, point_ordinals, np.array(point_rates, dtype=np.float64)) / self.days
+        self.subsidy_shares = monthly(point_lanes, point_ordinals, np.ones(len(point_lanes))) / self.days
+        self.limits = _step_values(
+            point_lanes, point_ordinals, np.array(point_caps, dtype=np.float64), lanes_count, boundaries[:-1], np.inf
+        )
+        self.subsidized_balances = np.minimum(self.balances, self.limits)
+        
+        logger.info(f"Subsidy book built: {lanes_count} contracts x {len(self.months)} months")
+    
+    def program_rates(self, program_curves: Dict[str, KeyRateCurve]) -> np.ndarray:
+        """
+        Помесячные ставки субсидии с заменой условий программ
+        
+        Кривая программы переводится в средние ставки месяцев один раз
+        (дневная таблица на горизонт) и распространяется на договоры
+        программы с учетом доли месяца, в которой субсидия действует.
+        
+        Args:
+            program_curves: Словарь {код программы: кривая ставки субсидии}
+            
+        Returns:
+            Массив ставок субсидии, % (договоры x месяцы)
+        """
+        rates = self.subsidy_rates.copy()
+        if not len(self.months):
+            return rates
+        
+        programs = np.array(self.programs, dtype=object)
+        offsets = (self._month_starts[:-1] - self._month_starts[0]).astype(np.int64)
+        for program, curve in program_curves.items():
+            code = SubsidyProgram(program).value
+            rows = programs == code
+            if not rows.any():
+                continue
+            table = DailyRateTable(curve, self._month_starts[0].item(), (self._month_starts[-1] - 1).item())
+            curve_rates = np.add.reduceat(table.values, offsets) / self.days
+            rates[rows] = curve_rates * self.subsidy_shares[rows]
+        return rates
+    
+    def calculate(self, program_curves: Optional[Dict[str, KeyRateCurve]] = None) -> SubsidyResult:
+        """
+        Проценты, субсидии и эффективные ставки по месяцам
+        
+        Args:
+            program_curves: Новые ставки субсидии по программам (None - условия договоров)
+            
+        Returns:
+            Помесячный результат по договорам
+        """
+        subsidy_rates = self.program_rates(program_curves) if program_curves else self.subsidy_rates
+        return SubsidyResult(
+            self.contract_ids, self.programs, self.months, self.days, self.balances,
+            self.subsidized_balances, self.gross_interest, subsidy_rates
+        )
@@ -0,0 +1,311 @@
+"""
+Учет остатков и ставок по траншам (выборкам) договора в колоночном виде
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import Drawdown
+from models.drawdown import DrawdownStatus
+from .money import to_minor, from_minor, to_rate_units, divide_half_even, RATE_SCALE, RATE_DIGITS, MINOR_UNITS
+
+# Распределение погашения ОД по траншам: 'fifo' - начиная с самого раннего
+# транша, 'pro_rata' - пропорционально остаткам
+REPAYMENT_ALLOCATIONS = ('fifo', 'pro_rata')
+
+
+class TrancheBook:
+    """
+    Транши одного договора в виде массивов (структура массивов)
+    
+    Условия траншей (дата, сумма, ставка, маржа, тип ставки, статус) и
+    текущее состояние (остаток, погашено, проценты) хранятся столбцами
+    numpy по траншам в порядке дат выборки. История по событиям графика
+    хранится так же - столбцами по строкам (событие, транш с погашением ОД
+    или процентами), без объекта на транш и день.
+    """
+    
+    def __init__(self, drawdowns: List[Drawdown], allocation: str = 'fifo'):
+        """
+        Инициализация
+        
+        Args:
+            drawdowns: Выборки договора
+            allocation: Распределение погашений (REPAYMENT_ALLOCATIONS)
+        """
+        if allocation not in REPAYMENT_ALLOCATIONS:
+            raise ValueError(
+                f"Unknown repayment allocation: {allocation}. Supported: {', '.join(REPAYMENT_ALLOCATIONS)}"
+            )
+        
+        ordered = sorted(drawdowns, key=lambda x: x.drawdown_date)
+        self.allocation = allocation
+        self.drawdown_ids = [drawdown.id for drawdown in ordered]
+        self.ordinals = np.array([drawdown.drawdown_date.toordinal() for drawdown in ordered], dtype=np.int64)
+        self.amounts = np.array([to_minor(drawdown.amount) for drawdown in ordered], dtype=np.int64)
+        self.floating = np.array([drawdown.is_floating_rate() for drawdown in ordered], dtype=bool)
+        self.planned = np.array([drawdown.status == DrawdownStatus.PLANNED for drawdown in ordered], dtype=bool)
+        # Собственная ставка и маржа - в единицах RATE_SCALE
+        self.rate_units = np.array([to_rate_units(drawdown.interest_rate) for drawdown in ordered], dtype=np.int64)
+        self.margin_units = np.array([to_rate_units(drawdown.margin or 0) for drawdown in ordered], dtype=np.int64)
+        
+        # Составляющие ставки, % (фиксированная ставка, маржа, вес базовой
+        # ставки, собственная ставка плавающих) и то же для плановых траншей
+        # (ставка без базовой, вес базовой ставки) - для разложения процентов по
+        # базовой ставке матричным умножением на остатки
+        rates = self.rate_units / RATE_SCALE
+        margins = self.margin_units / RATE_SCALE
+        floating = self.floating.astype(np.float64)
+        self.component_rates = np.column_stack([
+            rates * (1 - floating), margins * floating, floating, rates * floating
+        ]).reshape(len(ordered), 4)
+        self.planned_component_rates = np.column_stack([
+            np.where(self.floating, margins, rates), floating
+        ]).reshape(len(ordered), 2)
+        self.planned_amounts = np.where(self.planned, self.amounts, 0)
+        
+        # Состояние в копейках
+        self.balances = np.zeros(len(ordered), dtype=np.int64)
+        self.repaid = np.zeros(len(ordered), dtype=np.int64)
+        self.interest = np.zeros(len(ordered), dtype=np.int64)
+        self.accrued = np.zeros(len(ordered), dtype=np.int64)  # Начислено, не уплачено
+        self.drawn = 0  # Количество выданных траншей (первые по порядку)
+        
+        # Остатки меняются только выдачами и погашениями (номер изменения -
+        # _changes), поэтому производные от остатков величины кэшируются до
+        # следующего изменения: ставки (базовая ставка, массив), произведения
+        # остаток * ставка и средняя ставка (номер изменения, ставки, значение),
+        # составляющие процентов (номер изменения, значения)
+        self._changes = 0
+        self._rates: tuple = (None, self.rate_units)
+        self._products: tuple = (-1, None, [])
+        self._weighted_rate: tuple = (-1, None, None)
+        self._components: tuple = (-1, [])
+        
+        # История: записи (дата, остатки, погашения ОД, проценты) по событиям с
+        # движением; при чтении сжимаются в столбцы по строкам (событие, транш)
+        self._history: List[tuple] = []
+        self._history_columns: Optional[Dict[str, np.ndarray]] = None
+    
+    def __len__(self) -> int:
+        return len(self.drawdown_ids)
+    
+    def draw(self, event_date: date) -> int:
+        """
+        Выдача траншей с датой выборки не позже event_date
+        
+        Returns:
+            Сумма выданных траншей в копейках
+        """
+        end = int(np.searchsorted(self.ordinals, event_date.toordinal(), side='right'))
+        if end <= self.drawn:
+            return 0
+        self.balances[self.drawn:end] = self.amounts[self.drawn:end]
+        amount = int(self.amounts[self.drawn:end].sum())
+        self.drawn = end
+        self._changes += 1
+        return amount
+    
+    def repay(self, amount: int) -> np.ndarray:
+        """
+        Распределение погашения ОД по траншам
+        
+        Погашение сверх суммы остатков траншам не распределяется.
+        
+        Args:
+            amount: Сумма погашения в копейках
+            
+        Returns:
+            Погашение по траншам в копейках
+        """
+        allocated = np.zeros(len(self), dtype=np.int64)
+        total = int(self.balances.sum())
+        amount = min(amount, total)
+        if amount <= 0:
+            return allocated
+        
+        if self.allocation == 'fifo':
+            repaid_before = np.cumsum(self.balances) - self.balances
+            allocated = np.clip(amount - repaid_before, 0, self.balances)
+        else:
+            # Пропорционально остаткам: целые доли, остаток копеек - наибольшим дробным частям
+            active = np.flatnonzero(self.balances)
+            shares = [divmod(amount * int(balance), total) for balance in self.balances[active].tolist()]
+            allocated[active] = [share for share, _ in shares]
+            left = amount - int(allocated.sum())
+            if left:
+                order = sorted(range(len(active)), key=lambda position: -shares[position][1])
+                allocated[active[order[:left]]] += 1
+        
+        self.balances -= allocated
+        self.repaid += allocated
+        self._changes += 1
+        return allocated
+    
+    def current_rates(self, base_rate: Optional[Decimal] = None) -> np.ndarray:
+        """
+        Ставки траншей в единицах RATE_SCALE
+        
+        Плавающие транши - базовая ставка плюс маржа, без базовой ставки -
+        собственная ставка выборки.
+        """
+        if base_rate is None or not self.floating.any():
+            return self.rate_units
+        if self._rates[0] != base_rate:
+            self._rates = (base_rate, np.where(self.floating, to_rate_units(base_rate) + self.margin_units, self.rate_units))
+        return self._rates[1]
+    
+    def accrue(self, rates: np.ndarray, numerator: int, denominator: int) -> int:
+        """
+        Начисление процентов по траншам за интервал (остаток * ставка * доля года)
+        
+        Каждый транш округляется отдельно, как money.accrue_interest;
+        произведения остаток * ставка считаются в целых числах Python один
+        раз до изменения остатков или ставок. Начисленное копится до settle.
+        
+        Args:
+            rates: Ставки траншей в единицах RATE_SCALE
+            numerator: Числитель доли года
+            denominator: Знаменатель доли года
+            
+        Returns:
+            Проценты за интервал по всем траншам в копейках
+        """
+        changes, previous_rates, products = self._products
+        if changes != self._changes or previous_rates is not rates:
+            products = [
+                (index, balance * rate)
+                for index, (balance, rate) in enumerate(zip(self.balances.tolist(), rates.tolist())) if balance
+            ]
+            self._products = (self._changes, rates, products)
+        
+        total = 0
+        scale = 100 * RATE_SCALE * denominator
+        for index, product in products:
+            interest = divide_half_even(product * numerator, scale)
+            self.accrued[index] += interest
+            total += interest
+        return total
+    
+    def settle(self) -> np.ndarray:
+        """
+        Уплата начисленных процентов
+        
+        Returns:
+            Проценты к уплате по траншам в копейках
+        """
+        interest = self.accrued
+        self.accrued = np.zeros(len(self), dtype=np.int64)
+        return interest
+    
+    def weighted_rate(self, rates: np.ndarray) -> Decimal:
+        """
+        Средняя ставка по остаткам траншей, %
+        
+        Без остатка - ставка последнего выданного транша (0, если выдач не было).
+        Пересчитывается только после выдачи, погашения или смены ставок.
+        """
+        changes, previous_rates, value = self._weighted_rate
+        if changes == self._changes and previous_rates is rates:
+            return value
+        
+        total = int(self.balances.sum())
+        if total > 0:
+            units = divide_half_even(
+                sum(balance * rate for balance, rate in zip(self.balances.tolist(), rates.tolist())), total
+            )
+        elif self.drawn:
+            units = int(rates[self.drawn - 1])
+        else:
+            units = 0
+        value = Decimal(units).scaleb(-RATE_DIGITS) if units else Decimal('0')
+        self._weighted_rate = (self._changes, rates, value)
+        return value
+    
+    def component_weights(self) -> List[float]:
+        """
+        Составляющие процентов за год по остаткам траншей (в единицах суммы * %)
+        
+        Returns:
+            Список: фиксированные ставки, маржа, вес базовой ставки,
+            собственные ставки плавающих траншей; для выданных плановых
+            траншей по выданной сумме - ставка без базовой, вес базовой ставки
+        """
+        changes, weights = self._components
+        if changes != self._changes:
+            drawn = self.drawn
+            weights = (
+                (self.balances[:drawn] @ self.component_rates[:drawn]).tolist()
+                + (self.planned_amounts[:drawn] @ self.planned_component_rates[:drawn]).tolist()
+            )
+            weights = [weight / MINOR_UNITS for weight in weights]
+            self._components = (self._changes, weights)
+        return weights
+    
+    def record(self, event_date: date, principal: np.ndarray, interest: np.ndarray) -> None:
+        """
+        Запись движений по траншам на дату события
+        
+        Args:
+            event_date: Дата события
+            principal: Погашение ОД по траншам в копейках
+            interest: Проценты к уплате по траншам в копейках
+        """
+        self.interest += interest
+        self._history.append((event_date.toordinal(), self.balances.copy(), principal, interest))
+        self._history_columns = None
+    
+    def get_history(self) -> Dict[str, np.ndarray]:
+        """
+        История по траншам: строки с погашением ОД или процентами
+        
+        Returns:
+            Словарь столбцов: ordinals (date.toordinal()), tranches (номер
+            транша в drawdown_ids), balance_end, principal, interest (копейки)
+        """
+        if self._history_columns is not None:
+            return self._history_columns
+        if not self._history:
+            names = ('ordinals', 'tranches', 'balance_end', 'principal', 'interest')
+            return {name: np.zeros(0, dtype=np.int64) for name in names}
+        
+        # Записи по событиям сжимаются при чтении: остаются только строки с движением
+        ordinals, balances, principal, interest = zip(*self._history)
+        principal, interest, balances = np.vstack(principal), np.vstack(interest), np.vstack(balances)
+        events, tranches = np.nonzero((principal != 0) | (interest != 0))
+        self._history_columns = {
+            'ordinals': np.asarray(ordinals, dtype=np.int64)[events],
+            'tranches': tranches.astype(np.int64),
+            'balance_end': balances[events, tranches],
+            'principal': principal[events, tranches],
+            'interest': interest[events, tranches]
+        }
+        return self._history_columns
+    
+    def get_summary(self) -> List[Dict[str, Any]]:
+        """Итоги по траншам: сумма, остаток, погашено, проценты"""
+        return [
+            {
+                'drawdown_id': drawdown_id,
+                'drawdown_date': date.fromordinal(ordinal),
+                'amount': from_minor(amount),
+                'balance': from_minor(balance),
+                'repaid': from_minor(repaid),
+                'interest': from_minor(interest),
+                'floating_rate': floating,
+                'planned': planned
+            }
+            for drawdown_id, ordinal, amount, balance, repaid, interest, floating, planned in zip(
+                self.drawdown_ids, self.ordinals.tolist(), self.amounts.tolist(), self.balances.tolist(),
+                self.repaid.tolist(), self.interest.tolist(), self.floating.tolist(), self.planned.tolist()
+            )
+        ]
@@ -0,0 +1,379 @@
+"""
+Внутренняя норма доходности (XIRR) и эффективная ставка по фактическим датам
+"""
+
+from typing import List, Dict, Any, Optional, Callable, Tuple
+import logging
+
+import numpy as np
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import PaymentSchedule
+from .money import schedule_minor_rows, MINOR_UNITS
+
+logger = logging.getLogger(__name__)
+
+# Дней в году для XIRR (как в XIRR Excel и в расчете ПСК)
+XIRR_DAY_BASIS = 365.0
+
+# Способ, которым найдена ставка линии
+XIRR_METHODS = ('newton', 'brent', 'failed')
+
+# Границы поиска корня для метода Брента, годовая ставка (доли)
+BRACKET_RATE_MIN = -0.99
+BRACKET_RATE_MAX = 100.0
+
+
+class XIRRResult:
+    """Ставки XIRR по линиям (договорам) и диагностика сходимости"""
+    
+    def __init__(self,
+                 lane_ids: List[str],
+                 rates: np.ndarray,
+                 methods: np.ndarray,
+                 iterations: np.ndarray,
+                 residuals: np.ndarray,
+                 failures: Dict[str, str]):
+        self.lane_ids = lane_ids
+        self.rates = rates
+        self.methods = methods
+        self.iterations = iterations
+        self.residuals = residuals
+        self.failures = failures
+    
+    @property
+    def converged(self) -> np.ndarray:
+        """Маска линий, для которых ставка найдена"""
+        return self.methods != XIRR_METHODS.index('failed')
+    
+    def get_rate(self, lane_id: str) -> Optional[float]:
+        """Годовая ставка линии (доли) или None, если она не найдена"""
+        index = self.lane_ids.index(lane_id)
+        return float(self.rates[index]) if self.converged[index] else None
+    
+    def get_effective_rates(self) -> Dict[str, Optional[float]]:
+        """Эффективные ставки линий, % годовых"""
+        converged = self.converged
+        return {
+            lane_id: float(self.rates[index] * 100) if converged[index] else None
+            for index, lane_id in enumerate(self.lane_ids)
+        }
+    
+    def get_diagnostics(self) -> Dict[str, Any]:
+        """Сводка сходимости: сколько линий решено каждым методом, итерации и невязки"""
+        converged = self.converged
+        return {
+            'lanes': len(self.lane_ids),
+            **{method: int((self.methods == index).sum()) for index, method in enumerate(XIRR_METHODS)},
+            'max_iterations': int(self.iterations.max()) if len(self.iterations) else 0,
+            'max_residual': float(self.residuals[converged].max()) if converged.any() else None,
+            'failures': dict(self.failures)
+        }
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Представление результата для API"""
+        return {
+            'effective_rates': self.get_effective_rates(),
+            'diagnostics': self.get_diagnostics()
+        }
+
+
+class XIRRSolver:
+    """
+    XIRR всех линий потоков за одну операцию
+    
+    Ставка линии - корень NPV(r) = sum(a_k * (1 + r) ^ -t_k), t_k - годы от
+    первого потока линии. Решение ведется по x = ln(1 + r), поэтому r > -1 на
+    любом шаге. Векторный метод Ньютона считает NPV и производную всех
+    линий двумя np.bincount за итерацию; линии, где Ньютон не сошелся
+    (нулевая производная, расходимость, лимит итераций), решаются методом
+    Брента на отрезке со сменой знака NPV.
+    """
+    
+    def __init__(self,
+                 tolerance: float = 1e-12,
+                 max_iterations: int = 50,
+                 initial_guess: float = 0.1,
+                 day_basis: float = XIRR_DAY_BASIS,
+                 bracket_points: int = 64):
+        """
+        Инициализация
+        
+        Args:
+            tolerance: Точность корня по ln(1 + r)
+            max_iterations: Максимум итераций Ньютона (и Брента) на линию
+            initial_guess: Начальное приближение ставки (доли)
+            day_basis: Дней в году
+            bracket_points: Количество точек сетки при поиске отрезка для Брента
+        """
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.initial_guess = initial_guess
+        self.day_basis = day_basis
+        self.bracket_points = bracket_points
+    
+    def solve_schedules(self, schedules: Dict[str, PaymentSchedule]) -> XIRRResult:
+        """
+        Эффективная ставка по графикам договоров
+        
+        Поток строки - выборка минус погашение ОД и проценты; остаток долга
+        на последнюю дату графика считается погашенным в эту дату.
+        
+        Args:
+            schedules: Словарь {ID договора: график}
+            
+        Returns:
+            Ставки по договорам
+        """
+        lane_ids = list(schedules)
+        rows_counts, ordinals, amounts = [], [], []
+        
+        for schedule in schedules.values():
+            rows = schedule_minor_rows(schedule)
+            rows_counts.append(len(rows))
+            ordinals.extend(row[0].toordinal() for row in rows)
+            flows = [row[1] - row[2] - row[3] for row in rows]
+            if rows:
+                flows[-1] -= rows[-1][4]
+            amounts.extend(flows)
+        
+        lane_index = np.repeat(np.arange(len(lane_ids), dtype=np.int64), rows_counts)
+        return self.solve_dates(
+            lane_ids, lane_index, np.array(ordinals, dtype=np.int64),
+            np.array(amounts, dtype=np.float64) / MINOR_UNITS
+        )
+    
+    def solve_dates(self,
+                    lane_ids: List[str],
+                    lane_index: np.ndarray,
+                    ordinals: np.ndarray,
+                    amounts: np.ndarray) -> XIRRResult:
+        """
+        XIRR по датам потоков
+        
+        Args:
+            lane_ids: ID линий
+            lane_index: Номер линии каждого потока
+            ordinals: Даты потоков (date.toordinal())
+            amounts: Суммы потоков
+            
+        Returns:
+            Ставки по линиям
+        """
+        lane_index = np.asarray(lane_index, dtype=np.int64)
+        ordinals = np.asarray(ordinals, dtype=np.int64)
+        
+        first_ordinals = np.full(len(lane_ids), np.iinfo(np.int64).max)
+        np.minimum.at(first_ordinals, lane_index, ordinals)
+        times = (ordinals - first_ordinals[lane_index]) / self.day_basis
+        return self.solve(lane_ids, lane_index, times, amounts)
+    
+    def solve(self,
+              lane_ids: List[str],
+              lane_index: np.ndarray,
+              times: np.ndarray,
+              amounts: np.ndarray) -> XIRRResult:
+        """
+        XIRR по срокам потоков в годах
+        
+        Args:
+            lane_ids: ID линий
+            lane_index: Номер линии каждого потока
+            times: Срок потока от начала линии, лет
+            amounts: Суммы потоков
+            
+        Returns:
+            Ставки по линиям
+        """
+        lanes_count = len(lane_ids)
+        lane_index = np.asarray(lane_index, dtype=np.int64)
+        times = np.asarray(times, dtype=np.float64)
+        amounts = np.asarray(amounts, dtype=np.float64)
+        
+        def by_lane(index: np.ndarray, values: np.ndarray) -> np.ndarray:
+            return np.bincount(index, weights=values, minlength=lanes_count)
+        
+        scale = by_lane(lane_index, np.abs(amounts))
+        has_inflow = by_lane(lane_index, (amounts > 0).astype(np.float64)) > 0
+        has_outflow = by_lane(lane_index, (amounts < 0).astype(np.float64)) > 0
+        
+        x = np.full(lanes_count, np.log1p(self.initial_guess))
+        methods = np.full(lanes_count, XIRR_METHODS.index('failed'), dtype=np.int8)
+        iterations = np.zeros(lanes_count, dtype=np.int64)
+        failures = {
+            lane_ids[index]: 'no sign change in cashflows'
+            for index in np.flatnonzero(~(has_inflow & has_outflow))
+        }
+        
+        # Векторный Ньютон по активным линиям
+        active = has_inflow & has_outflow
+        rows = active[lane_index]
+        index, row_times, row_amounts = lane_index[rows], times[rows], amounts[rows]
+        for _ in range(self.max_iterations):
+            if not active.any():
+                break
+            # Потоки решенных линий отбрасываются, поздние итерации идут по остатку
+            rows = active[index]
+            if not rows.all():
+                index, row_times, row_amounts = index[rows], row_times[rows], row_amounts[rows]
+            weighted = row_amounts * np.exp(-row_times * x[index])
+            npv = by_lane(index, weighted)
+            derivative = by_lane(index, -row_times * weighted)
+            
+            iterations[active] += 1
+            
+            with np.errstate(divide='ignore', invalid='ignore'):
+                step = npv / derivative
+            # Шаг ограничен: ставка меняется не более чем в e раз за итерацию
+            step = np.clip(step, -1.0, 1.0)
+            active &= np.isfinite(step)
+            x[active] -= step[active]
+            
+            solved = active & (np.abs(step) <= self.tolerance * (1 + np.abs(x)))
+            methods[solved] = XIRR_METHODS.index('newton')
+            active &= ~solved
+        
+        # Остальные линии - метод Брента
+        pending = (has_inflow & has_outflow) & (methods == XIRR_METHODS.index('failed'))
+        if pending.any():
+            self._solve_bracketed(
+                np.flatnonzero(pending), lane_ids, lane_index, times, amounts,
+                x, methods, iterations, failures
+            )
+        
+        # Невязка NPV в найденных корнях относительно суммы модулей потоков
+        converged = methods != XIRR_METHODS.index('failed')
+        rows = converged[lane_index]
+        npv = by_lane(lane_index[rows], amounts[rows] * np.exp(-times[rows] * x[lane_index[rows]]))
+        residuals = np.where(converged, np.abs(npv) / np.where(scale > 0, scale, 1.0), np.nan)
+        
+        rates = np.where(methods != XIRR_METHODS.index('failed'), np.expm1(x), np.nan)
+        result = XIRRResult(lane_ids, rates, methods, iterations, residuals, failures)
+        
+        diagnostics = result.get_diagnostics()
+        logger.info(
+            f"XIRR solved for {lanes_count} lanes: newton {diagnostics['newton']}, "
+            f"brent {diagnostics['brent']}, failed {diagnostics['failed']}"
+        )
+        return result
+    
+    def _solve_bracketed(self,
+                         lanes: np.ndarray,
+                         lane_ids: List[str],
+                         lane_index: np.ndarray,
+                         times: np.ndarray,
+                         amounts: np.ndarray,
+                         x: np.ndarray,
+                         methods: np.ndarray,
+                         iterations: np.ndarray,
+                         failures: Dict[str, str]) -> None:
+        """
+        Метод Брента для линий, где не сошелся Ньютон (результаты - в массивы)
+        
+        Отрезок со сменой знака ищется на общей сетке по x для всех линий
+        сразу, затем каждая линия решается на своем отрезке.
+        """
+        grid = np.linspace(np.log1p(BRACKET_RATE_MIN), np.log1p(BRACKET_RATE_MAX), self.bracket_points)
+        
+        order = np.argsort(lane_index, kind='stable')
+        bounds = np.searchsorted(lane_index[order], np.arange(len(lane_ids) + 1))
+        
+        for lane in lanes:
+            rows = order[bounds[lane]:bounds[lane + 1]]
+            lane_times, lane_amounts = times[rows], amounts[rows]
+            
+            def npv(point: float) -> float:
+                return float(lane_amounts @ np.exp(-lane_times * point))
+            
+            with np.errstate(over='ignore', invalid='ignore'):
+                values = np.exp(-np.outer(grid, lane_times)) @ lane_amounts
+            signs = np.sign(values)
+            changes = np.flatnonzero(np.isfinite(values[:-1]) & np.isfinite(values[1:]) & (signs[:-1] * signs[1:] <= 0))
+            if not len(changes):
+                failures[lane_ids[lane]] = 'no root in bracket'
+                continue
+            
+            # Корень, ближайший к начальному приближению
+            start = changes[np.argmin(np.abs(grid[changes] - np.log1p(self.initial_guess)))]
+            root, steps, converged = _brent(
+                npv, grid[start], grid[start + 1], values[start], values[start + 1],
+                self.tolerance, self.max_iterations
+            )
+            iterations[lane] += steps
+            if not converged:
+                failures[lane_ids[lane]] = 'brent did not converge'
+                continue
+            x[lane] = root
+            methods[lane] = XIRR_METHODS.index('brent')
+
+
+def _brent(func: Callable[[float], float],
+           lower: float,
+           upper: float,
+           f_lower: float,
+           f_upper: float,
+           tolerance: float,
+           max_iterations: int) -> Tuple[float, int, bool]:
+    """
+    Корень функции на отрезке со сменой знака (метод Брента)
+    
+    Args:
+        func: Функция
+        lower, upper: Границы отрезка
+        f_lower, f_upper: Значения функции на границах
+        tolerance: Точность корня
+        max_iterations: Максимум итераций
+        
+    Returns:
+        Корень, количество итераций, признак сходимости
+    """
+    a, b, fa, fb = lower, upper, f_lower, f_upper
+    if fa == 0:
+        return a, 0, True
+    if fb == 0:
+        return b, 0, True
+    
+    c, fc = a, fa
+    d = e = b - a
+    for iteration in range(1, max_iterations + 1):
+        if fb * fc > 0:
+            c, fc = a, fa
+            d = e = b - a
+        if abs(fc) < abs(fb):
+            a, b, c = b, c, b
+            fa, fb, fc = fb, fc, fb
+        
+        x_tolerance = 2 * np.finfo(float).eps * abs(b) + tolerance / 2
+        middle = (c - b) / 2
+        if fb == 0 or abs(middle) <= x_tolerance:
+            return b, iteration, True
+        
+        if abs(e) >= x_tolerance and abs(fa) > abs(fb):
+            # Интерполяция: секущая или обратная квадратичная
+            s = fb / fa
+            if a == c:
+                p, q = 2 * middle * s, 1 - s
+            else:
+                q, r = fa / fc, fb / fc
+                p = s * (2 * middle * q * (q - r) - (b - a) * (r - 1))
+                q = (q - 1) * (r - 1) * (s - 1)
+            if p > 0:
+                q = -q
+            p = abs(p)
+            if 2 * p < min(3 * middle * q - abs(x_tolerance * q), abs(e * q)):
+                e, d = d, p / q
+            else:
+                d = e = middle
+        else:
+            d = e = middle
+        
+        a, fa = b, fb
+        b += d if abs(d) > x_tolerance else (x_tolerance if middle > 0 else -x_tolerance)
+        fb = func(b)
+    
+    return b, max_iterations, False
@@ -8,6 +8,8 @@ from .repayment import Repayment
 from .calculation_version import CalculationVersion
 from .payment_schedule import PaymentSchedule, PaymentScheduleItem
 from .portfolio_cashflow import PortfolioCashflow, PortfolioCashflowItem
+from .key_rate_curve import KeyRateCurve, KeyRatePoint, CurveInterpolation
+from .subsidy import SubsidyTerms, SubsidyRatePoint, SubsidyProgram
 
 __all__ = [
     'CreditContract',
@@ -17,6 +19,12 @@ __all__ = [
     'PaymentSchedule',
     'PaymentScheduleItem',
     'PortfolioCashflow',
-    'PortfolioCashflowItem'
+    'PortfolioCashflowItem',
+    'KeyRateCurve',
+    'KeyRatePoint',
+    'CurveInterpolation',
+    'SubsidyTerms',
+    'SubsidyRatePoint',
+    'SubsidyProgram'
 ]
 
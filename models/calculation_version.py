@@ -8,6 +8,8 @@ from typing import Optional, Dict, Any
 from enum import Enum
 from pydantic import BaseModel, Field
 
+from .key_rate_curve import KeyRateCurve
+
 
 class VersionType(str, Enum):
     """Типы версий"""
@@ -84,6 +86,17 @@ class CalculationVersion(BaseModel):
         """Установить базовую ставку"""
         self.set_parameter('base_rate', float(rate))
     
+    def get_base_rate_curve(self) -> Optional[KeyRateCurve]:
+        """Получить кривую базовой ставки из параметров"""
+        curve = self.get_parameter('base_rate_curve')
+        if curve:
+            return KeyRateCurve.from_parameters(curve)
+        return None
+    
+    def set_base_rate_curve(self, curve: KeyRateCurve) -> None:
+        """Установить кривую базовой ставки"""
+        self.set_parameter('base_rate_curve', curve.to_parameters())
+    
     def get_scenario_date(self) -> Optional[date]:
         """Получить дату сценария"""
         scenario_date = self.get_parameter('scenario_date')
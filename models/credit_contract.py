@@ -8,6 +8,8 @@ from typing import Optional, List
 from enum import Enum
 from pydantic import BaseModel, Field
 
+from .subsidy import SubsidyTerms
+
 
 class CreditType(str, Enum):
     """Типы кредитов"""
@@ -67,6 +69,9 @@ class CreditContract(BaseModel):
     interest_rate_base: Optional[Decimal] = Field(None, description="Базовая ставка для плавающих ставок")
     margin: Optional[Decimal] = Field(None, description="Маржа к базовой ставке")
     
+    # Субсидирование процентной ставки
+    subsidy: Optional[SubsidyTerms] = Field(None, description="Условия субсидирования (None - без субсидии)")
+    
     # Метаданные
     created_at: datetime = Field(default_factory=datetime.now, description="Дата создания записи")
     updated_at: datetime = Field(default_factory=datetime.now, description="Дата последнего обновления")
@@ -90,6 +95,10 @@ class CreditContract(BaseModel):
         """Получить сумму использованного лимита"""
         return self.total_limit - self.available_limit
     
+    def is_subsidized(self) -> bool:
+        """Проверка, субсидируется ли ставка по договору"""
+        return self.subsidy is not None
+    
     def get_utilization_ratio(self) -> Decimal:
         """Получить коэффициент использования лимита"""
         if self.total_limit == 0:
@@ -0,0 +1,110 @@
+"""
+Модель кривой ключевой (базовой) ставки
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Dict, Any
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class CurveInterpolation(str, Enum):
+    """Способ построения ставки между узлами кривой"""
+    STEP = "step"  # Ступенчато: ставка действует с даты узла до следующего узла
+    LINEAR = "linear"  # Линейная интерполяция между узлами
+
+
+class KeyRatePoint(BaseModel):
+    """Узел кривой ставки"""
+    
+    effective_date: date = Field(..., description="Дата, с которой действует ставка")
+    rate: Decimal = Field(..., description="Значение ставки")
+    
+    class Config:
+        json_encoders = {
+            date: lambda v: v.isoformat(),
+            Decimal: lambda v: float(v)
+        }
+
+
+class KeyRateCurve(BaseModel):
+    """Датированная траектория базовой ставки"""
+    
+    points: List[KeyRatePoint] = Field(..., min_length=1, description="Узлы кривой")
+    interpolation: CurveInterpolation = Field(default=CurveInterpolation.STEP, description="Способ интерполяции")
+    initial_rate: Optional[Decimal] = Field(None, description="Ставка до первого узла (по умолчанию - ставка первого узла)")
+    
+    class Config:
+        json_encoders = {
+            date: lambda v: v.isoformat(),
+            Decimal: lambda v: float(v)
+        }
+    
+    @classmethod
+    def flat(cls, rate: Decimal) -> 'KeyRateCurve':
+        """Постоянная ставка на всем горизонте"""
+        return cls(points=[KeyRatePoint(effective_date=date.min, rate=rate)])
+    
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any]) -> 'KeyRateCurve':
+        """Восстановление кривой из параметров сценария"""
+        return cls(
+            points=[
+                KeyRatePoint(
+                    effective_date=date.fromisoformat(point['date']),
+                    rate=Decimal(str(point['rate']))
+                )
+                for point in parameters['points']
+            ],
+            interpolation=parameters.get('interpolation', CurveInterpolation.STEP),
+            initial_rate=(
+                Decimal(str(parameters['initial_rate']))
+                if parameters.get('initial_rate') is not None else None
+            )
+        )
+    
+    def to_parameters(self) -> Dict[str, Any]:
+        """Представление кривой для хранения в параметрах сценария"""
+        return {
+            'points': [
+                {'date': point.effective_date.isoformat(), 'rate': float(point.rate)}
+                for point in self.get_sorted_points()
+            ],
+            'interpolation': self.interpolation.value,
+            'initial_rate': float(self.initial_rate) if self.initial_rate is not None else None
+        }
+    
+    def shifted(self, shift: Decimal) -> 'KeyRateCurve':
+        """Кривая, сдвинутая параллельно на shift"""
+        return KeyRateCurve(
+            points=[
+                KeyRatePoint(effective_date=point.effective_date, rate=point.rate + shift)
+                for point in self.points
+            ],
+            interpolation=self.interpolation,
+            initial_rate=self.initial_rate + shift if self.initial_rate is not None else None
+        )
+    
+    def get_sorted_points(self) -> List[KeyRatePoint]:
+        """Узлы кривой по возрастанию даты"""
+        return sorted(self.points, key=lambda point: point.effective_date)
+    
+    def get_rate(self, target_date: date) -> Decimal:
+        """Ставка на дату (для разовых запросов; для графиков используйте DailyRateTable)"""
+        points = self.get_sorted_points()
+        
+        if target_date < points[0].effective_date:
+            return self.initial_rate if self.initial_rate is not None else points[0].rate
+        
+        for index in range(len(points) - 1, -1, -1):
+            point = points[index]
+            if point.effective_date <= target_date:
+                if self.interpolation == CurveInterpolation.LINEAR and index + 1 < len(points):
+                    next_point = points[index + 1]
+                    span = (next_point.effective_date - point.effective_date).days
+                    elapsed = (target_date - point.effective_date).days
+                    return point.rate + (next_point.rate - point.rate) * Decimal(elapsed) / Decimal(span)
+                return point.rate
+        
+        return points[0].rate
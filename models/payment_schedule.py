@@ -4,8 +4,8 @@
 
 from datetime import date
 from decimal import Decimal
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Any, List, Optional, Tuple
+from pydantic import BaseModel, Field, PrivateAttr
 
 
 class PaymentScheduleItem(BaseModel):
@@ -20,6 +20,7 @@ class PaymentScheduleItem(BaseModel):
     drawdown_amount: Decimal = Field(default=Decimal('0'), ge=0, description="Сумма выборки")
     principal_payment: Decimal = Field(default=Decimal('0'), ge=0, description="Сумма погашения основного долга")
     interest_payment: Decimal = Field(default=Decimal('0'), ge=0, description="Сумма процентов к уплате")
+    subsidy_payment: Decimal = Field(default=Decimal('0'), ge=0, description="Сумма субсидии (возмещение процентов)")
     
     # Расчетные поля
     effective_rate: Decimal = Field(..., ge=0, description="Эффективная ставка на период")
@@ -36,6 +37,11 @@ class PaymentScheduleItem(BaseModel):
         """Общая сумма платежа"""
         return self.principal_payment + self.interest_payment
     
+    @property
+    def net_interest_payment(self) -> Decimal:
+        """Проценты за вычетом субсидии"""
+        return self.interest_payment - self.subsidy_payment
+    
     @property
     def net_cashflow(self) -> Decimal:
         """Чистый денежный поток (выборки - погашения)"""
@@ -66,6 +72,13 @@ class PaymentSchedule(BaseModel):
     total_drawdowns: Decimal = Field(default=Decimal('0'), description="Общая сумма выборок")
     total_principal_payments: Decimal = Field(default=Decimal('0'), description="Общая сумма погашений основного долга")
     total_interest_payments: Decimal = Field(default=Decimal('0'), description="Общая сумма процентных платежей")
+    total_subsidy_payments: Decimal = Field(default=Decimal('0'), description="Общая сумма субсидий")
+    
+    # Строки графика в копейках (дата, выборка, погашение ОД, проценты, остаток на конец)
+    _minor_rows: Optional[List[Tuple[date, int, int, int, int]]] = PrivateAttr(default=None)
+    
+    # Остатки, погашения и проценты по траншам (TrancheBook планировщика)
+    _tranches: Optional[Any] = PrivateAttr(default=None)
     
     class Config:
         json_encoders = {
@@ -76,13 +89,42 @@ class PaymentSchedule(BaseModel):
     def add_item(self, item: PaymentScheduleItem) -> None:
         """Добавить элемент в график"""
         self.schedule_items.append(item)
+        self._minor_rows = None
+        self._update_totals()
+    
+    def add_items(self,
+                  items: List[PaymentScheduleItem],
+                  minor_rows: Optional[List[Tuple[date, int, int, int, int]]] = None) -> None:
+        """
+        Добавить элементы в график (итоги пересчитываются один раз)
+        
+        Args:
+            items: Элементы графика
+            minor_rows: Те же строки в копейках (заполняет планировщик для
+                консолидации без обратного перевода из Decimal)
+        """
+        self._minor_rows = minor_rows if minor_rows is not None and not self.schedule_items else None
+        self.schedule_items.extend(items)
         self._update_totals()
     
+    def get_minor_rows(self) -> Optional[List[Tuple[date, int, int, int, int]]]:
+        """Строки графика в копейках, если они переданы при построении"""
+        return self._minor_rows
+    
+    def set_tranches(self, tranches: Any) -> None:
+        """Сохранить учет по траншам, построенный вместе с графиком"""
+        self._tranches = tranches
+    
+    def get_tranches(self) -> Optional[Any]:
+        """Учет по траншам (TrancheBook), если график построен планировщиком по выборкам"""
+        return self._tranches
+    
     def _update_totals(self) -> None:
         """Обновить итоговые суммы"""
         self.total_drawdowns = sum(item.drawdown_amount for item in self.schedule_items)
         self.total_principal_payments = sum(item.principal_payment for item in self.schedule_items)
         self.total_interest_payments = sum(item.interest_payment for item in self.schedule_items)
+        self.total_subsidy_payments = sum(item.subsidy_payment for item in self.schedule_items)
     
     def get_items_by_date_range(self, start_date: date, end_date: date) -> List[PaymentScheduleItem]:
         """Получить элементы за период"""
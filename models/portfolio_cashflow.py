@@ -83,6 +83,11 @@ class PortfolioCashflow(BaseModel):
         self.cashflow_items.append(item)
         self._update_totals()
     
+    def add_items(self, items: List[PortfolioCashflowItem]) -> None:
+        """Добавить элементы в кэш-флоу (итоги пересчитываются один раз)"""
+        self.cashflow_items.extend(items)
+        self._update_totals()
+    
     def _update_totals(self) -> None:
         """Обновить итоговые суммы"""
         if not self.cashflow_items:
@@ -0,0 +1,95 @@
+"""
+Модель условий субсидирования процентной ставки
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Optional, Dict, Any, Tuple
+from enum import Enum
+from pydantic import BaseModel, Field
+
+
+class SubsidyProgram(str, Enum):
+    """Программы субсидирования"""
+    PROGRAM_1528 = "1528"  # Льготное кредитование (постановление № 1528)
+    PROGRAM_512 = "512"  # Возмещение части затрат на уплату процентов (постановление № 512)
+    OTHER = "other"  # Прочие программы
+
+
+class SubsidyRatePoint(BaseModel):
+    """Узел условий субсидирования: действует с даты узла до следующего узла"""
+    
+    effective_date: date = Field(..., description="Дата, с которой действуют условия")
+    subsidy_rate: Decimal = Field(..., ge=0, description="Ставка субсидии, % годовых")
+    subsidized_amount: Optional[Decimal] = Field(
+        None, ge=0, description="Субсидируемая сумма (по умолчанию - весь остаток долга)"
+    )
+    
+    class Config:
+        json_encoders = {
+            date: lambda v: v.isoformat(),
+            Decimal: lambda v: float(v)
+        }
+
+
+class SubsidyTerms(BaseModel):
+    """Условия субсидирования договора: программа и датированные ставка субсидии и субсидируемая сумма"""
+    
+    program: SubsidyProgram = Field(..., description="Программа субсидирования")
+    points: List[SubsidyRatePoint] = Field(..., min_length=1, description="Узлы условий")
+    
+    class Config:
+        json_encoders = {
+            date: lambda v: v.isoformat(),
+            Decimal: lambda v: float(v)
+        }
+    
+    @classmethod
+    def from_parameters(cls, parameters: Dict[str, Any]) -> 'SubsidyTerms':
+        """Восстановление условий из параметров (API, параметры сценария)"""
+        return cls(
+            program=parameters['program'],
+            points=[
+                SubsidyRatePoint(
+                    effective_date=date.fromisoformat(point['date']),
+                    subsidy_rate=Decimal(str(point['subsidy_rate'])),
+                    subsidized_amount=(
+                        Decimal(str(point['subsidized_amount']))
+                        if point.get('subsidized_amount') is not None else None
+                    )
+                )
+                for point in parameters['points']
+            ]
+        )
+    
+    def to_parameters(self) -> Dict[str, Any]:
+        """Представление условий для хранения в параметрах"""
+        return {
+            'program': self.program.value,
+            'points': [
+                {
+                    'date': point.effective_date.isoformat(),
+                    'subsidy_rate': float(point.subsidy_rate),
+                    'subsidized_amount': float(point.subsidized_amount) if point.subsidized_amount is not None else None
+                }
+                for point in self.get_sorted_points()
+            ]
+        }
+    
+    def get_sorted_points(self) -> List[SubsidyRatePoint]:
+        """Узлы условий по возрастанию даты"""
+        return sorted(self.points, key=lambda point: point.effective_date)
+    
+    def get_terms(self, target_date: date) -> Tuple[Decimal, Optional[Decimal]]:
+        """
+        Ставка субсидии и субсидируемая сумма на дату (до первого узла субсидии нет)
+        
+        Returns:
+            Кортеж (ставка субсидии, субсидируемая сумма или None - весь остаток)
+        """
+        terms = (Decimal('0'), None)
+        for point in self.get_sorted_points():
+            if point.effective_date > target_date:
+                break
+            terms = (point.subsidy_rate, point.subsidized_amount)
+        return terms
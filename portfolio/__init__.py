@@ -4,9 +4,15 @@
 
 from .portfolio_manager import PortfolioManager
 from .data_aggregator import DataAggregator
+from .aggregation_state import AggregationState
+from .frame_aggregator import FrameAggregator, compare_aggregations, create_data_aggregator
 
 __all__ = [
     'PortfolioManager',
-    'DataAggregator'
+    'DataAggregator',
+    'AggregationState',
+    'FrameAggregator',
+    'compare_aggregations',
+    'create_data_aggregator'
 ]
 
@@ -0,0 +1,266 @@
+"""
+Инкрементальное состояние агрегатов портфеля
+"""
+
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Any, Optional, Iterable
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, Drawdown, Repayment
+
+
+class AggregationState:
+    """
+    Накопители агрегатов портфеля с хэш-индексами по записям
+    
+    Состояние строится за один проход по договорам, выборкам и погашениям,
+    а затем обновляется точечно при добавлении, изменении или удалении
+    отдельной записи - без повторного обхода всего портфеля. Договоры
+    индексируются по ID, поэтому привязка выборок и погашений к валюте
+    договора выполняется за O(1).
+    """
+    
+    def __init__(self):
+        """Инициализация пустого состояния"""
+        # Индексы записей
+        self.contracts: Dict[str, CreditContract] = {}
+        self.drawdowns: Dict[str, Drawdown] = {}
+        self.repayments: Dict[str, Repayment] = {}
+        
+        # Итоги по портфелю
+        self.total_limit = Decimal('0')
+        self.total_available = Decimal('0')
+        self.limit_squares_sum = Decimal('0')  # Для индекса Херфиндаля-Хиршмана
+        
+        # Распределения по договорам
+        self.end_date_counts: Counter = Counter()
+        self.utilization_counts: Counter = Counter()
+        
+        # Группировки по валютам и типам кредитов
+        self.currency_groups: Dict[str, Dict[str, Any]] = {}
+        self.credit_type_groups: Dict[str, Dict[str, Any]] = {}
+        
+        # Количество выборок и погашений по договорам
+        self.drawdowns_per_contract: Counter = Counter()
+        self.repayments_per_contract: Counter = Counter()
+        
+        # Временные ряды
+        self.drawdowns_by_month: Dict[str, Dict[str, Any]] = {}
+        self.repayments_by_month: Dict[str, Dict[str, Any]] = {}
+        self.event_dates: Counter = Counter()
+    
+    @classmethod
+    def from_records(cls,
+                     contracts: Iterable[CreditContract],
+                     all_drawdowns: Iterable[Drawdown],
+                     all_repayments: Iterable[Repayment]) -> 'AggregationState':
+        """
+        Построение состояния за один проход по записям
+        
+        Args:
+            contracts: Кредитные договоры
+            all_drawdowns: Выборки
+            all_repayments: Погашения
+            
+        Returns:
+            Заполненное состояние
+        """
+        state = cls()
+        for contract in contracts:
+            state.upsert_contract(contract)
+        for drawdown in all_drawdowns:
+            state.upsert_drawdown(drawdown)
+        for repayment in all_repayments:
+            state.upsert_repayment(repayment)
+        return state
+    
+    # Договоры
+    
+    def upsert_contract(self, contract: CreditContract) -> None:
+        """Добавление или замена договора"""
+        if contract.id in self.contracts:
+            self.remove_contract(contract.id)
+        self._apply_contract(contract, sign=1)
+        self.contracts[contract.id] = contract
+    
+    def remove_contract(self, contract_id: str) -> None:
+        """Удаление договора"""
+        contract = self.contracts.pop(contract_id, None)
+        if contract is not None:
+            self._apply_contract(contract, sign=-1)
+    
+    def _apply_contract(self, contract: CreditContract, sign: int) -> None:
+        """Учет договора в накопителях (sign=1 - добавление, -1 - исключение)"""
+        utilized = contract.get_utilized_amount()
+        
+        self.total_limit += sign * contract.total_limit
+        self.total_available += sign * contract.available_limit
+        self.limit_squares_sum += sign * contract.total_limit * contract.total_limit
+        
+        self._bump(self.end_date_counts, contract.end_date, sign)
+        self._bump(self.utilization_counts, self._utilization_level(contract), sign)
+        
+        currency_group = self._get_group(self.currency_groups, contract.currency, sign, with_counts=True)
+        credit_type_group = self._get_group(self.credit_type_groups, contract.credit_type, sign)
+        
+        for group in (currency_group, credit_type_group):
+            if sign > 0:
+                group['contracts'][contract.id] = None
+            else:
+                group['contracts'].pop(contract.id, None)
+            group['total_limit'] += sign * contract.total_limit
+            group['total_utilized'] += sign * utilized
+            group['total_available'] += sign * contract.available_limit
+        
+        # Выборки и погашения, загруженные раньше договора, учитываются в валюте при его появлении
+        currency_group['drawdowns_count'] += sign * self.drawdowns_per_contract[contract.id]
+        currency_group['repayments_count'] += sign * self.repayments_per_contract[contract.id]
+        
+        if sign < 0:
+            self._drop_if_empty(self.currency_groups, contract.currency)
+            self._drop_if_empty(self.credit_type_groups, contract.credit_type)
+    
+    # Выборки
+    
+    def upsert_drawdown(self, drawdown: Drawdown) -> None:
+        """Добавление или замена выборки"""
+        if drawdown.id in self.drawdowns:
+            self.remove_drawdown(drawdown.id)
+        self._apply_drawdown(drawdown, sign=1)
+        self.drawdowns[drawdown.id] = drawdown
+    
+    def remove_drawdown(self, drawdown_id: str) -> None:
+        """Удаление выборки"""
+        drawdown = self.drawdowns.pop(drawdown_id, None)
+        if drawdown is not None:
+            self._apply_drawdown(drawdown, sign=-1)
+    
+    def _apply_drawdown(self, drawdown: Drawdown, sign: int) -> None:
+        """Учет выборки в накопителях"""
+        self._bump(self.drawdowns_per_contract, drawdown.contract_id, sign)
+        
+        contract = self.contracts.get(drawdown.contract_id)
+        if contract is not None:
+            self.currency_groups[contract.currency]['drawdowns_count'] += sign
+        
+        month_key = drawdown.drawdown_date.strftime('%Y-%m')
+        month = self.drawdowns_by_month.setdefault(month_key, {'count': 0, 'amount': Decimal('0')})
+        month['count'] += sign
+        month['amount'] += sign * drawdown.amount
+        if month['count'] == 0:
+            del self.drawdowns_by_month[month_key]
+        
+        self._bump(self.event_dates, drawdown.drawdown_date, sign)
+    
+    # Погашения
+    
+    def upsert_repayment(self, repayment: Repayment) -> None:
+        """Добавление или замена погашения"""
+        if repayment.id in self.repayments:
+            self.remove_repayment(repayment.id)
+        self._apply_repayment(repayment, sign=1)
+        self.repayments[repayment.id] = repayment
+    
+    def remove_repayment(self, repayment_id: str) -> None:
+        """Удаление погашения"""
+        repayment = self.repayments.pop(repayment_id, None)
+        if repayment is not None:
+            self._apply_repayment(repayment, sign=-1)
+    
+    def _apply_repayment(self, repayment: Repayment, sign: int) -> None:
+        """Учет погашения в накопителях"""
+        self._bump(self.repayments_per_contract, repayment.contract_id, sign)
+        
+        contract = self.contracts.get(repayment.contract_id)
+        if contract is not None:
+            self.currency_groups[contract.currency]['repayments_count'] += sign
+        
+        month_key = repayment.repayment_date.strftime('%Y-%m')
+        month = self.repayments_by_month.setdefault(
+            month_key, {'count': 0, 'principal': Decimal('0'), 'interest': Decimal('0')}
+        )
+        month['count'] += sign
+        month['principal'] += sign * repayment.principal_amount
+        month['interest'] += sign * repayment.interest_amount
+        if month['count'] == 0:
+            del self.repayments_by_month[month_key]
+        
+        self._bump(self.event_dates, repayment.repayment_date, sign)
+    
+    # Производные показатели
+    
+    @property
+    def contracts_count(self) -> int:
+        """Количество договоров"""
+        return len(self.contracts)
+    
+    def get_max_limit(self) -> Decimal:
+        """Максимальный лимит по договору"""
+        return max((c.total_limit for c in self.contracts.values()), default=Decimal('0'))
+    
+    def count_contracts_by_days_to_maturity(self,
+                                            current_date: date,
+                                            min_days: Optional[int] = None,
+                                            max_days: Optional[int] = None) -> int:
+        """
+        Количество договоров со сроком до погашения в интервале (min_days, max_days]
+        
+        Обход идет по уникальным датам погашения, а не по договорам.
+        """
+        total = 0
+        for end_date, count in self.end_date_counts.items():
+            days = (end_date - current_date).days
+            if min_days is not None and days <= min_days:
+                continue
+            if max_days is not None and days > max_days:
+                continue
+            total += count
+        return total
+    
+    # Служебные методы
+    
+    def _utilization_level(self, contract: CreditContract) -> str:
+        """Уровень использования лимита договора"""
+        ratio = contract.get_utilization_ratio()
+        if ratio < Decimal('0.3'):
+            return 'low'
+        if ratio < Decimal('0.7'):
+            return 'medium'
+        return 'high'
+    
+    def _get_group(self,
+                   groups: Dict[str, Dict[str, Any]],
+                   key: str,
+                   sign: int,
+                   with_counts: bool = False) -> Dict[str, Any]:
+        """Получение (при добавлении - создание) накопителя группы"""
+        if key not in groups and sign > 0:
+            group = {
+                'contracts': {},
+                'total_limit': Decimal('0'),
+                'total_utilized': Decimal('0'),
+                'total_available': Decimal('0')
+            }
+            if with_counts:
+                group['drawdowns_count'] = 0
+                group['repayments_count'] = 0
+            groups[key] = group
+        return groups[key]
+    
+    def _drop_if_empty(self, groups: Dict[str, Dict[str, Any]], key: str) -> None:
+        """Удаление группы без договоров"""
+        if key in groups and not groups[key]['contracts']:
+            del groups[key]
+    
+    def _bump(self, counter: Counter, key: Any, sign: int) -> None:
+        """Изменение счетчика с удалением нулевых ключей"""
+        counter[key] += sign
+        if counter[key] == 0:
+            del counter[key]
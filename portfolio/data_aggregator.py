@@ -17,6 +17,7 @@ from models import (
     CreditContract, Drawdown, Repayment, 
     PaymentSchedule, PortfolioCashflow, PortfolioCashflowItem
 )
+from .aggregation_state import AggregationState
 
 logger = logging.getLogger(__name__)
 
@@ -24,10 +25,33 @@ logger = logging.getLogger(__name__)
 class DataAggregator:
     """Агрегатор данных портфеля"""
     
+    # Поддерживает инкрементальное состояние (build_state / aggregate_state)
+    incremental = True
+    
     def __init__(self):
         """Инициализация агрегатора"""
         pass
     
+    def build_state(self,
+                    contracts: List[CreditContract],
+                    all_drawdowns: List[Drawdown],
+                    all_repayments: List[Repayment]) -> AggregationState:
+        """
+        Построение индексированного состояния агрегатов за один проход
+        
+        Состояние хранится вместе со снимком данных и может обновляться
+        точечно (upsert/remove записей) без повторной агрегации.
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки
+            all_repayments: Все погашения
+            
+        Returns:
+            Состояние агрегатов
+        """
+        return AggregationState.from_records(contracts, all_drawdowns, all_repayments)
+    
     def aggregate_portfolio_data(self, 
                                contracts: List[CreditContract],
                                all_drawdowns: List[Drawdown],
@@ -46,27 +70,33 @@ class DataAggregator:
         try:
             logger.info(f"Aggregating data for {len(contracts)} contracts")
             
-            # Базовые метрики портфеля
-            portfolio_summary = self._calculate_portfolio_summary(contracts)
-            
-            # Агрегация по валютам
-            currency_breakdown = self._aggregate_by_currency(contracts, all_drawdowns, all_repayments)
-            
-            # Агрегация по типам кредитов
-            credit_type_breakdown = self._aggregate_by_credit_type(contracts, all_drawdowns, all_repayments)
-            
-            # Временной анализ
-            temporal_analysis = self._analyze_temporal_patterns(all_drawdowns, all_repayments)
+            state = self.build_state(contracts, all_drawdowns, all_repayments)
+            return self.aggregate_state(state)
             
-            # Анализ рисков
-            risk_analysis = self._analyze_risk_metrics(contracts, all_drawdowns, all_repayments)
+        except Exception as e:
+            logger.error(f"Error aggregating portfolio data: {e}")
+            return {}
+    
+    def aggregate_state(self, state: AggregationState) -> Dict[str, Any]:
+        """
+        Формирование агрегированных данных из готового состояния
+        
+        Стоимость не зависит от количества выборок и погашений: используются
+        только накопленные итоги по группам и уникальным датам.
+        
+        Args:
+            state: Состояние агрегатов
             
+        Returns:
+            Агрегированные данные портфеля
+        """
+        try:
             return {
-                'portfolio_summary': portfolio_summary,
-                'currency_breakdown': currency_breakdown,
-                'credit_type_breakdown': credit_type_breakdown,
-                'temporal_analysis': temporal_analysis,
-                'risk_analysis': risk_analysis,
+                'portfolio_summary': self._calculate_portfolio_summary(state),
+                'currency_breakdown': self._aggregate_by_currency(state),
+                'credit_type_breakdown': self._aggregate_by_credit_type(state),
+                'temporal_analysis': self._analyze_temporal_patterns(state),
+                'risk_analysis': self._analyze_risk_metrics(state),
                 'aggregation_date': datetime.now().isoformat()
             }
             
@@ -74,15 +104,15 @@ class DataAggregator:
             logger.error(f"Error aggregating portfolio data: {e}")
             return {}
     
-    def _calculate_portfolio_summary(self, contracts: List[CreditContract]) -> Dict[str, Any]:
+    def _calculate_portfolio_summary(self, state: AggregationState) -> Dict[str, Any]:
         """Расчет сводных показателей портфеля"""
         try:
-            if not contracts:
+            if not state.contracts_count:
                 return {}
             
-            total_contracts = len(contracts)
-            total_limit = sum(contract.total_limit for contract in contracts)
-            total_available = sum(contract.available_limit for contract in contracts)
+            total_contracts = state.contracts_count
+            total_limit = state.total_limit
+            total_available = state.total_available
             total_utilized = total_limit - total_available
             
             # Расчет средних показателей
@@ -90,13 +120,13 @@ class DataAggregator:
             avg_utilization = total_utilized / total_limit if total_limit > 0 else Decimal('0')
             
             # Анализ сроков
-            active_contracts = [c for c in contracts if c.end_date >= date.today()]
-            expired_contracts = [c for c in contracts if c.end_date < date.today()]
+            current_date = date.today()
+            expired_contracts = state.count_contracts_by_days_to_maturity(current_date, max_days=-1)
             
             return {
                 'total_contracts': total_contracts,
-                'active_contracts': len(active_contracts),
-                'expired_contracts': len(expired_contracts),
+                'active_contracts': total_contracts - expired_contracts,
+                'expired_contracts': expired_contracts,
                 'total_limit': float(total_limit),
                 'total_utilized': float(total_utilized),
                 'total_available': float(total_available),
@@ -109,50 +139,21 @@ class DataAggregator:
             logger.error(f"Error calculating portfolio summary: {e}")
             return {}
     
-    def _aggregate_by_currency(self, 
-                              contracts: List[CreditContract],
-                              all_drawdowns: List[Drawdown],
-                              all_repayments: List[Repayment]) -> Dict[str, Any]:
+    def _aggregate_by_currency(self, state: AggregationState) -> Dict[str, Any]:
         """Агрегация по валютам"""
         try:
             currency_data = {}
             
-            for contract in contracts:
-                currency = contract.currency
-                if currency not in currency_data:
-                    currency_data[currency] = {
-                        'contracts': [],
-                        'total_limit': Decimal('0'),
-                        'total_utilized': Decimal('0'),
-                        'total_available': Decimal('0'),
-                        'drawdowns_count': 0,
-                        'repayments_count': 0
-                    }
-                
-                currency_data[currency]['contracts'].append(contract.id)
-                currency_data[currency]['total_limit'] += contract.total_limit
-                currency_data[currency]['total_utilized'] += contract.get_utilized_amount()
-                currency_data[currency]['total_available'] += contract.available_limit
-            
-            # Добавление данных по выборкам и погашениям
-            for drawdown in all_drawdowns:
-                contract = next((c for c in contracts if c.id == drawdown.contract_id), None)
-                if contract:
-                    currency = contract.currency
-                    if currency in currency_data:
-                        currency_data[currency]['drawdowns_count'] += 1
-            
-            for repayment in all_repayments:
-                contract = next((c for c in contracts if c.id == repayment.contract_id), None)
-                if contract:
-                    currency = contract.currency
-                    if currency in currency_data:
-                        currency_data[currency]['repayments_count'] += 1
-            
-            # Конвертация в float для JSON сериализации
-            for currency in currency_data:
-                for key in ['total_limit', 'total_utilized', 'total_available']:
-                    currency_data[currency][key] = float(currency_data[currency][key])
+            for currency, group in sorted(state.currency_groups.items()):
+                # Конвертация в float для JSON сериализации
+                currency_data[currency] = {
+                    'contracts': sorted(group['contracts']),
+                    'total_limit': float(group['total_limit']),
+                    'total_utilized': float(group['total_utilized']),
+                    'total_available': float(group['total_available']),
+                    'drawdowns_count': group['drawdowns_count'],
+                    'repayments_count': group['repayments_count']
+                }
             
             return currency_data
             
@@ -160,41 +161,25 @@ class DataAggregator:
             logger.error(f"Error aggregating by currency: {e}")
             return {}
     
-    def _aggregate_by_credit_type(self, 
-                                 contracts: List[CreditContract],
-                                 all_drawdowns: List[Drawdown],
-                                 all_repayments: List[Repayment]) -> Dict[str, Any]:
+    def _aggregate_by_credit_type(self, state: AggregationState) -> Dict[str, Any]:
         """Агрегация по типам кредитов"""
         try:
             credit_type_data = {}
             
-            for contract in contracts:
-                credit_type = contract.credit_type
-                if credit_type not in credit_type_data:
-                    credit_type_data[credit_type] = {
-                        'contracts': [],
-                        'total_limit': Decimal('0'),
-                        'total_utilized': Decimal('0'),
-                        'total_available': Decimal('0'),
-                        'average_utilization': Decimal('0')
-                    }
-                
-                credit_type_data[credit_type]['contracts'].append(contract.id)
-                credit_type_data[credit_type]['total_limit'] += contract.total_limit
-                credit_type_data[credit_type]['total_utilized'] += contract.get_utilized_amount()
-                credit_type_data[credit_type]['total_available'] += contract.available_limit
-            
-            # Расчет средних показателей
-            for credit_type in credit_type_data:
-                data = credit_type_data[credit_type]
-                if data['total_limit'] > 0:
-                    data['average_utilization'] = data['total_utilized'] / data['total_limit']
+            for credit_type, group in sorted(state.credit_type_groups.items()):
+                # Расчет средних показателей
+                if group['total_limit'] > 0:
+                    average_utilization = group['total_utilized'] / group['total_limit']
                 else:
-                    data['average_utilization'] = Decimal('0')
+                    average_utilization = Decimal('0')
                 
-                # Конвертация в float
-                for key in ['total_limit', 'total_utilized', 'total_available', 'average_utilization']:
-                    data[key] = float(data[key])
+                credit_type_data[credit_type] = {
+                    'contracts': sorted(group['contracts']),
+                    'total_limit': float(group['total_limit']),
+                    'total_utilized': float(group['total_utilized']),
+                    'total_available': float(group['total_available']),
+                    'average_utilization': float(average_utilization)
+                }
             
             return credit_type_data
             
@@ -202,48 +187,32 @@ class DataAggregator:
             logger.error(f"Error aggregating by credit type: {e}")
             return {}
     
-    def _analyze_temporal_patterns(self, 
-                                  all_drawdowns: List[Drawdown],
-                                  all_repayments: List[Repayment]) -> Dict[str, Any]:
+    def _analyze_temporal_patterns(self, state: AggregationState) -> Dict[str, Any]:
         """Анализ временных паттернов"""
         try:
-            # Анализ выборок по месяцам
-            drawdowns_by_month = {}
-            for drawdown in all_drawdowns:
-                month_key = drawdown.drawdown_date.strftime('%Y-%m')
-                if month_key not in drawdowns_by_month:
-                    drawdowns_by_month[month_key] = {'count': 0, 'amount': Decimal('0')}
-                drawdowns_by_month[month_key]['count'] += 1
-                drawdowns_by_month[month_key]['amount'] += drawdown.amount
-            
-            # Анализ погашений по месяцам
-            repayments_by_month = {}
-            for repayment in all_repayments:
-                month_key = repayment.repayment_date.strftime('%Y-%m')
-                if month_key not in repayments_by_month:
-                    repayments_by_month[month_key] = {
-                        'count': 0, 
-                        'principal': Decimal('0'), 
-                        'interest': Decimal('0')
-                    }
-                repayments_by_month[month_key]['count'] += 1
-                repayments_by_month[month_key]['principal'] += repayment.principal_amount
-                repayments_by_month[month_key]['interest'] += repayment.interest_amount
-            
-            # Конвертация в float
-            for month in drawdowns_by_month:
-                drawdowns_by_month[month]['amount'] = float(drawdowns_by_month[month]['amount'])
-            
-            for month in repayments_by_month:
-                repayments_by_month[month]['principal'] = float(repayments_by_month[month]['principal'])
-                repayments_by_month[month]['interest'] = float(repayments_by_month[month]['interest'])
+            # Выборки и погашения по месяцам в хронологическом порядке (конвертация в float)
+            drawdowns_by_month = {
+                month: {'count': data['count'], 'amount': float(data['amount'])}
+                for month, data in sorted(state.drawdowns_by_month.items())
+            }
+            
+            repayments_by_month = {
+                month: {
+                    'count': data['count'],
+                    'principal': float(data['principal']),
+                    'interest': float(data['interest'])
+                }
+                for month, data in sorted(state.repayments_by_month.items())
+            }
+            
+            event_dates = state.event_dates
             
             return {
                 'drawdowns_by_month': drawdowns_by_month,
                 'repayments_by_month': repayments_by_month,
                 'analysis_period': {
-                    'start': min([d.drawdown_date for d in all_drawdowns] + [r.repayment_date for r in all_repayments]) if all_drawdowns or all_repayments else None,
-                    'end': max([d.drawdown_date for d in all_drawdowns] + [r.repayment_date for r in all_repayments]) if all_drawdowns or all_repayments else None
+                    'start': min(event_dates) if event_dates else None,
+                    'end': max(event_dates) if event_dates else None
                 }
             }
             
@@ -251,40 +220,35 @@ class DataAggregator:
             logger.error(f"Error analyzing temporal patterns: {e}")
             return {}
     
-    def _analyze_risk_metrics(self, 
-                             contracts: List[CreditContract],
-                             all_drawdowns: List[Drawdown],
-                             all_repayments: List[Repayment]) -> Dict[str, Any]:
+    def _analyze_risk_metrics(self, state: AggregationState) -> Dict[str, Any]:
         """Анализ метрик риска"""
         try:
-            if not contracts:
+            if not state.contracts_count:
                 return {}
             
             # Концентрация портфеля
-            total_limit = sum(contract.total_limit for contract in contracts)
+            total_limit = state.total_limit
             if total_limit == 0:
                 return {}
             
-            # Расчет индекса Херфиндаля-Хиршмана
-            contract_shares = [float(contract.total_limit / total_limit) for contract in contracts]
-            hhi = sum(share ** 2 for share in contract_shares)
+            # Индекс Херфиндаля-Хиршмана: sum((l_i / L)^2) = sum(l_i^2) / L^2
+            hhi = float(state.limit_squares_sum / (total_limit * total_limit))
             
             # Максимальная доля
-            max_share = max(contract_shares)
+            max_share = float(state.get_max_limit() / total_limit)
             
             # Анализ сроков
             current_date = date.today()
             contracts_by_maturity = {
-                'short_term': len([c for c in contracts if (c.end_date - current_date).days <= 30]),
-                'medium_term': len([c for c in contracts if 30 < (c.end_date - current_date).days <= 365]),
-                'long_term': len([c for c in contracts if (c.end_date - current_date).days > 365])
+                'short_term': state.count_contracts_by_days_to_maturity(current_date, max_days=30),
+                'medium_term': state.count_contracts_by_days_to_maturity(current_date, min_days=30, max_days=365),
+                'long_term': state.count_contracts_by_days_to_maturity(current_date, min_days=365)
             }
             
             # Анализ использования лимитов
             utilization_levels = {
-                'low': len([c for c in contracts if c.get_utilization_ratio() < 0.3]),
-                'medium': len([c for c in contracts if 0.3 <= c.get_utilization_ratio() < 0.7]),
-                'high': len([c for c in contracts if c.get_utilization_ratio() >= 0.7])
+                level: state.utilization_counts.get(level, 0)
+                for level in ('low', 'medium', 'high')
             }
             
             return {
@@ -296,7 +260,7 @@ class DataAggregator:
                 'maturity_distribution': contracts_by_maturity,
                 'utilization_distribution': utilization_levels,
                 'total_exposure': float(total_limit),
-                'average_exposure': float(total_limit / len(contracts))
+                'average_exposure': float(total_limit / state.contracts_count)
             }
             
         except Exception as e:
@@ -0,0 +1,419 @@
+"""
+Агрегатор данных портфеля на pandas (колоночный снимок)
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import List, Dict, Any
+import math
+import logging
+
+import numpy as np
+import pandas as pd
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import CreditContract, Drawdown, Repayment
+from .data_aggregator import DataAggregator
+
+logger = logging.getLogger(__name__)
+
+
+class FrameAggregator(DataAggregator):
+    """
+    Агрегатор портфеля на DataFrame
+    
+    Записи один раз раскладываются в колоночный снимок (по DataFrame на
+    договоры, выборки и погашения), после чего все разрезы считаются
+    векторными group-by. Результат совпадает по структуре с DataAggregator;
+    суммы считаются во float, поэтому возможны расхождения в последних
+    знаках (см. validate).
+    """
+    
+    # Состояние для точечных обновлений не поддерживается - только полный пересчет
+    incremental = False
+    
+    def build_frames(self,
+                     contracts: List[CreditContract],
+                     all_drawdowns: List[Drawdown],
+                     all_repayments: List[Repayment]) -> Dict[str, pd.DataFrame]:
+        """
+        Построение колоночного снимка портфеля
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки
+            all_repayments: Все погашения
+            
+        Returns:
+            Словарь DataFrame: contracts, drawdowns, repayments
+        """
+        contracts_df = pd.DataFrame({
+            'id': [c.id for c in contracts],
+            'currency': [c.currency for c in contracts],
+            'credit_type': [c.credit_type for c in contracts],
+            'total_limit': np.array([float(c.total_limit) for c in contracts], dtype=np.float64),
+            'available_limit': np.array([float(c.available_limit) for c in contracts], dtype=np.float64),
+            'end_date': pd.to_datetime([c.end_date for c in contracts])
+        })
+        contracts_df['utilized'] = contracts_df['total_limit'] - contracts_df['available_limit']
+        
+        drawdowns_df = pd.DataFrame({
+            'contract_id': [d.contract_id for d in all_drawdowns],
+            'date': pd.to_datetime([d.drawdown_date for d in all_drawdowns]),
+            'amount': np.array([float(d.amount) for d in all_drawdowns], dtype=np.float64)
+        })
+        
+        repayments_df = pd.DataFrame({
+            'contract_id': [r.contract_id for r in all_repayments],
+            'date': pd.to_datetime([r.repayment_date for r in all_repayments]),
+            'principal': np.array([float(r.principal_amount) for r in all_repayments], dtype=np.float64),
+            'interest': np.array([float(r.interest_amount) for r in all_repayments], dtype=np.float64)
+        })
+        
+        return {
+            'contracts': contracts_df,
+            'drawdowns': drawdowns_df,
+            'repayments': repayments_df
+        }
+    
+    def aggregate_portfolio_data(self,
+                               contracts: List[CreditContract],
+                               all_drawdowns: List[Drawdown],
+                               all_repayments: List[Repayment]) -> Dict[str, Any]:
+        """
+        Агрегация данных портфеля по колоночному снимку
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки
+            all_repayments: Все погашения
+            
+        Returns:
+            Агрегированные данные портфеля
+        """
+        try:
+            logger.info(f"Aggregating data for {len(contracts)} contracts (pandas)")
+            
+            frames = self.build_frames(contracts, all_drawdowns, all_repayments)
+            return self.aggregate_frames(frames)
+        
+        except Exception as e:
+            logger.error(f"Error aggregating portfolio data: {e}")
+            return {}
+    
+    def aggregate_frames(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """
+        Формирование агрегированных данных из колоночного снимка
+        
+        Args:
+            frames: Колоночный снимок (см. build_frames)
+            
+        Returns:
+            Агрегированные данные портфеля
+        """
+        contracts_df = frames['contracts'].copy()
+        
+        # Дни до погашения нужны сводке и анализу рисков
+        today = pd.Timestamp(date.today())
+        contracts_df['days_to_maturity'] = (contracts_df['end_date'] - today).dt.days
+        
+        return {
+            'portfolio_summary': self._frame_portfolio_summary(contracts_df),
+            'currency_breakdown': self._frame_by_currency(contracts_df, frames),
+            'credit_type_breakdown': self._frame_by_credit_type(contracts_df),
+            'temporal_analysis': self._analyze_temporal_patterns_frame(frames),
+            'risk_analysis': self._analyze_risk_metrics_frame(contracts_df),
+            'aggregation_date': pd.Timestamp.now().isoformat()
+        }
+    
+    def _frame_portfolio_summary(self, contracts_df: pd.DataFrame) -> Dict[str, Any]:
+        """Расчет сводных показателей портфеля"""
+        try:
+            total_contracts = len(contracts_df)
+            if not total_contracts:
+                return {}
+            
+            total_limit = float(contracts_df['total_limit'].sum())
+            total_available = float(contracts_df['available_limit'].sum())
+            total_utilized = total_limit - total_available
+            expired_contracts = int((contracts_df['days_to_maturity'] < 0).sum())
+            
+            return {
+                'total_contracts': total_contracts,
+                'active_contracts': total_contracts - expired_contracts,
+                'expired_contracts': expired_contracts,
+                'total_limit': total_limit,
+                'total_utilized': total_utilized,
+                'total_available': total_available,
+                'average_limit': total_limit / total_contracts,
+                'utilization_ratio': total_utilized / total_limit if total_limit > 0 else 0.0,
+                'portfolio_size': self._categorize_portfolio_size(Decimal(str(total_limit)))
+            }
+        
+        except Exception as e:
+            logger.error(f"Error calculating portfolio summary: {e}")
+            return {}
+    
+    def _group_totals(self, contracts_df: pd.DataFrame, key: str) -> pd.DataFrame:
+        """Итоги по группе договоров: ключи и ID договоров по возрастанию"""
+        return contracts_df.groupby(key, sort=True).agg(
+            contracts=('id', sorted),
+            total_limit=('total_limit', 'sum'),
+            total_utilized=('utilized', 'sum'),
+            total_available=('available_limit', 'sum')
+        )
+    
+    def _frame_by_currency(self,
+                           contracts_df: pd.DataFrame,
+                           frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """Агрегация по валютам"""
+        try:
+            totals = self._group_totals(contracts_df, 'currency')
+            
+            # Привязка событий к валюте договора через индекс по ID
+            currency_by_contract = contracts_df.set_index('id')['currency']
+            drawdowns_count = frames['drawdowns']['contract_id'].map(currency_by_contract).value_counts()
+            repayments_count = frames['repayments']['contract_id'].map(currency_by_contract).value_counts()
+            
+            return {
+                currency: {
+                    'contracts': row.contracts,
+                    'total_limit': float(row.total_limit),
+                    'total_utilized': float(row.total_utilized),
+                    'total_available': float(row.total_available),
+                    'drawdowns_count': int(drawdowns_count.get(currency, 0)),
+                    'repayments_count': int(repayments_count.get(currency, 0))
+                }
+                for currency, row in zip(totals.index, totals.itertuples(index=False))
+            }
+        
+        except Exception as e:
+            logger.error(f"Error aggregating by currency: {e}")
+            return {}
+    
+    def _frame_by_credit_type(self, contracts_df: pd.DataFrame) -> Dict[str, Any]:
+        """Агрегация по типам кредитов"""
+        try:
+            totals = self._group_totals(contracts_df, 'credit_type')
+            
+            return {
+                credit_type: {
+                    'contracts': row.contracts,
+                    'total_limit': float(row.total_limit),
+                    'total_utilized': float(row.total_utilized),
+                    'total_available': float(row.total_available),
+                    'average_utilization': (
+                        float(row.total_utilized / row.total_limit) if row.total_limit > 0 else 0.0
+                    )
+                }
+                for credit_type, row in zip(totals.index, totals.itertuples(index=False))
+            }
+        
+        except Exception as e:
+            logger.error(f"Error aggregating by credit type: {e}")
+            return {}
+    
+    def _analyze_temporal_patterns_frame(self, frames: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+        """Анализ временных паттернов"""
+        try:
+            drawdowns_df = frames['drawdowns']
+            repayments_df = frames['repayments']
+            
+            # Группировка по целочисленному ключу YYYYMM (strftime по всему столбцу на порядок медленнее)
+            drawdowns_grouped = drawdowns_df.groupby(
+                self._month_key(drawdowns_df['date']), sort=True
+            ).agg(
+                events=('amount', 'size'),
+                amount=('amount', 'sum')
+            )
+            
+            repayments_grouped = repayments_df.groupby(
+                self._month_key(repayments_df['date']), sort=True
+            ).agg(
+                events=('principal', 'size'),
+                principal=('principal', 'sum'),
+                interest=('interest', 'sum')
+            )
+            
+            drawdowns_by_month = {
+                self._format_month(month): {'count': int(row.events), 'amount': float(row.amount)}
+                for month, row in zip(drawdowns_grouped.index, drawdowns_grouped.itertuples(index=False))
+            }
+            
+            repayments_by_month = {
+                self._format_month(month): {
+                    'count': int(row.events),
+                    'principal': float(row.principal),
+                    'interest': float(row.interest)
+                }
+                for month, row in zip(repayments_grouped.index, repayments_grouped.itertuples(index=False))
+            }
+            
+            event_dates = pd.concat([drawdowns_df['date'], repayments_df['date']])
+            
+            return {
+                'drawdowns_by_month': drawdowns_by_month,
+                'repayments_by_month': repayments_by_month,
+                'analysis_period': {
+                    'start': event_dates.min().date() if len(event_dates) else None,
+                    'end': event_dates.max().date() if len(event_dates) else None
+                }
+            }
+        
+        except Exception as e:
+            logger.error(f"Error analyzing temporal patterns: {e}")
+            return {}
+    
+    def _month_key(self, dates: pd.Series) -> pd.Series:
+        """Ключ месяца в виде целого YYYYMM"""
+        return dates.dt.year * 100 + dates.dt.month
+    
+    def _format_month(self, month_key: int) -> str:
+        """Преобразование ключа YYYYMM в строку 'YYYY-MM'"""
+        return f"{month_key // 100:04d}-{month_key % 100:02d}"
+    
+    def _analyze_risk_metrics_frame(self, contracts_df: pd.DataFrame) -> Dict[str, Any]:
+        """Анализ метрик риска"""
+        try:
+            if contracts_df.empty:
+                return {}
+            
+            limits = contracts_df['total_limit'].to_numpy()
+            total_limit = float(limits.sum())
+            if total_limit == 0:
+                return {}
+            
+            # Индекс Херфиндаля-Хиршмана
+            hhi = float(np.square(limits / total_limit).sum())
+            max_share = float(limits.max() / total_limit)
+            
+            days = contracts_df['days_to_maturity'].to_numpy()
+            contracts_by_maturity = {
+                'short_term': int((days <= 30).sum()),
+                'medium_term': int(((days > 30) & (days <= 365)).sum()),
+                'long_term': int((days > 365).sum())
+            }
+            
+            ratio = np.divide(
+                contracts_df['utilized'].to_numpy(), limits,
+                out=np.zeros_like(limits), where=limits != 0
+            )
+            utilization_levels = {
+                'low': int((ratio < 0.3).sum()),
+                'medium': int(((ratio >= 0.3) & (ratio < 0.7)).sum()),
+                'high': int((ratio >= 0.7).sum())
+            }
+            
+            return {
+                'concentration_risk': {
+                    'hhi': hhi,
+                    'max_share': max_share,
+                    'risk_level': 'high' if hhi > 0.25 else 'medium' if hhi > 0.15 else 'low'
+                },
+                'maturity_distribution': contracts_by_maturity,
+                'utilization_distribution': utilization_levels,
+                'total_exposure': total_limit,
+                'average_exposure': total_limit / len(limits)
+            }
+        
+        except Exception as e:
+            logger.error(f"Error analyzing risk metrics: {e}")
+            return {}
+    
+    def validate(self,
+                 contracts: List[CreditContract],
+                 all_drawdowns: List[Drawdown],
+                 all_repayments: List[Repayment],
+                 rel_tol: float = 1e-9) -> List[str]:
+        """
+        Сверка результата с эталонной реализацией DataAggregator
+        
+        Args:
+            contracts: Список кредитных договоров
+            all_drawdowns: Все выборки
+            all_repayments: Все погашения
+            rel_tol: Допустимая относительная погрешность сумм
+            
+        Returns:
+            Список расхождений (пустой, если результаты совпадают)
+        """
+        reference = DataAggregator().aggregate_portfolio_data(contracts, all_drawdowns, all_repayments)
+        candidate = self.aggregate_portfolio_data(contracts, all_drawdowns, all_repayments)
+        
+        reference.pop('aggregation_date', None)
+        candidate.pop('aggregation_date', None)
+        
+        return compare_aggregations(reference, candidate, rel_tol)
+
+
+def compare_aggregations(reference: Any,
+                         candidate: Any,
+                         rel_tol: float = 1e-9,
+                         path: str = '') -> List[str]:
+    """
+    Рекурсивное сравнение двух результатов агрегации
+    
+    Числа сравниваются с относительной погрешностью, словари - по набору
+    и порядку ключей, списки - поэлементно.
+    
+    Args:
+        reference: Эталонный результат
+        candidate: Проверяемый результат
+        rel_tol: Допустимая относительная погрешность чисел
+        path: Путь к текущему элементу (для сообщений)
+        
+    Returns:
+        Список расхождений
+    """
+    location = path or '<root>'
+    
+    if isinstance(reference, dict) and isinstance(candidate, dict):
+        if list(reference) != list(candidate):
+            return [f"{location}: keys {list(reference)} != {list(candidate)}"]
+        mismatches = []
+        for key in reference:
+            mismatches.extend(
+                compare_aggregations(reference[key], candidate[key], rel_tol, f"{path}.{key}" if path else str(key))
+            )
+        return mismatches
+    
+    if isinstance(reference, list) and isinstance(candidate, list):
+        if len(reference) != len(candidate):
+            return [f"{location}: length {len(reference)} != {len(candidate)}"]
+        mismatches = []
+        for index, (ref_item, cand_item) in enumerate(zip(reference, candidate)):
+            mismatches.extend(compare_aggregations(ref_item, cand_item, rel_tol, f"{location}[{index}]"))
+        return mismatches
+    
+    numeric = (int, float, Decimal)
+    if (isinstance(reference, numeric) and isinstance(candidate, numeric)
+            and not isinstance(reference, bool) and not isinstance(candidate, bool)):
+        if math.isclose(float(reference), float(candidate), rel_tol=rel_tol, abs_tol=1e-9):
+            return []
+        return [f"{location}: {reference} != {candidate}"]
+    
+    if reference != candidate:
+        return [f"{location}: {reference!r} != {candidate!r}"]
+    return []
+
+
+def create_data_aggregator(backend: str = 'python') -> DataAggregator:
+    """
+    Создание агрегатора по имени реализации
+    
+    Args:
+        backend: 'python' (инкрементальные накопители) или 'pandas' (колоночный снимок)
+        
+    Returns:
+        Агрегатор данных портфеля
+    """
+    if backend == 'python':
+        return DataAggregator()
+    if backend == 'pandas':
+        return FrameAggregator()
+    raise ValueError(f"Unknown aggregation backend: {backend}. Supported backends: python, pandas")
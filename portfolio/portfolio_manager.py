@@ -4,8 +4,11 @@
 
 from datetime import date, datetime
 from decimal import Decimal
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 import logging
+import os
+
+import numpy as np
 
 import sys
 from pathlib import Path
@@ -15,11 +18,18 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from models import (
     CreditContract, Drawdown, Repayment, CalculationVersion,
-    PaymentSchedule, PortfolioCashflow
+    PaymentSchedule, PortfolioCashflow, KeyRateCurve
 )
+from models.drawdown import InterestRateType
 from api import TreasuryAPIClient
-from calculations import CalculationEngine
+from calculations import (
+    CalculationEngine, PortfolioAccrual, RateSweepResult, MonteCarloResult, CashflowDelta,
+    RateSensitivityResult, OptimizationResult, ReverseStressResult, ScenarioCube, NPVResult,
+    XIRRResult, SubsidyBook, SubsidyResult, create_short_rate_model, expand_stress_grid
+)
 from .data_aggregator import DataAggregator
+from .aggregation_state import AggregationState
+from .frame_aggregator import create_data_aggregator
 
 logger = logging.getLogger(__name__)
 
@@ -27,16 +37,36 @@ logger = logging.getLogger(__name__)
 class PortfolioManager:
     """Менеджер портфеля"""
     
-    def __init__(self, api_client: TreasuryAPIClient):
+    def __init__(self,
+                 api_client: TreasuryAPIClient,
+                 aggregation_backend: Optional[str] = None,
+                 accrual_mode: Optional[str] = None,
+                 business_day_convention: Optional[str] = None,
+                 repayment_allocation: Optional[str] = None):
         """
         Инициализация менеджера портфеля
         
         Args:
             api_client: Клиент для работы с API
+            aggregation_backend: Реализация агрегации ('python' или 'pandas');
+                по умолчанию берется из PORTFOLIO_AGGREGATION_BACKEND
+            accrual_mode: Режим начисления процентов ('daily' или 'event');
+                по умолчанию берется из PAYMENT_ACCRUAL_MODE
+            business_day_convention: Перенос дат уплаты процентов на рабочие дни
+                (календарь РФ); по умолчанию берется из PAYMENT_BUSINESS_DAY_CONVENTION
+            repayment_allocation: Распределение погашений ОД по траншам ('fifo' или
+                'pro_rata'); по умолчанию берется из PAYMENT_REPAYMENT_ALLOCATION
         """
         self.api_client = api_client
-        self.calculation_engine = CalculationEngine()
-        self.data_aggregator = DataAggregator()
+        self.calculation_engine = CalculationEngine(
+            accrual_mode=accrual_mode or os.getenv("PAYMENT_ACCRUAL_MODE", "daily"),
+            business_day_convention=(
+                business_day_convention or os.getenv("PAYMENT_BUSINESS_DAY_CONVENTION", "unadjusted")
+            ),
+            repayment_allocation=repayment_allocation or os.getenv("PAYMENT_REPAYMENT_ALLOCATION", "fifo")
+        )
+        self.aggregation_backend = aggregation_backend or os.getenv("PORTFOLIO_AGGREGATION_BACKEND", "python")
+        self.data_aggregator: DataAggregator = create_data_aggregator(self.aggregation_backend)
         
         # Кэш данных
         self._contracts_cache: Optional[List[CreditContract]] = None
@@ -44,6 +74,21 @@ class PortfolioManager:
         self._repayments_cache: Optional[List[Repayment]] = None
         self._cache_timestamp: Optional[datetime] = None
         self._cache_ttl_minutes = 30  # Время жизни кэша в минутах
+        self._base_rate: Optional[Decimal] = None  # Базовая ставка снимка данных
+        
+        # Агрегаты текущего снимка (состояние и готовый результат) и номер снимка
+        self._aggregation_state: Optional[AggregationState] = None
+        self._aggregated_cache: Optional[Dict[str, Any]] = None
+        self._snapshot_version = 0
+        
+        # Массивы начислений для пакетных расчетов по ставкам (номер снимка, массивы)
+        self._accrual_cache: Optional[Tuple[int, PortfolioAccrual]] = None
+        
+        # Графики платежей базовых версий: ID версии -> ((номер снимка, базовая ставка), графики)
+        self._schedules_cache: Dict[str, Tuple[Tuple[int, Optional[Decimal]], Dict[str, PaymentSchedule]]] = {}
+        
+        # Массивы субсидируемого портфеля базовых версий: ID версии -> ((номер снимка, базовая ставка), массивы)
+        self._subsidy_cache: Dict[str, Tuple[Tuple[int, Optional[Decimal]], SubsidyBook]] = {}
     
     def load_portfolio_data(self, force_refresh: bool = False) -> Dict[str, Any]:
         """
@@ -65,6 +110,7 @@ class PortfolioManager:
             
             # Загрузка данных из API
             contracts = self.api_client.get_active_contracts()
+            base_rate = self.api_client.get_current_base_rate()
             
             all_drawdowns = []
             all_repayments = []
@@ -82,12 +128,10 @@ class PortfolioManager:
                     continue
             
             # Обновление кэша
-            self._update_cache(contracts, all_drawdowns, all_repayments)
+            self._update_cache(contracts, all_drawdowns, all_repayments, base_rate)
             
-            # Агрегация данных
-            aggregated_data = self.data_aggregator.aggregate_portfolio_data(
-                contracts, all_drawdowns, all_repayments
-            )
+            # Агрегация данных (состояние построено при обновлении кэша)
+            aggregated_data = self._get_cached_data()
             
             logger.info(f"Portfolio data loaded: {len(contracts)} contracts")
             return aggregated_data
@@ -119,7 +163,7 @@ class PortfolioManager:
         """
         try:
             version = CalculationVersion(
-                id=f"version_{datetime.now().strftime('%Y%m%d_%H%M%S')}",
+                id=f"version_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}",
                 name=name,
                 description=description,
                 created_by=created_by,
@@ -137,13 +181,18 @@ class PortfolioManager:
     
     def calculate_portfolio_cashflow(self, 
                                    version: CalculationVersion,
-                                   force_refresh: bool = False) -> PortfolioCashflow:
+                                   force_refresh: bool = False,
+                                   base_version: Optional[CalculationVersion] = None) -> PortfolioCashflow:
         """
         Расчет кэш-флоу портфеля для версии
         
+        Для сценарной версии с известной базовой пересчитываются только
+        договоры, затронутые сценарием; графики остальных берутся из базовой.
+        
         Args:
             version: Версия расчета
             force_refresh: Принудительное обновление данных
+            base_version: Базовая версия сценария (для переиспользования графиков)
             
         Returns:
             Кэш-флоу портфеля
@@ -156,20 +205,12 @@ class PortfolioManager:
             
             # Получение данных из кэша
             contracts = self._contracts_cache or []
-            all_drawdowns = self._drawdowns_cache or []
-            all_repayments = self._repayments_cache or []
             
-            # Получение текущей базовой ставки
-            current_base_rate = self.api_client.get_current_base_rate()
+            # Расчет графиков платежей
+            payment_schedules = self.get_version_schedules(version, base_version)
             
-            # Расчет кэш-флоу
-            cashflow = self.calculation_engine.calculate_portfolio_cashflow(
-                contracts=contracts,
-                all_drawdowns=all_drawdowns,
-                all_repayments=all_repayments,
-                version=version,
-                current_base_rate=current_base_rate
-            )
+            # Консолидация кэш-флоу
+            cashflow = self.calculation_engine.consolidate_schedules(version.id, payment_schedules, contracts)
             
             logger.info(f"Portfolio cashflow calculated for version {version.id}")
             return cashflow
@@ -178,6 +219,499 @@ class PortfolioManager:
             logger.error(f"Error calculating portfolio cashflow: {e}")
             raise
     
+    def calculate_scenario_delta(self,
+                                 version: CalculationVersion,
+                                 base_version: CalculationVersion) -> CashflowDelta:
+        """
+        Расчет кэш-флоу сценарной версии в виде разницы с базовой
+        
+        Args:
+            version: Сценарная версия
+            base_version: Базовая версия сценария
+            
+        Returns:
+            Дельта кэш-флоу по датам
+        """
+        try:
+            if not self._is_cache_valid():
+                self.load_portfolio_data()
+            
+            current_base_rate = self.get_current_base_rate()
+            
+            delta = self.calculation_engine.calculate_scenario_delta(
+                contracts=self._contracts_cache or [],
+                all_drawdowns=self._drawdowns_cache or [],
+                all_repayments=self._repayments_cache or [],
+                version=version,
+                base_version=base_version,
+                base_schedules=self.get_payment_schedules(base_version, current_base_rate),
+                current_base_rate=current_base_rate
+            )
+            
+            logger.info(f"Scenario delta calculated for version {version.id}: {delta.changed_dates_count} dates changed")
+            return delta
+            
+        except Exception as e:
+            logger.error(f"Error calculating scenario delta: {e}")
+            raise
+    
+    def get_payment_schedules(self,
+                              version: CalculationVersion,
+                              current_base_rate: Optional[Decimal] = None) -> Dict[str, PaymentSchedule]:
+        """
+        Графики платежей версии по всем договорам
+        
+        Графики базовых версий кэшируются на снимок данных и текущую
+        базовую ставку: на них опираются сценарные версии.
+        
+        Args:
+            version: Версия расчета
+            current_base_rate: Текущая базовая ставка (по умолчанию - ставка снимка данных)
+            
+        Returns:
+            Словарь {ID договора: график}
+        """
+        if current_base_rate is None:
+            current_base_rate = self.get_current_base_rate()
+        cache_key = (self.get_snapshot_version(), current_base_rate)
+        
+        cached = self._schedules_cache.get(version.id)
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+        
+        payment_schedules = self.calculation_engine.calculate_payment_schedules(
+            contracts=self._contracts_cache or [],
+            all_drawdowns=self._drawdowns_cache or [],
+            all_repayments=self._repayments_cache or [],
+            version=version,
+            current_base_rate=current_base_rate
+        )
+        
+        if version.is_base_version():
+            self._schedules_cache[version.id] = (cache_key, payment_schedules)
+        
+        return payment_schedules
+    
+    def get_version_schedules(self,
+                              version: CalculationVersion,
+                              base_version: Optional[CalculationVersion] = None) -> Dict[str, PaymentSchedule]:
+        """
+        Графики платежей версии с переиспользованием графиков базовой
+        
+        Args:
+            version: Версия расчета
+            base_version: Базовая версия сценария (для сценарных версий)
+            
+        Returns:
+            Словарь {ID договора: график}
+        """
+        current_base_rate = self.get_current_base_rate()
+        
+        if base_version is None:
+            return self.get_payment_schedules(version, current_base_rate)
+        
+        payment_schedules, _ = self.calculation_engine.calculate_scenario_schedules(
+            contracts=self._contracts_cache or [],
+            all_drawdowns=self._drawdowns_cache or [],
+            all_repayments=self._repayments_cache or [],
+            version=version,
+            base_version=base_version,
+            base_schedules=self.get_payment_schedules(base_version, current_base_rate),
+            current_base_rate=current_base_rate
+        )
+        return payment_schedules
+    
+    def build_scenario_cube(self,
+                            path: str,
+                            versions: List[CalculationVersion],
+                            base_versions: Optional[Dict[str, CalculationVersion]] = None) -> ScenarioCube:
+        """
+        Построение куба результатов версий в файле
+        
+        Графики версий рассчитываются по одной (сценарии - с
+        переиспользованием графиков базовой версии) и в памяти не копятся.
+        
+        Args:
+            path: Путь к файлу куба
+            versions: Версии (сценарии куба) в порядке оси сценариев
+            base_versions: Базовые версии сценариев по ID сценария
+            
+        Returns:
+            Куб сценарии x даты x показатели x валюты
+        """
+        try:
+            if not self._is_cache_valid():
+                self.load_portfolio_data()
+            
+            base_versions = base_versions or {}
+            scenarios = (
+                (version.id, self.get_version_schedules(version, base_versions.get(version.id)))
+                for version in versions
+            )
+            
+            return ScenarioCube.build(path, scenarios, self._contracts_cache or [])
+            
+        except Exception as e:
+            logger.error(f"Error building scenario cube: {e}")
+            raise
+    
+    def calculate_npv(self,
+                      versions: List[CalculationVersion],
+                      base_versions: Optional[Dict[str, CalculationVersion]] = None,
+                      curve: Optional[KeyRateCurve] = None,
+                      valuation_date: Optional[date] = None) -> NPVResult:
+        """
+        NPV чистого потока договоров по версиям
+        
+        Args:
+            versions: Версии расчета
+            base_versions: Базовые версии сценариев по ID сценария
+            curve: Кривая ставки дисконтирования (по умолчанию - текущая базовая ставка)
+            valuation_date: Дата оценки (по умолчанию - первая дата графиков)
+            
+        Returns:
+            NPV по версиям и договорам
+        """
+        try:
+            if not self._is_cache_valid():
+                self.load_portfolio_data()
+            
+            base_versions = base_versions or {}
+            schedules = {
+                version.id: self.get_version_schedules(version, base_versions.get(version.id))
+                for version in versions
+            }
+            if curve is None:
+                curve = KeyRateCurve.flat(self.get_current_base_rate())
+            
+            return self.calculation_engine.npv_portfolio(schedules, curve, valuation_date)
+            
+        except Exception as e:
+            logger.error(f"Error calculating NPV: {e}")
+            raise
+    
+    def calculate_effective_rates(self,
+                                  version: CalculationVersion,
+                                  base_version: Optional[CalculationVersion] = None) -> XIRRResult:
+        """
+        Эффективная ставка (XIRR) договоров версии
+        
+        Args:
+            version: Версия расчета
+            base_version: Базовая версия (для сценарных версий)
+            
+        Returns:
+            Ставки по договорам и диагностика сходимости
+        """
+        try:
+            if not self._is_cache_valid():
+                self.load_portfolio_data()
+            
+            schedules = self.get_version_schedules(version, base_version)
+            return self.calculation_engine.calculate_effective_rates(schedules)
+            
+        except Exception as e:
+            logger.error(f"Error calculating effective rates: {e}")
+            raise
+    
+    def calculate_subsidies(self,
+                            version: CalculationVersion,
+                            base_version: Optional[CalculationVersion] = None,
+                            program_curves: Optional[Dict[str, KeyRateCurve]] = None) -> SubsidyResult:
+        """
+        Субсидии и чистые проценты субсидируемых договоров версии по месяцам
+        
+        Массивы базовой версии строятся один раз на снимок данных, поэтому
+        пересчет при новых условиях программ не перестраивает графики.
+        
+        Args:
+            version: Версия расчета
+            base_version: Базовая версия (для сценарных версий)
+            program_curves: Новые ставки субсидии по программам (None - условия договоров)
+            
+        Returns:
+            Помесячный результат по договорам
+        """
+        try:
+            if not self._is_cache_valid():
+                self.load_portfolio_data()
+            
+            cache_key = (self.get_snapshot_version(), self.get_current_base_rate())
+            cached = self._subsidy_cache.get(version.id)
+            if cached is not None and cached[0] == cache_key:
+                book = cached[1]
+            else:
+                book = self.calculation_engine.build_subsidy_book(
+                    self._contracts_cache or [], self.get_version_schedules(version, base_version)
+                )
+                if version.is_base_version():
+                    self._subsidy_cache[version.id] = (cache_key, book)
+            
+            return self.calculation_engine.calculate_subsidies(book, program_curves)
+            
+        except Exception as e:
+            logger.error(f"Error calculating subsidies: {e}")
+            raise
+    
+    def iter_payment_schedules(self, version: CalculationVersion) -> Iterator[PaymentSchedule]:
+        """
+        Ленивое получение графиков платежей по договорам для версии
+        
+        Args:
+            version: Версия расчета
+            
+        Yields:
+            График платежей по очередному договору
+        """
+        # Загрузка данных портфеля (из кэша, если он валиден)
+        if not self._is_cache_valid():
+            self.load_portfolio_data()
+        
+        current_base_rate = self.get_current_base_rate()
+        
+        yield from self.calculation_engine.iter_payment_schedules(
+            contracts=self._contracts_cache or [],
+            all_drawdowns=self._drawdowns_cache or [],
+            all_repayments=self._repayments_cache or [],
+            version=version,
+            current_base_rate=current_base_rate
+        )
+    
+    def get_portfolio_accrual(self) -> PortfolioAccrual:
+        """
+        Массивы начислений портфеля для текущего снимка данных
+        
+        Строятся один раз на снимок и переиспользуются всеми пакетными
+        расчетами по ставкам.
+        
+        Returns:
+            Массивы начислений портфеля
+        """
+        snapshot = self.get_snapshot_version()
+        
+        if self._accrual_cache is None or self._accrual_cache[0] != snapshot:
+            accrual = self.calculation_engine.build_portfolio_accrual(
+                contracts=self._contracts_cache or [],
+                all_drawdowns=self._drawdowns_cache or [],
+                all_repayments=self._repayments_cache or []
+            )
+            self._accrual_cache = (snapshot, accrual)
+        
+        return self._accrual_cache[1]
+    
+    def sweep_base_rates(self,
+                         base_rates: List[Any],
+                         scenario_labels: Optional[List[str]] = None) -> RateSweepResult:
+        """
+        Пакетный расчет сценариев базовой ставки за один проход по портфелю
+        
+        Args:
+            base_rates: Список ставок или матрица траекторий (сценарии, даты портфеля)
+            scenario_labels: Наименования сценариев
+            
+        Returns:
+            Куб кэш-флоу сценарии x даты
+        """
+        return self.calculation_engine.sweep_base_rates(
+            self.get_portfolio_accrual(), base_rates, scenario_labels
+        )
+    
+    def simulate_floating_interest(self,
+                                   model_name: str = 'vasicek',
+                                   model_parameters: Optional[Dict[str, Any]] = None,
+                                   paths_count: int = 5000,
+                                   seed: Optional[int] = None,
+                                   valuation_date: Optional[date] = None) -> MonteCarloResult:
+        """
+        Моделирование процентных расходов по плавающим выборкам методом Монте-Карло
+        
+        Траектории стартуют от текущей базовой ставки казначейской системы.
+        
+        Args:
+            model_name: Модель краткосрочной ставки (vasicek, hull_white)
+            model_parameters: Параметры модели (по умолчанию - CBR_CALIBRATION)
+            paths_count: Количество траекторий
+            seed: Начальное значение генератора (для воспроизводимости)
+            valuation_date: Дата начала моделирования
+            
+        Returns:
+            Перцентильные полосы процентных расходов по месяцам
+        """
+        model = create_short_rate_model(model_name, model_parameters)
+        accrual = self.get_portfolio_accrual()
+        initial_rate = float(self.get_current_base_rate())
+        
+        return self.calculation_engine.simulate_floating_interest(
+            accrual, model, initial_rate,
+            paths_count=paths_count,
+            seed=seed,
+            valuation_date=valuation_date
+        )
+    
+    def calculate_rate_sensitivity(self, bump_bp: float = 1.0) -> RateSensitivityResult:
+        """
+        Чувствительность процентных расходов к базовой ставке (DV01)
+        
+        Args:
+            bump_bp: Сдвиг базовой ставки, б.п.
+            
+        Returns:
+            DV01 по договорам и корзинам месяц x валюта
+        """
+        accrual = self.get_portfolio_accrual()
+        currencies = {contract.id: contract.currency.value for contract in self._contracts_cache or []}
+        
+        return self.calculation_engine.calculate_rate_sensitivity(
+            accrual,
+            [currencies[contract_id] for contract_id in accrual.contract_ids],
+            bump_bp
+        )
+    
+    def optimize_allocation(self,
+                            target_utilization: float,
+                            max_concentration: float = 1.0) -> OptimizationResult:
+        """
+        Перераспределение долга под целевую загрузку с минимальными процентами
+        
+        Текущий остаток договора - использованная часть лимита, ставка -
+        эффективная ставка последней выборки (для договоров без выборок -
+        текущая базовая ставка плюс маржа договора).
+        
+        Args:
+            target_utilization: Целевая загрузка портфеля (доля от суммы лимитов)
+            max_concentration: Максимальная доля договора в долге портфеля
+            
+        Returns:
+            Целевые остатки и перераспределение
+        """
+        # Перезагрузка данных, если кэш пуст или устарел
+        self.get_snapshot_version()
+        
+        contracts = self._contracts_cache or []
+        current_base_rate = self.get_current_base_rate()
+        terms = self._get_drawdown_terms(current_base_rate)
+        
+        return self.calculation_engine.optimize_utilization(
+            [contract.id for contract in contracts],
+            np.array([float(contract.total_limit) for contract in contracts]),
+            np.array([float(contract.total_limit - contract.available_limit) for contract in contracts]),
+            np.array([terms[contract.id]['effective_rate'] for contract in contracts]),
+            target_utilization,
+            max_concentration
+        )
+    
+    def get_reallocation_parameters(self,
+                                    result: OptimizationResult,
+                                    effective_date: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Выборки и погашения сценария по результату оптимизации
+        
+        Новые выборки получают условия последней выборки договора.
+        
+        Args:
+            result: Результат optimize_allocation
+            effective_date: Дата перераспределения (по умолчанию - сегодня)
+            
+        Returns:
+            Параметры additional_drawdowns и additional_repayments
+        """
+        self.get_snapshot_version()
+        terms = self._get_drawdown_terms(self.get_current_base_rate())
+        drawdown_terms = {
+            contract_id: {key: value for key, value in contract_terms.items() if key != 'effective_rate'}
+            for contract_id, contract_terms in terms.items()
+        }
+        
+        return result.to_scenario_parameters(effective_date or date.today(), drawdown_terms)
+    
+    def _get_drawdown_terms(self, current_base_rate: Decimal) -> Dict[str, Dict[str, Any]]:
+        """Условия последней выборки по договорам и их эффективная ставка"""
+        latest: Dict[str, Drawdown] = {}
+        for drawdown in self._drawdowns_cache or []:
+            current = latest.get(drawdown.contract_id)
+            if current is None or drawdown.drawdown_date >= current.drawdown_date:
+                latest[drawdown.contract_id] = drawdown
+        
+        terms = {}
+        for contract in self._contracts_cache or []:
+            drawdown = latest.get(contract.id)
+            if drawdown is not None:
+                terms[contract.id] = {
+                    'interest_rate_type': drawdown.interest_rate_type.value,
+                    'interest_rate': float(drawdown.interest_rate),
+                    'margin': float(drawdown.margin) if drawdown.margin is not None else None,
+                    'effective_rate': float(drawdown.get_effective_rate(current_base_rate))
+                }
+            else:
+                margin = contract.margin or Decimal('0')
+                terms[contract.id] = {
+                    'interest_rate_type': InterestRateType.FLOATING.value,
+                    'interest_rate': float(current_base_rate + margin),
+                    'margin': float(margin),
+                    'effective_rate': float(current_base_rate + margin)
+                }
+        
+        return terms
+    
+    def run_stress_grid(self,
+                        grid_ranges: Dict[str, Any],
+                        limits: Optional[Dict[str, float]] = None,
+                        stop_on_breach: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый расчет сетки стресс-сценариев
+        
+        Сетка разворачивается и проверяется до начала расчета, поэтому
+        ошибки параметров возникают сразу, а не при чтении генератора.
+        
+        Args:
+            grid_ranges: Диапазоны rate_shock и drawdown_shock
+            limits: Ограничения (max_total_interest, max_peak_debt_balance,
+                max_breached_contracts); нарушение лимита договора -
+                превышение остатком общего лимита
+            stop_on_breach: Остановиться на первом сценарии с нарушением
+            
+        Returns:
+            Генератор метрик по сценариям
+        """
+        grid = expand_stress_grid(grid_ranges)
+        limits = self.calculation_engine.stress_grid_runner.validate_limits(limits)
+        
+        accrual = self.get_portfolio_accrual()
+        total_limits = {contract.id: float(contract.total_limit) for contract in self._contracts_cache or []}
+        basis = self.calculation_engine.build_stress_basis(
+            accrual,
+            float(self.get_current_base_rate()),
+            [total_limits.get(contract_id, np.inf) for contract_id in accrual.contract_ids]
+        )
+        
+        return self.calculation_engine.run_stress_grid(basis, grid, limits, stop_on_breach)
+    
+    def run_reverse_stress(self,
+                           direction: Dict[str, float],
+                           limits: Dict[str, float],
+                           max_scale: float = 1.0) -> ReverseStressResult:
+        """
+        Поиск минимального шока ставки или выборок, нарушающего ограничения ликвидности
+        
+        Все шаги поиска используют массивы начислений текущего снимка,
+        графики договоров не перестраиваются.
+        
+        Args:
+            direction: Направление шока, например {'rate_shock': 1.0}
+            limits: Ограничения (min_net_cashflow, max_debt_service) для каждого месяца
+            max_scale: Верхняя граница множителя направления
+            
+        Returns:
+            Минимальный шок и нарушенное ограничение
+        """
+        return self.calculation_engine.run_reverse_stress(
+            self.get_portfolio_accrual(),
+            float(self.get_current_base_rate()),
+            direction,
+            limits,
+            max_scale
+        )
+    
     def compare_versions(self, 
                         base_version: CalculationVersion,
                         scenario_version: CalculationVersion) -> Dict[str, Any]:
@@ -194,7 +728,10 @@ class PortfolioManager:
         try:
             # Расчет кэш-флоу для обеих версий
             base_cashflow = self.calculate_portfolio_cashflow(base_version)
-            scenario_cashflow = self.calculate_portfolio_cashflow(scenario_version)
+            scenario_cashflow = self.calculate_portfolio_cashflow(
+                scenario_version,
+                base_version=base_version if scenario_version.base_version_id == base_version.id else None
+            )
             
             # Расчет влияния сценария
             scenario_impact = self.calculation_engine.calculate_scenario_impact(
@@ -316,23 +853,131 @@ class PortfolioManager:
     
     def _get_cached_data(self) -> Dict[str, Any]:
         """Получение данных из кэша"""
-        contracts = self._contracts_cache or []
-        all_drawdowns = self._drawdowns_cache or []
-        all_repayments = self._repayments_cache or []
+        if self._aggregated_cache is None:
+            if self.data_aggregator.incremental:
+                self._aggregated_cache = self.data_aggregator.aggregate_state(self._get_aggregation_state())
+            else:
+                self._aggregated_cache = self.data_aggregator.aggregate_portfolio_data(
+                    self._contracts_cache or [],
+                    self._drawdowns_cache or [],
+                    self._repayments_cache or []
+                )
         
-        return self.data_aggregator.aggregate_portfolio_data(
-            contracts, all_drawdowns, all_repayments
-        )
+        return self._aggregated_cache
+    
+    def _get_aggregation_state(self) -> AggregationState:
+        """Получение состояния агрегатов текущего снимка"""
+        if self._aggregation_state is None:
+            self._aggregation_state = self.data_aggregator.build_state(
+                self._contracts_cache or [],
+                self._drawdowns_cache or [],
+                self._repayments_cache or []
+            )
+        return self._aggregation_state
+    
+    def upsert_records(self,
+                       contracts: Optional[List[CreditContract]] = None,
+                       drawdowns: Optional[List[Drawdown]] = None,
+                       repayments: Optional[List[Repayment]] = None) -> None:
+        """
+        Точечное добавление или изменение записей в снимке данных
+        
+        Агрегаты обновляются инкрементально, без повторного обхода портфеля.
+        
+        Args:
+            contracts: Новые или измененные договоры
+            drawdowns: Новые или измененные выборки
+            repayments: Новые или измененные погашения
+        """
+        state = self._get_aggregation_state()
+        
+        for contract in contracts or []:
+            state.upsert_contract(contract)
+        for drawdown in drawdowns or []:
+            state.upsert_drawdown(drawdown)
+        for repayment in repayments or []:
+            state.upsert_repayment(repayment)
+        
+        self._sync_records_from_state(state)
+    
+    def remove_records(self,
+                       contract_ids: Optional[List[str]] = None,
+                       drawdown_ids: Optional[List[str]] = None,
+                       repayment_ids: Optional[List[str]] = None) -> None:
+        """
+        Точечное удаление записей из снимка данных
+        
+        Args:
+            contract_ids: ID удаляемых договоров
+            drawdown_ids: ID удаляемых выборок
+            repayment_ids: ID удаляемых погашений
+        """
+        state = self._get_aggregation_state()
+        
+        for contract_id in contract_ids or []:
+            state.remove_contract(contract_id)
+        for drawdown_id in drawdown_ids or []:
+            state.remove_drawdown(drawdown_id)
+        for repayment_id in repayment_ids or []:
+            state.remove_repayment(repayment_id)
+        
+        self._sync_records_from_state(state)
+    
+    def _sync_records_from_state(self, state: AggregationState) -> None:
+        """Обновление списков записей по индексам состояния и смена номера снимка"""
+        self._contracts_cache = list(state.contracts.values())
+        self._drawdowns_cache = list(state.drawdowns.values())
+        self._repayments_cache = list(state.repayments.values())
+        self._aggregated_cache = None
+        self._snapshot_version += 1
+        
+        logger.info(f"Portfolio snapshot updated incrementally: version {self._snapshot_version}")
+    
+    def get_current_base_rate(self) -> Decimal:
+        """
+        Базовая ставка текущего снимка данных
+        
+        Ставка запрашивается у казначейской системы вместе с данными портфеля
+        и не меняется до следующей загрузки, поэтому все расчеты по снимку
+        (и ключи их кэшей) используют одно и то же значение.
+        
+        Returns:
+            Базовая ставка, %
+        """
+        self.get_snapshot_version()
+        if self._base_rate is None:
+            self._base_rate = self.api_client.get_current_base_rate()
+        return self._base_rate
+    
+    def get_snapshot_version(self) -> int:
+        """
+        Получение номера текущего снимка данных портфеля
+        
+        Номер увеличивается при каждом обновлении или очистке кэша, поэтому
+        может использоваться как ключ для кэширования производных результатов.
+        Если кэш устарел, данные предварительно перезагружаются.
+        
+        Returns:
+            Номер снимка данных
+        """
+        if not self._is_cache_valid():
+            self.load_portfolio_data()
+        return self._snapshot_version
     
     def _update_cache(self, 
                      contracts: List[CreditContract],
                      all_drawdowns: List[Drawdown],
-                     all_repayments: List[Repayment]) -> None:
+                     all_repayments: List[Repayment],
+                     base_rate: Decimal) -> None:
         """Обновление кэша"""
         self._contracts_cache = contracts
         self._drawdowns_cache = all_drawdowns
         self._repayments_cache = all_repayments
+        self._base_rate = base_rate
         self._cache_timestamp = datetime.now()
+        self._aggregation_state = None  # Строится при первом обращении
+        self._aggregated_cache = None
+        self._snapshot_version += 1
         
         logger.info(f"Cache updated: {len(contracts)} contracts, {len(all_drawdowns)} drawdowns, {len(all_repayments)} repayments")
     
@@ -341,6 +986,12 @@ class PortfolioManager:
         self._contracts_cache = None
         self._drawdowns_cache = None
         self._repayments_cache = None
+        self._base_rate = None
         self._cache_timestamp = None
+        self._aggregation_state = None
+        self._aggregated_cache = None
+        self._schedules_cache.clear()
+        self._subsidy_cache.clear()
+        self._snapshot_version += 1
         
         logger.info("Cache cleared")
@@ -0,0 +1,16 @@
+"""
+Модуль отчетов и выгрузки данных
+"""
+
+from .data_exporter import DataExporter
+from .report_queue import ReportQueue, ReportJob, ReportStatus
+from .report_builder import ReportBuilder, ProcessReportRenderer
+
+__all__ = [
+    'DataExporter',
+    'ReportQueue',
+    'ReportJob',
+    'ReportStatus',
+    'ReportBuilder',
+    'ProcessReportRenderer'
+]
@@ -0,0 +1,367 @@
+"""
+Потоковая выгрузка данных портфеля в CSV и XLSX
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Any, Iterable, Iterator, Tuple
+from xml.sax.saxutils import escape
+import csv
+import io
+import zipfile
+import zlib
+import logging
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from models import PaymentSchedule, PortfolioCashflow
+
+logger = logging.getLogger(__name__)
+
+
+class _ChunkSink:
+    """Приемник байтов для zipfile, отдающий накопленные данные порциями"""
+    
+    def __init__(self):
+        self._chunks: List[bytes] = []
+    
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+    
+    def flush(self) -> None:
+        pass
+    
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class DataExporter:
+    """Потоковый экспорт графиков платежей и кэш-флоу"""
+    
+    SUPPORTED_FORMATS = ('csv', 'xlsx')
+    
+    MEDIA_TYPES = {
+        'csv': 'text/csv; charset=utf-8',
+        'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        'json': 'application/json',
+        'gzip': 'application/gzip'
+    }
+    
+    SCHEDULE_COLUMNS = [
+        'ID договора',
+        'Дата',
+        'Остаток долга на начало',
+        'Выборка',
+        'Погашение основного долга',
+        'Проценты',
+        'Остаток долга на конец',
+        'Эффективная ставка',
+        'Дней в периоде'
+    ]
+    
+    CASHFLOW_COLUMNS = [
+        'Дата',
+        'Выборки',
+        'Погашения основного долга',
+        'Процентные платежи',
+        'Чистый денежный поток',
+        'Остаток долга',
+        'Доступный лимит'
+    ]
+    
+    # Точка отсчета дат Excel (с учетом ошибки 1900 года)
+    _EXCEL_EPOCH = date(1899, 12, 30)
+    
+    def __init__(self, chunk_rows: int = 1000):
+        """
+        Инициализация экспортера
+        
+        Args:
+            chunk_rows: Количество строк, накапливаемых перед отправкой порции клиенту
+        """
+        self.chunk_rows = chunk_rows
+    
+    def validate_format(self, export_format: str) -> str:
+        """
+        Проверка формата выгрузки
+        
+        Args:
+            export_format: Формат (csv/xlsx)
+            
+        Returns:
+            Нормализованный формат
+            
+        Raises:
+            ValueError: Неподдерживаемый формат
+        """
+        normalized = export_format.lower()
+        if normalized not in self.SUPPORTED_FORMATS:
+            raise ValueError(
+                f"Unsupported export format: {export_format}. "
+                f"Supported formats: {', '.join(self.SUPPORTED_FORMATS)}"
+            )
+        return normalized
+    
+    def get_media_type(self, export_format: str, compress: bool = False) -> str:
+        """Получить MIME-тип выгрузки"""
+        if compress:
+            return self.MEDIA_TYPES['gzip']
+        return self.MEDIA_TYPES[export_format]
+    
+    def get_filename(self, base_name: str, export_format: str, compress: bool = False) -> str:
+        """Получить имя файла выгрузки"""
+        filename = f"{base_name}.{export_format}"
+        return f"{filename}.gz" if compress else filename
+    
+    def iter_schedule_rows(self, schedules: Iterable[PaymentSchedule]) -> Iterator[List[Any]]:
+        """
+        Построчный обход графиков платежей
+        
+        Args:
+            schedules: Графики платежей (может быть ленивым генератором)
+            
+        Yields:
+            Строка выгрузки в порядке SCHEDULE_COLUMNS
+        """
+        for schedule in schedules:
+            for item in schedule.schedule_items:
+                yield [
+                    schedule.contract_id,
+                    item.payment_date,
+                    item.debt_balance_start,
+                    item.drawdown_amount,
+                    item.principal_payment,
+                    item.interest_payment,
+                    item.debt_balance_end,
+                    item.effective_rate,
+                    item.days_in_period
+                ]
+    
+    def iter_cashflow_rows(self, cashflow: PortfolioCashflow) -> Iterator[List[Any]]:
+        """
+        Построчный обход консолидированного кэш-флоу
+        
+        Args:
+            cashflow: Кэш-флоу портфеля
+            
+        Yields:
+            Строка выгрузки в порядке CASHFLOW_COLUMNS
+        """
+        for item in cashflow.cashflow_items:
+            yield [
+                item.cashflow_date,
+                item.total_drawdowns,
+                item.total_principal_payments,
+                item.total_interest_payments,
+                item.net_cashflow,
+                item.total_debt_balance,
+                item.total_available_limit
+            ]
+    
+    def stream(self,
+               export_format: str,
+               columns: List[str],
+               rows: Iterable[List[Any]],
+               sheet_name: str = 'Данные',
+               compress: bool = False) -> Iterator[bytes]:
+        """
+        Потоковая выгрузка строк в заданном формате
+        
+        Строки читаются лениво и отдаются порциями по chunk_rows, поэтому
+        потребление памяти не зависит от объема выгрузки, а первая порция
+        (заголовок) уходит клиенту сразу.
+        
+        Args:
+            export_format: Формат (csv/xlsx)
+            columns: Заголовки столбцов
+            rows: Строки данных
+            sheet_name: Наименование листа (для xlsx)
+            compress: Сжатие выгрузки gzip
+            
+        Returns:
+            Генератор порций байтов
+        """
+        export_format = self.validate_format(export_format)
+        
+        if export_format == 'csv':
+            chunks = self._stream_csv(columns, rows)
+        else:
+            chunks = self._stream_xlsx(columns, rows, sheet_name)
+        
+        return self._gzip(chunks) if compress else chunks
+    
+    def _stream_csv(self, columns: List[str], rows: Iterable[List[Any]]) -> Iterator[bytes]:
+        """Потоковая генерация CSV (разделитель ';', UTF-8 с BOM для Excel)"""
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, delimiter=';', lineterminator='\r\n')
+        
+        writer.writerow(columns)
+        yield ('\ufeff' + buffer.getvalue()).encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate(0)
+        
+        rows_in_buffer = 0
+        for row in rows:
+            writer.writerow([self._format_csv_value(value) for value in row])
+            rows_in_buffer += 1
+            
+            if rows_in_buffer >= self.chunk_rows:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate(0)
+                rows_in_buffer = 0
+        
+        if rows_in_buffer:
+            yield buffer.getvalue().encode('utf-8')
+    
+    def _stream_xlsx(self,
+                     columns: List[str],
+                     rows: Iterable[List[Any]],
+                     sheet_name: str) -> Iterator[bytes]:
+        """
+        Потоковая генерация XLSX
+        
+        Книга пишется в режиме write-only: служебные части уходят клиенту
+        сразу, лист формируется построчно прямо в zip-поток (без таблицы общих
+        строк), а готовые байты отдаются по мере сжатия.
+        """
+        sink = _ChunkSink()
+        
+        with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as archive:
+            for part_name, content in self._xlsx_static_parts(sheet_name):
+                archive.writestr(part_name, content)
+            yield sink.drain()
+            
+            with archive.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                    b'<sheetData>'
+                )
+                sheet.write(self._xlsx_row(1, columns))
+                
+                buffer: List[bytes] = []
+                for row_number, row in enumerate(rows, start=2):
+                    buffer.append(self._xlsx_row(row_number, row))
+                    
+                    if len(buffer) >= self.chunk_rows:
+                        sheet.write(b''.join(buffer))
+                        buffer.clear()
+                        
+                        data = sink.drain()
+                        if data:
+                            yield data
+                
+                if buffer:
+                    sheet.write(b''.join(buffer))
+                sheet.write(b'</sheetData></worksheet>')
+        
+        yield sink.drain()
+    
+    def _xlsx_static_parts(self, sheet_name: str) -> List[Tuple[str, str]]:
+        """Служебные части книги XLSX"""
+        return [
+            (
+                '[Content_Types].xml',
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                '<Default Extension="xml" ContentType="application/xml"/>'
+                '<Override PartName="/xl/workbook.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                '<Override PartName="/xl/worksheets/sheet1.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                '<Override PartName="/xl/styles.xml" '
+                'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+                '</Types>'
+            ),
+            (
+                '_rels/.rels',
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+                'Target="xl/workbook.xml"/>'
+                '</Relationships>'
+            ),
+            (
+                'xl/workbook.xml',
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+                'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+                f'<sheets><sheet name="{escape(sheet_name[:31])}" sheetId="1" r:id="rId1"/></sheets>'
+                '</workbook>'
+            ),
+            (
+                'xl/_rels/workbook.xml.rels',
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                '<Relationship Id="rId1" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+                'Target="worksheets/sheet1.xml"/>'
+                '<Relationship Id="rId2" '
+                'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+                'Target="styles.xml"/>'
+                '</Relationships>'
+            ),
+            (
+                'xl/styles.xml',
+                # Стиль 0 - общий, стиль 1 - дата (встроенный формат 14)
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+                '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+                '<borders count="1"><border/></borders>'
+                '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+                '<cellXfs count="2">'
+                '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+                '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+                '</cellXfs>'
+                '</styleSheet>'
+            )
+        ]
+    
+    def _xlsx_row(self, row_number: int, values: List[Any]) -> bytes:
+        """Сериализация строки листа XLSX"""
+        cells = []
+        for value in values:
+            if value is None:
+                cells.append('<c/>')
+            elif isinstance(value, bool):
+                cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+            elif isinstance(value, (int, float, Decimal)):
+                cells.append(f'<c><v>{value}</v></c>')
+            elif isinstance(value, date) and not isinstance(value, datetime):
+                serial = (value - self._EXCEL_EPOCH).days
+                cells.append(f'<c s="1"><v>{serial}</v></c>')
+            else:
+                text = value.isoformat() if isinstance(value, datetime) else str(value)
+                cells.append(f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>')
+        
+        return f'<row r="{row_number}">{"".join(cells)}</row>'.encode('utf-8')
+    
+    def _format_csv_value(self, value: Any) -> Any:
+        """Форматирование значения для CSV"""
+        if value is None:
+            return ''
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+        return value
+    
+    def _gzip(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        """Потоковое сжатие gzip"""
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        
+        yield compressor.flush()
@@ -0,0 +1,221 @@
+"""
+Построитель отчетов для фоновой очереди
+"""
+
+from datetime import date, datetime
+from decimal import Decimal
+from typing import List, Dict, Any, Optional, Iterable, Tuple
+import json
+import logging
+
+import sys
+from pathlib import Path
+
+# Добавляем корневую директорию в путь
+sys.path.append(str(Path(__file__).parent.parent))
+
+from api import TreasuryAPIClient
+from models import CalculationVersion
+from portfolio import PortfolioManager
+from versions import VersionManager
+from visualization import DashboardCreator
+from .data_exporter import DataExporter
+
+logger = logging.getLogger(__name__)
+
+
+class ReportBuilder:
+    """Построитель отчетов"""
+    
+    # Табличные отчеты выгружаются в csv/xlsx, остальные - в json
+    TABULAR_REPORTS = ('cashflow', 'schedules')
+    JSON_REPORTS = ('portfolio', 'executive')
+    
+    def __init__(self,
+                 portfolio_manager: PortfolioManager,
+                 version_manager: VersionManager,
+                 data_exporter: DataExporter):
+        """
+        Инициализация построителя
+        
+        Args:
+            portfolio_manager: Менеджер портфеля
+            version_manager: Менеджер версий
+            data_exporter: Экспортер табличных данных
+        """
+        self.portfolio_manager = portfolio_manager
+        self.version_manager = version_manager
+        self.data_exporter = data_exporter
+        self.dashboard_creator = DashboardCreator()
+    
+    @property
+    def supported_types(self) -> List[str]:
+        """Поддерживаемые типы отчетов"""
+        return list(self.JSON_REPORTS + self.TABULAR_REPORTS)
+    
+    def validate_request(self, report_type: str, parameters: Dict[str, Any]) -> None:
+        """
+        Проверка запроса до постановки в очередь
+        
+        Args:
+            report_type: Тип отчета
+            parameters: Параметры отчета
+            
+        Raises:
+            ValueError: Неизвестный тип отчета или некорректные параметры
+        """
+        if report_type not in self.supported_types:
+            raise ValueError(
+                f"Unknown report type: {report_type}. "
+                f"Supported types: {', '.join(self.supported_types)}"
+            )
+        
+        if report_type in self.TABULAR_REPORTS:
+            if not parameters.get('version_id'):
+                raise ValueError(f"version_id is required for {report_type} report")
+            self.data_exporter.validate_format(parameters.get('format', 'csv'))
+        
+        version_id = parameters.get('version_id')
+        if version_id and not self.version_manager.get_version(version_id):
+            raise ValueError(f"Version {version_id} not found")
+    
+    def build_context(self, report_type: str, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Данные основного процесса для формирования отчета в процессе пула
+        
+        Версии расчета и их сохраненные кэш-флоу хранятся в памяти основного
+        процесса, поэтому передаются обработчику вместе с заданием.
+        
+        Args:
+            report_type: Тип отчета
+            parameters: Параметры отчета
+            
+        Returns:
+            Контекст отчета: версия расчета и (для отчета cashflow) ее кэш-флоу
+        """
+        version = self._get_version(parameters)
+        context: Dict[str, Any] = {'version': version}
+        if version and report_type == 'cashflow':
+            context['cashflow'] = self.version_manager.get_version_cashflow(version.id)
+        return context
+    
+    def render(self,
+               report_type: str,
+               parameters: Dict[str, Any],
+               context: Optional[Dict[str, Any]] = None) -> Tuple[str, Iterable[bytes]]:
+        """
+        Формирование отчета (выполняется в процессе пула)
+        
+        Args:
+            report_type: Тип отчета
+            parameters: Параметры отчета
+            context: Контекст из build_context (по умолчанию версия ищется в своем менеджере версий)
+            
+        Returns:
+            Кортеж (формат файла, порции байтов)
+        """
+        logger.info(f"Rendering report {report_type}")
+        
+        if context is None:
+            context = self.build_context(report_type, parameters)
+        version = context.get('version')
+        
+        if report_type == 'portfolio':
+            payload = self.portfolio_manager.get_portfolio_report(
+                version, self._get_report_date(parameters)
+            )
+            return 'json', [self._to_json(payload)]
+        
+        if report_type == 'executive':
+            portfolio_data = self.portfolio_manager.load_portfolio_data()
+            key_metrics = {}
+            if version:
+                cashflow = self.portfolio_manager.calculate_portfolio_cashflow(version)
+                contracts = self.portfolio_manager._contracts_cache or []
+                key_metrics = self.portfolio_manager.calculation_engine.calculate_portfolio_metrics(
+                    cashflow, contracts
+                )
+            payload = self.dashboard_creator.create_executive_dashboard(portfolio_data, key_metrics)
+            return 'json', [self._to_json(payload)]
+        
+        export_format = self.data_exporter.validate_format(parameters.get('format', 'csv'))
+        
+        if report_type == 'cashflow':
+            cashflow = context.get('cashflow')
+            if cashflow is None:
+                cashflow = self.portfolio_manager.calculate_portfolio_cashflow(version)
+            rows = self.data_exporter.iter_cashflow_rows(cashflow)
+            columns = self.data_exporter.CASHFLOW_COLUMNS
+        elif report_type == 'schedules':
+            rows = self.data_exporter.iter_schedule_rows(
+                self.portfolio_manager.iter_payment_schedules(version)
+            )
+            columns = self.data_exporter.SCHEDULE_COLUMNS
+        else:
+            raise ValueError(f"Unknown report type: {report_type}")
+        
+        return export_format, self.data_exporter.stream(export_format, columns, rows)
+    
+    def _get_version(self, parameters: Dict[str, Any]) -> Optional[CalculationVersion]:
+        """Получение версии расчета из параметров отчета"""
+        version_id = parameters.get('version_id')
+        if not version_id:
+            return None
+        
+        version = self.version_manager.get_version(version_id)
+        if not version:
+            raise ValueError(f"Version {version_id} not found")
+        return version
+    
+    def _get_report_date(self, parameters: Dict[str, Any]) -> Optional[date]:
+        """Получение даты отчета из параметров"""
+        report_date = parameters.get('report_date')
+        return date.fromisoformat(report_date) if report_date else None
+    
+    def _to_json(self, payload: Dict[str, Any]) -> bytes:
+        """Сериализация отчета в JSON"""
+        def default(value: Any) -> Any:
+            if isinstance(value, Decimal):
+                return float(value)
+            if isinstance(value, (date, datetime)):
+                return value.isoformat()
+            return str(value)
+        
+        return json.dumps(payload, ensure_ascii=False, default=default).encode('utf-8')
+
+
+class ProcessReportRenderer:
+    """
+    Функция формирования отчетов для пула процессов ReportQueue
+    
+    Объект передается в каждый процесс пула; при первом вызове процесс
+    создает собственный ReportBuilder со своими клиентом API, менеджером
+    портфеля и менеджером версий. Кэши менеджеров не разделяются между
+    обработчиками и основным процессом.
+    """
+    
+    def __init__(self, api_base_url: str, api_key: str):
+        """
+        Инициализация функции формирования
+        
+        Args:
+            api_base_url: URL казначейской системы
+            api_key: Ключ API
+        """
+        self.api_base_url = api_base_url
+        self.api_key = api_key
+        self._builder: Optional[ReportBuilder] = None
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """В процесс пула передаются только настройки, построитель создается на месте"""
+        return {'api_base_url': self.api_base_url, 'api_key': self.api_key, '_builder': None}
+    
+    def __call__(self,
+                 report_type: str,
+                 parameters: Dict[str, Any],
+                 context: Optional[Dict[str, Any]] = None) -> Tuple[str, Iterable[bytes]]:
+        """Формирование отчета построителем текущего процесса"""
+        if self._builder is None:
+            portfolio_manager = PortfolioManager(TreasuryAPIClient(base_url=self.api_base_url, api_key=self.api_key))
+            self._builder = ReportBuilder(portfolio_manager, VersionManager(portfolio_manager), DataExporter())
+        return self._builder.render(report_type, parameters, context)
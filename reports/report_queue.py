@@ -0,0 +1,442 @@
+"""
+Очередь фоновой генерации отчетов
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, Any, Optional, Callable, Iterable, Iterator, Tuple
+from enum import Enum
+from pydantic import BaseModel, Field
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import threading
+import uuid
+import logging
+
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Функция отрисовки отчета: (тип, параметры, контекст) -> (расширение файла, порции байтов).
+# Выполняется в процессах пула, поэтому должна сериализоваться pickle
+ReportRenderer = Callable[[str, Dict[str, Any], Optional[Dict[str, Any]]], Tuple[str, Iterable[bytes]]]
+
+# Функция отрисовки в процессе пула (задается инициализатором процесса)
+_process_renderer: Optional[ReportRenderer] = None
+
+
+def _init_render_process(renderer: ReportRenderer) -> None:
+    """Инициализация процесса пула: функция отрисовки передается один раз на процесс"""
+    global _process_renderer
+    _process_renderer = renderer
+
+
+def _render_artifact(job_id: str,
+                     report_type: str,
+                     parameters: Dict[str, Any],
+                     context: Optional[Dict[str, Any]],
+                     storage_dir: str) -> Dict[str, Any]:
+    """
+    Формирование отчета в процессе пула и запись на диск
+    
+    Returns:
+        Путь, формат и размер файла, время начала формирования
+    """
+    started_at = datetime.now()
+    tmp_path = Path(storage_dir) / f"{job_id}.part"
+    
+    try:
+        artifact_format, chunks = _process_renderer(report_type, parameters, context)
+        
+        size = 0
+        with open(tmp_path, 'wb') as artifact:
+            for chunk in chunks:
+                artifact.write(chunk)
+                size += len(chunk)
+        
+        artifact_path = Path(storage_dir) / f"{job_id}.{artifact_format}"
+        os.replace(tmp_path, artifact_path)
+    
+    except Exception:
+        if tmp_path.exists():
+            tmp_path.unlink()
+        raise
+    
+    return {
+        'artifact_path': str(artifact_path),
+        'artifact_format': artifact_format,
+        'artifact_size': size,
+        'started_at': started_at
+    }
+
+
+class ReportStatus(str, Enum):
+    """Статусы задания на формирование отчета"""
+    QUEUED = "queued"  # В очереди
+    RUNNING = "running"  # Формируется
+    COMPLETED = "completed"  # Готов
+    FAILED = "failed"  # Ошибка формирования
+    EXPIRED = "expired"  # Срок хранения истек
+
+
+class ReportJob(BaseModel):
+    """Задание на формирование отчета"""
+    
+    id: str = Field(..., description="Идентификатор отчета")
+    report_type: str = Field(..., description="Тип отчета")
+    parameters: Dict[str, Any] = Field(default_factory=dict, description="Параметры отчета")
+    fingerprint: str = Field(..., description="Ключ дедупликации (тип + параметры)")
+    
+    status: ReportStatus = Field(default=ReportStatus.QUEUED, description="Статус задания")
+    error: Optional[str] = Field(None, description="Текст ошибки")
+    
+    artifact_path: Optional[str] = Field(None, description="Путь к готовому файлу")
+    artifact_format: Optional[str] = Field(None, description="Формат готового файла")
+    artifact_size: Optional[int] = Field(None, description="Размер готового файла в байтах")
+    
+    created_at: datetime = Field(default_factory=datetime.now, description="Дата постановки в очередь")
+    started_at: Optional[datetime] = Field(None, description="Начало формирования")
+    completed_at: Optional[datetime] = Field(None, description="Окончание формирования")
+    expires_at: Optional[datetime] = Field(None, description="Окончание срока хранения")
+    
+    class Config:
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+    
+    def is_in_flight(self) -> bool:
+        """Проверка, находится ли задание в работе"""
+        return self.status in (ReportStatus.QUEUED, ReportStatus.RUNNING)
+    
+    def is_ready(self) -> bool:
+        """Проверка готовности отчета"""
+        return self.status == ReportStatus.COMPLETED
+
+
+class ReportQueue:
+    """
+    Очередь отчетов с пулом процессов-обработчиков
+    
+    Отчеты формируются в отдельных процессах (spawn): тяжелая отрисовка не
+    конкурирует за GIL с обработкой запросов, а у каждого процесса свои
+    экземпляры менеджеров с собственными кэшами. Данные, известные только
+    основному процессу (например, версии расчета), передаются в контексте
+    задания.
+    """
+    
+    def __init__(self,
+                 renderer: ReportRenderer,
+                 storage_dir: str,
+                 max_workers: int = 2,
+                 ttl_minutes: int = 60,
+                 retention_minutes: int = 24 * 60):
+        """
+        Инициализация очереди
+        
+        Args:
+            renderer: Функция формирования отчета (сериализуемая pickle)
+            storage_dir: Каталог для хранения готовых отчетов (общий для процессов API;
+                каждая очередь пишет в свой подкаталог process_<pid>_<id очереди>)
+            max_workers: Количество процессов-обработчиков
+            ttl_minutes: Время хранения готовых отчетов в минутах
+            retention_minutes: Время хранения в реестре заданий с истекшим сроком
+                и завершившихся ошибкой (после него задание удаляется из реестра)
+        """
+        self.renderer = renderer
+        self.storage_root = Path(storage_dir)
+        self.storage_dir = self.storage_root / f"process_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        
+        self._remove_stale_artifacts()
+        self.storage_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.ttl = timedelta(minutes=ttl_minutes)
+        self.retention = timedelta(minutes=retention_minutes)
+        
+        self._jobs: Dict[str, ReportJob] = {}
+        self._in_flight: Dict[str, str] = {}  # fingerprint -> id задания
+        self._futures: Dict[str, Future] = {}  # id задания -> задача пула
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._housekeeper: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+    
+    def start(self) -> None:
+        """Запуск пула процессов-обработчиков"""
+        if self._executor is not None:
+            return
+        
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_render_process,
+            initargs=(self.renderer,)
+        )
+        
+        # Периодическая очистка просроченных отчетов
+        self._stopped.clear()
+        self._housekeeper = threading.Thread(target=self._housekeeping_loop, name="report-housekeeper", daemon=True)
+        self._housekeeper.start()
+        
+        logger.info(f"Report queue started with {self.max_workers} worker processes")
+    
+    def stop(self) -> None:
+        """Остановка пула: задания из очереди отменяются, формируемые - дожидаются завершения"""
+        if self._executor is None:
+            return
+        
+        self._stopped.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        self._executor = None
+        if self._housekeeper is not None:
+            self._housekeeper.join(timeout=5)
+            self._housekeeper = None
+        
+        logger.info("Report queue stopped")
+    
+    def submit(self,
+               report_type: str,
+               parameters: Dict[str, Any],
+               context: Optional[Dict[str, Any]] = None) -> ReportJob:
+        """
+        Постановка отчета в очередь
+        
+        Если идентичный отчет (тот же тип и параметры) уже в очереди или
+        формируется, новое задание не создается - возвращается существующее.
+        
+        Args:
+            report_type: Тип отчета
+            parameters: Параметры отчета
+            context: Данные основного процесса для отрисовки (не входят в ключ дедупликации)
+            
+        Returns:
+            Задание на формирование отчета
+        """
+        if self._executor is None:
+            raise RuntimeError("Report queue is not started")
+        
+        self.cleanup_expired()
+        
+        fingerprint = self._make_fingerprint(report_type, parameters)
+        
+        with self._lock:
+            existing_id = self._in_flight.get(fingerprint)
+            if existing_id:
+                logger.info(f"Report request deduplicated: {existing_id}")
+                return self._jobs[existing_id]
+            
+            job = ReportJob(
+                id=f"report_{uuid.uuid4().hex}",
+                report_type=report_type,
+                parameters=parameters,
+                fingerprint=fingerprint
+            )
+            self._jobs[job.id] = job
+            self._in_flight[fingerprint] = job.id
+            
+            future = self._executor.submit(
+                _render_artifact, job.id, report_type, parameters, context, str(self.storage_dir)
+            )
+            self._futures[job.id] = future
+        
+        future.add_done_callback(lambda completed: self._complete(job.id, completed))
+        logger.info(f"Report queued: {job.id} ({report_type})")
+        return job
+    
+    def get_job(self, job_id: str) -> Optional[ReportJob]:
+        """
+        Получение задания по ID
+        
+        Args:
+            job_id: ID задания
+            
+        Returns:
+            Задание или None
+        """
+        job = self._jobs.get(job_id)
+        if job and job.is_ready() and self._is_expired(job):
+            self._expire(job)
+        if job:
+            self._refresh_status(job)
+        return job
+    
+    def iter_artifact(self, job: ReportJob, chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+        """
+        Потоковое чтение готового отчета с диска
+        
+        Args:
+            job: Готовое задание
+            chunk_size: Размер порции в байтах
+            
+        Yields:
+            Порции файла отчета
+        """
+        with open(job.artifact_path, 'rb') as artifact:
+            while True:
+                chunk = artifact.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def cleanup_expired(self) -> int:
+        """
+        Удаление отчетов с истекшим сроком хранения
+        
+        Файлы готовых отчетов с истекшим сроком удаляются, задание остается в
+        реестре со статусом EXPIRED. Задания EXPIRED и FAILED удаляются из
+        реестра по истечении срока retention_minutes.
+        
+        Returns:
+            Количество удаленных отчетов
+        """
+        now = datetime.now()
+        with self._lock:
+            expired_jobs = [
+                job for job in self._jobs.values()
+                if job.is_ready() and self._is_expired(job)
+            ]
+            purged_ids = [
+                job.id for job in self._jobs.values()
+                if job.status in (ReportStatus.EXPIRED, ReportStatus.FAILED)
+                and self._finished_at(job) + self.retention <= now
+            ]
+            for job_id in purged_ids:
+                del self._jobs[job_id]
+        
+        for job in expired_jobs:
+            self._expire(job)
+        
+        if expired_jobs:
+            logger.info(f"Expired reports removed: {len(expired_jobs)}")
+        if purged_ids:
+            logger.info(f"Expired and failed report jobs purged: {len(purged_ids)}")
+        return len(expired_jobs)
+    
+    def get_statistics(self) -> Dict[str, Any]:
+        """
+        Получение статистики очереди
+        
+        Returns:
+            Количество заданий по статусам и длина очереди
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        
+        by_status: Dict[str, int] = {}
+        for job in jobs:
+            self._refresh_status(job)
+            by_status[job.status.value] = by_status.get(job.status.value, 0) + 1
+        
+        return {
+            'workers': self.max_workers if self._executor is not None else 0,
+            'queue_size': by_status.get(ReportStatus.QUEUED.value, 0),
+            'jobs_by_status': by_status
+        }
+    
+    def _housekeeping_loop(self) -> None:
+        """Периодическая очистка просроченных отчетов"""
+        while not self._stopped.wait(60):
+            self.cleanup_expired()
+    
+    def _refresh_status(self, job: ReportJob) -> None:
+        """Перевод задания в статус RUNNING, когда пул взял его в работу"""
+        future = self._futures.get(job.id)
+        if job.status == ReportStatus.QUEUED and future is not None and future.running():
+            job.status = ReportStatus.RUNNING
+    
+    def _complete(self, job_id: str, future: Future) -> None:
+        """Учет результата формирования отчета (вызывается по завершении задачи пула)"""
+        with self._lock:
+            self._futures.pop(job_id, None)
+            job = self._jobs.get(job_id)
+            if job is None:
+                return
+            if self._in_flight.get(job.fingerprint) == job.id:
+                del self._in_flight[job.fingerprint]
+        
+        job.completed_at = datetime.now()
+        
+        if future.cancelled():
+            job.status = ReportStatus.FAILED
+            job.error = "Report queue stopped"
+            return
+        
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.error(f"Error generating report {job.id}: {e}")
+            job.status = ReportStatus.FAILED
+            job.error = str(e)
+            return
+        
+        job.artifact_path = result['artifact_path']
+        job.artifact_format = result['artifact_format']
+        job.artifact_size = result['artifact_size']
+        job.started_at = result['started_at']
+        job.expires_at = job.completed_at + self.ttl
+        job.status = ReportStatus.COMPLETED
+        
+        logger.info(f"Report generated: {job.id} ({job.artifact_size} bytes)")
+    
+    def _is_expired(self, job: ReportJob) -> bool:
+        """Проверка истечения срока хранения"""
+        return job.expires_at is not None and job.expires_at <= datetime.now()
+    
+    def _finished_at(self, job: ReportJob) -> datetime:
+        """Момент перехода задания в конечный статус (истечение срока или ошибка)"""
+        if job.status == ReportStatus.EXPIRED and job.expires_at is not None:
+            return job.expires_at
+        return job.completed_at or job.created_at
+    
+    def _expire(self, job: ReportJob) -> None:
+        """Удаление файла отчета с истекшим сроком хранения"""
+        if job.artifact_path and os.path.exists(job.artifact_path):
+            try:
+                os.remove(job.artifact_path)
+            except OSError as e:
+                logger.error(f"Failed to remove report artifact {job.artifact_path}: {e}")
+        job.artifact_path = None
+        job.status = ReportStatus.EXPIRED
+    
+    def _remove_stale_artifacts(self) -> None:
+        """
+        Удаление файлов, оставшихся от завершившихся процессов
+        
+        Реестр заданий хранится в памяти процесса, поэтому файлы процесса,
+        который уже не работает, недоступны и удаляются. Каталоги работающих
+        процессов API (и других очередей этого процесса) не трогаются.
+        """
+        for path in self.storage_root.glob('process_*'):
+            try:
+                pid = int(path.name.split('_')[1])
+            except (IndexError, ValueError):
+                continue
+            if self._is_process_alive(pid):
+                continue
+            try:
+                shutil.rmtree(path)
+            except OSError as e:
+                logger.error(f"Failed to remove stale report artifacts {path}: {e}")
+    
+    def _is_process_alive(self, pid: int) -> bool:
+        """Проверка, работает ли процесс (вне POSIX процесс считается работающим)"""
+        if os.name != 'posix':
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    
+    def _make_fingerprint(self, report_type: str, parameters: Dict[str, Any]) -> str:
+        """Ключ дедупликации: хэш типа отчета и канонизированных параметров"""
+        canonical = json.dumps(
+            {'report_type': report_type, 'parameters': parameters},
+            sort_keys=True,
+            default=str
+        )
+        return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
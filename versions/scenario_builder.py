@@ -13,7 +13,10 @@ from pathlib import Path
 # Добавляем корневую директорию в путь
 sys.path.append(str(Path(__file__).parent.parent))
 
-from models import CalculationVersion, CreditContract, Drawdown, Repayment
+from models import (
+    CalculationVersion, CreditContract, Drawdown, Repayment,
+    KeyRateCurve, KeyRatePoint, CurveInterpolation
+)
 from portfolio import PortfolioManager
 
 logger = logging.getLogger(__name__)
@@ -76,6 +79,58 @@ class ScenarioBuilder:
             logger.error(f"Error creating rate scenario: {e}")
             raise
     
+    def create_rate_path_scenario(self,
+                                  base_version_id: str,
+                                  scenario_name: str,
+                                  scenario_description: str,
+                                  created_by: str,
+                                  rate_points: List[Tuple[date, Decimal]],
+                                  interpolation: str = 'step',
+                                  initial_rate: Optional[Decimal] = None) -> CalculationVersion:
+        """
+        Создание сценария траектории ключевой ставки
+        
+        Args:
+            base_version_id: ID базовой версии
+            scenario_name: Наименование сценария
+            scenario_description: Описание сценария
+            created_by: Автор сценария
+            rate_points: Узлы траектории (дата, ставка)
+            interpolation: Способ построения ставки между узлами (step, linear)
+            initial_rate: Ставка до первого узла
+            
+        Returns:
+            Созданная сценарная версия
+        """
+        try:
+            curve = KeyRateCurve(
+                points=[KeyRatePoint(effective_date=point_date, rate=rate) for point_date, rate in rate_points],
+                interpolation=CurveInterpolation(interpolation),
+                initial_rate=initial_rate
+            )
+            
+            scenario_parameters = {
+                'scenario_type': 'rate_path',
+                'base_rate_curve': curve.to_parameters(),
+                'description': f"Траектория базовой ставки из {len(rate_points)} узлов"
+            }
+            
+            version = self.portfolio_manager.create_calculation_version(
+                name=scenario_name,
+                description=scenario_description,
+                created_by=created_by,
+                version_type='scenario',
+                base_version_id=base_version_id,
+                scenario_parameters=scenario_parameters
+            )
+            
+            logger.info(f"Rate path scenario created: {version.id}")
+            return version
+            
+        except Exception as e:
+            logger.error(f"Error creating rate path scenario: {e}")
+            raise
+    
     def create_drawdown_scenario(self, 
                                base_version_id: str,
                                scenario_name: str,
@@ -211,6 +266,10 @@ class ScenarioBuilder:
         """
         Создание сценария оптимизации
         
+        Целевые остатки рассчитываются по target_utilization и
+        max_concentration, переход к ним сохраняется в сценарии как
+        дополнительные выборки и погашения на effective_date.
+        
         Args:
             base_version_id: ID базовой версии
             scenario_name: Наименование сценария
@@ -222,9 +281,26 @@ class ScenarioBuilder:
             Созданная сценарная версия
         """
         try:
+            is_valid, errors = self.validate_scenario_parameters('optimization', optimization_parameters)
+            if not is_valid:
+                raise ValueError(f"Invalid optimization parameters: {'; '.join(errors)}")
+            
+            result = self.portfolio_manager.optimize_allocation(
+                float(optimization_parameters['target_utilization']),
+                float(optimization_parameters.get('max_concentration', 1.0))
+            )
+            effective_date = optimization_parameters.get('effective_date')
+            if isinstance(effective_date, str):
+                effective_date = date.fromisoformat(effective_date)
+            
+            summary = result.to_dict()
+            summary.pop('reallocations')
+            
             scenario_parameters = {
                 'scenario_type': 'optimization',
                 'optimization_parameters': optimization_parameters,
+                'optimization_result': summary,
+                **self.portfolio_manager.get_reallocation_parameters(result, effective_date),
                 'description': f"Оптимизация: {optimization_parameters.get('description', '')}"
             }
             
@@ -354,6 +430,29 @@ class ScenarioBuilder:
                 elif parameters['new_base_rate'] < 0:
                     errors.append("new_base_rate must be non-negative")
             
+            elif scenario_type == 'rate_path':
+                if 'base_rate_curve' not in parameters:
+                    errors.append("base_rate_curve is required for rate_path scenario")
+                else:
+                    try:
+                        KeyRateCurve.from_parameters(parameters['base_rate_curve'])
+                    except (KeyError, TypeError, ValueError) as e:
+                        errors.append(f"Invalid base_rate_curve: {e}")
+            
+            elif scenario_type == 'optimization':
+                if 'target_utilization' not in parameters:
+                    errors.append("target_utilization is required for optimization scenario")
+                for name in ('target_utilization', 'max_concentration'):
+                    if name not in parameters:
+                        continue
+                    value = parameters[name]
+                    if not isinstance(value, (int, float, Decimal)):
+                        errors.append(f"{name} must be a number")
+                    elif name == 'target_utilization' and not 0 <= value <= 1:
+                        errors.append("target_utilization must be between 0 and 1")
+                    elif name == 'max_concentration' and not 0 < value <= 1:
+                        errors.append("max_concentration must be in (0, 1]")
+            
             elif scenario_type == 'additional_drawdowns':
                 if 'additional_drawdowns' not in parameters:
                     errors.append("additional_drawdowns is required")
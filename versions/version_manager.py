@@ -4,9 +4,14 @@
 
 from datetime import datetime, date
 from decimal import Decimal
+from collections import OrderedDict
 from typing import List, Dict, Any, Optional
 import logging
 import json
+import os
+import shutil
+import tempfile
+import uuid
 
 import sys
 from pathlib import Path
@@ -14,7 +19,8 @@ from pathlib import Path
 # Добавляем корневую директорию в путь
 sys.path.append(str(Path(__file__).parent.parent))
 
-from models import CalculationVersion, PortfolioCashflow
+from models import CalculationVersion, PortfolioCashflow, KeyRateCurve
+from calculations import CashflowDelta, ScenarioCube, NPVResult, XIRRResult, SubsidyResult
 from portfolio import PortfolioManager
 
 logger = logging.getLogger(__name__)
@@ -23,16 +29,40 @@ logger = logging.getLogger(__name__)
 class VersionManager:
     """Менеджер версий расчетов"""
     
-    def __init__(self, portfolio_manager: PortfolioManager):
+    def __init__(self,
+                 portfolio_manager: PortfolioManager,
+                 materialized_cache_size: int = 8,
+                 cube_dir: Optional[str] = None):
         """
         Инициализация менеджера версий
         
+        Кэш-флоу базовых версий хранится целиком, сценарных - в виде дельты
+        к базовой версии; полный кэш-флоу сценария собирается при чтении и
+        держится в небольшом LRU-кэше.
+        
         Args:
             portfolio_manager: Менеджер портфеля
+            materialized_cache_size: Количество материализованных сценариев в кэше
+            cube_dir: Каталог для файлов куба сценариев (по умолчанию - временный; общий для
+                процессов API, каждый менеджер пишет в свой подкаталог process_<pid>_<id>)
         """
         self.portfolio_manager = portfolio_manager
         self._versions: Dict[str, CalculationVersion] = {}
         self._cashflows: Dict[str, PortfolioCashflow] = {}
+        self._cashflow_snapshots: Dict[str, int] = {}  # Номер снимка данных, на котором рассчитан кэш-флоу
+        self._deltas: Dict[str, CashflowDelta] = {}
+        self._materialized: "OrderedDict[str, PortfolioCashflow]" = OrderedDict()
+        self.materialized_cache_size = materialized_cache_size
+        self._revision = 0  # Счетчик изменений набора версий
+        
+        # Куб результатов всех версий и (ID версий, номер снимка), на которых он построен
+        self.cube_root = Path(cube_dir) if cube_dir else Path(tempfile.gettempdir()) / "scenario_cubes"
+        self.cube_dir = self.cube_root / f"process_{os.getpid()}_{uuid.uuid4().hex[:8]}"
+        self._cube: Optional[ScenarioCube] = None
+        self._cube_key: Optional[tuple] = None
+        self._cube_builds = 0
+        
+        self._remove_stale_cubes()
     
     def create_base_version(self, 
                            name: str,
@@ -59,10 +89,12 @@ class VersionManager:
             
             # Сохранение версии
             self._versions[version.id] = version
+            self._revision += 1
             
             # Расчет кэш-флоу для базовой версии
             cashflow = self.portfolio_manager.calculate_portfolio_cashflow(version)
             self._cashflows[version.id] = cashflow
+            self._cashflow_snapshots[version.id] = self.portfolio_manager.get_snapshot_version()
             
             logger.info(f"Base version created: {version.id}")
             return version
@@ -107,10 +139,19 @@ class VersionManager:
             
             # Сохранение версии
             self._versions[version.id] = version
-            
-            # Расчет кэш-флоу для сценарной версии
-            cashflow = self.portfolio_manager.calculate_portfolio_cashflow(version)
-            self._cashflows[version.id] = cashflow
+            self._revision += 1
+            
+            # Кэш-флоу сценария хранится как дельта, если базовый кэш-флоу
+            # рассчитан на текущем снимке данных; иначе - целиком
+            base_version = self._versions[base_version_id]
+            snapshot = self.portfolio_manager.get_snapshot_version()
+            if self._cashflow_snapshots.get(base_version_id) == snapshot:
+                self._deltas[version.id] = self.portfolio_manager.calculate_scenario_delta(version, base_version)
+            else:
+                self._cashflows[version.id] = self.portfolio_manager.calculate_portfolio_cashflow(
+                    version, base_version=base_version
+                )
+            self._cashflow_snapshots[version.id] = snapshot
             
             logger.info(f"Scenario version created: {version.id} based on {base_version_id}")
             return version
@@ -119,6 +160,11 @@ class VersionManager:
             logger.error(f"Error creating scenario version: {e}")
             raise
     
+    @property
+    def revision(self) -> int:
+        """Номер ревизии набора версий (увеличивается при любом изменении)"""
+        return self._revision
+    
     def get_version(self, version_id: str) -> Optional[CalculationVersion]:
         """
         Получение версии по ID
@@ -175,7 +221,167 @@ class VersionManager:
         Returns:
             Кэш-флоу версии или None
         """
-        return self._cashflows.get(version_id)
+        cashflow = self._cashflows.get(version_id)
+        if cashflow is not None:
+            return cashflow
+        
+        delta = self._deltas.get(version_id)
+        if delta is None:
+            return None
+        
+        cashflow = self._materialized.get(version_id)
+        if cashflow is not None:
+            self._materialized.move_to_end(version_id)
+            return cashflow
+        
+        base_cashflow = self.get_version_cashflow(delta.base_version_id)
+        if base_cashflow is None:
+            return None
+        
+        cashflow = delta.materialize(base_cashflow)
+        self._materialized[version_id] = cashflow
+        while len(self._materialized) > self.materialized_cache_size:
+            self._materialized.popitem(last=False)
+        
+        return cashflow
+    
+    def get_scenario_cube(self) -> ScenarioCube:
+        """
+        Куб результатов всех версий (сценарии x даты x показатели x валюты)
+        
+        Куб хранится в файле и перестраивается при добавлении или удалении
+        версий и при изменении снимка данных портфеля.
+        
+        Returns:
+            Куб версий
+        """
+        snapshot = self.portfolio_manager.get_snapshot_version()
+        key = (tuple(self._versions), snapshot)
+        if self._cube is not None and self._cube_key == key:
+            return self._cube
+        
+        self._cube_builds += 1
+        versions = list(self._versions.values())
+        base_versions = {
+            version.id: self._versions[version.base_version_id]
+            for version in versions
+            if version.is_scenario_version() and version.base_version_id in self._versions
+        }
+        
+        cube = self.portfolio_manager.build_scenario_cube(
+            str(self.cube_dir / f"scenario_cube_{self._cube_builds}.npy"),
+            versions,
+            base_versions
+        )
+        
+        if self._cube is not None:
+            self._cube.remove()
+        self._cube, self._cube_key = cube, key
+        
+        return cube
+    
+    def close(self) -> None:
+        """Удаление файлов куба сценариев (при остановке приложения)"""
+        if self._cube is not None:
+            self._cube.remove()
+            self._cube, self._cube_key = None, None
+        shutil.rmtree(self.cube_dir, ignore_errors=True)
+    
+    def _remove_stale_cubes(self) -> None:
+        """
+        Удаление файлов куба, оставшихся от завершившихся процессов
+        
+        Каталоги работающих процессов API (и других менеджеров этого процесса)
+        не трогаются.
+        """
+        for path in self.cube_root.glob('process_*'):
+            try:
+                pid = int(path.name.split('_')[1])
+            except (IndexError, ValueError):
+                continue
+            if self._is_process_alive(pid):
+                continue
+            try:
+                shutil.rmtree(path)
+            except OSError as e:
+                logger.error(f"Failed to remove stale scenario cube files {path}: {e}")
+    
+    def _is_process_alive(self, pid: int) -> bool:
+        """Проверка, работает ли процесс (вне POSIX процесс считается работающим)"""
+        if os.name != 'posix':
+            return True
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return True
+    
+    def calculate_npv(self,
+                      version_ids: Optional[List[str]] = None,
+                      curve: Optional[KeyRateCurve] = None,
+                      valuation_date: Optional[date] = None) -> NPVResult:
+        """
+        NPV чистого потока договоров по версиям
+        
+        Args:
+            version_ids: ID версий (по умолчанию - все версии)
+            curve: Кривая ставки дисконтирования (по умолчанию - текущая базовая ставка)
+            valuation_date: Дата оценки
+            
+        Returns:
+            NPV по версиям и договорам
+        """
+        version_ids = list(self._versions) if version_ids is None else version_ids
+        unknown = [version_id for version_id in version_ids if version_id not in self._versions]
+        if unknown:
+            raise ValueError(f"Unknown versions: {', '.join(unknown)}")
+        
+        versions = [self._versions[version_id] for version_id in version_ids]
+        base_versions = {
+            version.id: self._versions[version.base_version_id]
+            for version in versions
+            if version.is_scenario_version() and version.base_version_id in self._versions
+        }
+        return self.portfolio_manager.calculate_npv(versions, base_versions, curve, valuation_date)
+    
+    def calculate_effective_rates(self, version_id: str) -> XIRRResult:
+        """
+        Эффективная ставка (XIRR) договоров версии
+        
+        Args:
+            version_id: ID версии
+            
+        Returns:
+            Ставки по договорам и диагностика сходимости
+        """
+        version = self._versions.get(version_id)
+        if version is None:
+            raise ValueError(f"Unknown version: {version_id}")
+        
+        base_version = self._versions.get(version.base_version_id) if version.is_scenario_version() else None
+        return self.portfolio_manager.calculate_effective_rates(version, base_version)
+    
+    def calculate_subsidies(self,
+                            version_id: str,
+                            program_curves: Optional[Dict[str, KeyRateCurve]] = None) -> SubsidyResult:
+        """
+        Субсидии и чистые проценты субсидируемых договоров версии
+        
+        Args:
+            version_id: ID версии
+            program_curves: Новые ставки субсидии по программам (None - условия договоров)
+            
+        Returns:
+            Помесячный результат по договорам
+        """
+        version = self._versions.get(version_id)
+        if version is None:
+            raise ValueError(f"Unknown version: {version_id}")
+        
+        base_version = self._versions.get(version.base_version_id) if version.is_scenario_version() else None
+        return self.portfolio_manager.calculate_subsidies(version, base_version, program_curves)
     
     def compare_versions(self, 
                          version1_id: str, 
@@ -230,8 +436,11 @@ class VersionManager:
             
             # Удаление версии и кэш-флоу
             del self._versions[version_id]
-            if version_id in self._cashflows:
-                del self._cashflows[version_id]
+            self._cashflows.pop(version_id, None)
+            self._cashflow_snapshots.pop(version_id, None)
+            self._deltas.pop(version_id, None)
+            self._materialized.pop(version_id, None)
+            self._revision += 1
             
             logger.info(f"Version deleted: {version_id}")
             return True
@@ -260,6 +469,7 @@ class VersionManager:
             
             # Установка активности
             self._versions[version_id].status = 'active'
+            self._revision += 1
             
             logger.info(f"Active version set: {version_id}")
             return True
@@ -333,6 +543,7 @@ class VersionManager:
             
             # Сохранение версии
             self._versions[version.id] = version
+            self._revision += 1
             
             # Импорт кэш-флоу если есть
             if 'cashflow' in version_data and version_data['cashflow']:
@@ -383,6 +594,10 @@ class VersionManager:
                 'active_versions': len(active_versions),
                 'authors': authors,
                 'creation_timeline': creation_dates,
+                'full_cashflows': len(self._cashflows),
+                'delta_cashflows': len(self._deltas),
+                'materialized_cashflows': len(self._materialized),
+                'scenario_cube_shape': list(self._cube.data.shape) if self._cube is not None else None,
                 'latest_version': max(all_versions, key=lambda v: v.created_at).id if all_versions else None
             }
             